@@ -0,0 +1,204 @@
+"""
+Memory and CPU of get_insights' in-memory aggregations, per 100k reviews.
+
+Builds the get_insights package (as init_profile does) for the working tree
+or a git revision and, in a fresh interpreter, feeds it seeded reviews
+shaped like DynamoDB returns them (numbers as Decimal, every attribute
+present) in 1,000-item pages. Reports:
+
+  * retained memory of the loaded reviews (tracemalloc), per 100k,
+  * load time: turning pages into whatever the aggregations read
+    (ReviewRecords where the revision has them, the raw dicts before),
+  * time of each aggregation over the loaded reviews (best of --repeat).
+
+    python backend/benchmarks/aggregation_profile.py
+    python backend/benchmarks/aggregation_profile.py --reviews 200000 --baseline HEAD~1
+
+With --baseline both revisions are profiled and printed side by side. Only
+revisions whose aggregators take a time window can be compared.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+import lambda_package  # noqa: E402
+
+PAGE_SIZE = 1_000
+
+PROBE = r"""
+import gc, json, sys, time, tracemalloc
+from datetime import datetime
+from decimal import Decimal
+
+seed_dir, count, repeat, brand_count, product_count = sys.argv[1], *map(int, sys.argv[2:6])
+sys.path.insert(0, seed_dir)
+import handler
+import link_counters
+import seed_load
+
+records = getattr(handler, "review_records", None)
+load = records.from_items if records else list
+
+start = datetime(2025, 1, 1)
+brands = seed_load.build_brands(brand_count, start)
+products = seed_load.build_products(product_count, brands, 42, start)
+cum_weights = seed_load.zipf_cum_weights(len(products), 1.1)
+
+
+def as_dynamodb(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    if isinstance(value, list):
+        return [as_dynamodb(v) for v in value]
+    if isinstance(value, dict):
+        return {k: as_dynamodb(v) for k, v in value.items()}
+    return value
+
+
+def pages():
+    page = []
+    for review in seed_load.generate_shard(0, 1, count, products, cum_weights, 42, start, 90):
+        page.append(as_dynamodb(review))
+        if len(page) == %(page_size)d:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+gc.collect()
+tracemalloc.start()
+loaded = []
+for page in pages():
+    loaded.extend(load(page))
+retained = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+del loaded
+gc.collect()
+
+raw_pages = list(pages())
+load_ms = float("inf")
+for _ in range(repeat):
+    started = time.perf_counter()
+    reviews = []
+    for page in raw_pages:
+        reviews.extend(load(page))
+    load_ms = min(load_ms, (time.perf_counter() - started) * 1000)
+del raw_pages
+
+window = handler._time_window({"from": "2025-01-01", "to": "2025-04-01", "granularity": "day"})
+link_stats = {link_counters.brand_key(b["brandId"]): link_counters.format_stats(None) for b in brands}
+brand_products = [p for p in products if p["brandId"] == brands[0]["brandId"]]
+# since the recent-activity buffers, the recent lists take the reviews already picked
+if hasattr(handler, "_recent_node"):
+    recent = lambda n: handler._newest(reviews, n)
+else:
+    recent = lambda n: reviews
+aggregations = {
+    "avg_rating": lambda: handler._avg_rating(reviews),
+    "sentiment_distribution": lambda: handler._sentiment_distribution(reviews),
+    "sentiment_trend (day)": lambda: handler._sentiment_trend(reviews, window),
+    "top_topics": lambda: handler._top_topics(reviews, 5),
+    "recent_reviews": lambda: handler._recent_reviews(recent(10)),
+    "product_summaries": lambda: handler._product_summaries(reviews, brand_products),
+    "brand_summaries": lambda: handler._brand_summaries(brands, reviews, products, link_stats, window),
+    "overview_recent_activity": lambda: handler._overview_recent_activity(brands, recent(20)),
+}
+timings = {}
+for name, fn in aggregations.items():
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    timings[name] = round(best, 2)
+
+print(json.dumps({"reviews": len(reviews), "retained_bytes": retained,
+                  "load_ms": round(load_ms, 2), "aggregations_ms": timings}))
+""" % {"page_size": PAGE_SIZE}
+
+
+def profile(ref: str | None, reviews: int, repeat: int, brands: int, products: int) -> dict:
+    with lambda_package.backend_tree(ref) as backend_dir, \
+            tempfile.TemporaryDirectory(prefix="aggregation-") as pkg:
+        lambda_package.build_package(backend_dir, "get_insights", pkg)
+        env = {
+            **os.environ,
+            "AWS_ACCESS_KEY_ID": "profile",
+            "AWS_SECRET_ACCESS_KEY": "profile",
+            "AWS_DEFAULT_REGION": environment.REGION,
+            "AWS_REGION_NAME": environment.REGION,
+            "AWS_XRAY_SDK_ENABLED": "false",
+            # no DynamoDB here: the recent lists must not read review details back
+            "INSIGHTS_ANALYTICS_READS": "false",
+            "INSIGHTS_RECENT_BUFFERS": "false",
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE, environment.TERRAFORM_DIR,
+             str(reviews), str(repeat), str(brands), str(products)],
+            cwd=pkg, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{ref or 'working tree'}: probe failed\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _rows(result: dict) -> dict:
+    per_100k = 100_000 / result["reviews"]
+    rows = {
+        "retained MB / 100k reviews": result["retained_bytes"] * per_100k / 2**20,
+        "load ms / 100k": result["load_ms"] * per_100k,
+    }
+    for name, ms in result["aggregations_ms"].items():
+        rows[f"{name} ms / 100k"] = ms * per_100k
+    rows["aggregations total ms / 100k"] = sum(result["aggregations_ms"].values()) * per_100k
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and CPU of the dashboard aggregations")
+    parser.add_argument("--reviews", type=int, default=100_000)
+    parser.add_argument("--brands", type=int, default=20)
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ref", help="profile this git revision instead of the working tree")
+    parser.add_argument("--baseline", help="also profile this git revision, for comparison")
+    parser.add_argument("--json", help="also write the raw results here")
+    args = parser.parse_args()
+
+    results = {}
+    if args.baseline:
+        results[args.baseline] = profile(args.baseline, args.reviews, args.repeat, args.brands, args.products)
+    results[args.ref or "working-tree"] = profile(args.ref, args.reviews, args.repeat,
+                                                  args.brands, args.products)
+
+    columns = {label: _rows(result) for label, result in results.items()}
+    labels = list(columns)
+    print(f"\n{args.reviews:,} reviews, {args.brands} brands, {args.products:,} products\n")
+    header = f"{'':<36}" + "".join(f"{label:>16}" for label in labels)
+    if len(labels) == 2:
+        header += f"{'ratio':>9}"
+    print(header)
+    for metric in columns[labels[-1]]:
+        values = [columns[label].get(metric) for label in labels]
+        line = f"{metric:<36}" + "".join(f"{v:>16.1f}" if v is not None else f"{'-':>16}" for v in values)
+        if len(values) == 2 and values[0] and values[1]:
+            line += f"{values[0] / values[1]:>8.1f}x"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+DynamoDB read units billed by item size, for the moto-backed benchmarks.
+
+moto reports a fixed ConsumedCapacity per call, whatever it read, so
+ddb_metrics' read units would say nothing about how wide the items are.
+install() adds two hooks to a boto3 session, ahead of ddb_metrics' own:
+
+  * before-call keeps each read's parameters, as serialized,
+  * after-call replays the read on a separate client with no projection,
+    no filter and the same page bounds (Limit, ExclusiveStartKey, Segment),
+    sizes what DynamoDB would have read and rewrites ConsumedCapacity.
+
+Sizes follow DynamoDB's rules: attribute names plus values (strings in
+UTF-8 bytes, numbers about one byte per two significant digits plus one,
+3 bytes per list or map plus 1 per element). A Query or Scan is billed
+for the items it reads, filter or no filter, as one total rounded up to
+4 KB; GetItem and BatchGetItem per item, rounded up to 4 KB each. A read
+unit is 4 KB strongly consistent, or 8 KB eventually consistent. An index
+is billed for its projected attributes, the table for whole items. Writes
+keep moto's figures.
+"""
+import json
+import math
+import re
+
+READ_UNIT_BYTES = 4096
+_TOKEN = re.compile(r"[#:][A-Za-z0-9_]+")
+_PAGE_PARAMS = ("TableName", "IndexName", "KeyConditionExpression", "Limit", "ExclusiveStartKey",
+                "ScanIndexForward", "Segment", "TotalSegments", "ConsistentRead")
+
+
+def value_size(value: dict) -> int:
+    """Bytes of one typed attribute value."""
+    (kind, data), = value.items()
+    if kind == "S":
+        return len(data.encode("utf-8"))
+    if kind == "N":
+        digits = data.lstrip("-").replace(".", "").strip("0") or "0"
+        return (len(digits) + 1) // 2 + 1
+    if kind == "B":
+        return len(data)
+    if kind in ("BOOL", "NULL"):
+        return 1
+    if kind in ("SS", "NS", "BS"):
+        return sum(value_size({kind[0]: element}) for element in data)
+    if kind == "L":
+        return 3 + sum(1 + value_size(element) for element in data)
+    if kind == "M":
+        return 3 + sum(1 + item_size_of(name, element) for name, element in data.items())
+    return 0
+
+
+def item_size_of(name: str, value: dict) -> int:
+    return len(name.encode("utf-8")) + value_size(value)
+
+
+def item_size(item: dict) -> int:
+    return sum(item_size_of(name, value) for name, value in item.items())
+
+
+def _units(size: int, consistent: bool) -> float:
+    return max(1, math.ceil(size / READ_UNIT_BYTES)) * (1.0 if consistent else 0.5)
+
+
+class _Billing:
+    def __init__(self, session):
+        # replays go through their own session: no ddb_metrics, no call counter
+        import boto3
+        self.client = boto3.session.Session(region_name=session.region_name).client("dynamodb")
+
+    def keep_params(self, params: dict, model, context: dict, **_kwargs) -> None:
+        if model.name in ("Query", "Scan", "GetItem", "BatchGetItem"):
+            context["bench_read_params"] = json.loads(params["body"])
+
+    def bill(self, parsed: dict, model, context: dict, **_kwargs) -> None:
+        params = context.get("bench_read_params")
+        if params is None or "ConsumedCapacity" not in parsed:
+            return
+        if model.name in ("Query", "Scan"):
+            parsed["ConsumedCapacity"] = self._bill_page(model.name, params)
+        elif model.name == "GetItem":
+            parsed["ConsumedCapacity"] = self._bill_items(params["TableName"], [params["Key"]],
+                                                          params.get("ConsistentRead", False))
+        else:
+            parsed["ConsumedCapacity"] = [
+                self._bill_items(table, request["Keys"], request.get("ConsistentRead", False))
+                for table, request in params["RequestItems"].items()
+            ]
+
+    def _bill_page(self, operation: str, params: dict) -> dict:
+        replay = {k: params[k] for k in _PAGE_PARAMS if k in params}
+        replay["Select"] = "ALL_PROJECTED_ATTRIBUTES" if "IndexName" in params else "ALL_ATTRIBUTES"
+        used = set(_TOKEN.findall(params.get("KeyConditionExpression", "")))
+        names = {k: v for k, v in params.get("ExpressionAttributeNames", {}).items() if k in used}
+        values = {k: v for k, v in params.get("ExpressionAttributeValues", {}).items() if k in used}
+        if names:
+            replay["ExpressionAttributeNames"] = names
+        if values:
+            replay["ExpressionAttributeValues"] = values
+        resp = getattr(self.client, operation.lower())(**replay)
+        size = sum(item_size(item) for item in resp.get("Items", []))
+        return {"TableName": params["TableName"],
+                "CapacityUnits": _units(size, params.get("ConsistentRead", False))}
+
+    def _bill_items(self, table: str, keys: list, consistent: bool) -> dict:
+        units = 0.0
+        for key in keys:
+            item = self.client.get_item(TableName=table, Key=key).get("Item")
+            units += _units(item_size(item) if item else 0, consistent)
+        return {"TableName": table, "CapacityUnits": units}
+
+
+def install(session) -> None:
+    """Bill the reads of every client later built from ``session`` (a boto3 Session) by size."""
+    billing = _Billing(session)
+    session.events.register_first("before-call.dynamodb", billing.keep_params,
+                                  unique_id="bench-capacity-params")
+    session.events.register_first("after-call.dynamodb", billing.bill,
+                                  unique_id="bench-capacity-bill")
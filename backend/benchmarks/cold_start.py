@@ -0,0 +1,176 @@
+"""
+Cold-start benchmark: Init Duration of each handler in the AWS Lambda
+Runtime Interface Emulator, before vs after.
+
+Every sample starts a fresh container from the Lambda Python base image
+(which ships the RIE), mounts the function package at /var/task, sends one
+invocation and reads the emulator's REPORT line:
+
+    REPORT RequestId: ...  Init Duration: 412.31 ms  Duration: 3.05 ms ...
+
+    python backend/benchmarks/cold_start.py --before HEAD~1
+    python backend/benchmarks/cold_start.py --functions get_insights --samples 20 --xray-patch botocore
+
+"after" is always the working tree; --before packages any git revision with
+the same layout. The event is the cheapest request each function serves (an
+OPTIONS preflight for the API handlers, an empty batch for the others), so
+the number is dominated by init work that every request pays for. No AWS
+calls are made; credentials are dummies. Requires Docker.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+import lambda_package  # noqa: E402
+
+IMAGE = "public.ecr.aws/lambda/python:3.11"
+INVOKE_PATH = "/2015-03-31/functions/function/invocations"
+REPORT_RE = re.compile(r"Init Duration: ([\d.]+) ms\s+Duration: ([\d.]+) ms")
+
+EVENTS = {
+    "submit_review": {"httpMethod": "OPTIONS", "path": "/review"},
+    "get_insights": {"httpMethod": "OPTIONS", "path": "/insights"},
+    "auth_otp": {"httpMethod": "OPTIONS", "path": "/auth/login"},
+    "ai_processor": {"Records": []},
+    "link_stats_reconciler": {"Records": []},
+    "review_import": {"Records": []},
+    "analytics_projector": {"Records": []},
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _invoke(port: int, event: dict, timeout_s: float = 30.0) -> float:
+    """POST the event, retrying until the emulator listens; returns client-side ms."""
+    body = json.dumps(event).encode()
+    deadline = time.monotonic() + timeout_s
+    while True:
+        request = urllib.request.Request(f"http://127.0.0.1:{port}{INVOKE_PATH}", data=body, method="POST")
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout_s) as resp:
+                resp.read()
+            return (time.perf_counter() - started) * 1000
+        except (urllib.error.URLError, ConnectionError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def cold_sample(package_dir: str, function: str, xray_patch: str) -> dict:
+    port = _free_port()
+    env = {
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_REGION": environment.REGION,
+        "AWS_REGION_NAME": environment.REGION,
+        "AWS_XRAY_CONTEXT_MISSING": "IGNORE_ERROR",
+        "XRAY_PATCH_MODULES": xray_patch,
+        "ENVIRONMENT": "bench",
+    }
+    cmd = ["docker", "run", "-d", "--rm", "-p", f"127.0.0.1:{port}:8080",
+           "-v", f"{package_dir}:/var/task:ro"]
+    for key, value in env.items():
+        cmd += ["-e", f"{key}={value}"]
+    cmd += [IMAGE, "handler.lambda_handler"]
+    container = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        client_ms = _invoke(port, EVENTS[function])
+        logs = ""
+        for _ in range(50):
+            logs = subprocess.run(["docker", "logs", container], capture_output=True, text=True).stdout
+            if "REPORT RequestId" in logs:
+                break
+            time.sleep(0.1)
+        match = REPORT_RE.search(logs)
+        if not match:
+            raise RuntimeError(f"{function}: no REPORT line with Init Duration\n{logs[-2000:]}")
+        return {"init_ms": float(match.group(1)), "duration_ms": float(match.group(2)),
+                "client_ms": round(client_ms, 2)}
+    finally:
+        subprocess.run(["docker", "rm", "-f", container], capture_output=True)
+
+
+def _stats(values: list) -> dict:
+    ordered = sorted(values)
+    return {
+        "median": round(statistics.median(ordered), 2),
+        "p90": round(ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))], 2),
+        "min": round(ordered[0], 2),
+    }
+
+
+def measure(label: str, ref: str | None, functions: list, deps_dir: str, args) -> dict:
+    results = {}
+    with lambda_package.backend_tree(ref) as backend_dir, tempfile.TemporaryDirectory() as root:
+        for function in functions:
+            package_dir = lambda_package.build_package(
+                backend_dir, function, os.path.join(root, function), deps_dir)
+            samples = []
+            for i in range(args.samples):
+                samples.append(cold_sample(package_dir, function, args.xray_patch))
+                print(f"[{label}] {function} {i + 1}/{args.samples}: "
+                      f"init {samples[-1]['init_ms']:.1f} ms", file=sys.stderr)
+            results[function] = {
+                "init_ms": _stats([s["init_ms"] for s in samples]),
+                "duration_ms": _stats([s["duration_ms"] for s in samples]),
+                "client_ms": _stats([s["client_ms"] for s in samples]),
+                "samples": samples,
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lambda cold-start Init Duration, before vs after")
+    parser.add_argument("--before", help="git revision to compare the working tree against")
+    parser.add_argument("--functions", default=",".join(lambda_package.FUNCTIONS))
+    parser.add_argument("--samples", type=int, default=10, help="cold starts per function")
+    parser.add_argument("--xray-patch", default="", help="XRAY_PATCH_MODULES inside the container")
+    parser.add_argument("--deps-dir", default=os.path.join(tempfile.gettempdir(), "reviewplus-lambda-deps"),
+                        help="cache for the pip-installed runtime deps")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    functions = [f.strip() for f in args.functions.split(",") if f.strip()]
+    deps_dir = lambda_package.install_deps(args.deps_dir)
+    subprocess.run(["docker", "pull", "-q", IMAGE], check=True, stdout=subprocess.DEVNULL)
+
+    runs = {}
+    if args.before:
+        runs["before"] = measure("before", args.before, functions, deps_dir, args)
+    runs["after"] = measure("after", None, functions, deps_dir, args)
+
+    print(f"\n{'function':<24} {'before init p50':>16} {'after init p50':>16} {'delta':>9}")
+    print("-" * 68)
+    for function in functions:
+        after = runs["after"][function]["init_ms"]["median"]
+        if "before" in runs:
+            before = runs["before"][function]["init_ms"]["median"]
+            print(f"{function:<24} {before:>13.1f} ms {after:>13.1f} ms {after - before:>+7.1f}ms")
+        else:
+            print(f"{function:<24} {'-':>16} {after:>13.1f} ms")
+
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump({"before_ref": args.before, "xray_patch": args.xray_patch,
+                       "samples": args.samples, "runs": runs}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare two run.py result files and flag regressions.
+
+    python backend/benchmarks/compare.py baseline.json candidate.json --threshold 10
+
+A scenario regresses when its p95 latency or its DynamoDB read units per
+request grow by more than --threshold percent, or when it makes more AWS
+calls per request than before. Exits 1 if anything regressed, so it can
+gate CI. The read-unit column shows the candidate's units per request and
+how many times fewer that is than the baseline's.
+"""
+import argparse
+import json
+import sys
+
+
+def _index(report: dict) -> dict:
+    return {
+        (r["scale"], r["function"], r["scenario"]): r
+        for run in report["runs"]
+        for r in run["results"]
+    }
+
+
+def _pct(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 growth, percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.candidate) as fh:
+        candidate = json.load(fh)
+    before, after = _index(baseline), _index(candidate)
+
+    print(f"baseline  {baseline['meta']['git_revision']}  {baseline['meta']['created_at']}")
+    print(f"candidate {candidate['meta']['git_revision']}  {candidate['meta']['created_at']}\n")
+    print(f"{'scale':<8} {'scenario':<52} {'p50':>16} {'p95':>16} {'p99':>16} {'calls':>11} "
+          f"{'read units':>16}")
+    print("-" * 141)
+
+    regressions = []
+    for key in sorted(before.keys() & after.keys()):
+        b, a = before[key], after[key]
+        cells = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            cells.append(f"{a[metric]:>8.1f} {_pct(b[metric], a[metric]):>+6.0f}%")
+        calls_delta = a["total_calls_per_request"] - b["total_calls_per_request"]
+        units_before = b.get("ddb_read_units_per_request", 0)
+        units_after = a.get("ddb_read_units_per_request", 0)
+        fewer = f"{units_before / units_after:>5.1f}x" if units_after else f"{'-':>6}"
+        flag = ""
+        if _pct(b["p95_ms"], a["p95_ms"]) > args.threshold:
+            flag = "  <-- p95"
+        if calls_delta > 0:
+            flag += "  <-- calls"
+        if _pct(units_before, units_after) > args.threshold:
+            flag += "  <-- read units"
+        if flag:
+            regressions.append(key)
+        label = f"{key[1]}: {key[2]}"
+        print(f"{key[0]:<8} {label:<52} {'  '.join(cells)} {a['total_calls_per_request']:>5} "
+              f"{calls_delta:>+5.1f} {units_after:>9.1f} {fewer}{flag}")
+
+    missing = sorted(before.keys() - after.keys())
+    for key in missing:
+        print(f"{key[0]:<8} {key[1]}: {key[2]}  (not in candidate)")
+
+    print()
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0f}% p95 or read units, or in call count")
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Near-duplicate detection on synthetic reviews: Bedrock calls saved, and
+how right the reuse is.
+
+Generates reviews per product from a pool of clauses with random details
+(so two organic reviews rarely share more than a phrase) and mixes in,
+at --duplicate-rate, copies of an earlier review of the same product:
+
+  * exact          the same text,
+  * reformatted    other case, punctuation and spacing,
+  * edited         one word changed, added or dropped,
+  * templated      spam with only its discount code swapped,
+  * reworded       the same clauses, a third of them replaced (not a
+                   duplicate; it should be analysed on its own),
+
+each with the original's rating, and some with another rating. Replays
+them in order through near_duplicates as ai_processor does, with the
+band buckets in memory: a review that finds a match reuses its analysis,
+any other is "sent to Bedrock" and filed. Reports the Bedrock calls
+avoided, precision and recall against the exact shingle Jaccard
+similarity of every earlier review of the product (a true duplicate is
+one at THRESHOLD or above, with the same rating), detection per kind,
+and per-review time in each stage.
+
+    python backend/benchmarks/dedupe_profile.py
+    python backend/benchmarks/dedupe_profile.py --reviews 50000 --duplicate-rate 0.3
+
+Times are the CPU side only: the lookup is one BatchGetItem and filing
+one UpdateItem per band on top.
+"""
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+
+KINDS = ("exact", "reformatted", "edited", "templated", "reworded")
+_CLAUSES = (
+    "the {part} {verb} after {n} {unit}",
+    "arrived {speed} and the packaging was {state}",
+    "I bought this for my {person} and {pronoun} {feeling} it",
+    "the {part} feels {quality} for the price",
+    "customer support {support} when I asked about the {part}",
+    "I use it every {period} for {activity}",
+    "compared to my old {brand} it is {comparison}",
+    "setup took {n} {unit} and the instructions were {state}",
+    "the colour is {colour} and matches the photos {match}",
+    "would {recommend} to anyone who needs it for {activity}",
+)
+_FILL = {
+    "part": "battery strap screen charger button lid zipper handle motor cable case hinge".split(),
+    "verb": "stopped working cracked loosened overheated faded broke squeaks rattles".split(),
+    "n": [str(n) for n in range(2, 60)],
+    "unit": "days weeks months minutes hours uses".split(),
+    "speed": "quickly late early on time slowly overnight".split(),
+    "state": "damaged fine excellent torn clear confusing missing perfect".split(),
+    "person": "son daughter wife husband mother father friend boss neighbour".split(),
+    "pronoun": "they she he".split(),
+    "feeling": "loves hates likes tolerates adores returned".split(),
+    "quality": "cheap sturdy flimsy premium solid fragile decent".split(),
+    "support": "never answered replied fast was rude was helpful sent a replacement".split(),
+    "period": "day morning weekend evening week".split(),
+    "activity": "hiking cooking work travel school gaming running cleaning".split(),
+    "brand": "Acme Globex Initech Umbrella Stark Wayne Hooli Vandelay".split(),
+    "comparison": "better worse about the same lighter heavier louder quieter".split(),
+    "colour": "red navy black grey teal white olive".split(),
+    "match": "exactly roughly poorly well".split(),
+    "recommend": "recommend not recommend maybe recommend happily recommend".split(),
+}
+_SPAM = ("Amazing product from {name}!!! Best purchase ever, five stars, use code {code} "
+         "for 20% off your next order at our store.")
+
+
+def _clause(rng: random.Random, template: str) -> str:
+    return template.format(**{k: rng.choice(v) for k, v in _FILL.items()})
+
+
+def _organic(rng: random.Random) -> list:
+    """An original review, as clauses."""
+    return [_clause(rng, t) for t in rng.sample(_CLAUSES, rng.randint(2, 5))]
+
+
+def _text(clauses: list) -> str:
+    return ". ".join(c[0].upper() + c[1:] for c in clauses) + "."
+
+
+def _variant(rng: random.Random, kind: str, clauses: list) -> list:
+    """A copy of ``clauses`` made ``kind``-wise (as clauses)."""
+    if kind == "exact":
+        return list(clauses)
+    if kind == "reformatted":
+        return [c.upper() if rng.random() < 0.5 else c.replace(" ", "  ") + "!!" for c in clauses]
+    if kind == "edited":
+        at = rng.randrange(len(clauses))
+        words = clauses[at].split()
+        i = rng.randrange(len(words))
+        action = rng.choice(("swap", "add", "drop"))
+        if action == "swap":
+            words[i] = rng.choice(_FILL["quality"])
+        elif action == "add":
+            words.insert(i, "really")
+        elif len(words) > 1:
+            del words[i]
+        return clauses[:at] + [" ".join(words)] + clauses[at + 1:]
+    if kind == "reworded":
+        out = list(clauses)
+        for at in rng.sample(range(len(out)), max(1, len(out) // 3)):
+            out[at] = _clause(rng, rng.choice(_CLAUSES))
+        return out
+    raise ValueError(kind)
+
+
+def _code(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_uppercase + string.digits, k=6))
+
+
+def _spam(rng: random.Random) -> str:
+    return _SPAM.format(name=rng.choice(_FILL["brand"]) + rng.choice(("", " Co", " Store")), code=_code(rng))
+
+
+def _generate(count: int, products: int, rate: float, other_rating: float, seed: int):
+    """(product, text, rating, kind) in arrival order; kind is None for an original.
+
+    Templated copies follow an earlier spam review of the product (the first
+    one is an original).
+    """
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(products)]
+    seen: dict[int, list] = {}
+    for _ in range(count):
+        product = rng.choices(range(products), weights=weights)[0]
+        earlier = seen.setdefault(product, [])
+        kind = rng.choice(KINDS) if earlier and rng.random() < rate else None
+        spam = [e for e in earlier if len(e[0]) == 1] if kind == "templated" else earlier
+        if kind and spam:
+            clauses, rating = rng.choice(spam)
+            if kind == "templated":
+                text = re.sub(r"code \w+", f"code {_code(rng)}", clauses[0])
+            else:
+                text = _text(_variant(rng, kind, clauses))
+            if rng.random() < other_rating:
+                rating = rng.choice([r for r in range(1, 6) if r != rating])
+            yield product, text, rating, kind
+            continue
+        clauses, rating = _organic(rng), rng.randint(1, 5)
+        if kind == "templated" or rng.random() < 0.02:
+            # the first spam review of the product, for templated copies to follow
+            clauses, rating = [_spam(rng)], 5
+        earlier.append((clauses, rating))
+        yield product, _text(clauses) if len(clauses) > 1 else clauses[0], rating, None
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--reviews", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2, help="share of reviews copied")
+    parser.add_argument("--other-rating", type=float, default=0.1,
+                        help="share of copies given another rating")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    environment.configure_process()
+    import near_duplicates
+
+    buckets: dict[tuple, list] = {}
+    analysed: dict[int, list] = {}          # product -> [(shingles, rating)] sent to Bedrock
+    stage = Counter()
+    kinds = Counter()
+    caught = Counter()
+    true_pos = false_pos = false_neg = calls = 0
+    for n, (product, text, rating, kind) in enumerate(
+            _generate(args.reviews, args.products, args.duplicate_rate, args.other_rating, args.seed)):
+        started = time.perf_counter()
+        sig = near_duplicates.signature(text)
+        stage["signature"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        keys = near_duplicates.band_keys(sig)
+        entries = [entry for key in keys for entry in buckets.get((product, key), [])]
+        match = near_duplicates.best(entries, sig, rating)
+        stage["lookup"] += time.perf_counter() - started
+
+        shingles = near_duplicates.shingles(text)
+        truth = any(r == rating and _jaccard(shingles, s) >= near_duplicates.THRESHOLD
+                    for s, r in analysed.get(product, []))
+        kinds[kind or "original"] += 1
+        if match:
+            caught[kind or "original"] += 1
+            true_pos += truth
+            false_pos += not truth
+            continue
+        false_neg += truth
+        calls += 1
+
+        started = time.perf_counter()
+        entry = {"FeedbackId": f"fb-{n}", "rating": rating, "sig": sig.tobytes()}
+        for key in keys:
+            bucket = buckets.setdefault((product, key), [])
+            if len(bucket) < near_duplicates.BUCKET_CAPACITY:
+                bucket.append(entry)
+        stage["file"] += time.perf_counter() - started
+        analysed.setdefault(product, []).append((shingles, rating))
+
+    reused = args.reviews - calls
+    print(f"{args.reviews:,} reviews over {args.products} products, {sum(kinds.values()) - kinds['original']:,} copies "
+          f"(signature {near_duplicates.SIGNATURE_SIZE}, bands {near_duplicates.BANDS}x{near_duplicates.ROWS}, "
+          f"threshold {near_duplicates.THRESHOLD})")
+    print(f"Bedrock calls: {calls:,} ({reused:,} avoided, {reused / args.reviews:.1%})")
+    print(f"precision {true_pos / max(1, true_pos + false_pos):.3f}  recall {true_pos / max(1, true_pos + false_neg):.3f}"
+          f"  (against exact shingle Jaccard >= {near_duplicates.THRESHOLD}, same rating)")
+    print(f"\n{'kind':<14}{'reviews':>9}{'reused':>9}")
+    for kind in ("original", *KINDS):
+        print(f"{kind:<14}{kinds[kind]:>9,}{caught[kind] / max(1, kinds[kind]):>9.1%}")
+    print(f"\n{'stage':<14}{'us/review':>10}")
+    for name in ("signature", "lookup", "file"):
+        per = args.reviews if name != "file" else max(1, calls)
+        print(f"{name:<14}{stage[name] / per * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
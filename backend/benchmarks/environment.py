@@ -0,0 +1,312 @@
+"""
+Local stand-in AWS environment for the handler benchmarks.
+
+Starts moto (DynamoDB, SES, Cognito, SQS), creates the tables the way
+terraform/modules/dynamodb defines them, registers a Cognito pool with an
+admin and a superadmin, and seeds a synthetic dataset with the same
+generator as terraform/seed_load.py (Zipf products, diurnal timestamps).
+There are no streams: every review written to the feedback table also gets
+its review-analytics item, its recent-activity entries, its search-index
+postings and its topic and aspect counts written directly, as the
+projector would.
+
+Import order matters: configure_process() must run before any handler or
+shared module is imported, because they read env vars and build boto3
+clients at import time.
+"""
+import importlib.util
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+FUNCTIONS_DIR = os.path.join(BACKEND_DIR, "functions")
+SHARED_DIR = os.path.join(BACKEND_DIR, "shared")
+TERRAFORM_DIR = os.path.join(REPO_DIR, "terraform")
+
+REGION = "ca-central-1"
+PREFIX = "reviewpulse"
+PASSWORD = "Bench@12345!"
+ADMIN_EMAIL = "admin@bench.reviewplus.test"
+SUPERADMIN_EMAIL = "superadmin@bench.reviewplus.test"
+SES_FROM_EMAIL = "noreply@bench.reviewplus.test"
+
+# name -> (hash key, range key)
+TABLES = {
+    f"{PREFIX}-feedback": ("FeedbackId", None),
+    f"{PREFIX}-brands": ("brandId", None),
+    f"{PREFIX}-products": ("productId", "brandId"),
+    f"{PREFIX}-users": ("userId", None),
+    f"{PREFIX}-review-links": ("linkToken", None),
+    f"{PREFIX}-link-stats": ("statsKey", None),
+    f"{PREFIX}-dashboards": ("docKey", None),
+    f"{PREFIX}-review-analytics": ("brandId", "sk"),
+    f"{PREFIX}-recent-activity": ("scopeKey", None),
+    f"{PREFIX}-topic-sketches": ("scopeKey", None),
+    f"{PREFIX}-aspect-matrix": ("scopeKey", "month"),
+    f"{PREFIX}-search-index": ("termKey", "sk"),
+    f"{PREFIX}-near-duplicates": ("scopeKey", "band"),
+    f"{PREFIX}-ai-usage": ("brandId", "sk"),
+}
+
+# table -> [(index name, hash key, range key, projected non-key attributes
+# or None for all)], as in terraform/modules/dynamodb
+INDEXES = {
+    f"{PREFIX}-feedback": [
+        ("productId-timestamp-index", "productId", "timestamp",
+         ["brandId", "customerName", "name", "rating", "reviewText", "message",
+          "sentiment", "summary", "topics", "duplicate_of"]),
+        ("brandId-timestamp-index", "brandId", "timestamp",
+         ["productId", "customerName", "name", "rating", "reviewText", "message",
+          "sentiment", "summary", "topics"]),
+    ],
+    f"{PREFIX}-review-analytics": [
+        ("productId-sk-index", "productId", "sk", None),
+    ],
+}
+
+# reviews, brands, products
+SCALES = {
+    "1k": (1_000, 5, 50),
+    "10k": (10_000, 10, 200),
+    "100k": (100_000, 20, 1_000),
+    "1m": (1_000_000, 50, 5_000),
+    # one product holding every review (paginated listing at depth)
+    "100k-1p": (100_000, 1, 1),
+    "1m-1p": (1_000_000, 1, 1),
+    # many tenants (the overview's scatter-gather mode)
+    "10k-1000b": (10_000, 1_000, 2_000),
+}
+
+
+def configure_process() -> None:
+    """Env vars every handler reads at import, pointed at the stand-ins."""
+    os.environ.update({
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_SESSION_TOKEN": "bench",
+        "AWS_DEFAULT_REGION": REGION,
+        "AWS_REGION_NAME": REGION,
+        "ENVIRONMENT": "bench",
+        "SES_FROM_EMAIL": SES_FROM_EMAIL,
+        "AI_LOW_PRIORITY_QUEUE_URL": "",
+        # X-Ray: no daemon locally; subsegments become no-ops
+        "AWS_XRAY_SDK_ENABLED": "false",
+        "AWS_XRAY_CONTEXT_MISSING": "IGNORE_ERROR",
+    })
+    for path in (SHARED_DIR, TERRAFORM_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def start_mock():
+    from moto import mock_aws
+    mock = mock_aws()
+    mock.start()
+    return mock
+
+
+def load_handler(function_name: str):
+    """Import backend/functions/<name>/handler.py under a unique module name."""
+    path = os.path.join(FUNCTIONS_DIR, function_name, "handler.py")
+    spec = importlib.util.spec_from_file_location(f"bench_{function_name}_handler", path)
+    module = importlib.util.module_from_spec(spec)
+    # registered so process-pool workers can unpickle references to it
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# ---------------------------------------------------------------------------
+# Infrastructure
+# ---------------------------------------------------------------------------
+
+def create_tables(dynamodb) -> None:
+    for name, (hash_key, range_key) in TABLES.items():
+        keys = [(hash_key, "HASH")] + ([(range_key, "RANGE")] if range_key else [])
+        attributes = [a for a, _ in keys]
+        kwargs = {}
+        indexes = INDEXES.get(name, [])
+        if indexes:
+            kwargs["GlobalSecondaryIndexes"] = [{
+                "IndexName": index,
+                "KeySchema": [{"AttributeName": ih, "KeyType": "HASH"},
+                              {"AttributeName": ir, "KeyType": "RANGE"}],
+                "Projection": ({"ProjectionType": "ALL"} if projected is None
+                               else {"ProjectionType": "INCLUDE", "NonKeyAttributes": projected}),
+            } for index, ih, ir, projected in indexes]
+            attributes += [a for _, ih, ir, _ in indexes for a in (ih, ir) if a not in attributes]
+        dynamodb.create_table(
+            TableName=name,
+            KeySchema=[{"AttributeName": a, "KeyType": k} for a, k in keys],
+            AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in dict.fromkeys(attributes)],
+            BillingMode="PAY_PER_REQUEST",
+            **kwargs,
+        )
+
+
+def create_cognito(cognito, brand_id: str) -> dict:
+    pool_id = cognito.create_user_pool(
+        PoolName=f"{PREFIX}-bench",
+        Schema=[
+            {"Name": "role", "AttributeDataType": "String", "Mutable": True},
+            {"Name": "brandId", "AttributeDataType": "String", "Mutable": True},
+        ],
+    )["UserPool"]["Id"]
+    client_id = cognito.create_user_pool_client(
+        UserPoolId=pool_id,
+        ClientName=f"{PREFIX}-bench-client",
+        ExplicitAuthFlows=["ALLOW_USER_PASSWORD_AUTH", "ALLOW_REFRESH_TOKEN_AUTH"],
+    )["UserPoolClient"]["ClientId"]
+
+    tokens = {}
+    for email, role in ((ADMIN_EMAIL, "admin"), (SUPERADMIN_EMAIL, "superadmin")):
+        cognito.admin_create_user(
+            UserPoolId=pool_id,
+            Username=email,
+            UserAttributes=[
+                {"Name": "email", "Value": email},
+                {"Name": "custom:role", "Value": role},
+                {"Name": "custom:brandId", "Value": brand_id},
+            ],
+            MessageAction="SUPPRESS",
+        )
+        cognito.admin_set_user_password(UserPoolId=pool_id, Username=email, Password=PASSWORD, Permanent=True)
+        auth = cognito.initiate_auth(
+            ClientId=client_id,
+            AuthFlow="USER_PASSWORD_AUTH",
+            AuthParameters={"USERNAME": email, "PASSWORD": PASSWORD},
+        )
+        tokens[role] = auth["AuthenticationResult"]["AccessToken"]
+
+    os.environ["COGNITO_USER_POOL_ID"] = pool_id
+    os.environ["COGNITO_CLIENT_ID"] = client_id
+    return {"pool_id": pool_id, "client_id": client_id, "tokens": tokens}
+
+
+# ---------------------------------------------------------------------------
+# Dataset
+# ---------------------------------------------------------------------------
+
+class Dataset:
+    """The seeded catalogue plus helpers to mint fresh per-iteration records."""
+
+    def __init__(self, dynamodb, scale: str, seed: int = 42):
+        import seed_load
+        self._seed_load = seed_load
+        self.dynamodb = dynamodb
+        self.scale = scale
+        self.seed = seed
+        self.reviews, brand_count, product_count = SCALES[scale]
+        self.start = datetime(2025, 1, 1)
+        self.brands = seed_load.build_brands(brand_count, self.start)
+        self.products = seed_load.build_products(product_count, self.brands, seed, self.start)
+        self.cum_weights = seed_load.zipf_cum_weights(len(self.products), 1.1)
+        # Zipf rank 1: the busiest product, and its brand
+        self.hot_product = self.products[0]
+        self.hot_brand_id = self.hot_product["brandId"]
+        self._fresh = 0
+
+    def seed_tables(self, progress=print) -> float:
+        import aspect_matrix
+        import recent_activity
+        import review_analytics
+        import search_index
+        import topic_sketch
+        started = time.monotonic()
+        for table, items in ((f"{PREFIX}-brands", self.brands), (f"{PREFIX}-products", self.products)):
+            with self.dynamodb.Table(table).batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+        feedback = self.dynamodb.Table(f"{PREFIX}-feedback")
+        analytics = self.dynamodb.Table(f"{PREFIX}-review-analytics")
+        index = self.dynamodb.Table(f"{PREFIX}-search-index")
+        shard_size = 50_000
+        written = 0
+        backfill = recent_activity.Backfill()
+        topics: dict = {}
+        aspects: dict = {}
+        for shard, first_idx, count in self._seed_load.shard_specs(self.reviews, shard_size):
+            with feedback.batch_writer() as batch, analytics.batch_writer() as narrow, \
+                    index.batch_writer() as postings:
+                for review in self._seed_load.generate_shard(
+                    shard, first_idx, count, self.products, self.cum_weights, self.seed, self.start, 90,
+                ):
+                    batch.put_item(Item=review)
+                    narrow_item = review_analytics.item(review)
+                    narrow.put_item(Item=narrow_item)
+                    backfill.add(review)
+                    for posting in search_index.postings(review).values():
+                        postings.put_item(Item=posting)
+                    topic_sketch.merge(topics, topic_sketch.deltas(None, narrow_item))
+                    aspect_matrix.merge(aspects, aspect_matrix.deltas(None, narrow_item))
+            written += count
+            progress(f"  seeded {written:,} / {self.reviews:,} reviews")
+        backfill.write()
+        topic_sketch.apply_all(topics)
+        aspect_matrix.apply_all(aspects)
+        return time.monotonic() - started
+
+    def review_page_key(self, depth: int) -> dict | None:
+        """LastEvaluatedKey ``depth`` reviews into the hot product's newest-first listing."""
+        from boto3.dynamodb.conditions import Key
+        resp = self.dynamodb.Table(f"{PREFIX}-feedback").query(
+            IndexName="productId-timestamp-index",
+            KeyConditionExpression=Key("productId").eq(self.hot_product["productId"]),
+            ScanIndexForward=False,
+            Limit=depth,
+        )
+        return resp.get("LastEvaluatedKey")
+
+    def new_link(self) -> str:
+        """Write an unused review link for the hot product and return its token."""
+        token = str(uuid.uuid4())
+        self.dynamodb.Table(f"{PREFIX}-review-links").put_item(Item={
+            "linkToken": token,
+            "orderId": f"ORD-BENCH-{token[:8]}",
+            "productId": self.hot_product["productId"],
+            "brandId": self.hot_brand_id,
+            "customerName": "Bench Customer",
+            "customerEmail": "customer@bench.reviewplus.test",
+            "customerPhone": "+1-555-0100",
+            "used": False,
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+            "expiresAt": int(time.time()) + 72 * 3600,
+        })
+        return token
+
+    def new_pending_review(self, message: str | None = None) -> dict:
+        """Write a just-submitted review for the hot product, as submit_review does.
+
+        Without ``message`` the text is unique (two random tokens added), so
+        ai_processor finds no near-duplicate of it and calls Bedrock.
+        """
+        import recent_activity
+        import review_analytics
+        self._fresh += 1
+        item = {
+            "FeedbackId": f"fb-bench-{self._fresh:08d}-{uuid.uuid4().hex[:8]}",
+            "brandId": self.hot_brand_id,
+            "productId": self.hot_product["productId"],
+            "orderId": f"ORD-BENCH-{self._fresh:08d}",
+            "name": "Bench Customer",
+            "email": "customer@bench.reviewplus.test",
+            "phone": "+1-555-0100",
+            "message": message or (f"Solid build and arrived quickly, though the strap feels a little cheap. "
+                                   f"Order ref {uuid.uuid4().hex} batch {uuid.uuid4().hex}."),
+            "rating": 4,
+            "sentiment": "pending",
+            "topics": [],
+            "summary": "",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        self.dynamodb.Table(f"{PREFIX}-feedback").put_item(Item=item)
+        self.dynamodb.Table(f"{PREFIX}-review-analytics").put_item(Item=review_analytics.item(item))
+        entry = recent_activity.entry(item)
+        for key in recent_activity.scope_keys(item):
+            recent_activity.apply(key, {entry["FeedbackId"]: entry})
+        return item
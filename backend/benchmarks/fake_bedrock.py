@@ -0,0 +1,129 @@
+"""
+In-process stand-in for the bedrock-runtime client.
+
+Answers invoke_model with canned JSON in the shape the handlers parse
+(review analysis or product summary, chosen from the prompt), after a
+configurable latency. A fraction of calls can fail with a model error or a
+ThrottlingException so retry/fallback paths show up in the numbers.
+
+Models can be given their own latency and throttle rate (``models``, model
+id -> ModelProfile), so model_router's choices and failovers play out as
+they would against several Bedrock models; other model ids get the
+defaults. Calls and the tokens of answered ones are counted per model as
+well.
+"""
+import io
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from botocore.exceptions import ClientError
+
+ANALYSIS_RESULT = {
+    "sentiment": "positive",
+    "confidence": 0.91,
+    "topics": ["quality", "value", "delivery"],
+    "summary": "Customer is happy with quality and value.",
+    "pros": ["quality", "value"],
+    "cons": [],
+    "feature_requests": [],
+}
+
+SUMMARY_RESULT = {
+    "overall_summary": "Customers mostly praise build quality and value; a minority report durability issues.",
+    "key_strengths": ["build quality", "value for money", "fast delivery"],
+    "key_weaknesses": ["durability"],
+    "recommendations": ["Improve quality control", "Extend warranty", "Publish care instructions"],
+    "customer_sentiment_overview": "Customers are broadly satisfied.",
+}
+
+
+@dataclass
+class ModelProfile:
+    latency_ms: float
+    throttle_rate: float = 0.0
+
+
+def parse_models(spec: str) -> dict:
+    """Parse "id=latency_ms[:throttle_rate],..." into {id: ModelProfile}."""
+    models = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        model_id, _, values = part.rpartition("=")
+        latency, _, throttle = values.partition(":")
+        models[model_id] = ModelProfile(float(latency), float(throttle or 0.0))
+    return models
+
+
+class FakeBedrock:
+    def __init__(self, latency_ms: float = 250.0, jitter_ms: float = 50.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 7,
+                 models: dict | None = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.models = dict(models or {})
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.throttles = 0
+        self.calls_by_model = Counter()
+        self.tokens_by_model = Counter()      # (model id, "input" | "output") -> tokens
+
+    def config(self) -> dict:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "throttle_rate": self.throttle_rate,
+            "models": {model: vars(profile) for model, profile in self.models.items()},
+        }
+
+    def invoke_model(self, modelId: str, body, contentType: str = "application/json",
+                     accept: str = "application/json", **_kwargs) -> dict:
+        profile = self.models.get(modelId) or ModelProfile(self.latency_ms, self.throttle_rate)
+        with self._lock:
+            self.calls += 1
+            self.calls_by_model[modelId] += 1
+            roll = self._rng.random()
+            delay = max(0.0, profile.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+        time.sleep(delay)
+        if roll < profile.throttle_rate:
+            with self._lock:
+                self.throttles += 1
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Too many requests"}},
+                "InvokeModel",
+            )
+        if roll < profile.throttle_rate + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise ClientError(
+                {"Error": {"Code": "ModelErrorException", "Message": "Injected model error"}},
+                "InvokeModel",
+            )
+
+        prompt = json.loads(body)["messages"][0]["content"]
+        if isinstance(prompt, list):
+            prompt = " ".join(block.get("text", "") for block in prompt)
+        result = SUMMARY_RESULT if "overall_summary" in prompt else ANALYSIS_RESULT
+        text = json.dumps(result)
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4}
+        with self._lock:
+            self.tokens_by_model[(modelId, "input")] += usage["input_tokens"]
+            self.tokens_by_model[(modelId, "output")] += usage["output_tokens"]
+        payload = {
+            "content": [{"type": "text", "text": text}],
+            "usage": usage,
+            "stop_reason": "end_turn",
+        }
+        return {
+            "body": io.BytesIO(json.dumps(payload).encode("utf-8")),
+            "contentType": "application/json",
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+        }
@@ -0,0 +1,37 @@
+"""
+In-process stand-in for the lambda client.
+
+Handlers only ever invoke other functions asynchronously (InvocationType
+"Event": dashboard refreshes). Those invocations are queued here and run by
+drain() between benchmark requests, outside the timed region, as if Lambda
+had finished them in the background before the next request arrived.
+"""
+import json
+
+
+class FakeLambda:
+    def __init__(self, handlers: dict):
+        # function name -> (handler module, Lambda context)
+        self.handlers = handlers
+        self.queued: list = []
+        self.invocations = 0
+
+    def invoke(self, FunctionName: str, InvocationType: str = "RequestResponse",
+               Payload: bytes = b"{}", **_kwargs) -> dict:
+        if InvocationType != "Event":
+            raise NotImplementedError("only asynchronous invocations are simulated")
+        if FunctionName not in self.handlers:
+            raise ValueError(f"no stand-in for function {FunctionName}")
+        self.queued.append((FunctionName, json.loads(Payload)))
+        return {"StatusCode": 202}
+
+    def drain(self) -> int:
+        """Run every queued invocation (and any they queue). Returns how many ran."""
+        ran = 0
+        while self.queued:
+            name, payload = self.queued.pop(0)
+            module, context = self.handlers[name]
+            module.lambda_handler(payload, context)
+            ran += 1
+        self.invocations += ran
+        return ran
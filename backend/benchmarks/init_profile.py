@@ -0,0 +1,131 @@
+"""
+Import-time profiler for the Lambda handlers.
+
+For each function, builds its package (function + shared modules, flat, as
+Terraform does) and imports handler.py in a fresh interpreter under
+``python -X importtime``, then builds the clients a typical first request
+needs through aws_clients. Reports:
+
+  * total handler import time,
+  * the most expensive imports, grouped by top-level package (self time),
+  * construction cost per AWS client (from aws_clients.init_costs_ms).
+
+    python backend/benchmarks/init_profile.py
+    python backend/benchmarks/init_profile.py --functions get_insights --top 15
+    python backend/benchmarks/init_profile.py --ref HEAD~1     # profile an older revision
+
+Older revisions (before aws_clients) built every client at import, so for
+them client costs show up inside the handler import time instead.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+import lambda_package  # noqa: E402
+
+# Clients the first real request of each function builds
+FUNCTION_CLIENTS = {
+    "submit_review": ("dynamodb",),
+    "get_insights": ("cognito-idp", "dynamodb"),
+    "auth_otp": ("cognito-idp", "dynamodb", "ses"),
+    "ai_processor": ("dynamodb", "bedrock-runtime"),
+    "link_stats_reconciler": ("dynamodb",),
+    "review_import": ("s3", "dynamodb", "sqs"),
+    "analytics_projector": ("dynamodb",),
+}
+
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import handler
+import_ms = (time.perf_counter() - started) * 1000
+clients = {}
+try:
+    import aws_clients
+except ImportError:
+    aws_clients = None
+if aws_clients is not None:
+    for service in sys.argv[1:]:
+        aws_clients.dynamodb() if service == "dynamodb" else aws_clients.client(service)
+    clients = dict(aws_clients.init_costs_ms)
+print(json.dumps({"import_ms": round(import_ms, 2), "clients_ms": clients}))
+"""
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Sum -X importtime self times (ms) by top-level package."""
+    by_package = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, _cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+            by_package[name.split(".")[0]] += int(self_us) / 1000
+        except ValueError:
+            continue
+    return dict(by_package)
+
+
+def profile_function(backend_dir: str, function: str, xray_patch: str) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f"init-{function}-") as pkg:
+        lambda_package.build_package(backend_dir, function, pkg)
+        env = {
+            **os.environ,
+            "AWS_ACCESS_KEY_ID": "profile",
+            "AWS_SECRET_ACCESS_KEY": "profile",
+            "AWS_DEFAULT_REGION": environment.REGION,
+            "AWS_REGION_NAME": environment.REGION,
+            "AWS_XRAY_CONTEXT_MISSING": "IGNORE_ERROR",
+            "XRAY_PATCH_MODULES": xray_patch,
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, *FUNCTION_CLIENTS[function]],
+            cwd=pkg, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{function}: probe failed\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["packages_ms"] = parse_importtime(proc.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-module and per-client init cost of each handler")
+    parser.add_argument("--functions", default=",".join(lambda_package.FUNCTIONS))
+    parser.add_argument("--ref", help="profile this git revision instead of the working tree")
+    parser.add_argument("--xray-patch", default="", help="XRAY_PATCH_MODULES for the probe, e.g. botocore")
+    parser.add_argument("--top", type=int, default=8, help="packages to list per function")
+    parser.add_argument("--json", help="also write the raw results here")
+    args = parser.parse_args()
+
+    functions = [f.strip() for f in args.functions.split(",") if f.strip()]
+    results = {}
+    with lambda_package.backend_tree(args.ref) as backend_dir:
+        for function in functions:
+            results[function] = profile_function(backend_dir, function, args.xray_patch)
+
+    for function, r in results.items():
+        print(f"\n{function}: handler import {r['import_ms']:.1f} ms")
+        ranked = sorted(r["packages_ms"].items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        for package, ms in ranked:
+            print(f"    {package:<28} {ms:>8.1f} ms")
+        if r["clients_ms"]:
+            print("  first-use clients:")
+            for name, ms in r["clients_ms"].items():
+                print(f"    {name:<28} {ms:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"ref": args.ref or "working-tree", "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Build Lambda packages the way terraform/modules/lambda does: the function's
+own *.py files plus backend/shared/*.py, flat at the zip root. Used by the
+cold-start tooling to package either the working tree or any git revision,
+so before/after comparisons run the exact same harness.
+"""
+import contextlib
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+from environment import REPO_DIR
+
+FUNCTIONS = (
+    "submit_review", "get_insights", "auth_otp", "ai_processor",
+    "link_stats_reconciler", "review_import", "analytics_projector",
+)
+
+# Third-party imports the handlers need beyond the runtime's bundled boto3
+# (matches the deps step in .github/workflows/deploy.yml)
+RUNTIME_DEPS = ("aws-xray-sdk",)
+
+
+@contextlib.contextmanager
+def backend_tree(ref: str | None):
+    """Yield a backend/ directory: the working tree, or ``ref`` via git archive."""
+    if not ref:
+        yield os.path.join(REPO_DIR, "backend")
+        return
+    with tempfile.TemporaryDirectory(prefix="reviewplus-ref-") as tmp:
+        archive = os.path.join(tmp, "backend.tar")
+        subprocess.run(["git", "archive", "--format=tar", "-o", archive, ref, "backend"],
+                       cwd=REPO_DIR, check=True)
+        with tarfile.open(archive) as tar:
+            tar.extractall(tmp)
+        yield os.path.join(tmp, "backend")
+
+
+def build_package(backend_dir: str, function: str, dest: str, deps_dir: str | None = None) -> str:
+    """Lay out ``function``'s package in ``dest`` and return it."""
+    os.makedirs(dest, exist_ok=True)
+    if deps_dir:
+        shutil.copytree(deps_dir, dest, dirs_exist_ok=True)
+    for path in glob.glob(os.path.join(backend_dir, "functions", function, "*.py")):
+        shutil.copy2(path, dest)
+    for path in glob.glob(os.path.join(backend_dir, "shared", "*.py")):
+        shutil.copy2(path, dest)
+    return dest
+
+
+def install_deps(dest: str, python_version: str = "3.11") -> str:
+    """pip-install RUNTIME_DEPS for the Lambda platform into ``dest`` (cached)."""
+    marker = os.path.join(dest, ".installed")
+    if os.path.exists(marker):
+        return dest
+    subprocess.run([
+        sys.executable, "-m", "pip", "install", *RUNTIME_DEPS, "-t", dest,
+        "--platform", "manylinux2014_x86_64", "--python-version", python_version,
+        "--only-binary=:all:", "--quiet", "--upgrade",
+    ], check=True)
+    open(marker, "w").close()
+    return dest
@@ -0,0 +1,163 @@
+"""
+Model routing against a multi-model Bedrock stand-in: model mix, latency,
+failovers and token cost, with routing on and off.
+
+Replays a mix of review analyses (lengths drawn log-normally, a few past a
+thousand characters) and product summaries through ai_processor's
+_invoke_bedrock, with fake_bedrock answering for three models of different
+speed, in three phases:
+
+  * steady         every model answers,
+  * fast throttled half the fast model's calls are throttled,
+  * large slow     the large model runs past the latency SLO,
+
+once with AI_MODEL_ROUTING on and once off (every call to the standard
+model). Per phase and mode it reports calls per model, failovers, calls
+that failed outright, p50/p95 latency per task and the token cost at
+PRICES. Latencies are scaled down (tens of ms) so a run takes a minute or
+two; the SLO is scaled with them.
+
+    python backend/benchmarks/routing_profile.py
+    python backend/benchmarks/routing_profile.py --calls 500 --slo-ms 400
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+
+MODELS = {
+    "fast": "anthropic.claude-3-haiku-20240307-v1:0",
+    "standard": "anthropic.claude-3-sonnet-20240229-v1:0",
+    "large": "anthropic.claude-3-5-sonnet-20240620-v1:0",
+}
+# USD per 1k (input, output) tokens; on-demand list prices, for comparison only
+PRICES = {
+    MODELS["fast"]: (0.00025, 0.00125),
+    MODELS["standard"]: (0.003, 0.015),
+    MODELS["large"]: (0.003, 0.015),
+}
+SUMMARY_SHARE = 0.1
+
+
+def _phases(slo_ms: float) -> list:
+    """(name, {model id: (latency ms, throttle rate)})."""
+    steady = {MODELS["fast"]: (30, 0.0), MODELS["standard"]: (60, 0.0), MODELS["large"]: (120, 0.0)}
+    return [
+        ("steady", steady),
+        ("fast throttled", {**steady, MODELS["fast"]: (30, 0.5)}),
+        ("large slow", {**steady, MODELS["large"]: (slo_ms * 2, 0.0)}),
+    ]
+
+
+def _workload(calls: int, seed: int) -> list:
+    """(task, review text) in arrival order."""
+    rng = random.Random(seed)
+    words = "battery strap screen quality delivery price broke great poor support refund fit colour".split()
+    out = []
+    for _ in range(calls):
+        task = "product_summary" if rng.random() < SUMMARY_SHARE else "review_analysis"
+        chars = int(min(3000, rng.lognormvariate(5.0, 0.9)))
+        text = " ".join(rng.choices(words, k=max(2, chars // 6)))
+        out.append((task, text))
+    return out
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] if ordered else 0.0
+
+
+def _run(handler, bedrock, phase: dict, workload: list, routing: bool, summary_prompt) -> dict:
+    import model_router
+    from fake_bedrock import ModelProfile
+
+    model_router.ROUTING = routing
+    model_router.reset()
+    bedrock.models = {model: ModelProfile(*profile) for model, profile in phase.items()}
+    calls_before, tokens_before = Counter(bedrock.calls_by_model), Counter(bedrock.tokens_by_model)
+    throttles_before = bedrock.throttles
+    latencies: dict[str, list] = {}
+    failed = 0
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for task, text in workload:
+            if task == "product_summary":
+                prompt, chars = summary_prompt(text), None
+            else:
+                prompt, chars = handler._build_prompt(text, 4), len(text)
+            started = time.perf_counter()
+            try:
+                handler._invoke_bedrock(prompt, task, "brand-profile", "profile", input_chars=chars)
+            except Exception:
+                failed += 1
+            latencies.setdefault(task, []).append((time.perf_counter() - started) * 1000)
+    tokens = bedrock.tokens_by_model - tokens_before
+    cost = sum(count / 1000 * PRICES[model][0 if kind == "input" else 1] for (model, kind), count in tokens.items())
+    return {
+        "models": bedrock.calls_by_model - calls_before,
+        "throttles": bedrock.throttles - throttles_before,
+        "failed": failed,
+        "latencies": latencies,
+        "cost": cost,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--calls", type=int, default=300, help="Bedrock calls per phase and mode")
+    parser.add_argument("--slo-ms", type=float, default=200.0, help="AI_LATENCY_SLO_MS, scaled like the latencies")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    environment.configure_process()
+    os.environ.update({
+        "BEDROCK_MODEL_FAST": MODELS["fast"],
+        "BEDROCK_MODEL_ID": MODELS["standard"],
+        "BEDROCK_MODEL_LARGE": MODELS["large"],
+        "AI_LATENCY_SLO_MS": str(args.slo_ms),
+    })
+    import aws_clients
+    import model_router
+    from fake_bedrock import FakeBedrock
+    from product_summary import ReviewSet, build_prompt
+
+    bedrock = FakeBedrock(jitter_ms=5.0, seed=args.seed)
+    aws_clients.override("bedrock-runtime", bedrock)
+    handler = environment.load_handler("ai_processor")
+
+    def summary_prompt(text: str) -> str:
+        """A product summary prompt quoting twenty reviews like ``text``."""
+        reviews = [{"FeedbackId": f"fb-{i}", "message": text, "rating": 4, "sentiment": "positive",
+                    "timestamp": f"2025-01-{i + 1:02d}"} for i in range(20)]
+        return build_prompt(ReviewSet.from_reviews(reviews), "Profile Product")
+
+    workload = _workload(args.calls, args.seed)
+    short = sum(1 for task, text in workload
+                if task == "review_analysis" and len(text) <= model_router.SHORT_INPUT_CHARS)
+    print(f"{args.calls} calls per run: {sum(t == 'product_summary' for t, _ in workload)} summaries, "
+          f"{short} short and {sum(t == 'review_analysis' for t, _ in workload) - short} long reviews; "
+          f"SLO {args.slo_ms:.0f} ms")
+    names = {model: tier for tier, model in MODELS.items()}
+    print(f"\n{'phase':<16}{'routing':<9}{'fast':>6}{'std':>6}{'large':>6}{'thrott':>8}{'failed':>8}"
+          f"{'review p50':>12}{'p95':>8}{'summary p50':>13}{'p95':>8}{'cost $':>10}")
+    for name, phase in _phases(args.slo_ms):
+        for routing in (True, False):
+            result = _run(handler, bedrock, phase, workload, routing, summary_prompt)
+            by_tier = Counter({names[m]: n for m, n in result["models"].items()})
+            reviews = result["latencies"].get("review_analysis", [])
+            summaries = result["latencies"].get("product_summary", [])
+            print(f"{name:<16}{'on' if routing else 'off':<9}{by_tier['fast']:>6}{by_tier['standard']:>6}"
+                  f"{by_tier['large']:>6}{result['throttles']:>8}{result['failed']:>8}"
+                  f"{_percentile(reviews, 50):>12.0f}{_percentile(reviews, 95):>8.0f}"
+                  f"{_percentile(summaries, 50):>13.0f}{_percentile(summaries, 95):>8.0f}{result['cost']:>10.4f}")
+    print("\nlatencies in ms, per call including failovers; cost from the stand-in's token counts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+"""
+End-to-end benchmarks for the Lambda handlers, run in-process against local
+stand-ins: moto for DynamoDB / SES / Cognito, fake_bedrock.FakeBedrock
+for Bedrock and fake_lambda.FakeLambda for asynchronous invocations, which
+run untimed after the request that made them.
+
+    pip install -r backend/requirements.txt -r backend/benchmarks/requirements.txt
+    python backend/benchmarks/run.py --scales 1k,100k
+    python backend/benchmarks/run.py --scales 1m --only insights --iterations 20
+    python backend/benchmarks/compare.py results/before.json results/after.json
+
+Each scale runs in its own subprocess so peak RSS is per scale. For every
+scenario the report gives p50/p95/p99 latency, AWS calls per request (by
+operation, counted from botocore's before-call event), DynamoDB items scanned
+and read units per request (from ddb_metrics), response bytes as sent (a
+gzip body counts compressed), Bedrock tokens per request (from
+bedrock_usage) and peak RSS; the full result set is written as JSON for
+compare.py. moto's own ConsumedCapacity is a constant, so read
+units are billed by item size instead (capacity.py).
+
+moto evaluates a Query by walking the whole table, so at the large scales
+latency says more about moto than about DynamoDB; items scanned and read
+units are what DynamoDB would charge and wait for. The single-product
+scales (e.g. 1m-1p: one product with 1M reviews) exist for the paginated
+reviews listing, whose per-page cost must not grow with the product.
+
+A scenario may also list tables its request must not touch (forbid_tables,
+checked against ddb_metrics' per-table totals); a request that does counts
+as unexpected, so e.g. the fields= scenario fails if it reads the products
+or link tables.
+
+--overview-fanout runs get_insights with OVERVIEW_FANOUT set (off or
+process; lambda mode needs real invocations). Compare the superadmin
+overview across modes at the many-tenant scale:
+
+    python backend/benchmarks/run.py --scales 10k-1000b --only "GET /insights?" --out off.json
+    python backend/benchmarks/run.py --scales 10k-1000b --only "GET /insights?" \
+        --overview-fanout process --out process.json
+
+Shard reads happen in the worker processes, so in process mode the
+DynamoDB columns only count the coordinator's own reads.
+
+--analytics-reads off points the dashboard aggregations back at the wide
+feedback GSIs (INSIGHTS_ANALYTICS_READS=false), for the read-unit cost of
+the narrow review-analytics table:
+
+    python backend/benchmarks/run.py --scales 10k --only insights --analytics-reads off --out wide.json
+    python backend/benchmarks/run.py --scales 10k --only insights --out narrow.json
+    python backend/benchmarks/compare.py wide.json narrow.json
+
+--recent-buffers off has the recent lists sort the scope's reviews again
+(INSIGHTS_RECENT_BUFFERS=false) instead of reading the recent-activity
+buffers, --topic-sketches off has top_topics count the scope's reviews
+(INSIGHTS_TOPIC_SKETCHES=false) instead of reading the topic sketches, and
+--aspect-matrix off has /aspects count the product's reviews
+(INSIGHTS_ASPECT_MATRIX=false) instead of reading the aspect matrices, and
+--search-index off has /search match the text of every review of the brand
+(INSIGHTS_SEARCH_INDEX=false) instead of walking the search index.
+
+--near-duplicates off has ai_processor send every review to Bedrock
+(AI_NEAR_DUPLICATES=false) instead of reusing the analysis of a
+near-duplicate of it.
+
+--model-routing off has ai_processor send every Bedrock call to
+BEDROCK_MODEL_ID (AI_MODEL_ROUTING=false) instead of routing it by task and
+size. --bedrock-models gives models their own stand-in latency and throttle
+rate, e.g. to see summaries fail over from a throttled large model:
+
+    python backend/benchmarks/run.py --only ai_processor \
+        --bedrock-models "anthropic.claude-3-5-sonnet-20240620-v1:0=900:1.0"
+"""
+import argparse
+import base64
+import contextlib
+import copy
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+
+DEFAULT_RESULTS_DIR = os.path.join(environment.BENCH_DIR, "results")
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = pct / 100 * (len(sorted_values) - 1)
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def outcome_of(result) -> object:
+    if isinstance(result, dict) and "statusCode" in result:
+        return result["statusCode"]
+    if isinstance(result, dict) and "fresh" in result:
+        # a materialize summary: what became of the (one) scope
+        return next((outcome for outcome, n in result.items() if n and outcome != "fresh"), "fresh")
+    if isinstance(result, dict) and "items_written" in result:
+        return "written" if result["items_written"] else "skipped"
+    if isinstance(result, dict) and "processed" in result:
+        if result.get("duplicates"):
+            return "duplicate"
+        if result.get("processed"):
+            return "processed"
+        return "error" if result.get("errors") else "skipped"
+    return "unknown"
+
+
+def wire_bytes(result) -> int:
+    """Response body size as sent to the client (base64 bodies go out decoded)."""
+    if not isinstance(result, dict) or not result.get("body"):
+        return 0
+    if result.get("isBase64Encoded"):
+        return len(base64.b64decode(result["body"]))
+    return len(result["body"].encode("utf-8"))
+
+
+def uncounted(calls: Counter, fn):
+    """Run fn() without its AWS calls showing up in ``calls``."""
+    counted = calls.copy()
+    try:
+        return fn()
+    finally:
+        calls.clear()
+        calls.update(counted)
+
+
+def revalidating(event: dict, module, context, calls: Counter) -> dict:
+    """Add the ETag of an identical, uncounted request as If-None-Match."""
+    result = uncounted(calls, lambda: module.lambda_handler(copy.deepcopy(event), context))
+    etag = result.get("headers", {}).get("ETag")
+    if etag:
+        event["headers"]["If-None-Match"] = etag
+    return event
+
+
+def run_scenario(scenario, module, calls: Counter, bedrock, lambdas, args) -> dict:
+    import bedrock_usage
+    import ddb_metrics
+    import metadata_cache
+    import model_router
+
+    metadata_cache.clear()
+    model_router.reset()
+    context = _context_for(scenario.function)
+    # Handler logs still get formatted (as on Lambda) but not shown
+    logs = contextlib.nullcontext() if args.show_logs else contextlib.redirect_stdout(open(os.devnull, "w"))
+    latencies, outcomes = [], Counter()
+    ddb_scanned = ddb_read_units = 0.0
+    response_bytes = 0
+    tokens = Counter()
+    with logs:
+        for _ in range(args.warmup):
+            event = scenario.build_event()
+            if scenario.revalidate:
+                event = revalidating(event, module, context, calls)
+            module.lambda_handler(event, context)
+            uncounted(calls, lambdas.drain)
+
+        calls.clear()
+        bedrock_before = bedrock.calls
+        models_before = Counter(bedrock.calls_by_model)
+        budget_end = time.monotonic() + args.scenario_budget_s
+        for i in range(args.iterations):
+            event = scenario.build_event()
+            if scenario.revalidate:
+                event = revalidating(event, module, context, calls)
+            started = time.perf_counter()
+            result = module.lambda_handler(event, context)
+            latencies.append((time.perf_counter() - started) * 1000)
+            outcome = outcome_of(result)
+            response_bytes += wire_bytes(result)
+            ddb = ddb_metrics.summary()
+            ddb_scanned += ddb["scanned"]
+            ddb_read_units += ddb["read_units"]
+            usage = bedrock_usage.summary()
+            tokens.update(input=usage["input_tokens"], output=usage["output_tokens"])
+            touched = sorted(set(ddb["tables"]) & set(scenario.forbid_tables))
+            if touched:
+                outcome = f"read {','.join(touched)}"
+            outcomes[str(outcome)] += 1
+            # background refreshes the request asked for, before the next one
+            uncounted(calls, lambdas.drain)
+            if i >= 2 and time.monotonic() > budget_end:
+                break
+
+    n = len(latencies)
+    ordered = sorted(latencies)
+    per_request = {op: round(count / n, 2) for op, count in sorted(calls.items())}
+    bedrock_calls = bedrock.calls - bedrock_before
+    if bedrock_calls:
+        per_request["bedrock-runtime.InvokeModel"] = round(bedrock_calls / n, 2)
+    bedrock_tokens = {kind: round(count / n, 1) for kind, count in sorted(tokens.items()) if count}
+    bedrock_models = {model: round(count / n, 2)
+                      for model, count in sorted((bedrock.calls_by_model - models_before).items())}
+    expected = {str(code) for code in scenario.expect}
+    return {
+        "function": scenario.function,
+        "scenario": scenario.name,
+        "iterations": n,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "mean_ms": round(sum(ordered) / n, 2),
+        "max_ms": round(ordered[-1], 2),
+        "throughput_rps": round(n / (sum(ordered) / 1000), 2) if sum(ordered) else 0.0,
+        "outcomes": dict(outcomes),
+        "unexpected": sum(c for o, c in outcomes.items() if o not in expected),
+        "calls_per_request": per_request,
+        "total_calls_per_request": round(sum(per_request.values()), 2),
+        "ddb_items_scanned_per_request": round(ddb_scanned / n, 1),
+        "ddb_read_units_per_request": round(ddb_read_units / n, 2),
+        "response_bytes_per_request": round(response_bytes / n),
+        "bedrock_tokens_per_request": bedrock_tokens,
+        "bedrock_calls_by_model_per_request": bedrock_models,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+_contexts: dict = {}
+
+
+def _context_for(function: str):
+    from scenarios import LambdaContext
+    if function not in _contexts:
+        _contexts[function] = LambdaContext(function)
+    return _contexts[function]
+
+
+class _CallCounter:
+    """botocore before-call hook. Paused while event builders write fixtures."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.paused = False
+
+    def __call__(self, model, **_kwargs):
+        if not self.paused:
+            self.counts[f"{model.service_model.service_name}.{model.name}"] += 1
+
+
+def run_scale(scale: str, args) -> dict:
+    environment.configure_process()
+    mock = environment.start_mock()
+    try:
+        import boto3
+
+        counter = _CallCounter()
+        boto3.setup_default_session(region_name=environment.REGION)
+        boto3.DEFAULT_SESSION.events.register("before-call", counter)
+        import capacity
+        capacity.install(boto3.DEFAULT_SESSION)
+
+        counter.paused = True
+        dynamodb = boto3.resource("dynamodb", region_name=environment.REGION)
+        environment.create_tables(dynamodb)
+        boto3.client("ses", region_name=environment.REGION).verify_email_identity(
+            EmailAddress=environment.SES_FROM_EMAIL)
+
+        dataset = environment.Dataset(dynamodb, scale, seed=args.seed)
+        print(f"[{scale}] seeding {dataset.reviews:,} reviews, {len(dataset.products):,} products, "
+              f"{len(dataset.brands):,} brands", file=sys.stderr)
+        seed_seconds = dataset.seed_tables(progress=lambda msg: print(f"[{scale}] {msg}", file=sys.stderr))
+        cognito = environment.create_cognito(
+            boto3.client("cognito-idp", region_name=environment.REGION), dataset.hot_brand_id)
+
+        from fake_bedrock import FakeBedrock, parse_models
+        from scenarios import build_scenarios
+
+        bedrock = FakeBedrock(
+            latency_ms=args.bedrock_latency_ms,
+            jitter_ms=args.bedrock_jitter_ms,
+            error_rate=args.bedrock_error_rate,
+            throttle_rate=args.bedrock_throttle_rate,
+            models=parse_models(args.bedrock_models),
+        )
+        os.environ["OVERVIEW_FANOUT"] = args.overview_fanout
+        os.environ["INSIGHTS_ANALYTICS_READS"] = "true" if args.analytics_reads == "on" else "false"
+        os.environ["INSIGHTS_RECENT_BUFFERS"] = "true" if args.recent_buffers == "on" else "false"
+        os.environ["INSIGHTS_TOPIC_SKETCHES"] = "true" if args.topic_sketches == "on" else "false"
+        os.environ["INSIGHTS_ASPECT_MATRIX"] = "true" if args.aspect_matrix == "on" else "false"
+        os.environ["INSIGHTS_SEARCH_INDEX"] = "true" if args.search_index == "on" else "false"
+        os.environ["AI_NEAR_DUPLICATES"] = "true" if args.near_duplicates == "on" else "false"
+        os.environ["AI_MODEL_ROUTING"] = "true" if args.model_routing == "on" else "false"
+        import aws_clients
+        aws_clients.override("bedrock-runtime", bedrock)
+        modules = {}
+        for name in ("submit_review", "get_insights", "auth_otp", "ai_processor", "analytics_projector"):
+            modules[name] = environment.load_handler(name)
+
+        from fake_lambda import FakeLambda
+        lambdas = FakeLambda({f"{environment.PREFIX}-get-insights":
+                              (modules["get_insights"], _context_for("get_insights"))})
+        aws_clients.override("lambda", lambdas)
+
+        scenarios = [s for s in build_scenarios(dataset, cognito["tokens"])
+                     if not args.only or args.only in f"{s.function} {s.name}"]
+
+        # Fixture writes inside build_event must not count as handler calls
+        for scenario in scenarios:
+            build = scenario.build_event
+
+            def paused_build(build=build):
+                counter.paused = True
+                try:
+                    return build()
+                finally:
+                    counter.paused = False
+            scenario.build_event = paused_build
+
+        counter.paused = False
+        results = []
+        for scenario in scenarios:
+            print(f"[{scale}] {scenario.function}: {scenario.name}", file=sys.stderr)
+            result = run_scenario(scenario, modules[scenario.function], counter.counts, bedrock, lambdas, args)
+            result["scale"] = scale
+            results.append(result)
+            print(f"[{scale}]   p50 {result['p50_ms']:.1f}ms  p95 {result['p95_ms']:.1f}ms  "
+                  f"p99 {result['p99_ms']:.1f}ms  calls {result['total_calls_per_request']}  "
+                  f"rss {result['peak_rss_mb']}MB", file=sys.stderr)
+
+        return {
+            "scale": scale,
+            "reviews": dataset.reviews,
+            "seed_seconds": round(seed_seconds, 1),
+            "bedrock": bedrock.config(),
+            "results": results,
+        }
+    finally:
+        mock.stop()
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=environment.REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def print_table(runs: list) -> None:
+    print()
+    print(f"{'scale':<8} {'function':<14} {'scenario':<50} {'n':>5} {'p50':>9} {'p95':>9} "
+          f"{'p99':>9} {'calls':>6} {'scanned':>8} {'RCU':>8} {'bytes':>8} {'rss MB':>7} {'bad':>4}")
+    print("-" * 155)
+    for run in runs:
+        for r in run["results"]:
+            print(f"{r['scale']:<8} {r['function']:<14} {r['scenario']:<50} {r['iterations']:>5} "
+                  f"{r['p50_ms']:>8.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms "
+                  f"{r['total_calls_per_request']:>6} {r.get('ddb_items_scanned_per_request', 0):>8} "
+                  f"{r.get('ddb_read_units_per_request', 0):>8} {r.get('response_bytes_per_request', 0):>8} {r['peak_rss_mb']:>7} {r['unexpected']:>4}")
+
+
+# ===========================================================================
+# Main
+# ===========================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ReviewPlus Lambda handlers locally")
+    parser.add_argument("--scales", default="1k", help=f"comma-separated, from {', '.join(environment.SCALES)}")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--scenario-budget-s", type=float, default=120.0,
+                        help="stop a scenario early once it has run this long (min 3 iterations)")
+    parser.add_argument("--only", help="run scenarios whose 'function route' contains this text")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bedrock-latency-ms", type=float, default=250.0)
+    parser.add_argument("--bedrock-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--bedrock-error-rate", type=float, default=0.0)
+    parser.add_argument("--bedrock-throttle-rate", type=float, default=0.0)
+    parser.add_argument("--bedrock-models", default="",
+                        help="per-model stand-ins: id=latency_ms[:throttle_rate],... (others use the defaults)")
+    parser.add_argument("--overview-fanout", choices=("off", "process"), default="off",
+                        help="OVERVIEW_FANOUT for get_insights")
+    parser.add_argument("--analytics-reads", choices=("on", "off"), default="on",
+                        help="aggregate from the review-analytics table (on) or the feedback GSIs (off)")
+    parser.add_argument("--recent-buffers", choices=("on", "off"), default="on",
+                        help="recent lists from the recent-activity buffers (on) or sorted reviews (off)")
+    parser.add_argument("--topic-sketches", choices=("on", "off"), default="on",
+                        help="top topics from the topic sketches (on) or counted reviews (off)")
+    parser.add_argument("--aspect-matrix", choices=("on", "off"), default="on",
+                        help="/aspects from the aspect matrices (on) or counted reviews (off)")
+    parser.add_argument("--search-index", choices=("on", "off"), default="on",
+                        help="/search from the search index (on) or the brand's review text (off)")
+    parser.add_argument("--near-duplicates", choices=("on", "off"), default="on",
+                        help="ai_processor reuses a near-duplicate's analysis (on) or always calls Bedrock (off)")
+    parser.add_argument("--model-routing", choices=("on", "off"), default="on",
+                        help="ai_processor routes Bedrock calls by task and size (on) or uses BEDROCK_MODEL_ID (off)")
+    parser.add_argument("--show-logs", action="store_true", help="let handler print() output through")
+    parser.add_argument("--out", help="result JSON path (default results/<timestamp>-<rev>.json)")
+    parser.add_argument("--scale-worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in environment.SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+
+    if args.scale_worker:
+        with open(args.out, "w") as fh:
+            json.dump(run_scale(scales[0], args), fh)
+        return
+
+    runs = []
+    for scale in scales:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            tmp_path = tmp.name
+        cmd = [sys.executable, os.path.abspath(__file__), *sys.argv[1:],
+               "--scales", scale, "--out", tmp_path, "--scale-worker"]
+        subprocess.run(cmd, check=True)
+        with open(tmp_path) as fh:
+            runs.append(json.load(fh))
+        os.unlink(tmp_path)
+
+    revision = _git_revision()
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": revision,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "overview_fanout": args.overview_fanout,
+            "analytics_reads": args.analytics_reads,
+            "recent_buffers": args.recent_buffers,
+            "topic_sketches": args.topic_sketches,
+            "aspect_matrix": args.aspect_matrix,
+            "search_index": args.search_index,
+            "near_duplicates": args.near_duplicates,
+            "model_routing": args.model_routing,
+        },
+        "runs": runs,
+    }
+    out = args.out
+    if not out:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        out = os.path.join(DEFAULT_RESULTS_DIR, f"{stamp}-{revision}.json")
+    with open(out, "w") as fh:
+        json.dump(report, fh, indent=2)
+
+    print_table(runs)
+    print(f"\nResults written to {out}")
+
+
+if __name__ == "__main__":
+    main()
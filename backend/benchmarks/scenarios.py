@@ -0,0 +1,253 @@
+"""
+Benchmark scenarios: one per handler route, each building a fresh API
+Gateway / stream event outside the timed region.
+"""
+import base64
+import json
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+from boto3.dynamodb.types import TypeSerializer
+
+from environment import ADMIN_EMAIL, PASSWORD, PREFIX
+
+_serializer = TypeSerializer()
+
+# one text for every run of the near-duplicate scenario: the first run is
+# analysed by Bedrock and filed, the rest reuse it
+DUPLICATE_MESSAGE = "Battery died after two days and support never answered my emails. Not buying again."
+
+
+@dataclass
+class Scenario:
+    function: str                     # directory under backend/functions
+    name: str                         # route label used in results
+    build_event: Callable[[], dict]   # called before each timed invocation
+    expect: tuple = (200,)            # status codes that count as success
+    forbid_tables: tuple = ()         # tables the request must not touch
+    revalidate: bool = False          # send the ETag of an untimed identical request as If-None-Match
+
+
+class LambdaContext:
+    """Enough of the Lambda context object for the handlers."""
+
+    def __init__(self, function_name: str):
+        self.function_name = f"reviewpulse-{function_name.replace('_', '-')}"
+        self.aws_request_id = "bench"
+        self.memory_limit_in_mb = 256
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 60_000
+
+
+def _api_event(method: str, path: str, path_params: dict | None = None,
+               body: dict | None = None, token: str | None = None, query: dict | None = None,
+               headers: dict | None = None) -> dict:
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return {
+        "httpMethod": method,
+        "path": path,
+        "pathParameters": path_params,
+        "headers": headers,
+        "queryStringParameters": query,
+        "body": json.dumps(body) if body is not None else None,
+    }
+
+
+def _stream_insert(item: dict) -> dict:
+    return {"Records": [{
+        "eventName": "INSERT",
+        "eventSource": "aws:dynamodb",
+        "dynamodb": {"NewImage": {k: _serializer.serialize(v) for k, v in item.items()}},
+    }]}
+
+
+def _materialize(brand_id: str, product_id: str = "") -> dict:
+    """A refresh of one dashboard, made stale first so that it is rebuilt."""
+    import link_counters
+
+    link_counters.bump_versions([(brand_id, product_id)])
+    key = (link_counters.product_key(brand_id, product_id) if product_id
+           else link_counters.brand_key(brand_id))
+    return {"action": "materialize", "scopes": [key]}
+
+
+def _cursor(key: dict | None) -> str | None:
+    """The listing's opaque cursor, as get_insights encodes it."""
+    if key is None:
+        return None
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def build_scenarios(dataset, tokens: dict) -> list:
+    brand_id = dataset.hot_brand_id
+    product_id = dataset.hot_product["productId"]
+    admin, superadmin = tokens["admin"], tokens["superadmin"]
+    reviews_path = f"/insights/{brand_id}/{product_id}/reviews"
+    reviews_params = {"brandId": brand_id, "productId": product_id}
+    deep_cursor = {}
+    # run.py --analytics-reads off sets this before the scenarios are built
+    wide_tables = () if os.environ.get("INSIGHTS_ANALYTICS_READS") == "false" else (f"{PREFIX}-feedback",)
+    # and --recent-buffers off this one
+    review_tables = (() if os.environ.get("INSIGHTS_RECENT_BUFFERS") == "false"
+                     else (f"{PREFIX}-feedback", f"{PREFIX}-review-analytics"))
+    # and --topic-sketches off this one
+    topic_tables = (() if os.environ.get("INSIGHTS_TOPIC_SKETCHES") == "false"
+                    else (f"{PREFIX}-feedback", f"{PREFIX}-review-analytics"))
+    # and --aspect-matrix off this one
+    aspect_tables = (() if os.environ.get("INSIGHTS_ASPECT_MATRIX") == "false"
+                     else (f"{PREFIX}-feedback", f"{PREFIX}-review-analytics"))
+    # and --search-index off this one (results are read from the feedback
+    # table either way, by key when the index finds them)
+    search_tables = () if os.environ.get("INSIGHTS_SEARCH_INDEX") == "false" else (f"{PREFIX}-review-analytics",)
+    # a week inside the seeded 90 days
+    week_start = dataset.start + timedelta(days=30)
+    week = {"from": week_start.date().isoformat(),
+            "to": (week_start + timedelta(days=6)).date().isoformat(),
+            "granularity": "day"}
+
+    def deep_page_event():
+        # page 500 of 20: the cursor is looked up once, outside the timed region
+        if "cursor" not in deep_cursor:
+            deep_cursor["cursor"] = _cursor(dataset.review_page_key(min(10_000, dataset.reviews // 2)))
+        query = {"limit": "20"}
+        if deep_cursor["cursor"]:
+            query["cursor"] = deep_cursor["cursor"]
+        return _api_event("GET", reviews_path, reviews_params, token=admin, query=query)
+
+    return [
+        # ---- get_insights (fields=) ----
+        # first, before any full insights request can leave pool work running
+        # (link-stats is read, but only for the ETag's data version)
+        # (the feedback table is not either, when aggregating from review-analytics)
+        Scenario("get_insights", "GET /insights/{brandId}?fields=avg_rating",
+                 lambda: _api_event("GET", f"/insights/{brand_id}", {"brandId": brand_id}, token=admin,
+                                    query={"fields": "avg_rating"}),
+                 forbid_tables=(f"{PREFIX}-products", f"{PREFIX}-review-links",
+                                f"{PREFIX}-recent-activity", *wide_tables)),
+        # the brand's last 20 reviews: one read of its recent-activity buffer
+        # (and the products, for their names)
+        Scenario("get_insights", "GET /insights/{brandId}?section=recent_activity",
+                 lambda: _api_event("GET", f"/insights/{brand_id}", {"brandId": brand_id}, token=admin,
+                                    query={"section": "recent_activity"}),
+                 forbid_tables=review_tables),
+        # the product's 5 most mentioned topics: one read of its topic sketch
+        Scenario("get_insights", "GET /insights/{brandId}/{productId}?section=top_topics",
+                 lambda: _api_event("GET", f"/insights/{brand_id}/{product_id}",
+                                    {"brandId": brand_id, "productId": product_id}, token=admin,
+                                    query={"section": "top_topics"}),
+                 forbid_tables=topic_tables),
+        # one topic's sentiment, month by month: a query of the product's aspect matrices
+        Scenario("get_insights", "GET /insights/{brandId}/{productId}/aspects?topic=",
+                 lambda: _api_event("GET", f"/insights/{brand_id}/{product_id}/aspects",
+                                    {"brandId": brand_id, "productId": product_id}, token=admin,
+                                    query={"topic": "delivery"}),
+                 forbid_tables=aspect_tables),
+        # a phrase and a word across the brand's reviews: the posting lists
+        # near the 20 newest matches, and those 20 reviews by key (moto sorts
+        # a whole table for every Query, so past 1k the stand-in's latency
+        # grows with the index's size; calls and read units are the measure)
+        Scenario("get_insights", "GET /insights/{brandId}/search?q=",
+                 lambda: _api_event("GET", f"/insights/{brand_id}/search", {"brandId": brand_id}, token=admin,
+                                    query={"q": '"build quality" poor', "limit": "20"}),
+                 forbid_tables=search_tables),
+        # a whole dashboard, every section waited for (a live request at 10k
+        # returns at the section budget with sections pending)
+        Scenario("get_insights", "materialize {brandId} (stale)",
+                 lambda: _materialize(brand_id), expect=("built",)),
+        Scenario("get_insights", "materialize {brandId}/{productId} (stale)",
+                 lambda: _materialize(brand_id, product_id), expect=("built",)),
+
+        # ---- submit_review ----
+        Scenario("submit_review", "OPTIONS /review",
+                 lambda: _api_event("OPTIONS", "/review")),
+        Scenario("submit_review", "GET /review/{token}",
+                 lambda: (lambda t: _api_event("GET", f"/review/{t}", {"token": t}))(dataset.new_link())),
+        Scenario("submit_review", "POST /review",
+                 lambda: _api_event("POST", "/review", body={
+                     "token": dataset.new_link(),
+                     "rating": 4,
+                     "reviewText": "Comfortable fit and great battery life for the price.",
+                 }),
+                 expect=(201,)),
+
+        # ---- auth_otp ----
+        Scenario("auth_otp", "POST /auth/login",
+                 lambda: _api_event("POST", "/auth/login", body={"email": ADMIN_EMAIL, "password": PASSWORD})),
+        Scenario("auth_otp", "POST /auth/send-review-link",
+                 lambda: _api_event("POST", "/auth/send-review-link", token=admin, body={
+                     "customerEmail": "customer@bench.reviewplus.test",
+                     "customerName": "Bench Customer",
+                     "orderId": "ORD-BENCH-LINK",
+                     "productId": product_id,
+                     "brandId": brand_id,
+                     "productName": dataset.hot_product["productName"],
+                 })),
+
+        # ---- get_insights ----
+        Scenario("get_insights", "GET /insights/{brandId}/{productId}",
+                 lambda: _api_event("GET", f"/insights/{brand_id}/{product_id}",
+                                    {"brandId": brand_id, "productId": product_id}, token=admin)),
+        Scenario("get_insights", "GET /insights/{brandId}",
+                 lambda: _api_event("GET", f"/insights/{brand_id}", {"brandId": brand_id}, token=admin)),
+        # plain requests are served from the stored documents after the first
+        # (warmup) request has them built; any query string is built live
+        Scenario("get_insights", "GET /insights",
+                 lambda: _api_event("GET", "/insights", token=superadmin)),
+        Scenario("get_insights", "GET /insights?granularity=month (built live)",
+                 lambda: _api_event("GET", "/insights", token=superadmin, query={"granularity": "month"})),
+        Scenario("get_insights", "GET /insights/{brandId}?from=&to= (7 days)",
+                 lambda: _api_event("GET", f"/insights/{brand_id}", {"brandId": brand_id}, token=admin,
+                                    query=week)),
+        Scenario("get_insights", "GET /insights?from=&to= (7 days)",
+                 lambda: _api_event("GET", "/insights", token=superadmin, query=week)),
+        Scenario("get_insights", "GET .../{productId}/reviews?limit=20",
+                 lambda: _api_event("GET", reviews_path, reviews_params, token=admin, query={"limit": "20"})),
+        Scenario("get_insights", "GET .../{productId}/reviews?limit=20&cursor=<deep>", deep_page_event),
+        Scenario("get_insights", "GET .../{productId}/reviews?limit=20&sentiment=negative",
+                 lambda: _api_event("GET", reviews_path, reviews_params, token=admin,
+                                    query={"limit": "20", "sentiment": "negative"})),
+        # a browser revalidating an unchanged dashboard, and one that accepts
+        # gzip (the overview over a week, which completes within the budget:
+        # responses with pending sections carry no ETag)
+        Scenario("get_insights", "GET /insights/{brandId} (If-None-Match)",
+                 lambda: _api_event("GET", f"/insights/{brand_id}", {"brandId": brand_id}, token=admin),
+                 expect=(304,), revalidate=True,
+                 forbid_tables=(f"{PREFIX}-feedback", f"{PREFIX}-review-analytics",
+                                f"{PREFIX}-recent-activity", f"{PREFIX}-products", f"{PREFIX}-brands")),
+        Scenario("get_insights", "GET /insights?from=&to= (If-None-Match)",
+                 lambda: _api_event("GET", "/insights", token=superadmin, query=week),
+                 expect=(304,), revalidate=True,
+                 forbid_tables=(f"{PREFIX}-feedback", f"{PREFIX}-review-analytics",
+                                f"{PREFIX}-recent-activity", f"{PREFIX}-products", f"{PREFIX}-brands")),
+        Scenario("get_insights", "GET /insights?from=&to= (Accept-Encoding: gzip)",
+                 lambda: _api_event("GET", "/insights", token=superadmin, query=week,
+                                    headers={"Accept-Encoding": "gzip, deflate, br"})),
+        # what a client sends for a section that came back pending
+        Scenario("get_insights", "GET /insights/{brandId}?section=products",
+                 lambda: _api_event("GET", f"/insights/{brand_id}", {"brandId": brand_id}, token=admin,
+                                    query={"section": "products"})),
+        # every brand's summary, waited for: what grows with the tenant count
+        # (compare --overview-fanout off / process at 10k-1000b)
+        Scenario("get_insights", "GET /insights?section=brands",
+                 lambda: _api_event("GET", "/insights", token=superadmin, query={"section": "brands"})),
+
+        # ---- ai_processor ----
+        Scenario("ai_processor", "stream INSERT (1 review)",
+                 lambda: _stream_insert(dataset.new_pending_review()),
+                 expect=("processed",)),
+        # the same text as a review already analysed (the first run files it)
+        Scenario("ai_processor", "stream INSERT (1 review, near-duplicate)",
+                 lambda: _stream_insert(dataset.new_pending_review(DUPLICATE_MESSAGE)),
+                 expect=("processed", "duplicate")),
+
+        # ---- analytics_projector ----
+        Scenario("analytics_projector", "stream INSERT (1 review)",
+                 lambda: _stream_insert(dataset.new_pending_review()),
+                 expect=("written",)),
+    ]
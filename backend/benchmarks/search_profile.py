@@ -0,0 +1,220 @@
+"""
+Search index build throughput and query cost, at 1M reviews.
+
+Generates seeded reviews as seed_load does (Zipf products, diurnal
+timestamps) and, since its templates are only twenty sentences, appends
+to each a run of filler words drawn from a Zipf vocabulary, so that terms
+range from one-per-review to a handful in the whole brand. Reports:
+
+  * build: search_index.postings() over every review, as the projector
+    and its rebuild call it, in reviews/s, with postings per review and
+    their approximate size and write units (1 KB each, rounded up),
+  * queries: the first page (20) of a mix of words, phrases, filters and
+    date ranges on the busiest brand, through search_index.search() over
+    an in-memory copy of that brand's posting lists; per query the time
+    (best of --repeat), posting-list Queries, postings read and their
+    approximate read units (eventually consistent, 4 KB), against matching
+    the text of every review of the brand as the unindexed path does.
+
+    python backend/benchmarks/search_profile.py
+    python backend/benchmarks/search_profile.py --reviews 200000 --repeat 3
+
+Query times are the CPU side only: each posting-list Query is a DynamoDB
+round trip on top (run.py's "GET /insights/{brandId}/search?q=" scenario
+measures the whole request at its scales).
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+
+BRANDS, PRODUCTS = 50, 5_000          # as environment.SCALES["1m"]
+PAGE = 20
+
+
+def _size(item: dict) -> int:
+    """Approximate DynamoDB item size: names, strings, ~1 byte per 2 digits of numbers."""
+    size = 0
+    for name, value in item.items():
+        size += len(name)
+        if isinstance(value, str):
+            size += len(value.encode())
+        elif isinstance(value, list):
+            size += 3 + sum(1 + len(str(v)) // 2 + 1 for v in value)
+        else:
+            size += len(str(value)) // 2 + 1
+    return size
+
+
+class _BrandIndex:
+    """One brand's posting lists in memory, read as search_index.query_page reads the table.
+
+    Lists hold review ordinals (the brand's reviews in sort-key order); the
+    postings themselves, positions and all, are rebuilt when read.
+    """
+
+    def __init__(self, brand_id: str, reviews: list):
+        import search_index
+        self.search_index = search_index
+        self.reviews = sorted(reviews, key=lambda r: r["sk"])
+        self.sks = [r["sk"] for r in self.reviews]
+        self.lists: dict[str, list] = {}
+        for ordinal, review in enumerate(self.reviews):
+            for term in {term for term, _ in search_index.terms(review["message"])}:
+                self.lists.setdefault(f"{brand_id}#{term}", []).append(ordinal)
+        self.queries = self.read = self.units = 0
+
+    def fetch(self, term_key: str, upper: str, lower: str | None, limit: int) -> list:
+        self.queries += 1
+        ordinals = self.lists.get(term_key, [])
+        hi = bisect_left(ordinals, bisect_right(self.sks, upper))
+        lo = bisect_left(ordinals, bisect_left(self.sks, lower)) if lower else 0
+        page = []
+        for ordinal in reversed(ordinals[max(lo, hi - limit):hi]):
+            review = self.reviews[ordinal]
+            posting = self.search_index.postings(review)
+            page.append(posting[(term_key, review["sk"])])
+        size = sum(_size(p) for p in page)
+        self.read += len(page)
+        self.units += max(1, math.ceil(size / 4096)) * 0.5
+        return page
+
+
+def _generate(count: int, vocabulary: int, seed: int):
+    """(hot brand id, feedback items): seed_load reviews with filler words appended."""
+    import seed_load
+    start = datetime(2025, 1, 1)
+    brands = seed_load.build_brands(BRANDS, start)
+    products = seed_load.build_products(PRODUCTS, brands, seed, start)
+    cum_weights = seed_load.zipf_cum_weights(len(products), 1.1)
+    words = [f"w{rank:05d}" for rank in range(vocabulary)]
+    word_weights = seed_load.zipf_cum_weights(vocabulary, 1.0)
+    rng = random.Random(f"{seed}:filler")
+
+    def reviews():
+        for review in seed_load.generate_shard(0, 1, count, products, cum_weights, seed, start, 90):
+            filler = rng.choices(words, cum_weights=word_weights, k=rng.randint(5, 40))
+            review["message"] = f"{review['message']} {' '.join(filler)}"
+            yield review
+
+    return products[0]["brandId"], start, reviews()
+
+
+def _queries(start: datetime) -> list:
+    """(label, q, filters, date range) run against the busiest brand."""
+    week = (start + timedelta(days=30)).date(), (start + timedelta(days=36)).date()
+    return [
+        ("common word", "quality", {}, None),
+        ("phrase + word", '"build quality" poor', {}, None),
+        ("filler word, rank 50", "w00050", {}, None),
+        ("filler word, rank 5000", "w05000", {}, None),
+        ("two independent words", "w00100 w00200", {}, None),
+        ("common + rare word", "product w02000", {}, None),
+        ("word, rating=1", "delivery", {"rating": 1}, None),
+        ("word, 7 days", "quality", {}, week),
+        ("no match", "w00001 zzzz", {}, None),
+    ]
+
+
+def _bounds(window) -> tuple:
+    """(before, after) sort-key bounds of a date range, as get_insights sets them."""
+    if window is None:
+        return None, None
+    return (window[1] + timedelta(days=1)).isoformat(), window[0].isoformat()
+
+
+def _accept(filters: dict):
+    def accept(item) -> bool:
+        return all(int(item[field]) == value if field == "rating" else item[field] == value
+                   for field, value in filters.items())
+    return accept
+
+
+def _scan(reviews: list, clauses: list, filters: dict, window, search_index) -> int:
+    """Matches among every review of the brand, newest first, as the unindexed path finds them."""
+    before, after = _bounds(window)
+    accept = _accept(filters)
+    found = 0
+    for review in reviews:
+        if before and not (after <= review["sk"] < before):
+            continue
+        if accept(review) and search_index.matches(review["message"], clauses):
+            found += 1
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=20_000, help="filler words")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query (best is reported)")
+    parser.add_argument("--max-queries", type=int, default=40,
+                        help="posting-list Queries per page (get_insights SEARCH_MAX_QUERIES)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    environment.configure_process()
+    import review_analytics
+    import search_index
+
+    hot_brand, start, reviews = _generate(args.reviews, args.vocabulary, args.seed)
+    brand_reviews = []
+    postings = units = size = 0
+    build_s = 0.0
+    for review in reviews:
+        started = time.perf_counter()
+        items = search_index.postings(review)
+        build_s += time.perf_counter() - started
+        postings += len(items)
+        for item in items.values():
+            item_size = _size(item)
+            size += item_size
+            units += math.ceil(item_size / 1024)
+        if review["brandId"] == hot_brand:
+            brand_reviews.append({field: review[field] for field in (
+                "FeedbackId", "brandId", "productId", "timestamp", "rating", "sentiment", "message")})
+            brand_reviews[-1]["sk"] = review_analytics.key(review)["sk"]
+
+    print(f"build: {args.reviews:,} reviews, {postings:,} postings in {build_s:.1f}s CPU "
+          f"({args.reviews / build_s:,.0f} reviews/s)")
+    print(f"       {postings / args.reviews:.1f} postings/review, {size / postings:.0f} B/posting, "
+          f"{units / args.reviews:.1f} WCU/review ({units:,} WCU in all)")
+
+    index = _BrandIndex(hot_brand, brand_reviews)
+    newest_first = index.reviews[::-1]
+    scan_units = max(1, math.ceil(sum(len(r["message"]) + 150 for r in brand_reviews) / 4096)) * 0.5
+    print(f"\nqueries: brand {hot_brand}, {len(brand_reviews):,} reviews, {len(index.lists):,} posting lists; "
+          f"first page of {PAGE}")
+    print(f"{'query':<24}{'found':>7}{'Queries':>9}{'postings':>10}{'RCU':>7}{'ms':>9}"
+          f"{'all matches':>13}{'scan ms':>10}{'scan RCU':>10}")
+    for label, q, filters, window in _queries(start):
+        clauses = search_index.parse_query(q)
+        before, after = _bounds(window)
+        best = math.inf
+        for _ in range(args.repeat):
+            index.queries = index.read = 0
+            index.units = 0.0
+            started = time.perf_counter()
+            matches, resume = search_index.search(hot_brand, clauses, PAGE, before, False, after,
+                                                  accept=_accept(filters), max_queries=args.max_queries,
+                                                  fetch=index.fetch)
+            best = min(best, time.perf_counter() - started)
+        started = time.perf_counter()
+        total = _scan(newest_first, clauses, filters, window, search_index)
+        scan_s = time.perf_counter() - started
+        short = "*" if resume is not None and len(matches) < PAGE else ""
+        print(f"{label:<24}{len(matches):>6}{short:1}{index.queries:>9}{index.read:>10}{index.units:>7.1f}"
+              f"{best * 1000:>9.2f}{total:>13,}{scan_s * 1000:>10.0f}{scan_units:>10,.0f}")
+    print("\n* page cut short at --max-queries; next_cursor continues it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Topic sketches against exact counts, on synthetic reviews.
+
+Replays a stream of review inserts, edits and deletions for one scope, in
+batches as the analytics projector sees them, through topic_sketch.deltas()
+into a Sketch, and counts the same topics exactly alongside. Topics are
+drawn from a Zipf vocabulary and written in varying case, spacing and
+plural, so normalization is exercised too. After each trial it checks what
+topic_sketch documents:
+
+  * no estimate is below the true count,
+  * at most a fraction e^-DEPTH of topics is over by more than e/WIDTH * N,
+  * every topic mentioned in more than N/CANDIDATES reviews is a candidate,
+  * the top 5 served are the exact top 5, wherever the exact counts are
+    further apart than e/WIDTH * N,
+
+and exits non-zero if any fails.
+
+    python backend/benchmarks/topic_sketch_accuracy.py
+    python backend/benchmarks/topic_sketch_accuracy.py --trials 50 --reviews 100000
+"""
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+
+SCOPE_REVIEW = {"brandId": "brand-accuracy"}
+BATCH_SIZE = 100            # stream records per projector invocation
+TOP_N = 5
+
+
+def _variant(rng: random.Random, topic: str) -> str:
+    """One way a reviewer (or the model) might have written ``topic``."""
+    if rng.random() < 0.3:
+        topic += "s"
+    form = rng.random()
+    if form < 0.2:
+        topic = topic.upper()
+    elif form < 0.4:
+        topic = topic.title()
+    if rng.random() < 0.2:
+        topic = topic.replace(" ", "  ") + " "
+    return topic
+
+
+def _trial(rng: random.Random, reviews: int, vocabulary: int, delete_rate: float, edit_rate: float) -> dict:
+    import topic_sketch
+
+    canonical = [f"aspect {i:05d}" for i in range(vocabulary)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** 1.1 for rank in range(vocabulary)))
+
+    def topics_of():
+        picked = set(rng.choices(canonical, cum_weights=cum_weights, k=rng.randint(1, 4)))
+        return picked, [_variant(rng, t) for t in picked]
+
+    sketch = topic_sketch.Sketch()
+    exact: Counter = Counter()
+    live: dict[int, tuple] = {}
+    next_id = 0
+    pending: dict = {}
+    records = 0
+
+    def record(old, new):
+        nonlocal records
+        for review, sign in ((old, -1), (new, 1)):
+            if review:
+                for t in review[0]:
+                    exact[t] += sign
+        topic_sketch.merge(pending, topic_sketch.deltas(
+            {**SCOPE_REVIEW, "topics": old[1]} if old else None,
+            {**SCOPE_REVIEW, "topics": new[1]} if new else None,
+        ))
+        records += 1
+        if records % BATCH_SIZE == 0:
+            flush()
+
+    def flush():
+        nonlocal pending
+        for counter in pending.values():
+            counter = Counter({t: d for t, d in counter.items() if d})
+            if counter:
+                sketch.add(counter)
+        pending = {}
+
+    while next_id < reviews:
+        roll = rng.random()
+        if live and roll < delete_rate:
+            old = live.pop(rng.choice(list(live)))
+            record(old, None)
+        elif live and roll < delete_rate + edit_rate:
+            review_id = rng.choice(list(live))
+            old, live[review_id] = live[review_id], topics_of()
+            record(old, live[review_id])
+        else:
+            live[next_id] = topics_of()
+            record(None, live[next_id])
+            next_id += 1
+    flush()
+
+    total = sum(exact.values())
+    bound = math.e / topic_sketch.WIDTH * total
+    assert sketch.total == total, (sketch.total, total)
+    over = [t for t, c in exact.items() if sketch.estimate(t) - c > bound]
+    under = [t for t, c in exact.items() if sketch.estimate(t) < c]
+    heavy = [t for t, c in exact.items() if c > total / topic_sketch.CANDIDATES]
+    missing_heavy = [t for t in heavy if t not in sketch.top]
+
+    served = [row["topic"] for row in topic_sketch.ranked(sketch.top, TOP_N)]
+    ordered = exact.most_common(TOP_N + 1)
+    # the first k of the exact ranking are separated from the rest by more than the error
+    clear = [t for k, (t, c) in enumerate(ordered[:TOP_N])
+             if all(c - c2 > bound for _, c2 in ordered[k + 1:])]
+    misranked = [t for k, t in enumerate(clear) if k >= len(served) or served[k] != t]
+    recall = len(set(served) & {t for t, _ in ordered[:TOP_N]}) / min(TOP_N, len(ordered) or 1)
+
+    return {
+        "reviews": len(live), "mentions": total, "topics": len(exact), "bound": bound,
+        "under": under, "over": over, "missing_heavy": missing_heavy, "misranked": misranked,
+        "max_error": max((sketch.estimate(t) - c for t, c in exact.items()), default=0),
+        "recall": recall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--trials", type=int, default=12)
+    parser.add_argument("--reviews", type=int, default=20_000, help="reviews inserted per trial (largest)")
+    parser.add_argument("--vocabulary", type=int, default=3_000)
+    parser.add_argument("--delete-rate", type=float, default=0.1)
+    parser.add_argument("--edit-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    environment.configure_process()
+    import topic_sketch
+
+    over_allowed = math.exp(-topic_sketch.DEPTH)
+    failures = 0
+    print(f"{'reviews':>8}{'mentions':>10}{'topics':>8}{'bound':>8}{'max err':>9}"
+          f"{'over':>7}{'top-5 recall':>14}")
+    for trial in range(args.trials):
+        rng = random.Random(args.seed + trial)
+        # small scopes as well as large: a tenth, a third, all of --reviews
+        reviews = max(100, args.reviews // (10, 3, 1)[trial % 3])
+        result = _trial(rng, reviews, args.vocabulary, args.delete_rate, args.edit_rate)
+        over_fraction = len(result["over"]) / max(result["topics"], 1)
+        print(f"{result['reviews']:>8,}{result['mentions']:>10,}{result['topics']:>8,}"
+              f"{result['bound']:>8.1f}{result['max_error']:>9,}{over_fraction:>7.1%}{result['recall']:>14.0%}")
+        problems = []
+        if result["under"]:
+            problems.append(f"{len(result['under'])} topics under-estimated")
+        if over_fraction > over_allowed:
+            problems.append(f"{over_fraction:.1%} of topics over the bound (allowed {over_allowed:.1%})")
+        if result["missing_heavy"]:
+            problems.append(f"heavy hitters not candidates: {result['missing_heavy']}")
+        if result["misranked"]:
+            problems.append(f"clearly ranked topics served out of place: {result['misranked']}")
+        for problem in problems:
+            print(f"  FAIL {problem}")
+        failures += bool(problems)
+
+    print(f"\n{args.trials - failures}/{args.trials} trials within the documented bounds")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,47 @@
 import json
 import os
 import re
+import time
 from datetime import datetime, timezone
 
-import boto3
-from aws_xray_sdk.core import xray_recorder, patch_all
-
-# Patch boto3 for X-Ray tracing
-patch_all()
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+import bedrock_usage
+import dashboards
+import ddb_metrics
+import link_counters
+import metadata_cache
+import model_router
+import near_duplicates
+from product_summary import (
+    PROMPT_VERSION as PRODUCT_SUMMARY_PROMPT_VERSION,
+    ReviewSet,
+    build_prompt as build_product_summary_prompt,
+    summary_attributes,
+)
+
+# X-Ray patching is opt-in (XRAY_PATCH_MODULES)
+aws_clients.patch_tracing()
 
 # ---------------------------------------------------------------------------
 # Environment
 # ---------------------------------------------------------------------------
 FEEDBACK_TABLE = os.environ.get("DYNAMODB_TABLE_FEEDBACK", "reviewpulse-feedback")
 PRODUCTS_TABLE = os.environ.get("DYNAMODB_TABLE_PRODUCTS", "reviewpulse-products")
-BEDROCK_MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "anthropic.claude-3-haiku-20240307-v1:0")
-REGION = os.environ.get("AWS_REGION_NAME", "ca-central-1")
+PRODUCT_TIME_INDEX = "productId-timestamp-index"
 ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
-
-dynamodb = boto3.resource("dynamodb", region_name=REGION)
-feedback_tbl = dynamodb.Table(FEEDBACK_TABLE)
-products_tbl = dynamodb.Table(PRODUCTS_TABLE)
-bedrock = boto3.client("bedrock-runtime", region_name=REGION)
+# Reviews close to one of the product's analysed reviews reuse its analysis;
+# "false" sends every review to Bedrock
+NEAR_DUPLICATES = os.environ.get("AI_NEAR_DUPLICATES", "true").lower() == "true"
+# what a reused analysis is read back from
+_ANALYSIS_NAMES = {f"#{name}": name for name in (
+    "sentiment", "topics", "summary", "pros", "cons", "feature_requests", "ai_confidence",
+)}
+# what a product summary reads of each review (all of it in the product GSI)
+_SUMMARY_NAMES = {f"#{name}": name for name in (
+    "FeedbackId", "brandId", "timestamp", "rating", "sentiment", "message", "reviewText", "duplicate_of",
+)}
 
 
 # ---------------------------------------------------------------------------
@@ -35,6 +55,10 @@ def _unmarshall_dynamodb(record: dict) -> dict:
     return {k: deser.deserialize(v) for k, v in record.items()}
 
 
+# Bedrock usage is metered per prompt version; bump it with the prompt
+ANALYSIS_PROMPT_VERSION = "review-analysis-v1"
+
+
 def _build_prompt(review_text: str, rating) -> str:
     return f"""Analyze this product review and respond ONLY with valid JSON.
 
@@ -59,8 +83,15 @@ Rules:
 - Respond ONLY with JSON, no other text"""
 
 
-def _invoke_bedrock(prompt: str) -> dict:
-    """Call Bedrock Claude (Messages API) and return parsed JSON response."""
+def _invoke_bedrock(prompt: str, call_type: str, brand_id: str, prompt_version: str,
+                    input_chars: int | None = None) -> dict:
+    """Call Bedrock Claude (Messages API) and return parsed JSON response.
+
+    The model is chosen by model_router (from ``input_chars``, the prompt's
+    length by default); a throttled or unavailable model fails over to the
+    router's next candidate. Every call is metered (bedrock_usage) under the
+    brand it was made for.
+    """
     body = json.dumps({
         "anthropic_version": "bedrock-2023-05-31",
         "max_tokens": 500,
@@ -70,19 +101,49 @@ def _invoke_bedrock(prompt: str) -> dict:
             {"role": "user", "content": prompt}
         ],
     })
+    input_chars = len(prompt) if input_chars is None else input_chars
+    models, reason = model_router.route(call_type, input_chars)
 
     # X-Ray subsegment around Bedrock invocation
     subsegment = xray_recorder.begin_subsegment("BedrockInvokeModel")
     try:
-        subsegment.put_annotation("model_id", BEDROCK_MODEL_ID)
+        subsegment.put_annotation("call_type", call_type)
         subsegment.put_metadata("prompt_length", len(body))
-        response = bedrock.invoke_model(
-            modelId=BEDROCK_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=body,
-        )
-        response_body = json.loads(response["body"].read())
+        subsegment.put_metadata("route", {"candidates": models, "reason": reason})
+        for attempt, model_id in enumerate(models):
+            started = time.perf_counter()
+            try:
+                response = aws_clients.client("bedrock-runtime").invoke_model(
+                    modelId=model_id,
+                    contentType="application/json",
+                    accept="application/json",
+                    body=body,
+                )
+                response_body = json.loads(response["body"].read())
+            except aws_clients.DeadlineExceeded:
+                raise  # no call was made: nothing to meter, nothing to fail over
+            except Exception as exc:
+                latency_ms = (time.perf_counter() - started) * 1000
+                failover = model_router.fails_over(exc)
+                if failover:
+                    model_router.observe(model_id, latency_ms, throttled=True)
+                bedrock_usage.record(call_type, model_id, brand_id, prompt_version, None,
+                                     latency_ms, bedrock_usage.retries_of(exc), error=True)
+                if not failover or attempt == len(models) - 1:
+                    raise
+                print(f"[ROUTE FAILOVER] {call_type}: {model_id} unavailable after {latency_ms:.0f} ms "
+                      f"({exc}), trying {models[attempt + 1]}")
+                continue
+            latency_ms = (time.perf_counter() - started) * 1000
+            model_router.observe(model_id, latency_ms)
+            break
+        usage = response_body.get("usage") or {}
+        bedrock_usage.record(call_type, model_id, brand_id, prompt_version, usage,
+                             latency_ms, bedrock_usage.retries_of(response))
+        print(f"[ROUTE] {call_type}: chars={input_chars} model={model_id} ({reason}) "
+              f"latency_ms={latency_ms:.0f} failovers={attempt}")
+        subsegment.put_annotation("model_id", model_id)
+        subsegment.put_annotation("failovers", attempt)
         # Messages API returns content as a list of blocks
         completion = ""
         for block in response_body.get("content", []):
@@ -95,6 +156,8 @@ def _invoke_bedrock(prompt: str) -> dict:
         print(f"[BEDROCK RESPONSE]\n{completion}")
 
         subsegment.put_metadata("response_length", len(completion))
+        subsegment.put_metadata("input_tokens", usage.get("input_tokens"))
+        subsegment.put_metadata("output_tokens", usage.get("output_tokens"))
     except Exception as exc:
         subsegment.add_exception(exc, stack=True)
         raise
@@ -109,16 +172,24 @@ def _invoke_bedrock(prompt: str) -> dict:
     return json.loads(json_match.group())
 
 
-def _update_feedback(feedback_id: str, ai_result: dict) -> None:
-    """Write AI analysis fields back to the feedback record."""
+def _update_feedback(feedback_id: str, ai_result: dict, duplicate: tuple | None = None) -> None:
+    """Write AI analysis fields back to the feedback record.
+
+    ``duplicate`` ((FeedbackId, similarity)) flags an analysis reused from
+    a near-duplicate review.
+    """
     now_iso = datetime.now(timezone.utc).isoformat()
+    flag, flag_values = "", {}
+    if duplicate is not None:
+        flag = ", duplicate_of = :dup, duplicate_similarity = :sim"
+        flag_values = {":dup": duplicate[0], ":sim": str(round(duplicate[1], 3))}
 
     with xray_recorder.in_subsegment("dynamodb-update-feedback") as seg:
         seg.put_annotation("table", FEEDBACK_TABLE)
         seg.put_annotation("operation", "update_item")
         seg.put_annotation("feedback_id", feedback_id)
         seg.put_annotation("sentiment", ai_result.get("sentiment", "neutral"))
-        feedback_tbl.update_item(
+        aws_clients.table(FEEDBACK_TABLE).update_item(
             Key={"FeedbackId": feedback_id},
             UpdateExpression=(
                 "SET sentiment = :sent, "
@@ -128,7 +199,7 @@ def _update_feedback(feedback_id: str, ai_result: dict) -> None:
                 "cons = :con, "
                 "feature_requests = :fr, "
                 "ai_confidence = :conf, "
-                "ai_processed_at = :ts"
+                "ai_processed_at = :ts" + flag
             ),
             ExpressionAttributeValues={
                 ":sent": ai_result.get("sentiment", "neutral"),
@@ -139,6 +210,7 @@ def _update_feedback(feedback_id: str, ai_result: dict) -> None:
                 ":fr": ai_result.get("feature_requests", []),
                 ":conf": str(ai_result.get("confidence", 0)),
                 ":ts": now_iso,
+                **flag_values,
             },
         )
 
@@ -151,7 +223,7 @@ def _mark_unprocessed(feedback_id: str, error_msg: str) -> None:
         seg.put_annotation("operation", "update_item")
         seg.put_annotation("feedback_id", feedback_id)
         seg.put_annotation("error_type", "ai_processing_failed")
-        feedback_tbl.update_item(
+        aws_clients.table(FEEDBACK_TABLE).update_item(
             Key={"FeedbackId": feedback_id},
             UpdateExpression=(
                 "SET sentiment = :sent, ai_processed_at = :ts, ai_error = :err"
@@ -168,104 +240,68 @@ def _mark_unprocessed(feedback_id: str, error_msg: str) -> None:
 # Product-level AI summary generation
 # ---------------------------------------------------------------------------
 
-def _full_scan(table, filter_expr=None):
-    """Paginated scan that returns ALL items."""
-    from boto3.dynamodb.conditions import Attr
-    kwargs = {}
-    if filter_expr is not None:
-        kwargs["FilterExpression"] = filter_expr
+def _product_reviews(product_id: str, brand_id: str) -> list:
+    """Every review of one product, from the productId-timestamp-index GSI."""
+    from boto3.dynamodb.conditions import Attr, Key
+    kwargs = {
+        "IndexName": PRODUCT_TIME_INDEX,
+        "KeyConditionExpression": Key("productId").eq(product_id),
+        # productIds are only unique within a brand
+        "FilterExpression": Attr("brandId").eq(brand_id),
+        "ProjectionExpression": ", ".join(_SUMMARY_NAMES),
+        "ExpressionAttributeNames": _SUMMARY_NAMES,
+    }
     items = []
-    while True:
-        resp = table.scan(**kwargs)
-        items.extend(resp.get("Items", []))
-        last_key = resp.get("LastEvaluatedKey")
-        if not last_key:
-            break
-        kwargs["ExclusiveStartKey"] = last_key
+    with xray_recorder.in_subsegment("dynamodb-query-product-reviews") as seg:
+        seg.put_annotation("table", FEEDBACK_TABLE)
+        seg.put_annotation("operation", "paginated_query")
+        while True:
+            resp = aws_clients.table(FEEDBACK_TABLE).query(**kwargs)
+            items.extend(resp.get("Items", []))
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+        seg.put_metadata("item_count", len(items))
     return items
 
 
-def _build_product_summary_prompt(reviews: list, product_name: str) -> str:
-    """Build a prompt that summarizes ALL reviews for a product."""
-    review_texts = []
-    for i, r in enumerate(reviews[:30], 1):  # Cap at 30 reviews for token limits
-        text = r.get("message", r.get("reviewText", ""))
-        rating = r.get("rating", "?")
-        sentiment = r.get("sentiment", "unknown")
-        review_texts.append(f"Review {i} (Rating: {rating}/5, Sentiment: {sentiment}): \"{text}\"")
-
-    reviews_block = "\n".join(review_texts)
-    total = len(reviews)
-    avg_rating = round(sum(float(r.get("rating", 0)) for r in reviews) / total, 1) if total else 0
-
-    return f"""You are a product analytics expert. Analyze ALL {total} customer reviews for the product "{product_name}" and provide a comprehensive summary.
-
-Product: {product_name}
-Total Reviews: {total}
-Average Rating: {avg_rating}/5
-
-Reviews:
-{reviews_block}
-
-Respond ONLY with valid JSON using this exact structure:
-{{
-  "overall_summary": "A 2-3 sentence summary of what customers overall think about this product",
-  "key_strengths": ["strength1", "strength2", "strength3"],
-  "key_weaknesses": ["weakness1", "weakness2"],
-  "recommendations": ["actionable recommendation 1", "actionable recommendation 2", "actionable recommendation 3"],
-  "customer_sentiment_overview": "One sentence describing the overall customer mood/satisfaction"
-}}
-
-Rules:
-- overall_summary: objective, data-driven, 2-3 sentences max
-- key_strengths: top 2-4 things customers love
-- key_weaknesses: top 1-3 things customers dislike (empty array if none)
-- recommendations: 2-4 actionable suggestions for the business to improve
-- customer_sentiment_overview: one concise sentence
-- Respond ONLY with JSON, no other text"""
-
-
 def _generate_product_summary(product_id: str, brand_id: str) -> None:
     """Fetch all reviews for a product, generate AI summary, store in products table."""
-    from boto3.dynamodb.conditions import Attr
-
     with xray_recorder.in_subsegment("generate-product-summary") as seg:
         seg.put_annotation("product_id", product_id)
         seg.put_annotation("brand_id", brand_id)
 
         try:
             # Fetch all processed reviews for this product
-            reviews = _full_scan(
-                feedback_tbl,
-                Attr("productId").eq(product_id) & Attr("brandId").eq(brand_id)
-            )
+            reviews = _product_reviews(product_id, brand_id)
 
             # Only generate if we have at least 1 review with AI processing done
-            processed_reviews = [
-                r for r in reviews
-                if r.get("sentiment") not in ("pending", "unprocessed", None)
-            ]
+            review_set = ReviewSet.from_reviews(reviews)
 
-            if not processed_reviews:
+            if not review_set.count:
                 print(f"[PRODUCT SUMMARY] No processed reviews for product={product_id}, skipping")
                 return
 
             # Get product name
             try:
-                prod_resp = products_tbl.get_item(
-                    Key={"productId": product_id, "brandId": brand_id}
-                )
-                product_name = prod_resp.get("Item", {}).get("productName", product_id)
+                prod_item = metadata_cache.get_product(brand_id, product_id) or {}
             except Exception:
-                product_name = product_id
+                prod_item = {}
+            product_name = prod_item.get("productName", product_id)
+
+            if review_set.matches(prod_item):
+                print(f"[PRODUCT SUMMARY] Review set unchanged for product={product_id}, skipping")
+                return
 
-            prompt = _build_product_summary_prompt(processed_reviews, product_name)
-            ai_result = _invoke_bedrock(prompt)
+            prompt = build_product_summary_prompt(review_set, product_name)
+            ai_result = _invoke_bedrock(prompt, "product_summary", brand_id, PRODUCT_SUMMARY_PROMPT_VERSION)
 
             now_iso = datetime.now(timezone.utc).isoformat()
+            attrs = summary_attributes(ai_result, review_set, now_iso)
 
             # Store summary in products table
-            products_tbl.update_item(
+            aws_clients.table(PRODUCTS_TABLE).update_item(
                 Key={"productId": product_id, "brandId": brand_id},
                 UpdateExpression=(
                     "SET ai_summary = :summary, "
@@ -274,109 +310,309 @@ def _generate_product_summary(product_id: str, brand_id: str) -> None:
                     "ai_recommendations = :recs, "
                     "ai_sentiment_overview = :overview, "
                     "ai_summary_updated_at = :ts, "
-                    "ai_summary_review_count = :cnt"
+                    "ai_summary_review_count = :cnt, "
+                    "ai_summary_review_hash = :hash"
                 ),
                 ExpressionAttributeValues={
-                    ":summary": ai_result.get("overall_summary", ""),
-                    ":strengths": ai_result.get("key_strengths", []),
-                    ":weaknesses": ai_result.get("key_weaknesses", []),
-                    ":recs": ai_result.get("recommendations", []),
-                    ":overview": ai_result.get("customer_sentiment_overview", ""),
-                    ":ts": now_iso,
-                    ":cnt": len(processed_reviews),
+                    ":summary": attrs["ai_summary"],
+                    ":strengths": attrs["ai_strengths"],
+                    ":weaknesses": attrs["ai_weaknesses"],
+                    ":recs": attrs["ai_recommendations"],
+                    ":overview": attrs["ai_sentiment_overview"],
+                    ":ts": attrs["ai_summary_updated_at"],
+                    ":cnt": attrs["ai_summary_review_count"],
+                    ":hash": attrs["ai_summary_review_hash"],
                 },
             )
 
+            # The cached record now carries the old summary
+            metadata_cache.invalidate_product(brand_id, product_id)
+
             print(f"[PRODUCT SUMMARY] Updated product={product_id} with AI summary "
-                  f"({len(processed_reviews)} reviews)")
+                  f"({review_set.count} reviews)")
 
         except Exception as exc:
             print(f"[PRODUCT SUMMARY ERROR] product={product_id}: {exc}")
             seg.add_exception(exc, stack=True)
 
 
+def _reused_analysis(feedback_id: str) -> dict | None:
+    """The analysis stored on a review, as _invoke_bedrock returns one (None if it has none)."""
+    with xray_recorder.in_subsegment("dynamodb-get-analysis") as seg:
+        seg.put_annotation("table", FEEDBACK_TABLE)
+        seg.put_annotation("operation", "get_item")
+        item = aws_clients.table(FEEDBACK_TABLE).get_item(
+            Key={"FeedbackId": feedback_id},
+            ProjectionExpression=", ".join(_ANALYSIS_NAMES),
+            ExpressionAttributeNames=_ANALYSIS_NAMES,
+        ).get("Item")
+    if not item or item.get("sentiment") in ("pending", "unprocessed", None):
+        return None
+    return {
+        "sentiment": item["sentiment"],
+        "confidence": item.get("ai_confidence", 0),
+        **{field: item.get(field, []) for field in ("topics", "pros", "cons", "feature_requests")},
+        "summary": item.get("summary", ""),
+    }
+
+
+def _near_duplicate(item: dict, signature) -> tuple | None:
+    """(FeedbackId, similarity, analysis) of an analysed review of the same product this one duplicates."""
+    if signature is None or not (item.get("brandId") and item.get("productId")):
+        return None
+    scope_key = link_counters.product_key(item["brandId"], item["productId"])
+    with xray_recorder.in_subsegment("near-duplicate-lookup") as seg:
+        try:
+            match = near_duplicates.find(scope_key, signature, item.get("rating", 3))
+            analysis = _reused_analysis(match[0]) if match else None
+        except aws_clients.DeadlineExceeded:
+            raise
+        except Exception as exc:
+            # the lookup only saves a call; Bedrock can still answer
+            print(f"[DEDUPE ERROR] FeedbackId={item.get('FeedbackId', '')}: {exc}")
+            seg.add_exception(exc, stack=True)
+            return None
+        seg.put_annotation("duplicate", analysis is not None)
+    return (*match, analysis) if analysis is not None else None
+
+
+def _remember(item: dict, signature) -> None:
+    """File a Bedrock-analysed review for later near-duplicates of it to find."""
+    if signature is None or not (item.get("brandId") and item.get("productId")):
+        return
+    try:
+        near_duplicates.remember(link_counters.product_key(item["brandId"], item["productId"]),
+                                 item["FeedbackId"], item.get("rating", 3), signature)
+    except aws_clients.DeadlineExceeded:
+        raise
+    except Exception as exc:
+        print(f"[DEDUPE ERROR] FeedbackId={item['FeedbackId']}: could not file signature: {exc}")
+
+
+def _analyse_review(item: dict, retry_throttled: bool = False) -> str:
+    """Run Bedrock analysis for one feedback item.
+
+    A near-duplicate of a review of the same product that has been analysed
+    (near_duplicates) reuses that analysis instead and is flagged with
+    duplicate_of. Returns "processed", "duplicate", "error" or "skipped".
+
+    With ``retry_throttled``, a review Bedrock throttled on every candidate
+    model is left pending and "retry" is returned, for the caller to have it
+    redelivered.
+    """
+    feedback_id = item.get("FeedbackId", "")
+    review_text = item.get("reviewText", item.get("message", ""))
+    rating = item.get("rating", 3)
+
+    if not feedback_id:
+        print("[SKIP] Missing FeedbackId")
+        return "skipped"
+
+    if not review_text:
+        print(f"[SKIP] FeedbackId={feedback_id} — empty review text")
+        _mark_unprocessed(feedback_id, "Empty review text")
+        return "error"
+
+    print(f"[PROCESS] FeedbackId={feedback_id}, rating={rating}, "
+          f"text_length={len(review_text)}")
+
+    with xray_recorder.in_subsegment("process-single-review") as rec_seg:
+        rec_seg.put_annotation("feedback_id", feedback_id)
+        rec_seg.put_annotation("rating", int(rating))
+        rec_seg.put_metadata("text_length", len(review_text))
+        try:
+            signature = near_duplicates.signature(review_text) if NEAR_DUPLICATES else None
+            duplicate = _near_duplicate(item, signature)
+            if duplicate is not None:
+                original, score, ai_result = duplicate
+                print(f"[DUPLICATE] FeedbackId={feedback_id}: reusing the analysis of "
+                      f"{original} (similarity {score:.2f})")
+                _update_feedback(feedback_id, ai_result, (original, score))
+                rec_seg.put_annotation("duplicate_of", original)
+                return "duplicate"
+
+            prompt = _build_prompt(review_text, rating)
+            ai_result = _invoke_bedrock(prompt, "review_analysis", item.get("brandId", ""),
+                                        ANALYSIS_PROMPT_VERSION, input_chars=len(review_text))
+
+            print(f"[AI RESULT] FeedbackId={feedback_id}: "
+                  f"sentiment={ai_result.get('sentiment')}, "
+                  f"topics={ai_result.get('topics')}")
+
+            _update_feedback(feedback_id, ai_result)
+            rec_seg.put_annotation("sentiment", ai_result.get("sentiment", "unknown"))
+            _remember(item, signature)
+            return "processed"
+
+        except aws_clients.DeadlineExceeded:
+            # Leave the review pending and let the batch be retried
+            rec_seg.put_annotation("deadline_exceeded", True)
+            raise
+        except Exception as exc:
+            error_msg = str(exc)
+            if retry_throttled and model_router.fails_over(exc):
+                print(f"[THROTTLED] FeedbackId={feedback_id}: left pending for a retry: {error_msg}")
+                rec_seg.put_annotation("throttled", True)
+                return "retry"
+            print(f"[ERROR] FeedbackId={feedback_id}: {error_msg}")
+            rec_seg.add_exception(exc, stack=True)
+            _mark_unprocessed(feedback_id, error_msg)
+            return "error"
+
+
+def _load_feedback(feedback_ids: list) -> list:
+    """BatchGetItem feedback items queued on the low-priority lane."""
+    items = []
+    with xray_recorder.in_subsegment("dynamodb-batch-get-feedback") as seg:
+        seg.put_annotation("table", FEEDBACK_TABLE)
+        seg.put_annotation("operation", "batch_get_item")
+        seg.put_metadata("key_count", len(feedback_ids))
+        for start in range(0, len(feedback_ids), 100):
+            request = {FEEDBACK_TABLE: {
+                "Keys": [{"FeedbackId": fid} for fid in feedback_ids[start:start + 100]]
+            }}
+            while request:
+                resp = aws_clients.dynamodb().batch_get_item(RequestItems=request)
+                items.extend(resp.get("Responses", {}).get(FEEDBACK_TABLE, []))
+                request = resp.get("UnprocessedKeys") or None
+    return items
+
+
+def _handle_low_priority(records: list) -> dict:
+    """SQS low-priority lane: bulk-imported reviews, analysed in the background.
+
+    Product summaries are regenerated once per product per batch rather than
+    once per review. Reviews Bedrock throttled stay pending, and the messages
+    that carried them are returned in ``failed`` (messageIds) for SQS to
+    redeliver; their other reviews are skipped then, as already analysed.
+    """
+    feedback_ids = []
+    messages: dict[str, list] = {}
+    for record in records:
+        for feedback_id in json.loads(record.get("body") or "{}").get("feedbackIds", []):
+            feedback_ids.append(feedback_id)
+            messages.setdefault(feedback_id, []).append(record.get("messageId", ""))
+    feedback_ids = list(dict.fromkeys(feedback_ids))
+    counts = {"total": len(feedback_ids), "processed": 0, "duplicates": 0, "errors": 0,
+              "failed": []}
+
+    touched = set()
+    failed = set()
+    for item in _load_feedback(feedback_ids):
+        if item.get("sentiment") != "pending":
+            continue  # already analysed (re-queued by a resumed import)
+        outcome = _analyse_review(item, retry_throttled=True)
+        if outcome == "retry":
+            failed.update(messages.get(item["FeedbackId"], []))
+        elif outcome == "processed":
+            counts["processed"] += 1
+            if item.get("productId") and item.get("brandId"):
+                touched.add((item["productId"], item["brandId"]))
+        elif outcome == "duplicate":
+            # nothing new for the product summary to say
+            counts["processed"] += 1
+            counts["duplicates"] += 1
+        elif outcome == "error":
+            counts["errors"] += 1
+
+    for p_id, b_id in touched:
+        _generate_product_summary(p_id, b_id)
+    dashboards.data_changed({(b_id, p_id) for p_id, b_id in touched})
+    counts["failed"] = sorted(failed)
+    return counts
+
+
 # ===========================================================================
-# Lambda entry point — DynamoDB Streams trigger
+# Lambda entry point — DynamoDB Streams trigger, or the SQS low-priority lane
 # ===========================================================================
 def lambda_handler(event, context):
+    aws_clients.start_deadline(context)
     records = event.get("Records", [])
+    total = len(records)
     processed = 0
+    duplicates = 0
     errors = 0
+    failed = None  # messageIds for SQS to redeliver (low-priority lane only)
 
     with xray_recorder.in_subsegment("ai-processor-handler") as handler_seg:
         handler_seg.put_annotation("function", "ai-processor")
         handler_seg.put_annotation("environment", ENVIRONMENT)
         handler_seg.put_annotation("total_records", len(records))
+        ddb_metrics.begin_request("ai-processor", route="stream")
+        bedrock_usage.begin_request("ai-processor")
 
-        for record in records:
-            event_name = record.get("eventName", "")
-
-            # Only process INSERT events
-            if event_name != "INSERT":
-                print(f"[SKIP] eventName={event_name}, not INSERT")
-                continue
-
-            new_image = record.get("dynamodb", {}).get("NewImage", {})
-            if not new_image:
-                print("[SKIP] No NewImage in stream record")
-                continue
-
-            item = _unmarshall_dynamodb(new_image)
-            feedback_id = item.get("FeedbackId", "")
-            review_text = item.get("reviewText", item.get("message", ""))
-            rating = item.get("rating", 3)
-
-            if not feedback_id:
-                print("[SKIP] Missing FeedbackId")
-                continue
-
-            if not review_text:
-                print(f"[SKIP] FeedbackId={feedback_id} — empty review text")
-                _mark_unprocessed(feedback_id, "Empty review text")
-                errors += 1
-                continue
-
-            print(f"[PROCESS] FeedbackId={feedback_id}, rating={rating}, "
-                  f"text_length={len(review_text)}")
-
-            with xray_recorder.in_subsegment("process-single-review") as rec_seg:
-                rec_seg.put_annotation("feedback_id", feedback_id)
-                rec_seg.put_annotation("rating", int(rating))
-                rec_seg.put_metadata("text_length", len(review_text))
-                try:
-                    prompt = _build_prompt(review_text, rating)
-                    ai_result = _invoke_bedrock(prompt)
-
-                    print(f"[AI RESULT] FeedbackId={feedback_id}: "
-                          f"sentiment={ai_result.get('sentiment')}, "
-                          f"topics={ai_result.get('topics')}")
-
-                    _update_feedback(feedback_id, ai_result)
-                    rec_seg.put_annotation("sentiment", ai_result.get("sentiment", "unknown"))
+        # usage is flushed however the batch ends: a failed batch is retried,
+        # but the Bedrock calls it made have been paid for
+        try:
+            if records and records[0].get("eventSource") == "aws:sqs":
+                handler_seg.put_annotation("lane", "low")
+                ddb_metrics.set_route("sqs-low-priority")
+                counts = _handle_low_priority(records)
+                total, processed, errors = counts["total"], counts["processed"], counts["errors"]
+                duplicates, failed = counts["duplicates"], counts["failed"]
+                records = []
+
+            # The reviews themselves reach the dashboards through the analytics
+            # projector; the product summaries regenerated below are handled here,
+            # once per batch, at the end
+            changed = set()
+
+            for record in records:
+                event_name = record.get("eventName", "")
+
+                # Only process INSERT events
+                if event_name != "INSERT":
+                    print(f"[SKIP] eventName={event_name}, not INSERT")
+                    continue
+
+                new_image = record.get("dynamodb", {}).get("NewImage", {})
+                if not new_image:
+                    print("[SKIP] No NewImage in stream record")
+                    continue
+
+                item = _unmarshall_dynamodb(new_image)
+
+                # Bulk imports are analysed from the SQS low-priority lane instead
+                if item.get("aiLane") == "low":
+                    print(f"[SKIP] FeedbackId={item.get('FeedbackId', '')} queued on low-priority lane")
+                    continue
+
+                outcome = _analyse_review(item)
+                if outcome == "processed":
                     processed += 1
-
                     # After processing individual review, regenerate product-level AI summary
                     p_id = item.get("productId", "")
                     b_id = item.get("brandId", "")
                     if p_id and b_id:
                         _generate_product_summary(p_id, b_id)
-
-                except Exception as exc:
-                    error_msg = str(exc)
-                    print(f"[ERROR] FeedbackId={feedback_id}: {error_msg}")
-                    rec_seg.add_exception(exc, stack=True)
-                    _mark_unprocessed(feedback_id, error_msg)
+                        changed.add((b_id, p_id))
+                elif outcome == "duplicate":
+                    # its product summary waits for the next review with something new
+                    processed += 1
+                    duplicates += 1
+                elif outcome == "error":
                     errors += 1
 
-        handler_seg.put_metadata("processed", processed)
-        handler_seg.put_metadata("errors", errors)
-        handler_seg.put_metadata("skipped", len(records) - processed - errors)
+            dashboards.data_changed(changed)
+
+            handler_seg.put_metadata("processed", processed)
+            handler_seg.put_metadata("duplicates", duplicates)
+            handler_seg.put_metadata("errors", errors)
+            handler_seg.put_metadata("skipped", total - processed - errors)
+        finally:
+            bedrock_usage.flush(handler_seg)
+            ddb_metrics.flush(handler_seg)
 
     summary = {
-        "total_records": len(records),
+        "total_records": total,
         "processed": processed,
+        "duplicates": duplicates,
         "errors": errors,
-        "skipped": len(records) - processed - errors,
+        "skipped": total - processed - errors,
     }
+    if failed is not None:
+        # ReportBatchItemFailures: only these messages go back on the queue
+        summary["retried"] = len(failed)
+        summary["batchItemFailures"] = [{"itemIdentifier": message_id} for message_id in failed]
     print(f"[DONE] {json.dumps(summary)}")
     return summary
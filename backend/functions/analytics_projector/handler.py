@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+
+from boto3.dynamodb.types import TypeDeserializer
+from aws_xray_sdk.core import xray_recorder
+
+import aspect_matrix
+import aws_clients
+import dashboards
+import ddb_metrics
+import recent_activity
+import review_analytics
+import search_index
+import topic_sketch
+
+# X-Ray patching is opt-in (XRAY_PATCH_MODULES)
+aws_clients.patch_tracing()
+
+# ---------------------------------------------------------------------------
+# Environment
+# ---------------------------------------------------------------------------
+FEEDBACK_TABLE = os.environ.get("DYNAMODB_TABLE_FEEDBACK", "reviewpulse-feedback")
+ANALYTICS_TABLE = review_analytics.ANALYTICS_TABLE
+RECENT_ACTIVITY_TABLE = recent_activity.RECENT_ACTIVITY_TABLE
+TOPIC_SKETCHES_TABLE = topic_sketch.TOPIC_SKETCHES_TABLE
+ASPECT_MATRIX_TABLE = aspect_matrix.ASPECT_MATRIX_TABLE
+SEARCH_INDEX_TABLE = search_index.SEARCH_INDEX_TABLE
+ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
+
+# a rebuild stops scanning this long before the deadline and reports where it got to
+REBUILD_MARGIN_S = 10.0
+REBUILD_PAGE_SIZE = 500     # reviews per scan page (each is one put)
+# a rebuild writes what it has counted once it holds this many topic-sketch
+# and aspect-matrix cells
+REBUILD_MAX_COUNTS = 50_000
+
+_deser = TypeDeserializer()
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _unmarshall_dynamodb(record: dict) -> dict:
+    """Convert DynamoDB stream image (typed map) to plain dict."""
+    return {k: _deser.deserialize(v) for k, v in record.items()}
+
+
+def _scope(narrow: dict) -> tuple:
+    return narrow["brandId"], narrow.get("productId", "")
+
+
+def _batch_id(records: list) -> str:
+    """Id of a stream batch; a retried batch comes back with the same records."""
+    digest = hashlib.sha256("\n".join(r.get("eventID", "") for r in records).encode())
+    return digest.hexdigest()[:16]
+
+
+def _project_record(record: dict, writes: dict, recent: dict, postings: dict, changed: set,
+                    topics: dict, aspects: dict) -> None:
+    """Queue what one feedback stream record calls for.
+
+    ``writes`` maps each analytics key to its last pending write (an item to
+    put, or None to delete), so a review changed several times in one batch
+    is written once. ``recent`` does the same per recent-activity buffer
+    (scope key -> FeedbackId -> entry or None), and ``postings`` per
+    search-index posting ((termKey, sk) -> item or None). ``topics`` and
+    ``aspects`` collect the record's count changes, taken from its own old
+    and new images so that a retried batch counts the same again (apply()
+    then skips it by batch id). Edits that change neither the narrow fields,
+    the text nor what the recent lists show write nothing.
+    """
+    event_name = record.get("eventName", "")
+    images = record.get("dynamodb", {})
+    seq = images.get("SequenceNumber", "0")
+    old_review = _unmarshall_dynamodb(images.get("OldImage", {}))
+    new_review = {}
+    if event_name in ("INSERT", "MODIFY"):
+        new_review = _unmarshall_dynamodb(images.get("NewImage", {}))
+
+    old = review_analytics.item(old_review)
+    new = review_analytics.item(new_review)
+    if new != old:
+        if old is not None and (new is None or new["sk"] != old["sk"] or new["brandId"] != old["brandId"]):
+            writes[(old["brandId"], old["sk"])] = None
+            changed.add(_scope(old))
+        if new is not None:
+            writes[(new["brandId"], new["sk"])] = new
+            changed.add(_scope(new))
+        _count([(old, new)], topics, aspects)
+    postings.update(search_index.changes(old_review, new_review))
+
+    old_entry = recent_activity.entry(old_review, seq)
+    new_entry = recent_activity.entry(new_review, seq)
+    if recent_activity.same(old_entry, new_entry):
+        return
+    # a review that moved (another product, say) leaves the buffers it was in
+    if old_entry is not None:
+        for key in recent_activity.scope_keys(old_review):
+            recent.setdefault(key, {})[old_entry["FeedbackId"]] = None
+        changed.add((old_review.get("brandId", ""), old_review.get("productId", "")))
+    if new_entry is not None:
+        for key in recent_activity.scope_keys(new_review):
+            recent.setdefault(key, {})[new_entry["FeedbackId"]] = new_entry
+        changed.add((new_review.get("brandId", ""), new_review.get("productId", "")))
+
+
+def _write(writes: dict) -> list:
+    """Apply the pending puts and deletes: (item replaced, item written) for each.
+
+    One request per item, each returning the item it replaced. A rebuild
+    counts those changes, so rewriting items that are already there counts
+    nothing twice. (The stream counts from its records instead: a batch
+    retried after a later write failed finds its items already written.)
+    """
+    table = aws_clients.table(ANALYTICS_TABLE)
+    changes = []
+    with xray_recorder.in_subsegment("dynamodb-write-analytics") as seg:
+        seg.put_annotation("table", ANALYTICS_TABLE)
+        seg.put_annotation("operation", "put_item")
+        seg.put_metadata("write_count", len(writes))
+        for (brand_id, sk), narrow in writes.items():
+            if narrow is None:
+                resp = table.delete_item(Key={"brandId": brand_id, "sk": sk}, ReturnValues="ALL_OLD")
+            else:
+                resp = table.put_item(Item=narrow, ReturnValues="ALL_OLD")
+            changes.append((resp.get("Attributes"), narrow))
+    return changes
+
+
+def _count(changes: list, topics: dict, aspects: dict) -> None:
+    """Add what the analytics item changes do to the pending topic and aspect counts."""
+    for old, new in changes:
+        topic_sketch.merge(topics, topic_sketch.deltas(old, new))
+        aspect_matrix.merge(aspects, aspect_matrix.deltas(old, new))
+
+
+def _write_counts(topics: dict, aspects: dict, batch: str | None = None) -> None:
+    """Add the pending counts to the topic sketches and aspect matrices (once per ``batch``)."""
+    with xray_recorder.in_subsegment("dynamodb-write-topic-sketches") as seg:
+        seg.put_annotation("table", TOPIC_SKETCHES_TABLE)
+        seg.put_metadata("scope_count", len(topics))
+        topic_sketch.apply_all(topics, batch)
+    with xray_recorder.in_subsegment("dynamodb-write-aspect-matrices") as seg:
+        seg.put_annotation("table", ASPECT_MATRIX_TABLE)
+        seg.put_metadata("month_count", len(aspects))
+        aspect_matrix.apply_all(aspects, batch)
+
+
+def _write_recent(recent: dict) -> None:
+    """Merge the pending entries into their recent-activity buffers."""
+    with xray_recorder.in_subsegment("dynamodb-write-recent-activity") as seg:
+        seg.put_annotation("table", RECENT_ACTIVITY_TABLE)
+        seg.put_metadata("scope_count", len(recent))
+        for scope_key, changes in recent.items():
+            recent_activity.apply(scope_key, changes)
+
+
+def _rebuild(event: dict) -> dict:
+    """Copy every feedback item into the analytics table, the recent-activity
+    buffers, the search index, the topic sketches and the aspect matrices.
+
+    One-off backfill for reviews that predate the projector. Run it with the
+    feedback_analytics_stream mapping disabled, and enable the mapping again
+    once every segment has finished: alongside the stream, a put of a
+    scanned image can replace a newer item the stream has just written, and
+    both would count the same change. The mapping resumes where it stopped.
+    Its replay leaves items, buffers and postings on the latest images, but
+    counts again the changes to reviews edited while it was off, which the
+    scan may already have seen, so keep that window short.
+
+    Puts are idempotent and buffer merges never replace what the stream
+    wrote, so a rerun is safe. Large tables can be split with
+    ``segment``/``total_segments`` (one invocation per segment); a run that
+    nears its deadline stops and returns ``next_key``, which a rerun takes as
+    ``start_key``. Narrow items, buffer entries and postings whose review is
+    gone are not removed; a review's postings are a write per distinct word,
+    so the search index is most of a rebuild's write capacity. Counts are
+    written every REBUILD_MAX_COUNTS cells and at the end; a run that
+    crashes in between leaves them short.
+
+    Where the analytics table was filled before the sketches and matrices
+    existed, ``recount`` counts every review, not only new or changed ones.
+    Run it once, into empty topic-sketches and aspect-matrix tables.
+
+    get_insights reads none of these tables until its INSIGHTS_* flags are
+    set: run the rebuild to completion first, then flip them.
+    """
+    names = {**review_analytics.SOURCE_NAMES, **recent_activity.SOURCE_NAMES}
+    kwargs = {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+        "Limit": REBUILD_PAGE_SIZE,
+    }
+    if event.get("total_segments"):
+        kwargs.update(Segment=int(event.get("segment", 0)), TotalSegments=int(event["total_segments"]))
+    if event.get("start_key"):
+        kwargs["ExclusiveStartKey"] = event["start_key"]
+
+    recount = bool(event.get("recount"))
+    scanned = written = indexed = 0
+    last_key = None
+    backfill = recent_activity.Backfill()
+    topics: dict = {}
+    aspects: dict = {}
+    with xray_recorder.in_subsegment("dynamodb-rebuild-analytics") as seg:
+        seg.put_annotation("table", FEEDBACK_TABLE)
+        seg.put_annotation("operation", "paginated_scan")
+        while True:
+            resp = aws_clients.table(FEEDBACK_TABLE).scan(**kwargs)
+            writes = {}
+            postings = {}
+            for review in resp.get("Items", []):
+                scanned += 1
+                backfill.add(review)
+                postings.update(search_index.postings(review))
+                narrow = review_analytics.item(review)
+                if narrow is not None:
+                    writes[(narrow["brandId"], narrow["sk"])] = narrow
+            if writes:
+                changes = _write(writes)
+                written += len(writes)
+                if recount:
+                    changes = [(None, narrow) for narrow in writes.values()]
+                _count(changes, topics, aspects)
+            if postings:
+                search_index.write(postings)
+                indexed += len(postings)
+            if sum(map(len, (*topics.values(), *aspects.values()))) >= REBUILD_MAX_COUNTS:
+                _write_counts(topics, aspects)
+                topics, aspects = {}, {}
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+            remaining = aws_clients.remaining_s()
+            if remaining is not None and remaining < REBUILD_MARGIN_S:
+                break
+        seg.put_metadata("item_count", scanned)
+    backfill.write()
+    _write_counts(topics, aspects)
+
+    return {"reviews_scanned": scanned, "items_written": written,
+            "buffers_written": backfill.scopes_written, "postings_written": indexed,
+            "next_key": last_key}
+
+
+# ===========================================================================
+# Lambda entry point — feedback Streams trigger, or {"action": "rebuild"}
+# ===========================================================================
+def lambda_handler(event, context):
+    aws_clients.start_deadline(context)
+    with xray_recorder.in_subsegment("analytics-projector-handler") as handler_seg:
+        handler_seg.put_annotation("function", "analytics-projector")
+        handler_seg.put_annotation("environment", ENVIRONMENT)
+        ddb_metrics.begin_request("analytics-projector", route="stream")
+
+        # capacity is flushed however the batch ends: a failed batch is
+        # retried, but the writes it made have been paid for
+        try:
+            if event.get("action") == "rebuild":
+                ddb_metrics.set_route("rebuild")
+                summary = _rebuild(event)
+                print(f"[REBUILD] {json.dumps(summary, default=str)}")
+                return summary
+
+            records = event.get("Records", [])
+            handler_seg.put_annotation("total_records", len(records))
+            writes: dict = {}
+            recent: dict = {}
+            topics: dict = {}
+            aspects: dict = {}
+            postings: dict = {}
+            changed: set = set()
+            for record in records:
+                _project_record(record, writes, recent, postings, changed, topics, aspects)
+            if writes:
+                _write(writes)
+            if recent:
+                _write_recent(recent)
+            if postings:
+                search_index.write(postings)
+            # the only writes a retry must not repeat, so last: a batch that
+            # fails before them is retried (or bisected) with none applied
+            if topics or aspects:
+                _write_counts(topics, aspects, _batch_id(records))
+            # only once everything is in, or a refresh could miss it
+            dashboards.data_changed(changed)
+            handler_seg.put_metadata("items_written", len(writes))
+            handler_seg.put_metadata("buffers_written", len(recent))
+            handler_seg.put_metadata("postings_written", len(postings))
+        finally:
+            ddb_metrics.flush(handler_seg)
+
+    summary = {"total_records": len(records), "items_written": len(writes),
+               "buffers_written": len(recent), "postings_written": len(postings),
+               "scopes_changed": len(changed)}
+    print(f"[DONE] {json.dumps(summary)}")
+    return summary
@@ -5,11 +5,14 @@ import base64
 import time
 from datetime import datetime, timezone
 
-import boto3
-from aws_xray_sdk.core import xray_recorder, patch_all
+from aws_xray_sdk.core import xray_recorder
 
-# Patch all supported libraries (boto3, requests, etc.) for X-Ray tracing
-patch_all()
+import aws_clients
+import ddb_metrics
+import link_counters
+
+# X-Ray patching is opt-in (XRAY_PATCH_MODULES)
+aws_clients.patch_tracing()
 
 # ---------------------------------------------------------------------------
 # Environment variables
@@ -18,16 +21,10 @@ LINKS_TABLE = os.environ.get("DYNAMODB_TABLE_LINKS", "reviewpulse-review-links")
 SES_FROM_EMAIL = os.environ.get("SES_FROM_EMAIL", "tripathiparth2411@gmail.com")
 COGNITO_CLIENT_ID = os.environ.get("COGNITO_CLIENT_ID", "")
 COGNITO_USER_POOL_ID = os.environ.get("COGNITO_USER_POOL_ID", "")
-REGION = os.environ.get("AWS_REGION_NAME", "ca-central-1")
 API_URL = os.environ.get("API_URL", "")  # set after deploy if needed
 CLOUDFRONT_URL = os.environ.get("CLOUDFRONT_URL", "")  # frontend origin
 ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
 
-dynamodb = boto3.resource("dynamodb", region_name=REGION)
-ses_client = boto3.client("ses", region_name=REGION)
-cognito = boto3.client("cognito-idp", region_name=REGION)
-links_table = dynamodb.Table(LINKS_TABLE)
-
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
     "Access-Control-Allow-Headers": "Content-Type,Authorization",
@@ -44,17 +41,29 @@ def _response(status_code: int, body: dict) -> dict:
     }
 
 
+def _request_body(event: dict) -> dict:
+    """Parsed JSON body. API Gateway base64-encodes it, since application/json
+    is a binary media type (for get_insights' gzip responses)."""
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+    return json.loads(body) if isinstance(body, str) else body
+
+
 # ---------------------------------------------------------------------------
 # Helper: verify Cognito AccessToken via get_user API
 # ---------------------------------------------------------------------------
 def _verify_cognito_token(access_token: str) -> dict | None:
     """Call Cognito get_user to verify an AccessToken. Returns user info or None."""
+    cognito = aws_clients.client("cognito-idp")
     with xray_recorder.in_subsegment("cognito-verify-token") as seg:
         seg.put_annotation("service", "cognito-idp")
         seg.put_annotation("operation", "get_user")
         try:
             response = cognito.get_user(AccessToken=access_token)
             return response
+        except aws_clients.DeadlineExceeded:
+            raise
         except Exception:
             return None
 
@@ -79,6 +88,7 @@ def _handle_login(body: dict) -> dict:
     if not email or not password:
         return _response(400, {"error": "email and password are required"})
 
+    cognito = aws_clients.client("cognito-idp")
     with xray_recorder.in_subsegment("cognito-initiate-auth") as seg:
         seg.put_annotation("service", "cognito-idp")
         seg.put_annotation("operation", "initiate_auth")
@@ -97,6 +107,8 @@ def _handle_login(body: dict) -> dict:
             return _response(401, {"error": "Invalid credentials"})
         except cognito.exceptions.UserNotConfirmedException:
             return _response(403, {"error": "User email not confirmed"})
+        except aws_clients.DeadlineExceeded:
+            raise
         except Exception as exc:
             print(f"[COGNITO ERROR] initiate_auth: {exc}")
             return _response(500, {"error": "Authentication service error"})
@@ -133,6 +145,7 @@ def _handle_verify(body: dict) -> dict:
     if not session or not otp_code or not email:
         return _response(400, {"error": "session, otpCode, and email are required"})
 
+    cognito = aws_clients.client("cognito-idp")
     with xray_recorder.in_subsegment("cognito-respond-to-challenge") as seg:
         seg.put_annotation("service", "cognito-idp")
         seg.put_annotation("operation", "respond_to_auth_challenge")
@@ -150,6 +163,8 @@ def _handle_verify(body: dict) -> dict:
             return _response(401, {"error": "Invalid OTP code"})
         except cognito.exceptions.ExpiredCodeException:
             return _response(401, {"error": "OTP code expired. Please login again."})
+        except aws_clients.DeadlineExceeded:
+            raise
         except Exception as exc:
             print(f"[COGNITO ERROR] respond_to_auth_challenge: {exc}")
             return _response(500, {"error": "Verification service error"})
@@ -212,22 +227,32 @@ def _handle_send_review_link(event: dict, body: dict) -> dict:
     now_epoch = int(time.time())
     expires_at = now_epoch + (72 * 3600)  # 72 hours
 
-    # Store in review-links table
+    # Store in review-links table and bump the product's sent counter atomically;
+    # the brand and global counters follow from the links stream
     with xray_recorder.in_subsegment("dynamodb-put-review-link") as seg:
         seg.put_annotation("table", LINKS_TABLE)
-        seg.put_annotation("operation", "put_item")
-        links_table.put_item(Item={
-            "linkToken": link_token,
-            "orderId": order_id,
-            "productId": product_id,
-            "brandId": brand_id,
-            "customerEmail": customer_email,
-            "customerPhone": customer_phone,
-            "customerName": customer_name,
-            "used": False,
-            "createdAt": datetime.now(timezone.utc).isoformat(),
-            "expiresAt": expires_at,
-        })
+        seg.put_annotation("operation", "transact_write_items")
+        link_counters.transact([
+            {
+                "Put": {
+                    "TableName": LINKS_TABLE,
+                    "Item": {
+                        "linkToken": link_token,
+                        "orderId": order_id,
+                        "productId": product_id,
+                        "brandId": brand_id,
+                        "customerEmail": customer_email,
+                        "customerPhone": customer_phone,
+                        "customerName": customer_name,
+                        "used": False,
+                        "sentCounted": True,
+                        "createdAt": datetime.now(timezone.utc).isoformat(),
+                        "expiresAt": expires_at,
+                    },
+                }
+            },
+            *link_counters.increment_ops(link_counters.link_keys(brand_id, product_id), "total_sent"),
+        ])
 
     # Build the review URL (frontend page served by CloudFront)
     base_url = CLOUDFRONT_URL or API_URL
@@ -248,7 +273,7 @@ def _handle_send_review_link(event: dict, body: dict) -> dict:
     with xray_recorder.in_subsegment("ses-send-review-link") as seg:
         seg.put_annotation("service", "ses")
         seg.put_annotation("email_type", "review_link")
-        ses_client.send_email(
+        aws_clients.client("ses").send_email(
             Source=SES_FROM_EMAIL,
             Destination={"ToAddresses": [customer_email]},
             Message={
@@ -267,9 +292,11 @@ def _handle_send_review_link(event: dict, body: dict) -> dict:
 # Lambda entry point — routes by path
 # ===========================================================================
 def lambda_handler(event, context):
+    aws_clients.start_deadline(context)
     with xray_recorder.in_subsegment("auth-otp-handler") as subsegment:
         subsegment.put_annotation("function", "auth-otp")
         subsegment.put_annotation("environment", ENVIRONMENT)
+        ddb_metrics.begin_request("auth-otp")
         try:
             http_method = event.get("httpMethod", "")
             path = event.get("path", "")
@@ -281,18 +308,19 @@ def lambda_handler(event, context):
             if http_method != "POST":
                 return _response(405, {"error": f"Method {http_method} not allowed"})
 
-            body = event.get("body", "{}")
-            if isinstance(body, str):
-                body = json.loads(body) if body else {}
+            body = _request_body(event)
 
             if path.endswith("/login"):
                 subsegment.put_annotation("route", "POST /auth/login")
+                ddb_metrics.set_route("POST /auth/login")
                 return _handle_login(body)
             elif path.endswith("/verify"):
                 subsegment.put_annotation("route", "POST /auth/verify")
+                ddb_metrics.set_route("POST /auth/verify")
                 return _handle_verify(body)
             elif path.endswith("/send-review-link"):
                 subsegment.put_annotation("route", "POST /auth/send-review-link")
+                ddb_metrics.set_route("POST /auth/send-review-link", body.get("brandId", ""))
                 return _handle_send_review_link(event, body)
             else:
                 return _response(404, {"error": f"Unknown auth route: {path}"})
@@ -300,8 +328,15 @@ def lambda_handler(event, context):
         except json.JSONDecodeError:
             subsegment.add_exception(Exception("Invalid JSON"), stack=False)
             return _response(400, {"error": "Invalid JSON in request body"})
+        except aws_clients.DeadlineExceeded as exc:
+            subsegment.put_annotation("deadline_exceeded", True)
+            print(f"[DEADLINE] {exc}")
+            return _response(503, {"error": "Request could not be completed in time, please retry",
+                                   "degraded": True})
         except Exception as exc:
             subsegment.add_exception(exc, stack=True)
             print(f"[ERROR] {exc}")
             return _response(500, {"error": "Internal server error"})
+        finally:
+            ddb_metrics.flush(subsegment)
 
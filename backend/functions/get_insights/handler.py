@@ -1,15 +1,50 @@
+import base64
+import glob
+import gzip
+import hashlib
+import heapq
 import json
 import os
 import re
 from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait
 from decimal import Decimal
+from functools import partial
+from operator import attrgetter
+
+from aws_xray_sdk.core import xray_recorder
+
+import aspect_matrix
+import aws_clients
+import dashboards
+import ddb_metrics
+import link_counters
+import metadata_cache
+import recent_activity
+import review_analytics
+import review_records
+import search_index
+import topic_sketch
+
+# X-Ray patching is opt-in (XRAY_PATCH_MODULES)
+aws_clients.patch_tracing()
+
+
+def _source_hash() -> str:
+    """Hash of this handler and the shared modules packaged with it.
+
+    Computed from the files, not passed in: CI deploys replace the code with
+    update-function-code and leave the environment as it was.
+    """
+    dirs = {os.path.dirname(os.path.abspath(__file__)), os.path.dirname(os.path.abspath(dashboards.__file__))}
+    digest = hashlib.sha256()
+    for path in sorted(p for d in dirs for p in glob.glob(os.path.join(d, "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
 
-from boto3.dynamodb.conditions import Attr
-import boto3
-from aws_xray_sdk.core import xray_recorder, patch_all
-
-# Patch all supported libraries (boto3, requests, etc.) for X-Ray tracing
-patch_all()
 
 # ---------------------------------------------------------------------------
 # Environment
@@ -17,28 +52,78 @@ patch_all()
 FEEDBACK_TABLE = os.environ.get("DYNAMODB_TABLE_FEEDBACK", "reviewpulse-feedback")
 BRANDS_TABLE = os.environ.get("DYNAMODB_TABLE_BRANDS", "reviewpulse-brands")
 PRODUCTS_TABLE = os.environ.get("DYNAMODB_TABLE_PRODUCTS", "reviewpulse-products")
-LINKS_TABLE = os.environ.get("DYNAMODB_TABLE_LINKS", "reviewpulse-review-links")
+ANALYTICS_TABLE = review_analytics.ANALYTICS_TABLE
 COGNITO_USER_POOL_ID = os.environ.get("COGNITO_USER_POOL_ID", "")
-REGION = os.environ.get("AWS_REGION_NAME", "ca-central-1")
 ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
-
-dynamodb = boto3.resource("dynamodb", region_name=REGION)
-feedback_tbl = dynamodb.Table(FEEDBACK_TABLE)
-brands_tbl = dynamodb.Table(BRANDS_TABLE)
-products_tbl = dynamodb.Table(PRODUCTS_TABLE)
-links_tbl = dynamodb.Table(LINKS_TABLE)
-cognito = boto3.client("cognito-idp", region_name=REGION)
+# Timestamp-sorted GSIs on the feedback table (terraform/modules/dynamodb)
+PRODUCT_TIME_INDEX = "productId-timestamp-index"
+BRAND_TIME_INDEX = "brandId-timestamp-index"
+# The five read paths below are off until the tables they read have been
+# filled: run the analytics-projector rebuild ({"action": "rebuild"}, with
+# "recount" where the analytics table was filled before the sketches and
+# matrices existed, and its stream mapping disabled while it runs), then set
+# the flags to "true".
+# "true": the aggregations read the narrow review-analytics table instead of
+# the feedback GSIs
+ANALYTICS_READS = os.environ.get("INSIGHTS_ANALYTICS_READS", "false").lower() == "true"
+# "true": unranged recent lists come from the recent-activity buffers instead
+# of sorting the scope's reviews
+RECENT_BUFFERS = os.environ.get("INSIGHTS_RECENT_BUFFERS", "false").lower() == "true"
+# "true": unranged top topics come from the topic sketches instead of
+# counting the scope's reviews
+TOPIC_SKETCHES = os.environ.get("INSIGHTS_TOPIC_SKETCHES", "false").lower() == "true"
+# "true": /aspects reads the aspect matrices instead of counting the
+# product's reviews
+ASPECT_MATRIX = os.environ.get("INSIGHTS_ASPECT_MATRIX", "false").lower() == "true"
+# "true": /search walks the search index instead of matching the text of
+# the brand's reviews
+SEARCH_INDEX = os.environ.get("INSIGHTS_SEARCH_INDEX", "false").lower() == "true"
+BATCH_GET_LIMIT = 100         # DynamoDB BatchGetItem hard limit per request
+# Latency budget for a full dashboard response; see "Sections" below
+SECTION_BUDGET_MS = int(os.environ.get("INSIGHTS_SECTION_BUDGET_MS", "800"))
+# Keep AWS_MAX_POOL_CONNECTIONS at least this high
+SECTION_WORKERS = int(os.environ.get("INSIGHTS_SECTION_WORKERS", "8"))
+# Smaller bodies are sent uncompressed; see "Conditional requests" below
+GZIP_MIN_BYTES = int(os.environ.get("INSIGHTS_GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+# Source hash: a deploy that changes a response shape must not leave
+# clients revalidating bodies built by the old code
+CODE_VERSION = _source_hash()
+# How long a dashboard refresh may hold its scope before another may start
+REFRESH_LEASE_S = int(os.environ.get("DASHBOARD_REFRESH_LEASE_S", "120"))
+# Superadmin overview: "off", "lambda" or "process"; see "Scatter-gather" below.
+# In lambda mode keep AWS_MAX_POOL_CONNECTIONS above the concurrency too.
+OVERVIEW_FANOUT = os.environ.get("OVERVIEW_FANOUT", "off")
+OVERVIEW_FANOUT_CONCURRENCY = int(os.environ.get("OVERVIEW_FANOUT_CONCURRENCY", "16"))
+OVERVIEW_SHARD_TIMEOUT_MS = int(os.environ.get("OVERVIEW_SHARD_TIMEOUT_MS", "10000"))
+OVERVIEW_SHARD_FUNCTION = os.environ.get("OVERVIEW_SHARD_FUNCTION", "reviewpulse-get-insights")
+GATHER_MARGIN_S = 1.0
 
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,Authorization",
+    "Access-Control-Allow-Headers": "Content-Type,Authorization,If-None-Match",
     "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
+    "Access-Control-Expose-Headers": "ETag",
     "Content-Type": "application/json",
 }
 
 MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
                "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
+PENDING = {"status": "pending"}
+
+GRANULARITIES = ("day", "week", "month")
+# What the aggregations read of a review (shared/review_records.py)
+_REVIEW_PROJECTION = {"ProjectionExpression": review_records.PROJECTION,
+                      "ExpressionAttributeNames": review_records.PROJECTION_NAMES}
+TREND_DEFAULT_BUCKETS = {"day": 30, "week": 12, "month": 7}
+MAX_TREND_BUCKETS = 400
+
+# Shared across invocations; threads start on first use
+_executor = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="insights-section")
+_fanout_executor = ThreadPoolExecutor(max_workers=OVERVIEW_FANOUT_CONCURRENCY,
+                                      thread_name_prefix="insights-fanout")
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -53,13 +138,156 @@ class _DecimalEncoder(json.JSONEncoder):
 
 
 def _response(status_code: int, body: dict) -> dict:
+    # errors and partial dashboards must never be revalidated
+    cacheable = (status_code == 200 and not body.get("degraded_sections")
+                 and not body.get("incomplete_brands"))
     return {
         "statusCode": status_code,
-        "headers": CORS_HEADERS,
+        "headers": {**CORS_HEADERS, "Cache-Control": "private, no-cache" if cacheable else "no-store"},
         "body": json.dumps(body, cls=_DecimalEncoder),
     }
 
 
+def _requested_sections(query: dict, sections: tuple) -> tuple[tuple, bool, list]:
+    """Sections a request asks for: (wanted, wait for all of them, unknown names).
+
+    ?section=<name> fetches one section that came back pending and waits for
+    it; ?fields=a,b builds only the listed sections, under the usual budget.
+    With neither, every section of the route is built.
+    """
+    if query.get("section"):
+        requested, complete = [query["section"]], True
+    elif query.get("fields"):
+        requested, complete = [f.strip() for f in query["fields"].split(",") if f.strip()], False
+    else:
+        return sections, False, []
+    unknown = [name for name in requested if name not in sections]
+    return tuple(name for name in sections if name in requested), complete, unknown
+
+
+def _unknown_sections(unknown: list, sections: tuple) -> dict:
+    return _response(400, {"error": f"Unknown section(s): {', '.join(unknown)}",
+                           "sections": list(sections)})
+
+
+# ---------------------------------------------------------------------------
+# Conditional requests and compression
+# ---------------------------------------------------------------------------
+# A complete 200 carries a strong ETag built from the data version of the
+# route's scope (link_counters: global, brand or product), the path and
+# query, the resolved time window and CODE_VERSION. Every write that can
+# change a dashboard bumps its scope's version, so a client that sends the
+# ETag back in If-None-Match gets a bodiless 304 after a single get_item:
+# no scans, no sections, no serialization. Browsers do this on their own
+# for "Cache-Control: no-cache" responses.
+#
+# Bodies of GZIP_MIN_BYTES or more are gzip-encoded for clients that accept
+# it. The gzip variant's ETag ends in "-gzip" (different bytes, different
+# strong validator); either one matches If-None-Match.
+
+def _header(event: dict, name: str) -> str:
+    """Request header by case-insensitive name ("" when absent)."""
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value or ""
+    return ""
+
+
+def _brand_ids() -> list:
+    """Every brandId, from a keys-only scan of the brands table."""
+    kwargs = {"ProjectionExpression": "brandId"}
+    brand_ids = []
+    with xray_recorder.in_subsegment("dynamodb-scan-brand-ids") as seg:
+        seg.put_annotation("table", BRANDS_TABLE)
+        seg.put_annotation("operation", "paginated_scan")
+        while True:
+            resp = aws_clients.table(BRANDS_TABLE).scan(**kwargs)
+            brand_ids.extend(item["brandId"] for item in resp.get("Items", []) if item.get("brandId"))
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+    return brand_ids
+
+
+def _scope_versions(scope_keys: list) -> dict:
+    """statsKey -> data version; the overview's is summed from every brand's."""
+    scope_keys = list(dict.fromkeys(scope_keys))
+    scoped = [key for key in scope_keys if key != link_counters.GLOBAL_KEY]
+    versions = link_counters.batch_get_versions(scoped) if scoped else {}
+    if link_counters.GLOBAL_KEY in scope_keys:
+        versions[link_counters.GLOBAL_KEY] = link_counters.overview_version(_brand_ids())
+    return versions
+
+
+def _data_version(scope_key: str) -> int | None:
+    """The scope's data version, or None if it could not be read."""
+    try:
+        if scope_key == link_counters.GLOBAL_KEY:
+            return link_counters.overview_version(_brand_ids())
+        return link_counters.get_version(scope_key)
+    except aws_clients.DeadlineExceeded:
+        raise
+    except Exception as exc:
+        print(f"[ETAG] version read failed for {scope_key}: {exc}")
+        return None
+
+
+def _etag(event: dict, window: dict, version: int | None) -> str | None:
+    """ETag for this request (None without a data version)."""
+    if version is None:
+        return None
+    query = sorted((event.get("queryStringParameters") or {}).items())
+    # window carries the resolved `to`, so default (rolling) windows change daily
+    key = json.dumps([CODE_VERSION, event.get("path", ""), query, window, version], default=str)
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def _not_modified(event: dict, etag: str | None) -> bool:
+    if not etag:
+        return False
+    gzip_etag = etag[:-1] + '-gzip"'
+    for candidate in _header(event, "If-None-Match").split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]     # If-None-Match compares weakly
+        if candidate in ("*", etag, gzip_etag):
+            return True
+    return False
+
+
+def _not_modified_response(event: dict, etag: str) -> dict:
+    if "gzip" in _header(event, "Accept-Encoding").lower():
+        etag = etag[:-1] + '-gzip"'
+    return {
+        "statusCode": 304,
+        "headers": {**CORS_HEADERS, "Cache-Control": "private, no-cache", "ETag": etag,
+                    "Vary": "Accept-Encoding"},
+        "body": "",
+    }
+
+
+def _finish(event: dict, response: dict, etag: str | None) -> dict:
+    """Attach the ETag to a complete response and gzip it if worthwhile."""
+    headers = {**response["headers"], "Vary": "Accept-Encoding"}
+    if headers["Cache-Control"] == "no-store":
+        etag = None
+    body = response["body"]
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in _header(event, "Accept-Encoding").lower():
+        with xray_recorder.in_subsegment("gzip-response") as seg:
+            compressed = gzip.compress(body.encode("utf-8"), compresslevel=GZIP_LEVEL)
+            seg.put_metadata("bytes", {"identity": len(body), "gzip": len(compressed)})
+        headers["Content-Encoding"] = "gzip"
+        if etag:
+            etag = etag[:-1] + '-gzip"'
+        response = {**response, "body": base64.b64encode(compressed).decode("ascii"),
+                    "isBase64Encoded": True}
+    if etag:
+        headers["ETag"] = etag
+    return {**response, "headers": headers}
+
+
 def _verify_jwt(event: dict) -> dict | None:
     """Verify Cognito AccessToken via get_user API. Returns user dict or None."""
     headers = event.get("headers") or {}
@@ -73,7 +301,7 @@ def _verify_jwt(event: dict) -> dict | None:
         with xray_recorder.in_subsegment("cognito-verify-token") as seg:
             seg.put_annotation("service", "cognito-idp")
             seg.put_annotation("operation", "get_user")
-            response = cognito.get_user(AccessToken=token)
+            response = aws_clients.client("cognito-idp").get_user(AccessToken=token)
             # Build a user dict from Cognito attributes
             attrs = {a["Name"]: a["Value"] for a in response.get("UserAttributes", [])}
             return {
@@ -82,210 +310,756 @@ def _verify_jwt(event: dict) -> dict | None:
                 "brandId": attrs.get("custom:brandId", ""),
                 "sub": attrs.get("sub", ""),
             }
+    except aws_clients.DeadlineExceeded:
+        raise
     except Exception as exc:
         print(f"[AUTH] Cognito get_user failed: {exc}")
         return None
 
 
-def _full_scan(table, filter_expr=None):
-    """Paginated scan that returns ALL items."""
+def _full_scan(table, filter_expr=None, reviews: bool = False):
+    """Paginated scan that returns ALL items (as ReviewRecords with ``reviews``)."""
+    analytics = table.table_name == ANALYTICS_TABLE
+    to_records = review_analytics.records if analytics else review_records.from_items
     kwargs = {}
     if filter_expr is not None:
         kwargs["FilterExpression"] = filter_expr
+    if reviews and not analytics:
+        kwargs.update(_REVIEW_PROJECTION)
     items = []
     with xray_recorder.in_subsegment("dynamodb-full-scan") as seg:
         seg.put_annotation("table", table.table_name)
         seg.put_annotation("operation", "paginated_scan")
+        pages = scanned = 0
         while True:
-            resp = table.scan(**kwargs)
-            items.extend(resp.get("Items", []))
+            # re-resolved per page so each page's read timeout fits the time left
+            resp = aws_clients.table(table.table_name).scan(**kwargs)
+            page = resp.get("Items", [])
+            items.extend(to_records(page) if reviews else page)
+            pages += 1
+            scanned += resp.get("ScannedCount", 0)
             last_key = resp.get("LastEvaluatedKey")
             if not last_key:
                 break
             kwargs["ExclusiveStartKey"] = last_key
         seg.put_metadata("item_count", len(items))
+        seg.put_metadata("scanned_count", scanned)
+        seg.put_metadata("pages", pages)
     return items
 
 
-def _safe_rating(item) -> float:
+# ---------------------------------------------------------------------------
+# Time range (?from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=day|week|month)
+# ---------------------------------------------------------------------------
+# Reviews are read by time (the analytics table's <timestamp>#<FeedbackId>
+# sort key, or the timestamp-sorted GSIs), and from/to become a key
+# condition on the sort key, so a 7-day view reads 7 days of reviews.
+# Both ends are inclusive, in UTC. Without from/to the full history is read
+# and the trend covers the last TREND_DEFAULT_BUCKETS buckets. Link stats
+# are lifetime counters and do not follow the range.
+
+def _bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())     # ISO week, Monday
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def _bucket_label(start: date, granularity: str, multi_year: bool) -> str:
+    label = MONTH_NAMES[start.month - 1]
+    if granularity != "month":
+        label = f"{label} {start.day}"
+    return f"{label} {start.year}" if multi_year else label
+
+
+def _time_window(query: dict) -> dict:
+    """Parse from/to/granularity; ValueError with a client-facing message if invalid."""
+    granularity = (query.get("granularity") or "month").lower()
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
     try:
-        return float(item.get("rating", 0))
-    except (ValueError, TypeError):
-        return 0.0
+        start = date.fromisoformat(query["from"]) if query.get("from") else None
+        end = date.fromisoformat(query["to"]) if query.get("to") else None
+    except ValueError:
+        raise ValueError("from and to must be dates (YYYY-MM-DD)") from None
+    ranged = start is not None or end is not None
+    end = end or datetime.now(timezone.utc).date()
+    if start is not None and start > end:
+        raise ValueError("from must not be after to")
+
+    trend_from = start
+    if trend_from is None:
+        trend_from = _bucket_start(end, granularity)
+        for _ in range(TREND_DEFAULT_BUCKETS[granularity] - 1):
+            trend_from = _bucket_start(trend_from - timedelta(days=1), granularity)
+    buckets, cursor = 0, _bucket_start(trend_from, granularity)
+    while cursor <= end:
+        buckets += 1
+        cursor = _next_bucket(cursor, granularity)
+    if buckets > MAX_TREND_BUCKETS:
+        raise ValueError(f"range spans {buckets} {granularity}s, at most {MAX_TREND_BUCKETS} allowed")
+
+    return {
+        "from": start,
+        "to": end,
+        "ranged": ranged,
+        "granularity": granularity,
+        "trend_from": trend_from,
+    }
+
+
+def _timestamp_condition(key_condition, window: dict, sort_key: str = "timestamp"):
+    """Add the window to a key condition as a range on the time-ordered sort key."""
+    if not window["ranged"]:
+        return key_condition
+    from boto3.dynamodb.conditions import Key
+    # timestamps are ISO 8601, so every instant on `to` sorts before the next day
+    # (and so does every "<timestamp>#<FeedbackId>" analytics key)
+    before = (window["to"] + timedelta(days=1)).isoformat()
+    if window["from"] is None:
+        return key_condition & Key(sort_key).lt(before)
+    return key_condition & Key(sort_key).between(window["from"].isoformat(), before)
+
+
+def _full_query(index: str | None, key_condition, filter_expr=None, table_name: str = FEEDBACK_TABLE):
+    """Paginated query of a reviews table (or its ``index``): ALL matching reviews, as ReviewRecords."""
+    analytics = table_name == ANALYTICS_TABLE
+    to_records = review_analytics.records if analytics else review_records.from_items
+    kwargs = {"KeyConditionExpression": key_condition}
+    if index:
+        kwargs["IndexName"] = index
+    if not analytics:
+        kwargs.update(_REVIEW_PROJECTION)
+    if filter_expr is not None:
+        kwargs["FilterExpression"] = filter_expr
+    items = []
+    with xray_recorder.in_subsegment("dynamodb-full-query") as seg:
+        seg.put_annotation("table", table_name)
+        seg.put_annotation("index", index or "")
+        seg.put_annotation("operation", "paginated_query")
+        pages = scanned = 0
+        while True:
+            resp = aws_clients.table(table_name).query(**kwargs)
+            # each page becomes records right away, so raw items never pile up
+            items.extend(to_records(resp.get("Items", [])))
+            pages += 1
+            scanned += resp.get("ScannedCount", 0)
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+        seg.put_metadata("item_count", len(items))
+        seg.put_metadata("scanned_count", scanned)
+        seg.put_metadata("pages", pages)
+    return items
 
 
-def _avg_rating(items) -> float:
-    if not items:
+def _brand_reviews(brand_id: str, window: dict) -> list:
+    """A brand's reviews in the window."""
+    from boto3.dynamodb.conditions import Key
+    if ANALYTICS_READS:
+        return _full_query(None, _timestamp_condition(Key("brandId").eq(brand_id), window, "sk"),
+                           table_name=ANALYTICS_TABLE)
+    return _full_query(BRAND_TIME_INDEX, _timestamp_condition(Key("brandId").eq(brand_id), window))
+
+
+def _product_reviews(brand_id: str, product_id: str, window: dict) -> list:
+    """A product's reviews in the window."""
+    from boto3.dynamodb.conditions import Attr, Key
+    # productIds are only unique per brand (products key is productId+brandId)
+    if ANALYTICS_READS:
+        return _full_query(review_analytics.PRODUCT_INDEX,
+                           _timestamp_condition(Key("productId").eq(product_id), window, "sk"),
+                           Attr("brandId").eq(brand_id), table_name=ANALYTICS_TABLE)
+    return _full_query(PRODUCT_TIME_INDEX, _timestamp_condition(Key("productId").eq(product_id), window),
+                       Attr("brandId").eq(brand_id))
+
+
+def _all_reviews() -> list:
+    """Every review: one scan beats a query per brand."""
+    return _full_scan(aws_clients.table(ANALYTICS_TABLE if ANALYTICS_READS else FEEDBACK_TABLE),
+                      reviews=True)
+
+
+def _with_details(records: list, narrow: bool | None = None) -> list:
+    """``records`` again, with what the recent lists show read from the feedback table.
+
+    Analytics records carry no customer name, text or summary; the recent
+    lists show a few reviews, so only those are read back, by key. A review
+    deleted in the meantime keeps its narrow record. ``narrow`` says whether
+    the records are narrow (default: whether they come from the analytics
+    table, ANALYTICS_READS).
+    """
+    if narrow is None:
+        narrow = ANALYTICS_READS
+    if not narrow or not records:
+        return records
+    ids = list(dict.fromkeys(r.feedback_id for r in records))
+    found = {}
+    with xray_recorder.in_subsegment("dynamodb-batch-get-reviews") as seg:
+        seg.put_annotation("table", FEEDBACK_TABLE)
+        seg.put_annotation("operation", "batch_get_item")
+        seg.put_metadata("key_count", len(ids))
+        for start in range(0, len(ids), BATCH_GET_LIMIT):
+            request = {FEEDBACK_TABLE: {
+                "Keys": [{"FeedbackId": fid} for fid in ids[start:start + BATCH_GET_LIMIT]],
+                **_REVIEW_PROJECTION,
+            }}
+            while request:
+                resp = aws_clients.dynamodb().batch_get_item(RequestItems=request)
+                for item in resp.get("Responses", {}).get(FEEDBACK_TABLE, []):
+                    found[item["FeedbackId"]] = review_records.ReviewRecord(item)
+                request = resp.get("UnprocessedKeys") or None
+    return [found.get(r.feedback_id, r) for r in records]
+
+
+def _avg_rating(reviews) -> float:
+    if not reviews:
         return 0.0
-    total = sum(_safe_rating(i) for i in items)
-    return round(total / len(items), 1)
+    return round(sum(r.rating for r in reviews) / len(reviews), 1)
 
 
-def _sentiment_distribution(items) -> dict:
+def _sentiment_distribution(reviews) -> dict:
     dist = {"positive": 0, "neutral": 0, "negative": 0}
-    for item in items:
-        s = str(item.get("sentiment", "neutral")).lower()
-        if s in dist:
-            dist[s] += 1
-        else:
-            dist["neutral"] += 1
+    for r in reviews:
+        dist[r.bucket] += 1
     return dist
 
 
-def _sentiment_trend(items) -> list:
-    """Group sentiment counts by month for the last 7 months."""
-    from datetime import datetime, timezone, timedelta
-    now = datetime.now(timezone.utc)
-    buckets: dict[str, dict] = {}
-    # initialise last 7 months
-    for i in range(6, -1, -1):
-        d = now - timedelta(days=30 * i)
-        key = d.strftime("%Y-%m")
-        label = MONTH_NAMES[d.month - 1]
-        buckets[key] = {"month": label, "positive": 0, "negative": 0, "neutral": 0}
-
-    for item in items:
-        ts = item.get("timestamp", "")
-        if not ts:
-            continue
-        month_key = ts[:7]  # "YYYY-MM"
-        if month_key in buckets:
-            s = str(item.get("sentiment", "neutral")).lower()
-            if s not in ("positive", "negative", "neutral"):
-                s = "neutral"
-            buckets[month_key][s] += 1
+def _sentiment_trend(reviews, window: dict) -> list:
+    """Sentiment counts per calendar day / ISO week / month across the window.
+
+    Each bucket has ``period`` (its first day) and ``label``; monthly
+    buckets (the default) also keep ``month``, the month's short name.
+    """
+    granularity = window["granularity"]
+    buckets: dict[date, dict] = {}
+    start = _bucket_start(window["trend_from"], granularity)
+    multi_year = start.year != window["to"].year
+    while start <= window["to"]:
+        bucket = {"period": start.isoformat(), "label": _bucket_label(start, granularity, multi_year)}
+        if granularity == "month":
+            # the key monthly trends had before period/label, kept for existing clients
+            bucket["month"] = MONTH_NAMES[start.month - 1]
+        buckets[start] = {**bucket, "positive": 0, "negative": 0, "neutral": 0}
+        start = _next_bucket(start, granularity)
+
+    # count per day first: far fewer distinct days than reviews
+    per_day = Counter((r.day, r.bucket) for r in reviews)
+    bucket_of: dict[int, dict | None] = {}
+    for (day, sentiment), count in per_day.items():
+        if day not in bucket_of:
+            bucket_of[day] = buckets.get(_bucket_start(date.fromordinal(max(day, 1)), granularity))
+        bucket = bucket_of[day]
+        if bucket is not None:
+            bucket[sentiment] += count
 
     return list(buckets.values())
 
 
-def _top_topics(items, n: int = 5) -> list:
+def _top_topics(reviews, n: int = 5) -> list:
+    """Exact counts, normalized and once per review as the topic sketches count them."""
     counter: Counter = Counter()
-    for item in items:
-        topics = item.get("topics", [])
-        if isinstance(topics, str):
-            try:
-                topics = json.loads(topics)
-            except Exception:
-                topics = [t.strip() for t in topics.split(",") if t.strip()]
-        if isinstance(topics, list):
-            for t in topics:
-                counter[str(t).strip()] += 1
-    return [{"topic": t, "count": c} for t, c in counter.most_common(n)]
+    # per distinct topic list first (reviews with equal lists share the tuple)
+    for topics, count in Counter(r.topics for r in reviews).items():
+        for t in {topic_sketch.normalize(t) for t in topics}:
+            if t:
+                counter[t] += count
+    return topic_sketch.ranked(counter, n)
+
+
+def _newest(reviews, n: int) -> list:
+    return heapq.nlargest(n, reviews, key=attrgetter("epoch_us"))
+
+
+def _recent(scope_key: str, n: int, reviews) -> list:
+    """The scope's n newest reviews, with details, newest first.
+
+    Read from its recent-activity buffer when it can answer; otherwise
+    picked from ``reviews`` (a callable returning them).
+    """
+    newest = recent_activity.newest(scope_key, n) if RECENT_BUFFERS else None
+    if newest is None:
+        newest = _with_details(_newest(reviews(), n))
+    return newest
+
+
+def _recent_node(scope_key: str, n: int, window: dict, reviews) -> tuple:
+    """Section node for the scope's n newest reviews (declare it after "reviews").
+
+    Buffers hold the newest of all time, so a date range picks from the
+    reviews it read anyway.
+    """
+    if window["ranged"]:
+        return ("reviews",), lambda loaded: _with_details(_newest(loaded, n))
+    return (), lambda: _recent(scope_key, n, reviews)
+
+
+def _top_topics_node(scope_key: str, n: int, window: dict) -> tuple:
+    """Section node for the scope's n most mentioned topics (declare it after "reviews").
+
+    Sketches count all time, so a date range (or a tree without them) counts
+    the reviews it read anyway.
+    """
+    if window["ranged"] or not TOPIC_SKETCHES:
+        return ("reviews",), lambda reviews: _top_topics(reviews, n)
+    return (), lambda: topic_sketch.top(scope_key, n)
 
 
 def _link_stats(brand_id: str, product_id: str | None = None) -> dict:
-    filt = Attr("brandId").eq(brand_id)
-    if product_id:
-        filt = filt & Attr("productId").eq(product_id)
-    links = _full_scan(links_tbl, filt)
-    total_sent = len(links)
-    total_used = sum(1 for l in links if l.get("used") is True)
-    usage_rate = round((total_used / total_sent * 100), 1) if total_sent else 0.0
-    return {"total_sent": total_sent, "total_used": total_used, "usage_rate": usage_rate}
+    """Read the pre-aggregated link counters — one get_item, no links scan."""
+    return link_counters.get_stats(brand_id, product_id)
+
+
+# ---------------------------------------------------------------------------
+# Sections
+# ---------------------------------------------------------------------------
+# Each route is a graph of nodes: name -> (dependencies, fn(*their values)).
+# Fetch nodes (scans, keyed reads) and the response sections built from them
+# all run on the pool, so a slow links read no longer holds up the review
+# aggregations. A full response waits INSIGHTS_SECTION_BUDGET_MS at most;
+# sections still running then come back as {"status": "pending"} and are
+# listed in "degraded_sections". The client fetches each of those with
+# ?section=<name>, which waits for it until the invocation deadline.
+#
+# Only the part of the graph the requested sections depend on is run, so
+# ?fields=avg_rating on a brand skips the products scan and the link
+# counters entirely. The 404 for a brand or product without reviews is
+# only returned when a requested section reads the reviews.
+#
+# Pending work is not interrupted: it finishes in the background (or at the
+# next thaw), and its DynamoDB I/O may be counted against the next request.
+
+def _run_node(parent, fn, dependencies: list):
+    if parent is not None:
+        xray_recorder.set_trace_entity(parent)
+    try:
+        return fn(*(future.result() for future in dependencies))
+    finally:
+        if parent is not None:
+            xray_recorder.clear_trace_entities()
+
+
+def _run_sections(nodes: dict, wanted: tuple, complete: bool = False) -> tuple[dict, list]:
+    """Run what the ``wanted`` sections need.
+
+    Returns (values of every node that finished, sections still pending).
+    With ``complete`` it waits for all of them until the deadline instead
+    of the section budget. Nodes may only depend on nodes declared before
+    them.
+    """
+    needed, stack = set(), list(wanted)
+    while stack:
+        name = stack.pop()
+        if name not in needed:
+            needed.add(name)
+            stack.extend(nodes[name][0])
+
+    parent = xray_recorder.get_trace_entity()
+    futures = {}
+    for name, (dependencies, fn) in nodes.items():
+        if name in needed:
+            futures[name] = _executor.submit(_run_node, parent, fn,
+                                             [futures[d] for d in dependencies])
+
+    remaining = aws_clients.remaining_s()
+    if complete:
+        timeout = remaining
+    else:
+        timeout = SECTION_BUDGET_MS / 1000
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+    wait([futures[name] for name in wanted], timeout=timeout)
+
+    finished = [name for name, future in futures.items() if future.done()]
+    for name, future in futures.items():
+        if name not in finished:
+            future.cancel()     # only drops work that has not started yet
+    values = {name: futures[name].result() for name in finished}
+    pending = [name for name in wanted if name not in values]
+
+    if complete and pending:
+        raise aws_clients.DeadlineExceeded(f"sections {','.join(pending)} did not finish in time")
+    if pending:
+        print(f"[DEGRADED] sections={','.join(pending)} budget_ms={round(timeout * 1000)}")
+    if parent is not None:
+        parent.put_annotation("degraded_sections", len(pending))
+        if pending:
+            parent.put_metadata("degraded_sections", pending)
+    return values, pending
+
+
+def _sections_body(values: dict, pending: list, wanted: tuple) -> dict:
+    """Response body in ``wanted`` order; optional sections that came back None are left out."""
+    body = {}
+    for name in wanted:
+        if name in pending:
+            body[name] = PENDING
+        elif values[name] is not None:
+            body[name] = values[name]
+    body["degraded_sections"] = pending
+    return body
 
 
 # ===========================================================================
 # ROUTE: GET /insights/{brandId}/{productId}
 # ===========================================================================
-def _handle_product_insights(brand_id: str, product_id: str) -> dict:
-    # Fetch product record (including AI summary)
-    prods = _full_scan(products_tbl, Attr("productId").eq(product_id))
-    prod_record = prods[0] if prods else {}
-    product_name = prod_record.get("productName", product_id)
-
-    # Extract AI insights if available
-    ai_insights = None
-    if prod_record.get("ai_summary"):
-        ai_insights = {
-            "ai_summary": prod_record.get("ai_summary", ""),
-            "ai_strengths": prod_record.get("ai_strengths", []),
-            "ai_weaknesses": prod_record.get("ai_weaknesses", []),
-            "ai_recommendations": prod_record.get("ai_recommendations", []),
-            "ai_sentiment_overview": prod_record.get("ai_sentiment_overview", ""),
-            "ai_summary_updated_at": prod_record.get("ai_summary_updated_at", ""),
-            "ai_summary_review_count": prod_record.get("ai_summary_review_count", 0),
-        }
+PRODUCT_SECTIONS = (
+    "product_name", "total_reviews", "avg_rating", "sentiment_distribution",
+    "sentiment_trend", "recent_reviews", "top_topics", "link_stats", "ai_insights",
+)
 
-    reviews = _full_scan(
-        feedback_tbl,
-        Attr("brandId").eq(brand_id) & Attr("productId").eq(product_id),
-    )
 
-    if not reviews:
+def _product_ai_insights(product: dict) -> dict | None:
+    if not product.get("ai_summary"):
+        return None
+    return {
+        "ai_summary": product.get("ai_summary", ""),
+        "ai_strengths": product.get("ai_strengths", []),
+        "ai_weaknesses": product.get("ai_weaknesses", []),
+        "ai_recommendations": product.get("ai_recommendations", []),
+        "ai_sentiment_overview": product.get("ai_sentiment_overview", ""),
+        "ai_summary_updated_at": product.get("ai_summary_updated_at", ""),
+        "ai_summary_review_count": product.get("ai_summary_review_count", 0),
+    }
+
+
+def _review_entry(r) -> dict:
+    return {
+        "FeedbackId": r.feedback_id,
+        "customerName": r.customer_name,
+        "rating": r.rating,
+        "reviewText": recent_activity.snippet(r.text),
+        "sentiment": r.sentiment,
+        "summary": recent_activity.snippet(r.summary),
+        "topics": list(r.topics),
+        "timestamp": r.timestamp,
+    }
+
+
+def _recent_reviews(newest) -> list:
+    return [_review_entry(r) for r in newest]
+
+
+def _handle_product_insights(brand_id: str, product_id: str, wanted: tuple = PRODUCT_SECTIONS,
+                             complete: bool = False, window: dict | None = None, fresh: bool = False) -> dict:
+    window = window or _time_window({})
+    nodes = {
+        # Product record (including AI summary) — keyed lookup via the cache,
+        # read through it when the response is stored (fresh)
+        "product_record": ((), lambda: metadata_cache.get_product(brand_id, product_id, fresh) or {}),
+        "reviews": ((), lambda: _product_reviews(brand_id, product_id, window)),
+        # The 10 newest: one read of the buffer, without waiting for the reviews
+        "recent": _recent_node(link_counters.product_key(brand_id, product_id), 10, window,
+                               lambda: _product_reviews(brand_id, product_id, window)),
+        "product_name": (("product_record",), lambda p: p.get("productName", product_id)),
+        "total_reviews": (("reviews",), len),
+        "avg_rating": (("reviews",), _avg_rating),
+        "sentiment_distribution": (("reviews",), _sentiment_distribution),
+        "sentiment_trend": (("reviews",), lambda reviews: _sentiment_trend(reviews, window)),
+        "recent_reviews": (("recent",), _recent_reviews),
+        "top_topics": _top_topics_node(link_counters.product_key(brand_id, product_id), 5, window),
+        "link_stats": ((), lambda: _link_stats(brand_id, product_id)),
+        "ai_insights": (("product_record",), _product_ai_insights),
+    }
+    values, pending = _run_sections(nodes, wanted, complete)
+
+    # an empty date range is a valid answer; no reviews at all is not
+    if not window["ranged"] and "reviews" in values and not values["reviews"]:
         return _response(404, {"error": "No reviews found for this product"})
+    return _response(200, _sections_body(values, pending, wanted))
 
-    # Sort by timestamp descending for recent reviews
-    reviews_sorted = sorted(reviews, key=lambda r: r.get("timestamp", ""), reverse=True)
-
-    recent = []
-    for r in reviews_sorted[:10]:
-        recent.append({
-            "FeedbackId": r.get("FeedbackId", ""),
-            "customerName": r.get("customerName", r.get("name", "")),
-            "rating": r.get("rating", 0),
-            "reviewText": r.get("reviewText", r.get("message", "")),
-            "sentiment": r.get("sentiment", "neutral"),
-            "summary": r.get("summary", ""),
-            "topics": r.get("topics", []),
-            "timestamp": r.get("timestamp", ""),
-        })
 
-    resp_body = {
-        "product_name": product_name,
-        "total_reviews": len(reviews),
-        "avg_rating": _avg_rating(reviews),
-        "sentiment_distribution": _sentiment_distribution(reviews),
-        "sentiment_trend": _sentiment_trend(reviews),
-        "recent_reviews": recent,
-        "top_topics": _top_topics(reviews, 5),
-        "link_stats": _link_stats(brand_id, product_id),
+# ===========================================================================
+# ROUTE: GET /insights/{brandId}/{productId}/reviews  (paginated, newest first)
+# ===========================================================================
+# Served from the productId-timestamp-index GSI, so a page reads about
+# `limit` items however many reviews the product has. The cursor is the
+# page's LastEvaluatedKey, base64-encoded; clients pass it back unchanged.
+# from/to narrow the sort-key range as on the other routes.
+REVIEWS_PAGE_DEFAULT = 20
+REVIEWS_PAGE_MAX = 100
+# sentiment/rating are filters, not key conditions: a page stops after this
+# many queries even if the filters left it short (next_cursor continues it)
+REVIEWS_MAX_QUERIES = 5
+SENTIMENTS = ("positive", "neutral", "negative", "pending")
+_CURSOR_KEYS = {"FeedbackId", "productId", "timestamp"}
+
+
+def _encode_cursor(key: dict) -> str:
+    raw = json.dumps(key, cls=_DecimalEncoder, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, product_id: str) -> dict:
+    """ExclusiveStartKey from a cursor; ValueError if it is not one of this listing's."""
+    key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    if not isinstance(key, dict) or set(key) != _CURSOR_KEYS or key["productId"] != product_id:
+        raise ValueError("cursor does not belong to this listing")
+    return key
+
+
+def _handle_product_reviews(brand_id: str, product_id: str, query: dict, window: dict) -> dict:
+    from boto3.dynamodb.conditions import Attr, Key
+    try:
+        limit = int(query.get("limit") or REVIEWS_PAGE_DEFAULT)
+        rating = int(query["rating"]) if query.get("rating") else None
+    except ValueError:
+        return _response(400, {"error": "limit and rating must be integers"})
+    if not 1 <= limit <= REVIEWS_PAGE_MAX:
+        return _response(400, {"error": f"limit must be between 1 and {REVIEWS_PAGE_MAX}"})
+    if rating is not None and not 1 <= rating <= 5:
+        return _response(400, {"error": "rating must be between 1 and 5"})
+    sentiment = (query.get("sentiment") or "").lower()
+    if sentiment and sentiment not in SENTIMENTS:
+        return _response(400, {"error": f"sentiment must be one of {', '.join(SENTIMENTS)}"})
+
+    # productIds are only unique per brand (products key is productId+brandId)
+    filter_expr = Attr("brandId").eq(brand_id)
+    if sentiment:
+        filter_expr &= Attr("sentiment").eq(sentiment)
+    if rating is not None:
+        filter_expr &= Attr("rating").eq(rating)
+    kwargs = {
+        "IndexName": PRODUCT_TIME_INDEX,
+        "KeyConditionExpression": _timestamp_condition(Key("productId").eq(product_id), window),
+        "FilterExpression": filter_expr,
+        "ScanIndexForward": False,
+        **_REVIEW_PROJECTION,
     }
-    if ai_insights:
-        resp_body["ai_insights"] = ai_insights
-    return _response(200, resp_body)
+    if query.get("cursor"):
+        try:
+            kwargs["ExclusiveStartKey"] = _decode_cursor(query["cursor"], product_id)
+        except ValueError:
+            return _response(400, {"error": "Invalid cursor"})
+
+    reviews, last_key = [], None
+    with xray_recorder.in_subsegment("dynamodb-reviews-page") as seg:
+        seg.put_annotation("table", FEEDBACK_TABLE)
+        seg.put_annotation("index", PRODUCT_TIME_INDEX)
+        queries = 0
+        while queries < REVIEWS_MAX_QUERIES:
+            # Limit bounds the items read, so a page never overshoots `limit`
+            kwargs["Limit"] = limit - len(reviews)
+            resp = aws_clients.table(FEEDBACK_TABLE).query(**kwargs)
+            queries += 1
+            reviews.extend(review_records.from_items(resp.get("Items", [])))
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key or len(reviews) >= limit:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+        seg.put_metadata("queries", queries)
+        seg.put_metadata("item_count", len(reviews))
+
+    return _response(200, {
+        "reviews": [_review_entry(r) for r in reviews],
+        "next_cursor": _encode_cursor(last_key) if last_key else None,
+    })
+
+
+# ===========================================================================
+# ROUTE: GET /insights/{brandId}/{productId}/aspects  (topic x sentiment by month)
+# ===========================================================================
+# Read from the product's aspect matrices (shared/aspect_matrix.py): one
+# query returning an item per month, whatever the review count. from/to
+# select whole months (from=2026-10-15 counts all of October); without from,
+# every month up to `to`. ?topic=a,b keeps those topics (normalized as they
+# are counted); the `limit` most mentioned are returned, each with its months.
+ASPECTS_DEFAULT = 20
+ASPECTS_MAX = 200
+
+
+def _month_window(window: dict) -> dict:
+    """The window widened to whole months, the matrices' granularity."""
+    start, end = window["from"], window["to"]
+    next_month = date(end.year + end.month // 12, end.month % 12 + 1, 1)
+    return {**window, "from": start.replace(day=1) if start else None, "to": next_month - timedelta(days=1)}
+
+
+def _aspects(months: dict, topics: set | None, limit: int) -> list:
+    """The most mentioned topics over ``months`` (month -> topic -> bucket counts)."""
+    totals: dict = {}
+    for month in sorted(months):
+        for topic, row in months[month].items():
+            if topics is not None and topic not in topics:
+                continue
+            aspect = totals.get(topic)
+            if aspect is None:
+                aspect = totals[topic] = {"topic": topic, "mentions": 0,
+                                          **dict.fromkeys(review_records.BUCKETS, 0), "months": []}
+            for bucket, n in row.items():
+                aspect[bucket] += n
+            aspect["mentions"] += sum(row.values())
+            aspect["months"].append({"month": month, **row})
+    best = heapq.nsmallest(limit, totals.values(), key=lambda a: (-a["mentions"], a["topic"]))
+    for aspect in best:
+        aspect["negative_pct"] = round(aspect["negative"] / aspect["mentions"] * 100, 1)
+    return best
+
+
+def _handle_product_aspects(brand_id: str, product_id: str, query: dict, window: dict) -> dict:
+    try:
+        limit = int(query.get("limit") or ASPECTS_DEFAULT)
+    except ValueError:
+        return _response(400, {"error": "limit must be an integer"})
+    if not 1 <= limit <= ASPECTS_MAX:
+        return _response(400, {"error": f"limit must be between 1 and {ASPECTS_MAX}"})
+    topics = None
+    if query.get("topic"):
+        topics = {topic_sketch.normalize(t) for t in query["topic"].split(",")} - {""}
+
+    months_window = _month_window(window)
+    first = months_window["from"].strftime("%Y-%m") if months_window["from"] else None
+    last = months_window["to"].strftime("%Y-%m")
+    if ASPECT_MATRIX:
+        months = aspect_matrix.read(link_counters.product_key(brand_id, product_id), first, last)
+    else:
+        counted = aspect_matrix.count(_product_reviews(brand_id, product_id, months_window))
+        months = {month: aspect_matrix.rows(cells) for month, cells in counted.items()}
+    return _response(200, {
+        "productId": product_id,
+        "from": first,
+        "to": last,
+        "aspects": _aspects(months, topics, limit),
+    })
+
+
+# ===========================================================================
+# ROUTE: GET /insights/{brandId}/search  (full-text, newest first)
+# ===========================================================================
+# ?q= is a conjunction of words and "quoted phrases", matched as the search
+# index stores them (shared/search_index.py: lower case, singular, common
+# words left out). rating/sentiment/productId filter as on /reviews, from/to
+# bound the dates. Served by intersecting the query's posting lists, so a
+# page reads postings near its matches rather than the brand's reviews; the
+# cursor is the key to resume from, base64-encoded.
+SEARCH_PAGE_DEFAULT = 20
+SEARCH_PAGE_MAX = 100
+# a page stops after this many posting-list queries even if it is short
+# (rare terms that never meet, say); next_cursor continues it
+SEARCH_MAX_QUERIES = 40
+
+
+def _encode_search_cursor(sk: str, inclusive: bool) -> str:
+    return _encode_cursor({"sk": sk, "inclusive": inclusive})
+
+
+def _decode_search_cursor(cursor: str) -> tuple:
+    """(sort key, inclusive) from a search cursor; ValueError if it is not one."""
+    key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    if (not isinstance(key, dict) or set(key) != {"sk", "inclusive"} or not isinstance(key["sk"], str)
+            or not isinstance(key["inclusive"], bool)):
+        raise ValueError("not a search cursor")
+    return key["sk"], key["inclusive"]
+
+
+def _search_scan(brand_id: str, clauses: list, window: dict, before: str | None, inclusive: bool,
+                 accept, limit: int) -> tuple:
+    """search_index.search() without the index: the brand's reviews, matched one by one."""
+    from boto3.dynamodb.conditions import Key
+    found = []
+    for r in _full_query(BRAND_TIME_INDEX, _timestamp_condition(Key("brandId").eq(brand_id), window)):
+        sk = review_analytics.sort_key(r.timestamp, r.feedback_id)
+        if before is not None and (sk > before or (sk == before and not inclusive)):
+            continue
+        if accept(r) and search_index.matches(r.text, clauses):
+            found.append((sk, r))
+    found.sort(key=lambda pair: pair[0], reverse=True)
+    resume = (found[limit - 1][0], False) if len(found) > limit else None
+    return [r for _, r in found[:limit]], resume
+
+
+def _handle_brand_search(brand_id: str, query: dict, window: dict) -> dict:
+    try:
+        limit = int(query.get("limit") or SEARCH_PAGE_DEFAULT)
+        rating = int(query["rating"]) if query.get("rating") else None
+    except ValueError:
+        return _response(400, {"error": "limit and rating must be integers"})
+    if not 1 <= limit <= SEARCH_PAGE_MAX:
+        return _response(400, {"error": f"limit must be between 1 and {SEARCH_PAGE_MAX}"})
+    if rating is not None and not 1 <= rating <= 5:
+        return _response(400, {"error": "rating must be between 1 and 5"})
+    sentiment = (query.get("sentiment") or "").lower()
+    if sentiment and sentiment not in SENTIMENTS:
+        return _response(400, {"error": f"sentiment must be one of {', '.join(SENTIMENTS)}"})
+    clauses = search_index.parse_query(query.get("q") or "")
+    if not clauses:
+        return _response(400, {"error": "q must contain at least one searchable word"})
+    product_id = query.get("productId") or None
+
+    # the window as sort-key bounds, as _timestamp_condition sets them
+    before, inclusive, after = None, False, None
+    if window["ranged"]:
+        before = (window["to"] + timedelta(days=1)).isoformat()
+        after = window["from"].isoformat() if window["from"] else None
+    if query.get("cursor"):
+        try:
+            sk, sk_inclusive = _decode_search_cursor(query["cursor"])
+        except ValueError:
+            return _response(400, {"error": "Invalid cursor"})
+        if before is None or sk < before:
+            before, inclusive = sk, sk_inclusive
+
+    def wanted(r) -> bool:
+        return ((rating is None or r.rating == rating)
+                and (not sentiment or r.sentiment == sentiment)
+                and (product_id is None or r.product_id == product_id))
+
+    if SEARCH_INDEX:
+        def narrow(posting) -> dict:
+            return {"brandId": brand_id, "sk": posting["sk"],
+                    **{field: posting[field] for field in ("productId", "rating", "sentiment") if field in posting}}
+
+        postings, resume = search_index.search(
+            brand_id, clauses, limit, before, inclusive, after,
+            accept=lambda posting: wanted(review_analytics.records([narrow(posting)])[0]),
+            max_queries=SEARCH_MAX_QUERIES,
+        )
+        reviews = _with_details(review_analytics.records([narrow(p) for p in postings]), narrow=True)
+    else:
+        reviews, resume = _search_scan(brand_id, clauses, window, before, inclusive, wanted, limit)
+
+    return _response(200, {
+        "brandId": brand_id,
+        "q": query.get("q"),
+        "reviews": [{**_review_entry(r), "productId": r.product_id} for r in reviews],
+        "next_cursor": _encode_search_cursor(*resume) if resume else None,
+    })
 
 
 # ===========================================================================
 # ROUTE: GET /insights/{brandId}
 # ===========================================================================
-def _handle_brand_insights(brand_id: str) -> dict:
-    # Fetch brand name
-    with xray_recorder.in_subsegment("dynamodb-get-brand") as seg:
-        seg.put_annotation("table", BRANDS_TABLE)
-        seg.put_annotation("operation", "get_item")
-        brand_resp = brands_tbl.get_item(Key={"brandId": brand_id})
-    brand = brand_resp.get("Item")
-    brand_name = brand.get("brandName", brand_id) if brand else brand_id
+BRAND_SECTIONS = (
+    "brand_name", "total_reviews", "avg_rating", "products", "total_products",
+    "overall_sentiment_distribution", "recent_activity", "top_topics", "link_stats",
+)
 
-    # All reviews for this brand
-    reviews = _full_scan(feedback_tbl, Attr("brandId").eq(brand_id))
-    if not reviews:
-        return _response(404, {"error": "No reviews found for this brand"})
 
-    # All products belonging to this brand
-    products = _full_scan(products_tbl, Attr("brandId").eq(brand_id))
+def _product_summaries(reviews, products) -> list:
     product_map = {p["productId"]: p.get("productName", p["productId"]) for p in products}
 
     # Group reviews by productId
     by_product: dict[str, list] = {}
     for r in reviews:
-        pid = r.get("productId", "unknown")
+        pid = r.product_id or "unknown"
         by_product.setdefault(pid, []).append(r)
 
     # Build a map of product AI summaries from the products table
     product_ai_map = {}
     for p in products:
-        pid = p.get("productId", "")
-        if p.get("ai_summary"):
-            product_ai_map[pid] = {
-                "ai_summary": p.get("ai_summary", ""),
-                "ai_strengths": p.get("ai_strengths", []),
-                "ai_weaknesses": p.get("ai_weaknesses", []),
-                "ai_recommendations": p.get("ai_recommendations", []),
-                "ai_sentiment_overview": p.get("ai_sentiment_overview", ""),
-                "ai_summary_updated_at": p.get("ai_summary_updated_at", ""),
-                "ai_summary_review_count": p.get("ai_summary_review_count", 0),
-            }
+        ai_insights = _product_ai_insights(p)
+        if ai_insights:
+            product_ai_map[p.get("productId", "")] = ai_insights
 
     product_summaries = []
     for pid, p_reviews in by_product.items():
@@ -304,49 +1078,170 @@ def _handle_brand_insights(brand_id: str) -> dict:
         product_summaries.append(entry)
 
     product_summaries.sort(key=lambda x: x["total_reviews"], reverse=True)
+    return product_summaries
 
-    # Recent activity — last 20 reviews
-    all_sorted = sorted(reviews, key=lambda r: r.get("timestamp", ""), reverse=True)
-    recent_activity = []
-    for r in all_sorted[:20]:
-        recent_activity.append({
-            "FeedbackId": r.get("FeedbackId", ""),
-            "customerName": r.get("customerName", r.get("name", "")),
-            "rating": r.get("rating", 0),
-            "reviewText": r.get("reviewText", r.get("message", "")),
-            "sentiment": r.get("sentiment", "neutral"),
-            "productId": r.get("productId", ""),
-            "productName": product_map.get(r.get("productId", ""), r.get("productId", "")),
-            "timestamp": r.get("timestamp", ""),
+
+def _brand_recent_activity(newest, products) -> list:
+    """Last 20 reviews of the brand."""
+    product_map = {p["productId"]: p.get("productName", p["productId"]) for p in products}
+    activity = []
+    for r in newest:
+        activity.append({
+            "FeedbackId": r.feedback_id,
+            "customerName": r.customer_name,
+            "rating": r.rating,
+            "reviewText": recent_activity.snippet(r.text),
+            "sentiment": r.sentiment,
+            "productId": r.product_id,
+            "productName": product_map.get(r.product_id, r.product_id),
+            "timestamp": r.timestamp,
         })
+    return activity
+
+
+def _handle_brand_insights(brand_id: str, wanted: tuple = BRAND_SECTIONS, complete: bool = False,
+                           window: dict | None = None, fresh: bool = False) -> dict:
+    from boto3.dynamodb.conditions import Attr
+    window = window or _time_window({})
+    nodes = {
+        "brand_record": ((), lambda: metadata_cache.get_brand(brand_id, fresh)),
+        # Reviews for this brand in the window
+        "reviews": ((), lambda: _brand_reviews(brand_id, window)),
+        "recent": _recent_node(link_counters.brand_key(brand_id), 20, window,
+                               lambda: _brand_reviews(brand_id, window)),
+        # All products belonging to this brand
+        "products_scan": ((), lambda: _full_scan(aws_clients.table(PRODUCTS_TABLE),
+                                                 Attr("brandId").eq(brand_id))),
+        "brand_name": (("brand_record",),
+                       lambda brand: brand.get("brandName", brand_id) if brand else brand_id),
+        "total_reviews": (("reviews",), len),
+        "avg_rating": (("reviews",), _avg_rating),
+        "products": (("reviews", "products_scan"), _product_summaries),
+        "total_products": (("products_scan",), len),
+        "overall_sentiment_distribution": (("reviews",), _sentiment_distribution),
+        "recent_activity": (("recent", "products_scan"), _brand_recent_activity),
+        "top_topics": _top_topics_node(link_counters.brand_key(brand_id), 5, window),
+        "link_stats": ((), lambda: _link_stats(brand_id)),
+    }
+    values, pending = _run_sections(nodes, wanted, complete)
 
-    return _response(200, {
-        "brand_name": brand_name,
-        "total_reviews": len(reviews),
-        "avg_rating": _avg_rating(reviews),
-        "products": product_summaries,
-        "total_products": len(products),
-        "overall_sentiment_distribution": _sentiment_distribution(reviews),
-        "recent_activity": recent_activity,
-        "link_stats": _link_stats(brand_id),
-    })
+    if not window["ranged"] and "reviews" in values and not values["reviews"]:
+        return _response(404, {"error": "No reviews found for this brand"})
+    return _response(200, _sections_body(values, pending, wanted))
 
 
 # ===========================================================================
 # ROUTE: GET /insights  (superadmin overview — all brands)
 # ===========================================================================
-def _handle_all_brands_insights() -> dict:
-    brands = _full_scan(brands_tbl)
-    reviews = _full_scan(feedback_tbl)
-    products = _full_scan(products_tbl)
-    links = _full_scan(links_tbl)
+OVERVIEW_SECTIONS = (
+    "total_brands", "total_reviews_all_brands", "overall_avg_rating",
+    "overall_sentiment_score", "overall_sentiment_distribution",
+    "overall_sentiment_trend", "total_products_all", "total_links_sent",
+    "overall_response_rate", "brands", "recent_activity",
+    # scatter-gather only: brands whose shard failed or ran out of time
+    "incomplete_brands",
+)
+
+
+def _overview_link_stats(reviews) -> dict:
+    """Link counters for every reviewed brand plus the global total, one batch."""
+    reviewed = {r.brand_id or "unknown" for r in reviews}
+    return link_counters.batch_get_stats(
+        [link_counters.GLOBAL_KEY] + [link_counters.brand_key(bid) for bid in reviewed]
+    )
+
+
+def _overview_sentiment_score(reviews) -> float:
+    overall_dist = _sentiment_distribution(reviews)
+    return round(overall_dist["positive"] / len(reviews) * 100, 1) if reviews else 0.0
+
+
+def _brands_reviews(brands, window: dict) -> list:
+    """Reviews of every brand in the window, one range query per brand."""
+    reviews = []
+    for brand in brands:
+        reviews.extend(_brand_reviews(brand["brandId"], window))
+    return reviews
+
+
+def _brand_summary(brand_id: str, brand_name: str, b_reviews: list, brand_products: list,
+                   brand_link_stats: dict, window: dict, newest: list | None = None) -> dict:
+    """One brand's entry in the overview's ``brands`` list.
+
+    ``newest``: its five newest reviews, with details, when the caller has
+    already read them.
+    """
+    dist = _sentiment_distribution(b_reviews)
+    total = len(b_reviews)
+    pos_pct = round(dist["positive"] / total * 100, 1) if total else 0.0
+
+    # Products for this brand
+    by_product: dict[str, list] = {}
+    for r in b_reviews:
+        by_product.setdefault(r.product_id, []).append(r)
+    product_list = []
+    for p in brand_products:
+        pid = p.get("productId", "")
+        p_reviews = by_product.get(pid, [])
+        p_dist = _sentiment_distribution(p_reviews)
+        p_total = len(p_reviews)
+        p_pos = round(p_dist["positive"] / p_total * 100, 1) if p_total else 0.0
+        entry = {
+            "productId": pid,
+            "productName": p.get("productName", pid),
+            "total_reviews": p_total,
+            "avg_rating": _avg_rating(p_reviews),
+            "sentiment_score": p_pos,
+        }
+        if p.get("ai_summary"):
+            entry["ai_insights"] = {
+                "ai_summary": p.get("ai_summary", ""),
+                "ai_strengths": p.get("ai_strengths", []),
+                "ai_weaknesses": p.get("ai_weaknesses", []),
+                "ai_recommendations": p.get("ai_recommendations", []),
+                "ai_sentiment_overview": p.get("ai_sentiment_overview", ""),
+                "ai_summary_review_count": p.get("ai_summary_review_count", 0),
+            }
+        product_list.append(entry)
+    product_list.sort(key=lambda x: x["total_reviews"], reverse=True)
+
+    # Recent reviews for this brand (top 5)
+    if newest is None:
+        newest = _with_details(_newest(b_reviews, 5))
+    brand_recent = []
+    for r in newest:
+        brand_recent.append({
+            "customerName": r.customer_name,
+            "rating": r.rating,
+            "sentiment": r.sentiment,
+            "reviewText": r.text[:120],
+            "productId": r.product_id,
+            "timestamp": r.timestamp,
+        })
+
+    return {
+        "brandId": brand_id,
+        "brandName": brand_name,
+        "total_reviews": total,
+        "avg_rating": _avg_rating(b_reviews),
+        "sentiment_score": pos_pct,
+        "sentiment_distribution": dist,
+        "total_products": len(brand_products),
+        "products": product_list,
+        "links_sent": brand_link_stats["total_sent"],
+        "response_rate": brand_link_stats["usage_rate"],
+        "recent_reviews": brand_recent,
+        "sentiment_trend": _sentiment_trend(b_reviews, window),
+    }
 
+
+def _brand_summaries(brands, reviews, products, link_stats, window: dict) -> list:
     brand_map = {b["brandId"]: b.get("brandName", b["brandId"]) for b in brands}
 
     # Group reviews by brand
     by_brand: dict[str, list] = {}
     for r in reviews:
-        bid = r.get("brandId", "unknown")
+        bid = r.brand_id or "unknown"
         by_brand.setdefault(bid, []).append(r)
 
     # Group products by brand
@@ -355,137 +1250,442 @@ def _handle_all_brands_insights() -> dict:
         bid = p.get("brandId", "unknown")
         products_by_brand.setdefault(bid, []).append(p)
 
-    # Group links by brand
-    links_by_brand: dict[str, list] = {}
-    for lnk in links:
-        bid = lnk.get("brandId", "unknown")
-        links_by_brand.setdefault(bid, []).append(lnk)
-
-    # Build rich brand summaries
-    brand_summaries = []
-    for bid, b_reviews in by_brand.items():
-        dist = _sentiment_distribution(b_reviews)
-        total = len(b_reviews)
-        pos_pct = round(dist["positive"] / total * 100, 1) if total else 0.0
+    # every brand's five newest reviews: from the buffers, in one batch, and
+    # those they cannot answer for picked here and read back in another
+    newest = {}
+    if RECENT_BUFFERS and not window["ranged"]:
+        buffered = recent_activity.batch_newest([link_counters.brand_key(bid) for bid in by_brand], 5)
+        newest = {bid: buffered[link_counters.brand_key(bid)] for bid in by_brand}
+    picked = {bid: _newest(b_reviews, 5) for bid, b_reviews in by_brand.items()
+              if newest.get(bid) is None}
+    detailed = iter(_with_details([r for chosen in picked.values() for r in chosen]))
+    newest.update({bid: [next(detailed) for _ in chosen] for bid, chosen in picked.items()})
+    brand_summaries = [
+        _brand_summary(bid, brand_map.get(bid, bid), b_reviews, products_by_brand.get(bid, []),
+                       link_stats[link_counters.brand_key(bid)], window, newest[bid])
+        for bid, b_reviews in by_brand.items()
+    ]
+    brand_summaries.sort(key=lambda x: x["total_reviews"], reverse=True)
+    return brand_summaries
 
-        # Products for this brand
-        brand_products = products_by_brand.get(bid, [])
-        product_list = []
-        for p in brand_products:
-            pid = p.get("productId", "")
-            p_reviews = [r for r in b_reviews if r.get("productId") == pid]
-            p_dist = _sentiment_distribution(p_reviews)
-            p_total = len(p_reviews)
-            p_pos = round(p_dist["positive"] / p_total * 100, 1) if p_total else 0.0
-            entry = {
-                "productId": pid,
-                "productName": p.get("productName", pid),
-                "total_reviews": p_total,
-                "avg_rating": _avg_rating(p_reviews),
-                "sentiment_score": p_pos,
-            }
-            if p.get("ai_summary"):
-                entry["ai_insights"] = {
-                    "ai_summary": p.get("ai_summary", ""),
-                    "ai_strengths": p.get("ai_strengths", []),
-                    "ai_weaknesses": p.get("ai_weaknesses", []),
-                    "ai_recommendations": p.get("ai_recommendations", []),
-                    "ai_sentiment_overview": p.get("ai_sentiment_overview", ""),
-                    "ai_summary_review_count": p.get("ai_summary_review_count", 0),
-                }
-            product_list.append(entry)
-        product_list.sort(key=lambda x: x["total_reviews"], reverse=True)
-
-        # Link stats for this brand
-        brand_links = links_by_brand.get(bid, [])
-        links_sent = len(brand_links)
-        links_used = sum(1 for l in brand_links if l.get("used") is True)
-        response_rate = round(links_used / links_sent * 100, 1) if links_sent else 0.0
-
-        # Recent reviews for this brand (top 5)
-        brand_sorted = sorted(b_reviews, key=lambda r: r.get("timestamp", ""), reverse=True)
-        brand_recent = []
-        for r in brand_sorted[:5]:
-            brand_recent.append({
-                "customerName": r.get("customerName", r.get("name", "")),
-                "rating": r.get("rating", 0),
-                "sentiment": r.get("sentiment", "neutral"),
-                "reviewText": r.get("reviewText", r.get("message", ""))[:120],
-                "productId": r.get("productId", ""),
-                "timestamp": r.get("timestamp", ""),
-            })
-
-        brand_summaries.append({
-            "brandId": bid,
-            "brandName": brand_map.get(bid, bid),
-            "total_reviews": total,
-            "avg_rating": _avg_rating(b_reviews),
-            "sentiment_score": pos_pct,
-            "sentiment_distribution": dist,
-            "total_products": len(brand_products),
-            "products": product_list,
-            "links_sent": links_sent,
-            "response_rate": response_rate,
-            "recent_reviews": brand_recent,
-            "sentiment_trend": _sentiment_trend(b_reviews),
+
+def _overview_recent_activity(brands, newest) -> list:
+    """Global recent activity (last 20)."""
+    brand_map = {b["brandId"]: b.get("brandName", b["brandId"]) for b in brands}
+    activity = []
+    for r in newest:
+        activity.append({
+            "customerName": r.customer_name,
+            "rating": r.rating,
+            "sentiment": r.sentiment,
+            "reviewText": r.text[:120],
+            "productId": r.product_id,
+            "brandId": r.brand_id,
+            "brandName": brand_map.get(r.brand_id, r.brand_id),
+            "timestamp": r.timestamp,
         })
+    return activity
+
+
+def _handle_all_brands_insights(wanted: tuple = OVERVIEW_SECTIONS, complete: bool = False,
+                                window: dict | None = None) -> dict:
+    window = window or _time_window({})
+    if OVERVIEW_FANOUT != "off":
+        return _handle_all_brands_fanout(wanted, complete, window)
+    if window["ranged"]:
+        reviews_node = (("brands_scan",), lambda brands: _brands_reviews(brands, window))
+    else:
+        reviews_node = ((), _all_reviews)
+    nodes = {
+        "brands_scan": ((), lambda: _full_scan(aws_clients.table(BRANDS_TABLE))),
+        "reviews": reviews_node,
+        "recent": _recent_node(link_counters.GLOBAL_KEY, 20, window, _all_reviews),
+        "products_scan": ((), lambda: _full_scan(aws_clients.table(PRODUCTS_TABLE))),
+        "link_stats_batch": (("reviews",), _overview_link_stats),
+        "total_brands": (("brands_scan",), len),
+        "total_reviews_all_brands": (("reviews",), len),
+        "overall_avg_rating": (("reviews",), _avg_rating),
+        "overall_sentiment_score": (("reviews",), _overview_sentiment_score),
+        "overall_sentiment_distribution": (("reviews",), _sentiment_distribution),
+        "overall_sentiment_trend": (("reviews",), lambda reviews: _sentiment_trend(reviews, window)),
+        "total_products_all": (("products_scan",), len),
+        "total_links_sent": (("link_stats_batch",),
+                             lambda stats: stats[link_counters.GLOBAL_KEY]["total_sent"]),
+        "overall_response_rate": (("link_stats_batch",),
+                                  lambda stats: stats[link_counters.GLOBAL_KEY]["usage_rate"]),
+        "brands": (("brands_scan", "reviews", "products_scan", "link_stats_batch"),
+                   lambda *sources: _brand_summaries(*sources, window)),
+        "recent_activity": (("brands_scan", "recent"), _overview_recent_activity),
+        "incomplete_brands": ((), lambda: None),
+    }
+    values, pending = _run_sections(nodes, wanted, complete)
+    return _response(200, _sections_body(values, pending, wanted))
 
-    brand_summaries.sort(key=lambda x: x["total_reviews"], reverse=True)
 
-    # Overall KPIs
-    total_all_reviews = len(reviews)
-    overall_dist = _sentiment_distribution(reviews)
-    overall_pos = round(overall_dist["positive"] / total_all_reviews * 100, 1) if total_all_reviews else 0.0
-    total_links_sent = len(links)
-    total_links_used = sum(1 for l in links if l.get("used") is True)
-    overall_response_rate = round(total_links_used / total_links_sent * 100, 1) if total_links_sent else 0.0
-
-    # Global recent activity (last 20)
-    all_sorted = sorted(reviews, key=lambda r: r.get("timestamp", ""), reverse=True)
-    recent_activity = []
-    for r in all_sorted[:20]:
-        pid = r.get("productId", "")
-        bid = r.get("brandId", "")
-        recent_activity.append({
-            "customerName": r.get("customerName", r.get("name", "")),
-            "rating": r.get("rating", 0),
-            "sentiment": r.get("sentiment", "neutral"),
-            "reviewText": r.get("reviewText", r.get("message", ""))[:120],
-            "productId": pid,
-            "brandId": bid,
-            "brandName": brand_map.get(bid, bid),
-            "timestamp": r.get("timestamp", ""),
-        })
+# ---------------------------------------------------------------------------
+# Scatter-gather (OVERVIEW_FANOUT=lambda|process)
+# ---------------------------------------------------------------------------
+# The classic overview reads every review into one invocation, so its time
+# and memory grow with the number of tenants. With fan-out on, the
+# coordinator scans only the brand and product metadata and hands each
+# brand to a shard, at most OVERVIEW_FANOUT_CONCURRENCY at a time:
+#
+#   lambda   a synchronous invocation of this function per brand
+#            ({"action": "overview_shard", ...})
+#   process  a local process pool, for runs outside AWS (Lambda has no
+#            /dev/shm for multiprocessing)
+#
+# A shard reads only its brand's partition (of the analytics table, and the
+# brand's link counters) and returns the brand summary plus the counts the overview
+# adds up, so the merged body has the classic shape. Each shard gets
+# OVERVIEW_SHARD_TIMEOUT_MS of its own; a brand whose shard fails or times
+# out is listed in "incomplete_brands" and the response is not cacheable.
+# Reviews whose brand is missing from the brands table are not counted, as
+# no shard owns them.
+
+def _window_payload(window: dict) -> dict:
+    return {k: v.isoformat() if isinstance(v, date) else v for k, v in window.items()}
+
+
+def _window_from_payload(payload: dict) -> dict:
+    return {k: date.fromisoformat(v) if k in ("from", "to", "trend_from") and v else v
+            for k, v in payload.items()}
+
+
+def _overview_shard(task: dict) -> dict:
+    """One brand's part of the overview: its summary and the totals to merge."""
+    aws_clients.limit_deadline(task["timeout_ms"] / 1000)
+    brand = task["brand"]
+    bid = brand["brandId"]
+    window = _window_from_payload(task["window"])
+    reviews = _brand_reviews(bid, window)
+    if window["ranged"]:
+        newest = _with_details(_newest(reviews, 20))
+    else:
+        newest = _recent(link_counters.brand_key(bid), 20, lambda: reviews)
+    summary = None
+    if reviews:
+        summary = _brand_summary(bid, brand.get("brandName", bid), reviews, task["products"],
+                                 _link_stats(bid), window, newest[:5])
+    return {
+        "brandId": bid,
+        "summary": summary,
+        "total_reviews": len(reviews),
+        "rating_sum": sum(r.rating for r in reviews),
+        "sentiment_distribution": _sentiment_distribution(reviews),
+        "sentiment_trend": _sentiment_trend(reviews, window),
+        "recent_activity": _overview_recent_activity([brand], newest),
+    }
 
-    # Overall sentiment trend
-    overall_trend = _sentiment_trend(reviews)
 
-    return _response(200, {
-        "total_brands": len(brands),
-        "total_reviews_all_brands": total_all_reviews,
-        "overall_avg_rating": _avg_rating(reviews),
-        "overall_sentiment_score": overall_pos,
-        "overall_sentiment_distribution": overall_dist,
-        "overall_sentiment_trend": overall_trend,
-        "total_products_all": len(products),
-        "total_links_sent": total_links_sent,
-        "overall_response_rate": overall_response_rate,
-        "brands": brand_summaries,
-        "recent_activity": recent_activity,
-    })
+def _shard_result(task: dict) -> dict:
+    """_overview_shard, with a failure reported in the result instead of raised."""
+    try:
+        return _overview_shard(task)
+    except Exception as exc:
+        return {"brandId": task["brand"]["brandId"], "error": f"{type(exc).__name__}: {exc}"}
+
+
+def _overview_shard_task(task: dict) -> dict:
+    """Process-pool entry point; workers are reused, so each task starts a fresh budget."""
+    aws_clients.start_deadline(None)
+    return _shard_result(task)
+
+
+def _invoke_shard(task: dict) -> dict:
+    with xray_recorder.in_subsegment("lambda-invoke-overview-shard") as seg:
+        seg.put_annotation("function_name", OVERVIEW_SHARD_FUNCTION)
+        seg.put_annotation("brand_id", task["brand"]["brandId"])
+        resp = aws_clients.client("lambda").invoke(
+            FunctionName=OVERVIEW_SHARD_FUNCTION,
+            Payload=json.dumps({"action": "overview_shard", **task}, cls=_DecimalEncoder).encode("utf-8"),
+        )
+    result = json.loads(resp["Payload"].read())
+    if resp.get("FunctionError"):
+        return {"brandId": task["brand"]["brandId"], "error": result.get("errorMessage", "FunctionError")}
+    return result
+
+
+def _scatter(tasks: list) -> tuple[list, list]:
+    """Run every shard task. Returns (results, brand ids whose shard failed or timed out)."""
+    if OVERVIEW_FANOUT == "process":
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=OVERVIEW_FANOUT_CONCURRENCY,
+                                   initializer=aws_clients.reset)
+        submit = partial(pool.submit, _overview_shard_task)
+    elif OVERVIEW_FANOUT == "lambda":
+        pool = None
+        parent = xray_recorder.get_trace_entity()
+        submit = lambda task: _fanout_executor.submit(_run_node, parent, partial(_invoke_shard, task), [])
+    else:
+        raise ValueError(f"Unknown OVERVIEW_FANOUT: {OVERVIEW_FANOUT}")
+
+    futures = {submit(task): task["brand"]["brandId"] for task in tasks}
+    remaining = aws_clients.remaining_s()
+    try:
+        # stop early enough to merge what came back and still answer
+        wait(futures, timeout=None if remaining is None else max(remaining - GATHER_MARGIN_S, 0))
+    finally:
+        for future in futures:
+            future.cancel()     # only drops shards that have not started yet
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    results, missing = [], []
+    for future, bid in futures.items():
+        if not future.done() or future.cancelled():
+            missing.append(bid)
+            continue
+        try:
+            result = future.result()
+        except Exception as exc:
+            result = {"brandId": bid, "error": f"{type(exc).__name__}: {exc}"}
+        if "error" in result:
+            print(f"[SHARD ERROR] brand={bid}: {result['error']}")
+            missing.append(bid)
+        else:
+            results.append(result)
+    if missing:
+        print(f"[DEGRADED] overview shards missing={len(missing)} of {len(tasks)}")
+    return results, missing
+
+
+def _gather_overview(brands, products, window: dict) -> dict:
+    """Fan the brands out to shards and merge their results into the overview sections."""
+    products_by_brand: dict[str, list] = {}
+    for p in products:
+        products_by_brand.setdefault(p.get("brandId", "unknown"), []).append(p)
+    window_payload = _window_payload(window)
+    tasks = [{"brand": b, "products": products_by_brand.get(b["brandId"], []),
+              "window": window_payload, "timeout_ms": OVERVIEW_SHARD_TIMEOUT_MS}
+             for b in brands if b.get("brandId")]
+    results, missing = _scatter(tasks)
+
+    total = sum(r["total_reviews"] for r in results)
+    dist = {"positive": 0, "neutral": 0, "negative": 0}
+    trend = _sentiment_trend([], window)
+    for r in results:
+        for s in dist:
+            dist[s] += r["sentiment_distribution"][s]
+        for bucket, counts in zip(trend, r["sentiment_trend"]):
+            for s in ("positive", "negative", "neutral"):
+                bucket[s] += counts[s]
+    recent = sorted((a for r in results for a in r["recent_activity"]),
+                    key=lambda a: a.get("timestamp", ""), reverse=True)[:20]
+    summaries = sorted((r["summary"] for r in results if r["summary"]),
+                       key=lambda x: x["total_reviews"], reverse=True)
+    return {
+        "total_reviews_all_brands": total,
+        "overall_avg_rating": round(sum(r["rating_sum"] for r in results) / total, 1) if total else 0.0,
+        "overall_sentiment_score": round(dist["positive"] / total * 100, 1) if total else 0.0,
+        "overall_sentiment_distribution": dist,
+        "overall_sentiment_trend": trend,
+        "brands": summaries,
+        "recent_activity": recent,
+        "incomplete_brands": sorted(missing) or None,
+    }
+
+
+def _handle_all_brands_fanout(wanted: tuple, complete: bool, window: dict) -> dict:
+    merged_sections = ("total_reviews_all_brands", "overall_avg_rating", "overall_sentiment_score",
+                       "overall_sentiment_distribution", "overall_sentiment_trend", "brands",
+                       "recent_activity", "incomplete_brands")
+    nodes = {
+        "brands_scan": ((), lambda: _full_scan(aws_clients.table(BRANDS_TABLE))),
+        "products_scan": ((), lambda: _full_scan(aws_clients.table(PRODUCTS_TABLE))),
+        "global_link_stats": ((), lambda: link_counters.batch_get_stats(
+            [link_counters.GLOBAL_KEY])[link_counters.GLOBAL_KEY]),
+        "shards": (("brands_scan", "products_scan"),
+                   lambda brands, products: _gather_overview(brands, products, window)),
+        "total_brands": (("brands_scan",), len),
+        "total_products_all": (("products_scan",), len),
+        "total_links_sent": (("global_link_stats",), lambda stats: stats["total_sent"]),
+        "overall_response_rate": (("global_link_stats",), lambda stats: stats["usage_rate"]),
+    }
+    for name in merged_sections:
+        nodes[name] = (("shards",), lambda merged, name=name: merged[name])
+    values, pending = _run_sections(nodes, wanted, complete)
+    body = _sections_body(values, pending, wanted)
+    if values.get("shards", {}).get("incomplete_brands"):
+        # also on ?section= / ?fields= bodies, which keeps them uncacheable
+        body["incomplete_brands"] = values["shards"]["incomplete_brands"]
+    return _response(200, body)
+
+
+# ===========================================================================
+# Materialized dashboards (shared/dashboards.py)
+# ===========================================================================
+# Plain dashboard requests are answered from the stored document for their
+# scope. A stale one is still served at once, and the read asks for a
+# background rebuild (stale-while-revalidate); a request whose scope has no
+# document yet is built live and asks for one. Rebuilds run the normal route
+# handler with every section (complete=True) and store the gzip body, so
+# serving a document needs neither the sections nor json.dumps.
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _document_etag(scope_key: str, version: int, built_on: str) -> str:
+    key = json.dumps([CODE_VERSION, scope_key, version, built_on])
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def _document_builder(scope_key: str):
+    """Route handler call that produces the full dashboard for ``scope_key``.
+
+    Brand and product records are read past the metadata cache: a document
+    is stored under the current data version, and a cached ai_summary could
+    be older than that version.
+    """
+    window = _time_window({})
+    if scope_key == link_counters.GLOBAL_KEY:
+        return partial(_handle_all_brands_insights, OVERVIEW_SECTIONS, True, window)
+    kind, _, rest = scope_key.partition("#")
+    if kind == "brand":
+        return partial(_handle_brand_insights, rest, BRAND_SECTIONS, True, window, fresh=True)
+    if kind == "product":
+        brand_id, _, product_id = rest.partition("#")
+        return partial(_handle_product_insights, brand_id, product_id, PRODUCT_SECTIONS, True, window,
+                       fresh=True)
+    raise ValueError(f"Unknown dashboard scope: {scope_key}")
+
+
+def _claim_refresh_request(scope_key: str, item: dict | None) -> bool:
+    """dashboards.claim_refresh_request; a failure only skips this read's request."""
+    try:
+        return dashboards.claim_refresh_request(scope_key, item)
+    except aws_clients.DeadlineExceeded:
+        raise
+    except Exception as exc:
+        print(f"[DASHBOARD] refresh claim failed for {scope_key}: {exc}")
+        return False
+
+
+def _stored_dashboard(event: dict, scope_key: str, version: int | None) -> dict | None:
+    """Response from the stored document, or None to build this one live."""
+    try:
+        item = dashboards.get(scope_key)
+    except aws_clients.DeadlineExceeded:
+        raise
+    except Exception as exc:
+        print(f"[DASHBOARD] read failed for {scope_key}: {exc}")
+        return None
+    stale = version is not None and dashboards.is_stale(item, version, CODE_VERSION, _today())
+    if stale and not dashboards.is_leased(item) and _claim_refresh_request(scope_key, item):
+        dashboards.request_refresh([scope_key])
+    if not item or "body" not in item or item.get("code") != CODE_VERSION:
+        return None
+
+    entity = xray_recorder.get_trace_entity()
+    if entity is not None:
+        entity.put_annotation("dashboard", "stale" if stale else "fresh")
+    etag = item["etag"]
+    if _not_modified(event, etag):
+        return _not_modified_response(event, etag)
+    headers = {**CORS_HEADERS, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    compressed = bytes(item["body"])
+    if "gzip" in _header(event, "Accept-Encoding").lower():
+        headers.update({"Content-Encoding": "gzip", "ETag": etag[:-1] + '-gzip"'})
+        return {"statusCode": 200, "headers": headers, "isBase64Encoded": True,
+                "body": base64.b64encode(compressed).decode("ascii")}
+    headers["ETag"] = etag
+    return {"statusCode": 200, "headers": headers, "body": gzip.decompress(compressed).decode("utf-8")}
+
+
+def _materialize_scope(scope_key: str, version: int) -> str:
+    """Rebuild one document.
+
+    Returns "built", "empty", "incomplete", "too_large", "superseded" or "busy".
+    """
+    if not dashboards.acquire_lease(scope_key, REFRESH_LEASE_S):
+        return "busy"
+    built_on = _today()
+    try:
+        response = _document_builder(scope_key)()
+    except Exception:
+        dashboards.release_lease(scope_key)
+        raise
+    if response["statusCode"] != 200:
+        stored = dashboards.put(scope_key, version, built_on, CODE_VERSION)
+        return "empty" if stored else "superseded"
+    if response["headers"]["Cache-Control"] == "no-store":
+        # a scatter-gather overview with brands missing: keep the old document
+        dashboards.release_lease(scope_key)
+        return "incomplete"
+
+    body = gzip.compress(response["body"].encode("utf-8"), compresslevel=GZIP_LEVEL)
+    if len(body) > dashboards.MAX_DOCUMENT_BYTES:
+        print(f"[DASHBOARD] {scope_key} is {len(body)} bytes compressed, serving it live")
+        dashboards.release_lease(scope_key)
+        return "too_large"
+    stored = dashboards.put(scope_key, version, built_on, CODE_VERSION,
+                            body=body, etag=_document_etag(scope_key, version, built_on))
+    return "built" if stored else "superseded"
+
+
+def _dashboard_scopes() -> list:
+    """Every scope a document can exist for: the overview, each brand, each product."""
+    brands = _full_scan(aws_clients.table(BRANDS_TABLE))
+    products = _full_scan(aws_clients.table(PRODUCTS_TABLE))
+    return ([link_counters.GLOBAL_KEY]
+            + [link_counters.brand_key(b["brandId"]) for b in brands if b.get("brandId")]
+            + [link_counters.product_key(p["brandId"], p["productId"]) for p in products
+               if p.get("brandId") and p.get("productId")])
+
+
+def _handle_materialize(scopes: list | None) -> dict:
+    """Rebuild the stale documents among ``scopes``.
+
+    Without scopes (the hourly schedule) it only finds the stale ones and
+    hands them to asynchronous refreshes, REFRESH_CHUNK scopes each.
+    """
+    planned = scopes is None
+    if planned:
+        scopes = _dashboard_scopes()
+    today = _today()
+    versions = _scope_versions(scopes)
+    stored = dashboards.batch_get_meta(scopes)
+    stale = [key for key in dict.fromkeys(scopes)
+             if dashboards.is_stale(stored.get(key), versions[key], CODE_VERSION, today)]
+    if planned:
+        dashboards.request_refresh(stale)
+        return {"scopes": len(versions), "stale": len(stale)}
+
+    outcomes = Counter({"fresh": len(versions) - len(stale)})
+    for key in stale:
+        outcomes[_materialize_scope(key, versions[key])] += 1
+    return dict(outcomes)
 
 
 # ===========================================================================
 # Lambda entry point
 # ===========================================================================
 def lambda_handler(event, context):
+    aws_clients.start_deadline(context)
     with xray_recorder.in_subsegment("get-insights-handler") as subsegment:
         subsegment.put_annotation("function", "get-insights")
         subsegment.put_annotation("environment", ENVIRONMENT)
+        ddb_metrics.begin_request("get-insights")
         try:
+            # Dashboard refresh: hourly schedule, stale reads, ai_processor
+            if event.get("action") == "materialize":
+                subsegment.put_annotation("route", "materialize")
+                ddb_metrics.set_route("materialize")
+                summary = _handle_materialize(event.get("scopes"))
+                print(f"[MATERIALIZE] {json.dumps(summary)}")
+                return summary
+
+            # One brand of a scatter-gather overview (called by get_insights)
+            if event.get("action") == "overview_shard":
+                subsegment.put_annotation("route", "overview_shard")
+                ddb_metrics.set_route("overview_shard", event["brand"]["brandId"])
+                return json.loads(json.dumps(_shard_result(event), cls=_DecimalEncoder))
+
             http_method = event.get("httpMethod", "")
             path = event.get("path", "")
             path_params = event.get("pathParameters") or {}
+            query = event.get("queryStringParameters") or {}
             subsegment.put_annotation("http_method", http_method)
 
             # CORS preflight
@@ -504,24 +1704,85 @@ def lambda_handler(event, context):
             # ------- Route matching -------
             brand_id = path_params.get("brandId")
             product_id = path_params.get("productId")
-
-            if brand_id and product_id:
+            try:
+                window = _time_window(query)
+            except ValueError as exc:
+                return _response(400, {"error": str(exc)})
+            if query.get("section") or query.get("fields"):
+                subsegment.put_annotation("fields", query.get("section") or query.get("fields"))
+
+            # only the dashboard routes have stored documents
+            dashboard = True
+            if brand_id and product_id and path.rstrip("/").endswith(f"/{product_id}/reviews"):
+                subsegment.put_annotation("route", "GET /insights/{brandId}/{productId}/reviews")
+                ddb_metrics.set_route("GET /insights/{brandId}/{productId}/reviews", brand_id)
+                scope_key = link_counters.product_key(brand_id, product_id)
+                handle = partial(_handle_product_reviews, brand_id, product_id, query, window)
+                dashboard = False
+            elif brand_id and product_id and path.rstrip("/").endswith(f"/{product_id}/aspects"):
+                subsegment.put_annotation("route", "GET /insights/{brandId}/{productId}/aspects")
+                ddb_metrics.set_route("GET /insights/{brandId}/{productId}/aspects", brand_id)
+                scope_key = link_counters.product_key(brand_id, product_id)
+                handle = partial(_handle_product_aspects, brand_id, product_id, query, window)
+                dashboard = False
+            elif brand_id and not product_id and path.rstrip("/").endswith(f"/{brand_id}/search"):
+                subsegment.put_annotation("route", "GET /insights/{brandId}/search")
+                ddb_metrics.set_route("GET /insights/{brandId}/search", brand_id)
+                scope_key = link_counters.brand_key(brand_id)
+                handle = partial(_handle_brand_search, brand_id, query, window)
+                dashboard = False
+            elif brand_id and product_id:
                 subsegment.put_annotation("route", "GET /insights/{brandId}/{productId}")
-                return _handle_product_insights(brand_id, product_id)
+                ddb_metrics.set_route("GET /insights/{brandId}/{productId}", brand_id)
+                wanted, complete, unknown = _requested_sections(query, PRODUCT_SECTIONS)
+                if unknown:
+                    return _unknown_sections(unknown, PRODUCT_SECTIONS)
+                scope_key = link_counters.product_key(brand_id, product_id)
+                handle = partial(_handle_product_insights, brand_id, product_id, wanted, complete, window)
             elif brand_id:
                 subsegment.put_annotation("route", "GET /insights/{brandId}")
-                return _handle_brand_insights(brand_id)
+                ddb_metrics.set_route("GET /insights/{brandId}", brand_id)
+                wanted, complete, unknown = _requested_sections(query, BRAND_SECTIONS)
+                if unknown:
+                    return _unknown_sections(unknown, BRAND_SECTIONS)
+                scope_key = link_counters.brand_key(brand_id)
+                handle = partial(_handle_brand_insights, brand_id, wanted, complete, window)
             else:
                 # All-brands overview — superadmin only
                 if caller.get("role") != "superadmin":
                     return _response(403, {"error": "Forbidden — superadmin access required"})
                 subsegment.put_annotation("route", "GET /insights")
-                return _handle_all_brands_insights()
+                ddb_metrics.set_route("GET /insights")
+                wanted, complete, unknown = _requested_sections(query, OVERVIEW_SECTIONS)
+                if unknown:
+                    return _unknown_sections(unknown, OVERVIEW_SECTIONS)
+                scope_key = link_counters.GLOBAL_KEY
+                handle = partial(_handle_all_brands_insights, wanted, complete, window)
+
+            version = _data_version(scope_key)
+            if dashboard and not query:
+                stored = _stored_dashboard(event, scope_key, version)
+                if stored is not None:
+                    return stored
+
+            # ------- Conditional request -------
+            etag = _etag(event, window, version)
+            if _not_modified(event, etag):
+                subsegment.put_annotation("not_modified", True)
+                return _not_modified_response(event, etag)
+            return _finish(event, handle(), etag)
 
         except json.JSONDecodeError:
             subsegment.add_exception(Exception("Invalid JSON"), stack=False)
             return _response(400, {"error": "Invalid JSON"})
+        except aws_clients.DeadlineExceeded as exc:
+            subsegment.put_annotation("deadline_exceeded", True)
+            print(f"[DEADLINE] {exc}")
+            return _response(503, {"error": "Request could not be completed in time, please retry",
+                                   "degraded": True})
         except Exception as exc:
             subsegment.add_exception(exc, stack=True)
             print(f"[ERROR] {exc}")
             return _response(500, {"error": "Internal server error"})
+        finally:
+            ddb_metrics.flush(subsegment)
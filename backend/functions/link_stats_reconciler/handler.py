@@ -0,0 +1,170 @@
+import json
+import os
+
+from boto3.dynamodb.types import TypeDeserializer
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+import link_counters
+
+# X-Ray patching is opt-in (XRAY_PATCH_MODULES)
+aws_clients.patch_tracing()
+
+# ---------------------------------------------------------------------------
+# Environment
+# ---------------------------------------------------------------------------
+LINKS_TABLE = os.environ.get("DYNAMODB_TABLE_LINKS", "reviewpulse-review-links")
+ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
+
+STAMPS = ("sentCounted", "sentRolledUp", "usedCounted", "usedRolledUp")
+# a rebuild stops scanning this long before the deadline and reports where it got to
+REBUILD_MARGIN_S = 10.0
+REBUILD_PAGE_SIZE = 500     # links per scan page
+
+_deser = TypeDeserializer()
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _unmarshall_dynamodb(record: dict) -> dict:
+    """Convert DynamoDB stream image (typed map) to plain dict."""
+    return {k: _deser.deserialize(v) for k, v in record.items()}
+
+
+def _count_link(link: dict, counted: str, rolled_up: str, field: str, condition: str) -> bool:
+    """Bump ``field`` on whichever counters the link has not been added to yet.
+
+    ``counted`` stamps the product counter, which the handlers bump with the
+    link write itself; ``rolled_up`` the brand and global ones, which only
+    this function bumps. Both are written under ``attribute_not_exists`` in
+    the same transaction as the counters, so a redelivered stream batch is a
+    no-op. Returns True when the counters moved.
+    """
+    brand_id, product_id = link.get("brandId", ""), link.get("productId", "")
+    stamps, keys = [], []
+    if not link.get(counted):
+        stamps.append(counted)
+        keys += link_counters.link_keys(brand_id, product_id)
+    if not link.get(rolled_up):
+        stamps.append(rolled_up)
+        keys += link_counters.rollup_keys(brand_id)
+    if not stamps:
+        return False
+
+    names = {f"#s{i}": stamp for i, stamp in enumerate(stamps)}
+    client = aws_clients.dynamodb().meta.client
+    try:
+        link_counters.transact([
+            {
+                "Update": {
+                    "TableName": LINKS_TABLE,
+                    "Key": {"linkToken": link["linkToken"]},
+                    "UpdateExpression": "SET " + ", ".join(f"{n} = :t" for n in names),
+                    "ConditionExpression": "attribute_exists(linkToken)"
+                                           + "".join(f" AND attribute_not_exists({n})" for n in names)
+                                           + condition,
+                    "ExpressionAttributeNames": names,
+                    "ExpressionAttributeValues": {":t": True},
+                }
+            },
+            *link_counters.increment_ops(keys, field),
+        ])
+        return True
+    except client.exceptions.TransactionCanceledException as exc:
+        reasons = exc.response.get("CancellationReasons", [])
+        if reasons and reasons[0].get("Code") == "ConditionalCheckFailed":
+            return False
+        raise
+
+
+def _reconcile_record(record: dict) -> int:
+    """Add the link to the counters the handlers left to the stream. Returns counters moved (0-2)."""
+    event_name = record.get("eventName", "")
+    images = record.get("dynamodb", {})
+    if event_name not in ("INSERT", "MODIFY") or not images.get("NewImage"):
+        return 0  # TTL REMOVE events keep their historical counts
+
+    new = _unmarshall_dynamodb(images["NewImage"])
+    old = _unmarshall_dynamodb(images.get("OldImage", {})) if event_name == "MODIFY" else {}
+    moved = 0
+
+    if event_name == "INSERT":
+        if _count_link(new, "sentCounted", "sentRolledUp", "total_sent", ""):
+            moved += 1
+
+    became_used = new.get("used") is True and old.get("used") is not True
+    if became_used:
+        if _count_link(new, "usedCounted", "usedRolledUp", "total_used", " AND used = :t"):
+            moved += 1
+
+    return moved
+
+
+def _rebuild(event: dict) -> dict:
+    """Add every link the counters do not hold yet, from a scan of the links table.
+
+    One-off backfill for links that predate the counters. Each link goes
+    through _count_link(), so only the stamps it lacks move the counters
+    and a link is never counted twice: the rebuild can run alongside the
+    handlers and the stream, and rerunning it is a no-op. Nothing is
+    overwritten, so increments that land mid-scan are kept. A run that nears
+    its deadline stops and returns ``next_key``, which a rerun takes as
+    ``start_key``.
+    """
+    kwargs = {
+        "ProjectionExpression": "linkToken, brandId, productId, used, " + ", ".join(STAMPS),
+        "Limit": REBUILD_PAGE_SIZE,
+    }
+    if event.get("start_key"):
+        kwargs["ExclusiveStartKey"] = event["start_key"]
+    scanned = adjusted = 0
+    last_key = None
+    with xray_recorder.in_subsegment("dynamodb-rebuild-link-stats") as seg:
+        seg.put_annotation("table", LINKS_TABLE)
+        seg.put_annotation("operation", "paginated_scan")
+        while True:
+            resp = aws_clients.table(LINKS_TABLE).scan(**kwargs)
+            for link in resp.get("Items", []):
+                scanned += 1
+                if _count_link(link, "sentCounted", "sentRolledUp", "total_sent", ""):
+                    adjusted += 1
+                if link.get("used") is True and _count_link(
+                        link, "usedCounted", "usedRolledUp", "total_used", " AND used = :t"):
+                    adjusted += 1
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+            remaining = aws_clients.remaining_s()
+            if remaining is not None and remaining < REBUILD_MARGIN_S:
+                break
+        seg.put_metadata("item_count", scanned)
+    return {"links_scanned": scanned, "counters_adjusted": adjusted, "next_key": last_key}
+
+
+# ===========================================================================
+# Lambda entry point — review-links Streams trigger, or {"action": "rebuild"}
+# ===========================================================================
+def lambda_handler(event, context):
+    aws_clients.start_deadline(context)
+    with xray_recorder.in_subsegment("link-stats-reconciler-handler") as handler_seg:
+        handler_seg.put_annotation("function", "link-stats-reconciler")
+        handler_seg.put_annotation("environment", ENVIRONMENT)
+
+        if event.get("action") == "rebuild":
+            summary = _rebuild(event)
+            print(f"[REBUILD] {json.dumps(summary, default=str)}")
+            return summary
+
+        records = event.get("Records", [])
+        handler_seg.put_annotation("total_records", len(records))
+        adjusted = 0
+        for record in records:
+            adjusted += _reconcile_record(record)
+        handler_seg.put_metadata("counters_adjusted", adjusted)
+
+    summary = {"total_records": len(records), "counters_adjusted": adjusted}
+    print(f"[DONE] {json.dumps(summary)}")
+    return summary
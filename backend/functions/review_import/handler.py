@@ -0,0 +1,119 @@
+import json
+import os
+from urllib.parse import unquote_plus
+
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+from review_import import ReviewImporter, S3CheckpointStore
+
+# X-Ray patching is opt-in (XRAY_PATCH_MODULES)
+aws_clients.patch_tracing()
+
+# ---------------------------------------------------------------------------
+# Environment
+# ---------------------------------------------------------------------------
+ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", "8"))
+STOP_MARGIN_MS = int(os.environ.get("IMPORT_STOP_MARGIN_MS", "90000"))
+CHUNK_SIZE = 1024 * 1024
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _format_for(key: str) -> str | None:
+    lowered = key.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def _jobs_from_event(event: dict) -> list:
+    """S3 ObjectCreated notifications or a direct {"bucket", "key", ...} job.
+
+    Uploads under imports/<brandId>/... default brandId for rows without one.
+    """
+    if "Records" not in event:
+        return [event]
+    jobs = []
+    for record in event["Records"]:
+        s3_info = record.get("s3", {})
+        key = unquote_plus(s3_info.get("object", {}).get("key", ""))
+        parts = key.split("/")
+        jobs.append({
+            "bucket": s3_info.get("bucket", {}).get("name", ""),
+            "key": key,
+            "brandId": parts[1] if len(parts) > 2 and parts[0] == "imports" else "",
+        })
+    return jobs
+
+
+def _run_job(job: dict, context) -> dict:
+    bucket, key = job["bucket"], job["key"]
+    fmt = job.get("format") or _format_for(key)
+    if not bucket or not key or fmt not in ("csv", "ndjson"):
+        return {"key": key, "status": "rejected", "error": "bucket, key and a csv/ndjson format are required"}
+
+    def open_chunks(offset: int):
+        kwargs = {"Bucket": bucket, "Key": key}
+        if offset:
+            kwargs["Range"] = f"bytes={offset}-"
+        return aws_clients.client("s3").get_object(**kwargs)["Body"].iter_chunks(CHUNK_SIZE)
+
+    def should_stop() -> bool:
+        return context is not None and context.get_remaining_time_in_millis() < STOP_MARGIN_MS
+
+    def progress(state: dict) -> None:
+        print(f"[IMPORT PROGRESS] key={key} offset={state['offset']} "
+              f"read={state['rows_read']} written={state['rows_written']}")
+
+    importer = ReviewImporter(aws_clients.dynamodb(), sqs=aws_clients.client("sqs"), workers=IMPORT_WORKERS)
+    store = S3CheckpointStore(aws_clients.client("s3"), bucket, f"checkpoints/{key}.json")
+    with xray_recorder.in_subsegment("review-import-run") as seg:
+        seg.put_annotation("source_key", key)
+        seg.put_annotation("format", fmt)
+        state = importer.run(
+            open_chunks,
+            fmt,
+            {"brandId": job.get("brandId", ""), "productId": job.get("productId", "")},
+            store,
+            job.get("jobId") or key,
+            should_stop=should_stop,
+            progress=progress,
+        )
+        seg.put_annotation("status", state["status"])
+        seg.put_metadata("rows_read", state["rows_read"])
+        seg.put_metadata("rows_written", state["rows_written"])
+
+    if state["status"] == "paused" and context is not None:
+        # Out of time: hand the rest of the file to a fresh invocation
+        aws_clients.client("lambda").invoke(
+            FunctionName=context.function_name,
+            InvocationType="Event",
+            Payload=json.dumps({**job, "format": fmt}).encode("utf-8"),
+        )
+        print(f"[IMPORT PAUSED] key={key} offset={state['offset']}, re-invoked to resume")
+
+    return {"key": key, **{k: state[k] for k in (
+        "status", "offset", "rows_read", "rows_written", "rows_existing",
+        "rows_invalid", "rows_duplicate",
+    )}}
+
+
+# ===========================================================================
+# Lambda entry point — S3 ObjectCreated under imports/, or a direct job
+# ===========================================================================
+def lambda_handler(event, context):
+    aws_clients.start_deadline(context)
+    with xray_recorder.in_subsegment("review-import-handler") as handler_seg:
+        handler_seg.put_annotation("function", "review-import")
+        handler_seg.put_annotation("environment", ENVIRONMENT)
+        results = [_run_job(job, context) for job in _jobs_from_event(event)]
+
+    summary = {"jobs": results}
+    print(f"[DONE] {json.dumps(summary)}")
+    return summary
@@ -1,30 +1,28 @@
+import base64
 import json
 import os
 import uuid
 import time
 from datetime import datetime, timezone
 
-import boto3
-from boto3.dynamodb.conditions import Key
-from aws_xray_sdk.core import xray_recorder, patch_all
+from aws_xray_sdk.core import xray_recorder
 
-# Patch all supported libraries (boto3, requests, etc.) for X-Ray tracing
-patch_all()
+import aws_clients
+import ddb_metrics
+import link_counters
+import metadata_cache
+from review_validation import validate_review
+
+# X-Ray patching is opt-in (XRAY_PATCH_MODULES)
+aws_clients.patch_tracing()
 
 # ---------------------------------------------------------------------------
 # Environment variables (set by Terraform)
 # ---------------------------------------------------------------------------
 LINKS_TABLE = os.environ.get("REVIEW_LINKS_TABLE", "reviewpulse-review-links")
 FEEDBACK_TABLE = os.environ.get("DYNAMODB_TABLE_FEEDBACK", "reviewpulse-feedback")
-PRODUCTS_TABLE = os.environ.get("DYNAMODB_TABLE_PRODUCTS", "reviewpulse-products")
-REGION = os.environ.get("AWS_REGION_NAME", "ca-central-1")
 ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
 
-dynamodb = boto3.resource("dynamodb", region_name=REGION)
-links_table = dynamodb.Table(LINKS_TABLE)
-feedback_table = dynamodb.Table(FEEDBACK_TABLE)
-products_table = dynamodb.Table(PRODUCTS_TABLE)
-
 # ---------------------------------------------------------------------------
 # CORS headers applied to every response
 # ---------------------------------------------------------------------------
@@ -45,6 +43,15 @@ def _response(status_code: int, body: dict) -> dict:
     }
 
 
+def _request_body(event: dict) -> dict:
+    """Parsed JSON body. API Gateway base64-encodes it, since application/json
+    is a binary media type (for get_insights' gzip responses)."""
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+    return json.loads(body) if isinstance(body, str) else body
+
+
 # ===========================================================================
 # GET /review/{token}  —  return pre-filled form data
 # ===========================================================================
@@ -53,7 +60,7 @@ def _handle_get_review(token: str) -> dict:
     with xray_recorder.in_subsegment("dynamodb-get-link-token") as seg:
         seg.put_annotation("table", LINKS_TABLE)
         seg.put_annotation("operation", "get_item")
-        resp = links_table.get_item(Key={"linkToken": token})
+        resp = aws_clients.table(LINKS_TABLE).get_item(Key={"linkToken": token})
     item = resp.get("Item")
 
     if not item:
@@ -72,15 +79,10 @@ def _handle_get_review(token: str) -> dict:
     product_name = ""
     product_id = item.get("productId", "")
     brand_id = item.get("brandId", "")
+    ddb_metrics.set_brand(brand_id)
     if product_id and brand_id:
         try:
-            with xray_recorder.in_subsegment("dynamodb-get-product") as seg:
-                seg.put_annotation("table", PRODUCTS_TABLE)
-                seg.put_annotation("operation", "get_item")
-                prod_resp = products_table.get_item(
-                    Key={"productId": product_id, "brandId": brand_id}
-                )
-            prod_item = prod_resp.get("Item")
+            prod_item = metadata_cache.get_product(brand_id, product_id)
             if prod_item:
                 product_name = prod_item.get("productName", "")
         except Exception:
@@ -112,23 +114,16 @@ def _handle_post_review(body: dict) -> dict:
     if not token:
         return _response(400, {"error": "token is required"})
 
-    # Rating validation
-    try:
-        rating = int(rating)
-    except (TypeError, ValueError):
-        return _response(400, {"error": "rating must be an integer between 1 and 5"})
-    if rating < 1 or rating > 5:
-        return _response(400, {"error": "rating must be between 1 and 5"})
-
-    # Review text validation
-    if len(review_text) < 10 or len(review_text) > 500:
-        return _response(400, {"error": "reviewText must be between 10 and 500 characters"})
+    # Rating & review text validation (same rules as the bulk importer)
+    rating, review_text, error = validate_review(rating, review_text)
+    if error:
+        return _response(400, {"error": error})
 
     # ---- Look up the token ----
     with xray_recorder.in_subsegment("dynamodb-get-link-token") as seg:
         seg.put_annotation("table", LINKS_TABLE)
         seg.put_annotation("operation", "get_item")
-        resp = links_table.get_item(Key={"linkToken": token})
+        resp = aws_clients.table(LINKS_TABLE).get_item(Key={"linkToken": token})
     item = resp.get("Item")
 
     if not item:
@@ -141,15 +136,37 @@ def _handle_post_review(body: dict) -> dict:
     if expires_at is not None and int(expires_at) < int(time.time()):
         return _response(404, {"error": "This review link has expired"})
 
-    # ---- Mark token as used ----
+    # ---- Mark token as used and bump the product's used counter atomically ----
+    # The condition also closes the race where two submissions read the
+    # same unused link: only one of them can flip it. The brand and global
+    # counters follow from the links stream (link_stats_reconciler).
     with xray_recorder.in_subsegment("dynamodb-mark-token-used") as seg:
         seg.put_annotation("table", LINKS_TABLE)
-        seg.put_annotation("operation", "update_item")
-        links_table.update_item(
-            Key={"linkToken": token},
-            UpdateExpression="SET used = :t",
-            ExpressionAttributeValues={":t": True},
-        )
+        seg.put_annotation("operation", "transact_write_items")
+        try:
+            link_counters.transact([
+                {
+                    "Update": {
+                        "TableName": LINKS_TABLE,
+                        "Key": {"linkToken": token},
+                        "UpdateExpression": "SET used = :t, usedCounted = :t",
+                        "ConditionExpression": (
+                            "attribute_exists(linkToken) AND "
+                            "(attribute_not_exists(used) OR used = :f)"
+                        ),
+                        "ExpressionAttributeValues": {":t": True, ":f": False},
+                    }
+                },
+                *link_counters.increment_ops(
+                    link_counters.link_keys(item.get("brandId", ""), item.get("productId", "")),
+                    "total_used",
+                ),
+            ])
+        except aws_clients.dynamodb().meta.client.exceptions.TransactionCanceledException as exc:
+            reasons = exc.response.get("CancellationReasons", [])
+            if reasons and reasons[0].get("Code") == "ConditionalCheckFailed":
+                return _response(410, {"error": "This review link has already been used"})
+            raise
 
     # ---- Save feedback ----
     feedback_id = str(uuid.uuid4())
@@ -175,21 +192,17 @@ def _handle_post_review(body: dict) -> dict:
         seg.put_annotation("table", FEEDBACK_TABLE)
         seg.put_annotation("operation", "put_item")
         seg.put_annotation("feedback_id", feedback_id)
-        feedback_table.put_item(Item=feedback_item)
+        aws_clients.table(FEEDBACK_TABLE).put_item(Item=feedback_item)
 
     # Fetch product AI summary to show on the thank-you page
     ai_insights = None
     product_id = item.get("productId", "")
     brand_id = item.get("brandId", "")
+    ddb_metrics.set_brand(brand_id)
     if product_id and brand_id:
         try:
-            with xray_recorder.in_subsegment("dynamodb-get-product-ai") as seg:
-                seg.put_annotation("table", PRODUCTS_TABLE)
-                seg.put_annotation("operation", "get_item")
-                prod_resp = products_table.get_item(
-                    Key={"productId": product_id, "brandId": brand_id}
-                )
-            prod_item = prod_resp.get("Item")
+            # Usually a cache hit: the GET for the same link loaded it moments ago
+            prod_item = metadata_cache.get_product(brand_id, product_id)
             if prod_item and prod_item.get("ai_summary"):
                 ai_insights = {
                     "ai_summary": prod_item.get("ai_summary", ""),
@@ -217,9 +230,11 @@ def _handle_post_review(body: dict) -> dict:
 # Lambda entry point
 # ===========================================================================
 def lambda_handler(event, context):
+    aws_clients.start_deadline(context)
     with xray_recorder.in_subsegment("submit-review-handler") as subsegment:
         subsegment.put_annotation("function", "submit-review")
         subsegment.put_annotation("environment", ENVIRONMENT)
+        ddb_metrics.begin_request("submit-review")
         try:
             http_method = event.get("httpMethod", "")
             path_params = event.get("pathParameters") or {}
@@ -235,14 +250,14 @@ def lambda_handler(event, context):
                 if not token:
                     return _response(400, {"error": "Missing token in path"})
                 subsegment.put_annotation("route", "GET /review/{token}")
+                ddb_metrics.set_route("GET /review/{token}")
                 return _handle_get_review(token)
 
             # POST /review
             if http_method == "POST":
-                body = event.get("body", "{}")
-                if isinstance(body, str):
-                    body = json.loads(body)
+                body = _request_body(event)
                 subsegment.put_annotation("route", "POST /review")
+                ddb_metrics.set_route("POST /review")
                 return _handle_post_review(body)
 
             return _response(405, {"error": f"Method {http_method} not allowed"})
@@ -250,8 +265,15 @@ def lambda_handler(event, context):
         except json.JSONDecodeError:
             subsegment.add_exception(Exception("Invalid JSON"), stack=False)
             return _response(400, {"error": "Invalid JSON in request body"})
+        except aws_clients.DeadlineExceeded as exc:
+            subsegment.put_annotation("deadline_exceeded", True)
+            print(f"[DEADLINE] {exc}")
+            return _response(503, {"error": "Request could not be completed in time, please retry",
+                                   "degraded": True})
         except Exception as exc:
             subsegment.add_exception(exc, stack=True)
             print(f"[ERROR] {exc}")
             return _response(500, {"error": "Internal server error"})
+        finally:
+            ddb_metrics.flush(subsegment)
 
@@ -0,0 +1,131 @@
+"""
+Bulk-import historical reviews from a CSV or NDJSON file.
+
+Runs the same pipeline as the review_import Lambda (backend/shared/review_import.py)
+from a workstation, reading either a local file or an S3 object, and writing to
+real or local DynamoDB:
+
+    python backend/scripts/import_reviews.py reviews.csv --brand-id brand-001
+    python backend/scripts/import_reviews.py s3://bucket/imports/brand-001/2023.ndjson
+    python backend/scripts/import_reviews.py big.csv --endpoint-url http://localhost:8000
+
+Re-running the same command resumes from the checkpoint file.
+"""
+import argparse
+import os
+import sys
+import time
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+
+from review_import import (  # noqa: E402
+    AI_LOW_PRIORITY_QUEUE_URL,
+    FEEDBACK_TABLE,
+    AdaptiveThrottle,
+    LocalCheckpointStore,
+    ReviewImporter,
+)
+
+REGION = "ca-central-1"
+CHUNK_SIZE = 1024 * 1024
+
+
+def open_source(source: str, s3):
+    """Return ``open_chunks(offset)`` for a local path or an s3:// URL."""
+    if source.startswith("s3://"):
+        bucket, _, key = source[5:].partition("/")
+
+        def open_s3(offset: int):
+            kwargs = {"Bucket": bucket, "Key": key}
+            if offset:
+                kwargs["Range"] = f"bytes={offset}-"
+            return s3.get_object(**kwargs)["Body"].iter_chunks(CHUNK_SIZE)
+        return open_s3
+
+    def open_local(offset: int):
+        with open(source, "rb") as fh:
+            fh.seek(offset)
+            while True:
+                chunk = fh.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    return open_local
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import historical reviews")
+    parser.add_argument("source", help="local path or s3://bucket/key")
+    parser.add_argument("--format", choices=["csv", "ndjson"],
+                        help="defaults to the file extension")
+    parser.add_argument("--brand-id", default="", help="brandId for rows that omit it")
+    parser.add_argument("--product-id", default="", help="productId for rows that omit it")
+    parser.add_argument("--job-id", help="defaults to the source path")
+    parser.add_argument("--checkpoint", help="defaults to <source name>.checkpoint.json")
+    parser.add_argument("--table", default=FEEDBACK_TABLE)
+    parser.add_argument("--queue-url", default=AI_LOW_PRIORITY_QUEUE_URL,
+                        help="low-priority AI queue; empty to skip queueing")
+    parser.add_argument("--endpoint-url", help="e.g. http://localhost:8000 for DynamoDB Local")
+    parser.add_argument("--region", default=REGION)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--initial-rate", type=float, default=200.0,
+                        help="starting BatchWriteItem requests per second")
+    parser.add_argument("--no-skip-existing", action="store_true",
+                        help="overwrite items that already exist (faster, resets AI fields)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.source.lower().endswith(".csv") else "ndjson")
+    checkpoint = args.checkpoint or f"{os.path.basename(args.source)}.checkpoint.json"
+
+    dynamodb = boto3.resource("dynamodb", region_name=args.region, endpoint_url=args.endpoint_url)
+    s3 = boto3.client("s3", region_name=args.region)
+    sqs = boto3.client("sqs", region_name=args.region) if args.queue_url else None
+
+    importer = ReviewImporter(
+        dynamodb,
+        sqs=sqs,
+        queue_url=args.queue_url,
+        table_name=args.table,
+        workers=args.workers,
+        skip_existing=not args.no_skip_existing,
+        throttle=AdaptiveThrottle(initial_rate=args.initial_rate),
+    )
+
+    started = time.monotonic()
+
+    def progress(state: dict) -> None:
+        elapsed = time.monotonic() - started
+        print(f"  offset={state['offset']:>12,}  read={state['rows_read']:>10,}  "
+              f"written={state['rows_written']:>10,}  invalid={state['rows_invalid']:>8,}  "
+              f"rate={importer.throttle.rate:7.1f} req/s  "
+              f"{state['rows_read'] / elapsed if elapsed else 0:,.0f} rows/s")
+
+    print(f"Importing {args.source} ({fmt}) into {args.table}")
+    print(f"Checkpoint: {checkpoint}\n")
+    state = importer.run(
+        open_source(args.source, s3),
+        fmt,
+        {"brandId": args.brand_id, "productId": args.product_id},
+        LocalCheckpointStore(checkpoint),
+        args.job_id or args.source,
+        progress=progress,
+    )
+
+    elapsed = time.monotonic() - started
+    print()
+    print(f"Status:          {state['status']}")
+    print(f"Rows read:       {state['rows_read']:,}")
+    print(f"Rows written:    {state['rows_written']:,}")
+    print(f"Already present: {state['rows_existing']:,}")
+    print(f"Duplicates:      {state['rows_duplicate']:,}")
+    print(f"Invalid:         {state['rows_invalid']:,}")
+    print(f"Throttle events: {state['throttle_events']:,}")
+    print(f"Elapsed:         {elapsed:,.1f}s this run")
+    for sample in state.get("errors_sample", [])[:5]:
+        print(f"  invalid row ending at byte {sample['offset']}: {sample['error']}")
+
+
+if __name__ == "__main__":
+    main()
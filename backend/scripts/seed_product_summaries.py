@@ -1,41 +1,116 @@
 """
 Seed AI product summaries for all existing products.
-Replicates the _generate_product_summary logic from ai_processor/handler.py
-but runs locally (no X-Ray dependency).
+
+Same summary as ai_processor's _generate_product_summary (prompt and change
+hash come from backend/shared/product_summary.py), but run as one batch job:
+
+  1. Scan the feedback table once, in parallel segments, and fold processed
+     reviews into a ReviewSet per product.
+  2. Skip products whose stored ai_summary_review_hash / _count already match.
+  3. Summarise the rest with a bounded pool of concurrent Bedrock calls.
+  4. Write results back in BatchWriteItem batches and checkpoint after each
+     batch, so a rerun after a crash only redoes the unflushed batch.
+
+    python backend/scripts/seed_product_summaries.py --concurrency 8
+    python backend/scripts/seed_product_summaries.py --force      # ignore hashes
 """
+import argparse
 import json
+import os
 import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
 import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+
+from product_summary import ReviewSet, build_prompt, is_processed, summary_attributes  # noqa: E402
 
 REGION = "ca-central-1"
 FEEDBACK_TABLE = "reviewpulse-feedback"
 PRODUCTS_TABLE = "reviewpulse-products"
 BEDROCK_MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
 
-dynamodb = boto3.resource("dynamodb", region_name=REGION)
-feedback_tbl = dynamodb.Table(FEEDBACK_TABLE)
-products_tbl = dynamodb.Table(PRODUCTS_TABLE)
-bedrock = boto3.client("bedrock-runtime", region_name=REGION)
+# Only what the summary needs; message text dominates the scan otherwise
+FEEDBACK_PROJECTION = {
+    "#id": "FeedbackId", "#p": "productId", "#b": "brandId", "#r": "rating",
+    "#s": "sentiment", "#m": "message", "#t": "reviewText", "#ts": "timestamp",
+    "#d": "duplicate_of",
+}
+
+_deserializer = TypeDeserializer()
+
+
+def _plain(item: dict) -> dict:
+    return {k: _deserializer.deserialize(v) for k, v in item.items()}
+
+
+def product_key(brand_id: str, product_id: str) -> str:
+    return f"{brand_id}#{product_id}"
+
+
+# ---------------------------------------------------------------------------
+# Load
+# ---------------------------------------------------------------------------
+
+def scan_segment(client, table: str, segment: int, total_segments: int,
+                 projection: dict | None = None):
+    kwargs = {"TableName": table, "Segment": segment, "TotalSegments": total_segments}
+    if projection:
+        kwargs["ProjectionExpression"] = ", ".join(projection)
+        kwargs["ExpressionAttributeNames"] = projection
+    for page in client.get_paginator("scan").paginate(**kwargs):
+        for item in page.get("Items", []):
+            yield _plain(item)
+
 
+def load_review_sets(client, segments: int) -> tuple:
+    """One parallel scan of feedback -> ({product key: ReviewSet}, items scanned)."""
+    lock = threading.Lock()
+    review_sets: dict[str, ReviewSet] = {}
+    scanned = [0]
 
-def full_scan(table, filter_expr=None):
-    kwargs = {}
-    if filter_expr is not None:
-        kwargs["FilterExpression"] = filter_expr
-    items = []
-    while True:
-        resp = table.scan(**kwargs)
-        items.extend(resp.get("Items", []))
-        last_key = resp.get("LastEvaluatedKey")
-        if not last_key:
-            break
-        kwargs["ExclusiveStartKey"] = last_key
-    return items
+    def run(segment: int) -> None:
+        local: dict[str, ReviewSet] = {}
+        count = 0
+        for review in scan_segment(client, FEEDBACK_TABLE, segment, segments, FEEDBACK_PROJECTION):
+            count += 1
+            if is_processed(review):
+                key = product_key(review.get("brandId", ""), review.get("productId", ""))
+                local.setdefault(key, ReviewSet()).add(review)
+        with lock:
+            scanned[0] += count
+            for key, partial in local.items():
+                merged = review_sets.get(key)
+                if merged is None:
+                    review_sets[key] = partial
+                else:
+                    merged.merge(partial)
 
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        for future in [pool.submit(run, seg) for seg in range(segments)]:
+            future.result()
+    return review_sets, scanned[0]
 
-def invoke_bedrock(prompt: str) -> dict:
+
+def load_products(client) -> dict:
+    return {
+        product_key(p["brandId"], p["productId"]): p
+        for p in scan_segment(client, PRODUCTS_TABLE, 0, 1)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Summarise
+# ---------------------------------------------------------------------------
+
+def invoke_bedrock(bedrock, prompt: str) -> dict:
     body = json.dumps({
         "anthropic_version": "bedrock-2023-05-31",
         "max_tokens": 500,
@@ -51,106 +126,130 @@ def invoke_bedrock(prompt: str) -> dict:
     return json.loads(raw)
 
 
-def build_prompt(reviews, product_name):
-    review_texts = []
-    for i, r in enumerate(reviews[:30], 1):
-        text = r.get("message", r.get("reviewText", ""))
-        rating = r.get("rating", "?")
-        sentiment = r.get("sentiment", "unknown")
-        review_texts.append(f'Review {i} (Rating: {rating}/5, Sentiment: {sentiment}): "{text}"')
+def summarise(bedrock, product: dict, review_set: ReviewSet) -> tuple:
+    started = time.monotonic()
+    prompt = build_prompt(review_set, product.get("productName", product["productId"]))
+    ai_result = invoke_bedrock(bedrock, prompt)
+    return ai_result, time.monotonic() - started
+
+
+# ---------------------------------------------------------------------------
+# Write + checkpoint
+# ---------------------------------------------------------------------------
+
+def load_checkpoint(path: str) -> dict:
+    if path and os.path.exists(path):
+        with open(path) as fh:
+            return json.load(fh)
+    return {}
 
-    reviews_block = "\n".join(review_texts)
-    total = len(reviews)
-    avg_rating = round(sum(float(r.get("rating", 0)) for r in reviews) / total, 1) if total else 0
 
-    return f"""You are a product analytics expert. Analyze ALL {total} customer reviews for the product "{product_name}" and provide a comprehensive summary.
+def save_checkpoint(path: str, done: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(done, fh)
+    os.replace(tmp, path)
 
-Product: {product_name}
-Total Reviews: {total}
-Average Rating: {avg_rating}/5
 
-Reviews:
-{reviews_block}
+def flush(products_tbl, pending: list, done: dict, checkpoint: str) -> int:
+    """Put the merged product items in one batch_writer pass, then checkpoint."""
+    if not pending:
+        return 0
+    with products_tbl.batch_writer(overwrite_by_pkeys=["productId", "brandId"]) as batch:
+        for item in pending:
+            batch.put_item(Item=item)
+    for item in pending:
+        done[product_key(item["brandId"], item["productId"])] = item["ai_summary_review_hash"]
+    if checkpoint:
+        save_checkpoint(checkpoint, done)
+    written = len(pending)
+    pending.clear()
+    return written
 
-Respond ONLY with valid JSON using this exact structure:
-{{
-  "overall_summary": "A 2-3 sentence summary of what customers overall think about this product",
-  "key_strengths": ["strength1", "strength2", "strength3"],
-  "key_weaknesses": ["weakness1", "weakness2"],
-  "recommendations": ["actionable recommendation 1", "actionable recommendation 2", "actionable recommendation 3"],
-  "customer_sentiment_overview": "One sentence describing the overall customer mood/satisfaction"
-}}
 
-Rules:
-- overall_summary: objective, data-driven, 2-3 sentences max
-- key_strengths: top 2-4 things customers love
-- key_weaknesses: top 1-3 things customers dislike (empty array if none)
-- recommendations: 2-4 actionable suggestions for the business to improve
-- customer_sentiment_overview: one concise sentence
-- Respond ONLY with JSON, no other text"""
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
 
 
+# ===========================================================================
+# Main
+# ===========================================================================
+
 def main():
-    from boto3.dynamodb.conditions import Attr
-
-    # Get all products
-    products = full_scan(products_tbl)
-    print(f"Found {len(products)} products\n")
-
-    for prod in products:
-        pid = prod["productId"]
-        bid = prod["brandId"]
-        pname = prod.get("productName", pid)
-        print(f"--- Processing: {pname} ({pid} / {bid}) ---")
-
-        # Fetch all processed reviews
-        reviews = full_scan(
-            feedback_tbl,
-            Attr("productId").eq(pid) & Attr("brandId").eq(bid)
-        )
-        processed = [r for r in reviews if r.get("sentiment") not in ("pending", "unprocessed", None)]
-        print(f"  Found {len(processed)} processed reviews")
-
-        if not processed:
-            print("  Skipping — no processed reviews")
-            continue
-
-        prompt = build_prompt(processed, pname)
-        print("  Calling Bedrock...")
-        try:
-            ai_result = invoke_bedrock(prompt)
-        except Exception as e:
-            print(f"  ERROR from Bedrock: {e}")
-            continue
-
-        now_iso = datetime.now(timezone.utc).isoformat()
-
-        products_tbl.update_item(
-            Key={"productId": pid, "brandId": bid},
-            UpdateExpression=(
-                "SET ai_summary = :summary, "
-                "ai_strengths = :strengths, "
-                "ai_weaknesses = :weaknesses, "
-                "ai_recommendations = :recs, "
-                "ai_sentiment_overview = :overview, "
-                "ai_summary_updated_at = :ts, "
-                "ai_summary_review_count = :cnt"
-            ),
-            ExpressionAttributeValues={
-                ":summary": ai_result.get("overall_summary", ""),
-                ":strengths": ai_result.get("key_strengths", []),
-                ":weaknesses": ai_result.get("key_weaknesses", []),
-                ":recs": ai_result.get("recommendations", []),
-                ":overview": ai_result.get("customer_sentiment_overview", ""),
-                ":ts": now_iso,
-                ":cnt": len(processed),
-            },
-        )
-        print(f"  ✓ Updated with AI summary ({len(processed)} reviews)")
-        print(f"    Summary: {ai_result.get('overall_summary', '')[:80]}...")
-        print()
-
-    print("Done!")
+    parser = argparse.ArgumentParser(description="Regenerate AI summaries for products whose reviews changed")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel Bedrock calls")
+    parser.add_argument("--scan-segments", type=int, default=8, help="parallel scan segments over feedback")
+    parser.add_argument("--batch-size", type=int, default=25, help="summaries per write batch")
+    parser.add_argument("--checkpoint", default="seed_product_summaries.checkpoint.json")
+    parser.add_argument("--force", action="store_true", help="summarise every product with reviews")
+    parser.add_argument("--region", default=REGION)
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb", region_name=args.region,
+                              config=Config(max_pool_connections=max(10, args.scan_segments)))
+    client = dynamodb.meta.client
+    products_tbl = dynamodb.Table(PRODUCTS_TABLE)
+    bedrock = boto3.client(
+        "bedrock-runtime", region_name=args.region,
+        config=Config(max_pool_connections=args.concurrency, retries={"max_attempts": 8, "mode": "adaptive"}),
+    )
+
+    started = time.monotonic()
+    review_sets, scanned = load_review_sets(client, args.scan_segments)
+    products = load_products(client)
+    load_seconds = time.monotonic() - started
+    print(f"Loaded {scanned:,} reviews for {len(review_sets):,} products "
+          f"({len(products):,} in catalogue) in {load_seconds:.1f}s\n")
+
+    done = {} if args.force else load_checkpoint(args.checkpoint)
+    todo, unchanged, no_reviews = [], 0, 0
+    for key, product in products.items():
+        review_set = review_sets.get(key)
+        if review_set is None or not review_set.count:
+            no_reviews += 1
+        elif not args.force and (review_set.matches(product) or done.get(key) == review_set.digest):
+            unchanged += 1
+        else:
+            todo.append((product, review_set))
+    print(f"{len(todo):,} to summarise, {unchanged:,} unchanged, {no_reviews:,} without processed reviews\n")
+
+    latencies, errors, written = [], 0, 0
+    pending: list[dict] = []
+    summarise_started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = {pool.submit(summarise, bedrock, p, rs): (p, rs) for p, rs in todo}
+        for future in as_completed(futures):
+            product, review_set = futures[future]
+            name = product.get("productName", product["productId"])
+            try:
+                ai_result, seconds = future.result()
+            except Exception as exc:
+                errors += 1
+                print(f"  ✗ {name} ({product['productId']}): {exc}")
+                continue
+            latencies.append(seconds)
+            now_iso = datetime.now(timezone.utc).isoformat()
+            pending.append({**product, **summary_attributes(ai_result, review_set, now_iso)})
+            print(f"  ✓ {name} ({review_set.count} reviews, {seconds:.1f}s)")
+            if len(pending) >= args.batch_size:
+                written += flush(products_tbl, pending, done, args.checkpoint)
+    written += flush(products_tbl, pending, done, args.checkpoint)
+    summarise_seconds = time.monotonic() - summarise_started
+    total_seconds = time.monotonic() - started
+
+    print()
+    print("=" * 56)
+    print(f"  Reviews scanned:     {scanned:,} ({scanned / load_seconds if load_seconds else 0:,.0f}/s)")
+    print(f"  Products summarised: {written:,}  unchanged: {unchanged:,}  errors: {errors:,}")
+    print(f"  Bedrock latency:     p50 {percentile(latencies, 0.5):.2f}s  "
+          f"p95 {percentile(latencies, 0.95):.2f}s")
+    print(f"  Summary throughput:  {len(latencies) / summarise_seconds if summarise_seconds else 0:.2f} products/s "
+          f"at concurrency {args.concurrency}")
+    print(f"  Elapsed:             {total_seconds:.1f}s (load {load_seconds:.1f}s)")
+    print("=" * 56)
 
 
 if __name__ == "__main__":
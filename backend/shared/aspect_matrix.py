@@ -0,0 +1,220 @@
+"""
+Aspect matrices: how each product's topics are rated, month by month.
+
+Reviews carry topics and an overall sentiment, and the dashboards only
+show the two apart; "is delivery negative for product X this month?" took
+a read of every review in range. The analytics-projector Lambda keeps a
+topic x sentiment count per product and month instead, one item in the
+aspect-matrix table:
+
+    scopeKey  product#<brandId>#<productId> (as the link-stats counters)
+    month     YYYY-MM, UTC
+    topics    the topics counted that month, in the order first seen
+    counts    three signed 32-bit counters per topic, in topics order:
+              positive, neutral, negative (little-endian binary)
+    rev       bumped by every write; writes are conditional on it
+    batches   ids of the last APPLIED_BATCHES stream batches written in,
+              so a retried batch is not counted twice
+
+A product's matrix over a range of months is one Query on scopeKey with
+the months as sort-key range: O(months x topics) whatever the review count.
+Reviews are counted as the dashboards count them: each normalized topic
+once (topic_sketch.normalize), in the review's sentiment bucket (anything
+but positive or negative is neutral), in the month of its UTC timestamp.
+
+    months = aspect_matrix.read(link_counters.product_key(brand_id, product_id), "2026-01", "2026-06")
+"""
+import os
+from array import array
+from collections import Counter
+from datetime import date
+
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+import link_counters
+import review_analytics
+from review_records import BUCKETS
+from topic_sketch import normalize
+
+ASPECT_MATRIX_TABLE = os.environ.get("DYNAMODB_TABLE_ASPECT_MATRIX", "reviewpulse-aspect-matrix")
+
+WRITE_ATTEMPTS = 8            # conditional-write retries before the batch is failed
+APPLIED_BATCHES = 64          # stream batch ids an item remembers; see apply()
+_READ_NAMES = {"#m": "month", "#t": "topics", "#c": "counts"}
+
+
+# ---------------------------------------------------------------------------
+# Counting
+# ---------------------------------------------------------------------------
+
+def month_of(record) -> str:
+    """A ReviewRecord's UTC month, as matrix items are keyed."""
+    return date.fromordinal(max(record.day, 1)).strftime("%Y-%m")
+
+
+def count(records) -> dict:
+    """month -> Counter of (topic, bucket) -> reviews, counted from ReviewRecords."""
+    out: dict[str, Counter] = {}
+    for r in records:
+        topics = {normalize(t) for t in r.topics}
+        topics.discard("")
+        if topics:
+            cells = out.setdefault(month_of(r), Counter())
+            for topic in topics:
+                cells[topic, r.bucket] += 1
+    return out
+
+
+def rows(cells: Counter) -> dict:
+    """topic -> {bucket: count} from count()'s Counter for one month."""
+    out: dict[str, dict] = {}
+    for (topic, bucket), n in cells.items():
+        if n:
+            out.setdefault(topic, dict.fromkeys(BUCKETS, 0))[bucket] += n
+    return out
+
+
+def deltas(old: dict | None, new: dict | None) -> dict:
+    """(scope key, month) -> Counter of count changes, for an analytics item going from ``old`` to ``new``."""
+    out: dict[tuple, Counter] = {}
+    for narrow, sign in ((old, -1), (new, 1)):
+        if not narrow or not narrow.get("productId"):
+            continue
+        scope_key = link_counters.product_key(narrow["brandId"], narrow["productId"])
+        for month, cells in count(review_analytics.records([narrow])).items():
+            counter = out.setdefault((scope_key, month), Counter())
+            for cell, n in cells.items():
+                counter[cell] += sign * n
+    return {key: counter for key, counter in out.items() if any(counter.values())}
+
+
+def merge(into: dict, changes: dict) -> None:
+    """Add one review's deltas() to pending ``into``."""
+    for key, counter in changes.items():
+        into.setdefault(key, Counter()).update(counter)
+
+
+class Matrix:
+    """One product-month, as stored."""
+
+    def __init__(self, item: dict | None = None):
+        item = item or {}
+        self.topics = list(item.get("topics", []))
+        self.counts = array("i")
+        if "counts" in item:
+            self.counts.frombytes(bytes(item["counts"]))
+
+    def rows(self) -> dict:
+        """topic -> {bucket: count}, topics with no reviews left out."""
+        counts = self.counts
+        out = {}
+        for i, topic in enumerate(self.topics):
+            row = counts[3 * i:3 * i + 3]
+            if any(row):
+                out[topic] = dict(zip(BUCKETS, row))
+        return out
+
+    def add(self, changes: Counter) -> None:
+        index = {topic: i for i, topic in enumerate(self.topics)}
+        for (topic, bucket), delta in changes.items():
+            if topic not in index:
+                index[topic] = len(self.topics)
+                self.topics.append(topic)
+                self.counts.extend((0, 0, 0))
+            self.counts[3 * index[topic] + BUCKETS.index(bucket)] += delta
+
+    def item(self) -> dict:
+        """What is stored; topics whose counts are all back to zero are dropped."""
+        kept = [i for i in range(len(self.topics)) if any(self.counts[3 * i:3 * i + 3])]
+        counts = array("i")
+        for i in kept:
+            counts.extend(self.counts[3 * i:3 * i + 3])
+        return {"topics": [self.topics[i] for i in kept], "counts": counts.tobytes()}
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def read(scope_key: str, first_month: str | None, last_month: str) -> dict:
+    """month -> Matrix.rows() for the product's months from ``first_month``
+    (None: the first there is) to ``last_month``, inclusive."""
+    from boto3.dynamodb.conditions import Key
+    condition = Key("scopeKey").eq(scope_key)
+    if first_month is None:
+        condition &= Key("month").lte(last_month)
+    else:
+        condition &= Key("month").between(first_month, last_month)
+    kwargs = {
+        "KeyConditionExpression": condition,
+        "ProjectionExpression": ", ".join(_READ_NAMES),
+        "ExpressionAttributeNames": _READ_NAMES,
+    }
+    months = {}
+    with xray_recorder.in_subsegment("dynamodb-query-aspect-matrix") as seg:
+        seg.put_annotation("table", ASPECT_MATRIX_TABLE)
+        seg.put_annotation("operation", "paginated_query")
+        while True:
+            resp = aws_clients.table(ASPECT_MATRIX_TABLE).query(**kwargs)
+            for item in resp.get("Items", []):
+                months[item["month"]] = Matrix(item).rows()
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+        seg.put_metadata("month_count", len(months))
+    return months
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def _remembered(batches: list, batch: str | None) -> dict:
+    """The ``batches`` attribute after writing ``batch`` in (nothing without ids)."""
+    if batch is not None:
+        batches = (batches + [batch])[-APPLIED_BATCHES:]
+    return {"batches": batches} if batches else {}
+
+
+def apply(scope_key: str, month: str, changes: Counter, batch: str | None = None) -> None:
+    """Add ``changes`` ((topic, bucket) -> count delta) to one product-month.
+
+    Read-modify-write, conditional on ``rev`` and retried on conflict, and
+    skipped if ``batch`` is already in (as topic_sketch.apply()).
+    """
+    table = aws_clients.table(ASPECT_MATRIX_TABLE)
+    key = {"scopeKey": scope_key, "month": month}
+    with xray_recorder.in_subsegment("dynamodb-update-aspect-matrix") as seg:
+        seg.put_annotation("table", ASPECT_MATRIX_TABLE)
+        seg.put_annotation("operation", "put_item")
+        seg.put_metadata("cell_count", len(changes))
+        for _ in range(WRITE_ATTEMPTS):
+            item = table.get_item(Key=key, ConsistentRead=True).get("Item")
+            batches = list(item.get("batches", [])) if item else []
+            if batch is not None and batch in batches:
+                return
+            matrix = Matrix(item)
+            matrix.add(changes)
+            rev = int(item.get("rev", 0)) if item else 0
+            new_item = {**key, "rev": rev + 1, **matrix.item(), **_remembered(batches, batch)}
+            try:
+                if item is None:
+                    table.put_item(Item=new_item, ConditionExpression="attribute_not_exists(scopeKey)")
+                else:
+                    table.put_item(Item=new_item, ConditionExpression="#r = :rev",
+                                   ExpressionAttributeNames={"#r": "rev"},
+                                   ExpressionAttributeValues={":rev": rev})
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                continue
+            return
+    raise RuntimeError(f"aspect matrix {scope_key} {month} kept changing under {WRITE_ATTEMPTS} updates")
+
+
+def apply_all(changes: dict, batch: str | None = None) -> None:
+    """apply() for every product-month in ``changes`` ((scope key, month) -> Counter)."""
+    for (scope_key, month), counter in changes.items():
+        counter = Counter({cell: d for cell, d in counter.items() if d})
+        if counter:
+            apply(scope_key, month, counter, batch)
@@ -0,0 +1,226 @@
+"""
+Lazily built, memoized AWS clients and DynamoDB table handles, with tuned
+botocore settings and a per-invocation deadline.
+
+Handlers used to build every client at import, so each cold start paid for
+Bedrock, Cognito and SES clients whether or not the request needed them
+(an OPTIONS preflight needs none). Now nothing is built until first use;
+after that the same object is reused for the lifetime of the container.
+
+    aws_clients.client("cognito-idp").get_user(...)
+    aws_clients.table(FEEDBACK_TABLE).update_item(...)
+    aws_clients.dynamodb().batch_get_item(...)
+
+boto3 itself is imported on first use too, so a request that touches no AWS
+service never loads botocore. The DynamoDB resource is wrapped with
+ddb_metrics.instrument(). Construction time per client is kept in
+init_costs_ms for the import-time profiler.
+
+Client settings: TCP keep-alive, max_pool_connections from
+AWS_MAX_POOL_CONNECTIONS (set it to at least the function's worker
+threads), adaptive retries, and connect/read timeouts per service
+(SERVICE_TIMEOUTS).
+
+Deadlines: handlers call start_deadline(context) first. From then on every
+client handed out has a read timeout that fits in the time left (rounded
+down to one of READ_TIMEOUT_STEPS, so only a few variants are ever built),
+and every attempt, retries included, is checked before it is sent. Work
+that cannot finish raises DeadlineExceeded, and the handler turns it into a
+degraded response instead of hitting the Lambda timeout.
+DEADLINE_RESERVE_MS is held back for that response; the default 1500 ms
+also keeps 30 s API functions under API Gateway's 29 s limit.
+
+X-Ray patching is opt-in through XRAY_PATCH_MODULES (comma-separated
+aws_xray_sdk module names, e.g. "botocore"); patch_tracing() patches only
+those instead of patch_all().
+"""
+import os
+import threading
+import time
+
+import ddb_metrics
+
+REGION = os.environ.get("AWS_REGION_NAME", "ca-central-1")
+XRAY_PATCH_MODULES = os.environ.get("XRAY_PATCH_MODULES", "")
+MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "10"))
+MAX_ATTEMPTS = int(os.environ.get("AWS_MAX_ATTEMPTS", "3"))
+DEADLINE_RESERVE_MS = int(os.environ.get("DEADLINE_RESERVE_MS", "1500"))
+
+# service -> (connect timeout, max read timeout), seconds
+SERVICE_TIMEOUTS = {
+    "dynamodb": (1.0, 5.0),
+    "bedrock-runtime": (2.0, 60.0),
+    # synchronous invocations wait for the other function's whole run
+    "lambda": (2.0, 30.0),
+}
+DEFAULT_TIMEOUTS = (2.0, 10.0)
+READ_TIMEOUT_STEPS = (1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+_lock = threading.RLock()
+_clients: dict = {}      # (service, read timeout) -> client
+_resources: dict = {}    # read timeout -> DynamoDB resource
+_tables: dict = {}       # (table name, read timeout) -> Table
+_overrides: dict = {}    # service -> stand-in client
+_deadline_at: float | None = None
+
+init_costs_ms: dict[str, float] = {}
+
+
+class DeadlineExceeded(Exception):
+    """An AWS call would not finish before the invocation's deadline."""
+
+
+# ---------------------------------------------------------------------------
+# Deadline
+# ---------------------------------------------------------------------------
+
+def start_deadline(context, reserve_ms: int = DEADLINE_RESERVE_MS) -> None:
+    """Start this invocation's budget from the Lambda context (None = no deadline)."""
+    global _deadline_at
+    if context is None:
+        _deadline_at = None
+        return
+    remaining_ms = context.get_remaining_time_in_millis() - reserve_ms
+    _deadline_at = time.monotonic() + remaining_ms / 1000
+
+
+def limit_deadline(seconds: float) -> None:
+    """Cap the current budget at ``seconds`` from now (per-task budgets)."""
+    global _deadline_at
+    limit = time.monotonic() + seconds
+    _deadline_at = limit if _deadline_at is None else min(_deadline_at, limit)
+
+
+def remaining_s() -> float | None:
+    """Seconds left before the deadline, or None when there is none."""
+    if _deadline_at is None:
+        return None
+    return _deadline_at - time.monotonic()
+
+
+def check_deadline(needed_s: float = 0.0, what: str = "request") -> None:
+    """Raise DeadlineExceeded unless ``needed_s`` seconds are still available."""
+    remaining = remaining_s()
+    if remaining is not None and remaining < needed_s:
+        raise DeadlineExceeded(f"{what} needs {needed_s:.1f}s, {max(remaining, 0):.1f}s left")
+
+
+def _timeouts(service: str) -> tuple:
+    """(connect, read) for a call starting now; read fits the time left."""
+    connect, read = SERVICE_TIMEOUTS.get(service, DEFAULT_TIMEOUTS)
+    remaining = remaining_s()
+    if remaining is None:
+        return connect, read
+    fitting = [step for step in READ_TIMEOUT_STEPS if step <= min(read, remaining - connect)]
+    if not fitting:
+        raise DeadlineExceeded(f"{service} call needs {connect + READ_TIMEOUT_STEPS[0]:.1f}s, "
+                               f"{max(remaining, 0):.1f}s left")
+    return connect, fitting[-1]
+
+
+def _guard_attempts(client, service: str, connect: float, read: float) -> None:
+    """Check the deadline before each attempt, retries included."""
+    def before_send(**_kwargs):
+        check_deadline(connect + read, f"{service} attempt")
+    # each client has its own copy of the event emitter, so this is per client
+    client.meta.events.register("before-send", before_send, unique_id="aws-clients-deadline")
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+def _config(connect: float, read: float):
+    from botocore.config import Config
+    return Config(
+        connect_timeout=connect,
+        read_timeout=read,
+        tcp_keepalive=True,
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        retries={"mode": "adaptive", "total_max_attempts": MAX_ATTEMPTS},
+    )
+
+
+def _timed(name: str, build):
+    """Run build(boto3), recording its cost (and the first boto3 import's)."""
+    started = time.perf_counter()
+    import boto3
+    if "boto3" not in init_costs_ms:
+        init_costs_ms["boto3"] = round((time.perf_counter() - started) * 1000, 2)
+    started = time.perf_counter()
+    obj = build(boto3)
+    init_costs_ms.setdefault(name, round((time.perf_counter() - started) * 1000, 2))
+    return obj
+
+
+def client(service: str):
+    """boto3 client for ``service`` whose read timeout fits the deadline."""
+    if service in _overrides:
+        return _overrides[service]
+    connect, read = _timeouts(service)
+    key = (service, read)
+    found = _clients.get(key)
+    if found is not None:
+        return found
+    with _lock:
+        if key not in _clients:
+            built = _timed(service, lambda boto3: boto3.client(
+                service, region_name=REGION, config=_config(connect, read)))
+            _guard_attempts(built, service, connect, read)
+            _clients[key] = built
+        return _clients[key]
+
+
+def dynamodb():
+    """Instrumented DynamoDB service resource whose read timeout fits the deadline."""
+    connect, read = _timeouts("dynamodb")
+    found = _resources.get(read)
+    if found is not None:
+        return found
+    with _lock:
+        if read not in _resources:
+            built = _timed("dynamodb", lambda boto3: ddb_metrics.instrument(
+                boto3.resource("dynamodb", region_name=REGION, config=_config(connect, read))))
+            _guard_attempts(built.meta.client, "dynamodb", connect, read)
+            _resources[read] = built
+        return _resources[read]
+
+
+def table(name: str):
+    """DynamoDB Table handle for ``name``, on a resource that fits the deadline."""
+    resource = dynamodb()
+    key = (name, resource.meta.client.meta.config.read_timeout)
+    found = _tables.get(key)
+    if found is not None:
+        return found
+    with _lock:
+        if key not in _tables:
+            _tables[key] = resource.Table(name)
+        return _tables[key]
+
+
+def override(service: str, obj) -> None:
+    """Swap in a stand-in client (benchmarks, local runs)."""
+    with _lock:
+        _overrides[service] = obj
+
+
+def reset() -> None:
+    """Forget every client and table, as after a fresh cold start."""
+    global _deadline_at
+    with _lock:
+        _clients.clear()
+        _resources.clear()
+        _tables.clear()
+        _overrides.clear()
+        _deadline_at = None
+        init_costs_ms.clear()
+
+
+def patch_tracing() -> tuple:
+    """Patch only the modules named in XRAY_PATCH_MODULES; returns them."""
+    modules = tuple(m.strip() for m in XRAY_PATCH_MODULES.split(",") if m.strip())
+    if modules:
+        from aws_xray_sdk.core import patch
+        patch(modules)
+    return modules
@@ -0,0 +1,182 @@
+"""
+Bedrock usage metering: tokens, latency and retries per brand, call type,
+model and prompt version.
+
+Every InvokeModel call is record()ed with the token counts from the
+response's ``usage`` block, the wall time and botocore's retry count.
+Calls are grouped per request; flush() then
+
+  * prints one CloudWatch Embedded Metric Format line per group (namespace
+    ReviewPulse/AI, dimensions CallType+ModelId, CallType+PromptVersion
+    and optionally BrandId+CallType; latency goes out as the list of call
+    times, so CloudWatch keeps the percentiles, and a group of more than
+    EMF_MAX_VALUES calls adds latency-only lines for the rest),
+  * adds the group to its brand's daily roll-up in the ai-usage table,
+
+    brandId    the brand the call was made for
+    sk         <day>#<callType>#<modelId>#<promptVersion>
+    calls, errors, retries, input_tokens, output_tokens, latency_ms
+               running sums (ADD), so one day of a brand is a key range
+
+  * and attaches the totals to the handler's X-Ray subsegment.
+
+A low-priority batch of fifty reviews is one update per group, not fifty.
+Metering never fails the request: a roll-up that cannot be written is
+logged and dropped.
+
+    bedrock_usage.begin_request("ai-processor")
+    bedrock_usage.record("review_analysis", model_id, brand_id, "review-analysis-v1",
+                         response_body.get("usage"), latency_ms, retries)
+    bedrock_usage.flush(handler_seg)
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import aws_clients
+
+USAGE_TABLE = os.environ.get("DYNAMODB_TABLE_AI_USAGE", "reviewpulse-ai-usage")
+NAMESPACE = os.environ.get("AI_METRICS_NAMESPACE", "ReviewPulse/AI")
+BRAND_DIMENSION = os.environ.get("AI_METRICS_BRAND_DIMENSION", "true").lower() == "true"
+ENABLED = os.environ.get("AI_USAGE_METERING", "true").lower() == "true"
+
+UNATTRIBUTED = "-"            # brandId of calls made for no particular brand
+EMF_MAX_VALUES = 100          # CloudWatch rejects an EMF metric with more values
+
+_lock = threading.Lock()
+_request: dict = {"function": "unknown", "groups": {}}
+
+
+def _empty_group() -> dict:
+    return {"calls": 0, "errors": 0, "retries": 0, "input_tokens": 0, "output_tokens": 0,
+            "latency_ms": 0.0, "latencies": []}
+
+
+def begin_request(function: str) -> None:
+    with _lock:
+        _request.update({"function": function, "groups": {}})
+
+
+def retries_of(response_or_error) -> int:
+    """botocore's retry count for a response, or for the ClientError a call ended in."""
+    response = getattr(response_or_error, "response", response_or_error)
+    if not isinstance(response, dict):
+        return 0
+    return int(response.get("ResponseMetadata", {}).get("RetryAttempts", 0))
+
+
+def record(call_type: str, model_id: str, brand_id: str, prompt_version: str, usage: dict | None,
+           latency_ms: float, retries: int = 0, error: bool = False) -> None:
+    """Count one InvokeModel call (``usage`` as the response body has it; None for a failed call)."""
+    if not ENABLED:
+        return
+    usage = usage or {}
+    key = (brand_id or UNATTRIBUTED, call_type, model_id, prompt_version)
+    with _lock:
+        group = _request["groups"].setdefault(key, _empty_group())
+        group["calls"] += 1
+        group["errors"] += 1 if error else 0
+        group["retries"] += retries
+        group["input_tokens"] += int(usage.get("input_tokens", 0))
+        group["output_tokens"] += int(usage.get("output_tokens", 0))
+        group["latency_ms"] += latency_ms
+        group["latencies"].append(round(latency_ms, 1))
+
+
+def summary() -> dict:
+    """This request's totals over every group."""
+    with _lock:
+        groups = list(_request["groups"].values())
+    totals = _empty_group()
+    del totals["latencies"]
+    for group in groups:
+        for name in totals:
+            totals[name] += group[name]
+    totals["latency_ms"] = round(totals["latency_ms"], 1)
+    return totals
+
+
+def _emf_lines(function: str, key: tuple, group: dict) -> list:
+    """The group's EMF lines: every metric on the first, latencies EMF_MAX_VALUES per line."""
+    latencies = group["latencies"]
+    chunks = [latencies[i:i + EMF_MAX_VALUES] for i in range(0, len(latencies), EMF_MAX_VALUES)] or [[]]
+    lines = [_emf_line(function, key, {**group, "latencies": chunks[0]})]
+    lines += [_emf_line(function, key, {"latencies": chunk}) for chunk in chunks[1:]]
+    return lines
+
+
+def _emf_line(function: str, key: tuple, group: dict) -> str:
+    """One EMF line; ``group`` without counters carries the latencies alone."""
+    brand_id, call_type, model_id, prompt_version = key
+    dimensions = [["Function", "CallType", "ModelId"], ["Function", "CallType", "PromptVersion"]]
+    values = {"Function": function, "CallType": call_type, "ModelId": model_id,
+              "PromptVersion": prompt_version}
+    if BRAND_DIMENSION and brand_id != UNATTRIBUTED:
+        dimensions.append(["Function", "BrandId", "CallType"])
+        values["BrandId"] = brand_id
+    metrics = {}
+    if "calls" in group:
+        metrics.update({
+            "BedrockCalls": (group["calls"], "Count"),
+            "BedrockErrors": (group["errors"], "Count"),
+            "BedrockRetries": (group["retries"], "Count"),
+            "BedrockInputTokens": (group["input_tokens"], "Count"),
+            "BedrockOutputTokens": (group["output_tokens"], "Count"),
+        })
+    metrics["BedrockLatency"] = (group["latencies"], "Milliseconds")
+    return json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": dimensions,
+                "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in metrics.items()],
+            }],
+        },
+        **values,
+        **{name: value for name, (value, _) in metrics.items()},
+    })
+
+
+def _roll_up(day: str, key: tuple, group: dict) -> None:
+    brand_id, call_type, model_id, prompt_version = key
+    aws_clients.table(USAGE_TABLE).update_item(
+        Key={"brandId": brand_id, "sk": f"{day}#{call_type}#{model_id}#{prompt_version}"},
+        UpdateExpression=(
+            "ADD calls :calls, errors :errors, retries :retries, input_tokens :input, "
+            "output_tokens :output, latency_ms :latency "
+            "SET callType = :type, modelId = :model, promptVersion = :version, updatedAt = :now"
+        ),
+        ExpressionAttributeValues={
+            ":calls": group["calls"], ":errors": group["errors"], ":retries": group["retries"],
+            ":input": group["input_tokens"], ":output": group["output_tokens"],
+            ":latency": int(round(group["latency_ms"])),
+            ":type": call_type, ":model": model_id, ":version": prompt_version,
+            ":now": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+
+
+def flush(subsegment=None) -> dict:
+    """Emit this request's usage (EMF, daily roll-ups, X-Ray) and return its totals."""
+    data = summary()
+    with _lock:
+        function, groups = _request["function"], dict(_request["groups"])
+    if not ENABLED or not groups:
+        return data
+
+    day = datetime.now(timezone.utc).date().isoformat()
+    for key, group in groups.items():
+        for line in _emf_lines(function, key, group):
+            print(line)
+        try:
+            _roll_up(day, key, group)
+        except Exception as exc:
+            print(f"[USAGE ERROR] brand={key[0]} callType={key[1]}: could not roll up usage: {exc}")
+
+    if subsegment is not None:
+        subsegment.put_annotation("bedrock_calls", data["calls"])
+        subsegment.put_metadata("bedrock_usage", data)
+    return data
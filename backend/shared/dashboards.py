@@ -0,0 +1,224 @@
+"""
+Pre-built dashboard documents.
+
+get_insights materializes the response to each plain dashboard request (no
+query string) into the dashboards table, one item per scope, keyed like the
+link-stats counters:
+
+    global                          GET /insights                       (superadmin overview)
+    brand#<brandId>                 GET /insights/{brandId}
+    product#<brandId>#<productId>   GET /insights/{brandId}/{productId}
+
+An item holds the gzip-compressed JSON body, its ETag, the data version
+(link_counters) it was built from, the UTC day it was built on (default
+windows roll daily) and the package hash of the code that built it. A
+scope with nothing to show gets an ``empty`` item, so the schedule does not
+rebuild it every hour.
+
+Refreshes are asynchronous invocations of get_insights with
+``{"action": "materialize", "scopes": [...]}``. They are requested by
+get_insights when it serves a stale document, through data_changed() by
+analytics_projector and ai_processor when reviews or product summaries
+change, and by the hourly schedule (``{"action": "materialize"}``, no
+scopes), which looks for stale scopes and hands them out in chunks. A
+refresh holds a per-scope lease, so a burst of requests rebuilds a scope once,
+and stale reads ask at most once per REFRESH_REQUEST_INTERVAL_S
+(claim_refresh_request), so a burst does not send a request per read either.
+"""
+import json
+import os
+import time
+
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+import link_counters
+
+DASHBOARDS_TABLE = os.environ.get("DYNAMODB_TABLE_DASHBOARDS", "reviewpulse-dashboards")
+MATERIALIZER_FUNCTION = os.environ.get("DASHBOARD_MATERIALIZER_FUNCTION", "reviewpulse-get-insights")
+
+REFRESH_CHUNK = 25            # scopes per asynchronous refresh invocation
+REFRESH_REQUEST_INTERVAL_S = 30  # a stale scope's reads ask for a rebuild at most this often
+MAX_DOCUMENT_BYTES = 350_000  # compressed; DynamoDB items stop at 400 KB
+BATCH_GET_LIMIT = 100         # DynamoDB BatchGetItem hard limit per request
+# everything but the body; several of these are DynamoDB reserved words
+_META_NAMES = {f"#{name}": name for name in
+               ("docKey", "version", "built_on", "code", "lease_until", "empty")}
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def get(scope_key: str) -> dict | None:
+    """The stored item for one scope, body included (None if there is none)."""
+    with xray_recorder.in_subsegment("dynamodb-get-dashboard") as seg:
+        seg.put_annotation("table", DASHBOARDS_TABLE)
+        seg.put_annotation("operation", "get_item")
+        resp = aws_clients.table(DASHBOARDS_TABLE).get_item(Key={"docKey": scope_key})
+    return resp.get("Item")
+
+
+def batch_get_meta(keys: list) -> dict:
+    """docKey -> item without its body, for the scopes that have one."""
+    unique = list(dict.fromkeys(keys))
+    found: dict[str, dict] = {}
+    with xray_recorder.in_subsegment("dynamodb-batch-get-dashboards") as seg:
+        seg.put_annotation("table", DASHBOARDS_TABLE)
+        seg.put_annotation("operation", "batch_get_item")
+        seg.put_metadata("key_count", len(unique))
+        for start in range(0, len(unique), BATCH_GET_LIMIT):
+            request = {DASHBOARDS_TABLE: {
+                "Keys": [{"docKey": k} for k in unique[start:start + BATCH_GET_LIMIT]],
+                "ProjectionExpression": ", ".join(_META_NAMES),
+                "ExpressionAttributeNames": _META_NAMES,
+            }}
+            while request:
+                resp = aws_clients.dynamodb().batch_get_item(RequestItems=request)
+                for item in resp.get("Responses", {}).get(DASHBOARDS_TABLE, []):
+                    found[item["docKey"]] = item
+                request = resp.get("UnprocessedKeys") or None
+    return found
+
+
+def is_stale(item: dict | None, version: int, code: str, today: str) -> bool:
+    """Whether a stored item no longer matches the data, the code or the day."""
+    if not item or "built_on" not in item:
+        return True
+    return (int(item.get("version", -1)) < version
+            or item.get("code") != code
+            or item["built_on"] != today)
+
+
+def is_leased(item: dict | None) -> bool:
+    """A refresh of this scope is already running."""
+    return bool(item) and int(item.get("lease_until", 0)) > time.time()
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def acquire_lease(scope_key: str, seconds: int) -> bool:
+    """Claim the scope's refresh for ``seconds``; False if another one holds it."""
+    now = int(time.time())
+    table = aws_clients.table(DASHBOARDS_TABLE)
+    try:
+        table.update_item(
+            Key={"docKey": scope_key},
+            UpdateExpression="SET lease_until = :until",
+            ConditionExpression="attribute_not_exists(lease_until) OR lease_until < :now",
+            ExpressionAttributeValues={":until": now + seconds, ":now": now},
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def claim_refresh_request(scope_key: str, item: dict | None) -> bool:
+    """Whether this read should ask for the scope's rebuild.
+
+    A stale document is read by every request until the rebuild lands, and
+    the lease is only taken once the rebuild starts; without this a burst of
+    reads would each send a request. ``refresh_requested_at`` is set
+    conditionally, so one read per REFRESH_REQUEST_INTERVAL_S wins. ``item``
+    is the stored item just read, to skip the write while a request is recent.
+    """
+    now = int(time.time())
+    if item and int(item.get("refresh_requested_at", 0)) > now - REFRESH_REQUEST_INTERVAL_S:
+        return False
+    table = aws_clients.table(DASHBOARDS_TABLE)
+    try:
+        table.update_item(
+            Key={"docKey": scope_key},
+            UpdateExpression="SET refresh_requested_at = :now",
+            ConditionExpression="attribute_not_exists(refresh_requested_at) OR refresh_requested_at < :since",
+            ExpressionAttributeValues={":now": now, ":since": now - REFRESH_REQUEST_INTERVAL_S},
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def release_lease(scope_key: str) -> None:
+    aws_clients.table(DASHBOARDS_TABLE).update_item(
+        Key={"docKey": scope_key}, UpdateExpression="REMOVE lease_until",
+    )
+
+
+def put(scope_key: str, version: int, built_on: str, code: str,
+        body: bytes | None = None, etag: str | None = None) -> bool:
+    """Store a document (or an ``empty`` item when ``body`` is None), releasing the lease.
+
+    Never replaces a document built from a newer data version; returns False
+    when one is already there.
+    """
+    item = {"docKey": scope_key, "version": version, "built_on": built_on, "code": code,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    if body is None:
+        item["empty"] = True
+    else:
+        item.update({"body": body, "etag": etag})
+    table = aws_clients.table(DASHBOARDS_TABLE)
+    with xray_recorder.in_subsegment("dynamodb-put-dashboard") as seg:
+        seg.put_annotation("table", DASHBOARDS_TABLE)
+        seg.put_annotation("operation", "put_item")
+        seg.put_metadata("bytes", len(body or b""))
+        try:
+            table.put_item(
+                Item=item,
+                ConditionExpression="attribute_not_exists(#v) OR #v <= :v",
+                ExpressionAttributeNames={"#v": "version"},
+                ExpressionAttributeValues={":v": version},
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Refresh requests
+# ---------------------------------------------------------------------------
+
+def request_refresh(scope_keys) -> None:
+    """Have get_insights rebuild ``scope_keys`` in the background.
+
+    Fire-and-forget: a failed request only leaves a document stale until the
+    next one, so it is logged rather than raised.
+    """
+    keys = list(dict.fromkeys(scope_keys))
+    for start in range(0, len(keys), REFRESH_CHUNK):
+        chunk = keys[start:start + REFRESH_CHUNK]
+        try:
+            with xray_recorder.in_subsegment("lambda-request-dashboard-refresh") as seg:
+                seg.put_annotation("function_name", MATERIALIZER_FUNCTION)
+                seg.put_metadata("scopes", chunk)
+                aws_clients.client("lambda").invoke(
+                    FunctionName=MATERIALIZER_FUNCTION,
+                    InvocationType="Event",
+                    Payload=json.dumps({"action": "materialize", "scopes": chunk}).encode("utf-8"),
+                )
+        except aws_clients.DeadlineExceeded:
+            raise
+        except Exception as exc:
+            print(f"[DASHBOARD REFRESH ERROR] scopes={len(chunk)}: {exc}")
+
+
+def data_changed(scopes) -> None:
+    """Bump the data versions of the changed (brandId, productId) scopes and
+    have their brand and product dashboards rebuilt. The overview is left to
+    the hourly schedule and to stale reads. A failure here only costs freshness."""
+    scopes = set(scopes)
+    if not scopes:
+        return
+    try:
+        link_counters.bump_versions(scopes)
+    except aws_clients.DeadlineExceeded:
+        raise
+    except Exception as exc:
+        print(f"[VERSION ERROR] {exc}")
+    request_refresh(
+        key for brand_id, product_id in sorted(scopes)
+        for key in link_counters.scope_keys(brand_id, product_id)
+        if key != link_counters.GLOBAL_KEY
+    )
@@ -0,0 +1,226 @@
+"""
+DynamoDB I/O instrumentation.
+
+instrument(resource_or_client) hooks botocore events on a DynamoDB client:
+
+  * before-parameter-build: adds ReturnConsumedCapacity=TOTAL to every
+    operation that accepts it (get/put/update/delete, query, scan, batch
+    and transact calls).
+  * after-call: folds the response into the current request's totals —
+    calls per operation, read/write capacity units, items scanned vs
+    returned, pages and response bytes, overall and per table.
+
+Handlers bracket each invocation with begin_request() / flush(). flush()
+prints one CloudWatch Embedded Metric Format line (namespace
+ReviewPulse/DataAccess, dimensions Function+Route and optionally
+Function+Route+BrandId), attaches the summary to the handler's X-Ray
+subsegment, and flags routes whose scanned:returned ratio is over
+DDB_SCAN_RATIO_THRESHOLD.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+NAMESPACE = os.environ.get("DDB_METRICS_NAMESPACE", "ReviewPulse/DataAccess")
+SCAN_RATIO_THRESHOLD = float(os.environ.get("DDB_SCAN_RATIO_THRESHOLD", "10"))
+SCAN_RATIO_MIN_SCANNED = int(os.environ.get("DDB_SCAN_RATIO_MIN_SCANNED", "100"))
+BRAND_DIMENSION = os.environ.get("DDB_METRICS_BRAND_DIMENSION", "true").lower() == "true"
+ENABLED = os.environ.get("DDB_METRICS_ENABLED", "true").lower() == "true"
+
+WRITE_OPERATIONS = {
+    "PutItem", "UpdateItem", "DeleteItem", "BatchWriteItem", "TransactWriteItems",
+}
+
+_lock = threading.Lock()
+_request: dict = {}
+
+
+def _empty_totals() -> dict:
+    return {"calls": 0, "read_units": 0.0, "write_units": 0.0, "scanned": 0,
+            "returned": 0, "pages": 0, "bytes": 0}
+
+
+def _reset(function: str, route: str, brand_id: str) -> None:
+    _request.clear()
+    _request.update({
+        "function": function,
+        "route": route,
+        "brand_id": brand_id,
+        "operations": Counter(),
+        "totals": _empty_totals(),
+        "tables": {},
+    })
+
+
+_reset("unknown", "unknown", "")
+
+
+# ---------------------------------------------------------------------------
+# botocore hooks
+# ---------------------------------------------------------------------------
+
+def _add_return_consumed_capacity(params: dict, model, **_kwargs) -> None:
+    if "ReturnConsumedCapacity" in model.input_shape.members:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _capacity_entries(parsed: dict) -> list:
+    consumed = parsed.get("ConsumedCapacity")
+    if consumed is None:
+        return []
+    return consumed if isinstance(consumed, list) else [consumed]
+
+
+def _returned_count(operation: str, parsed: dict) -> int:
+    if operation in ("Scan", "Query"):
+        return int(parsed.get("Count", 0))
+    if operation == "GetItem":
+        return 1 if parsed.get("Item") else 0
+    if operation == "BatchGetItem":
+        return sum(len(items) for items in parsed.get("Responses", {}).values())
+    if operation == "TransactGetItems":
+        return sum(1 for r in parsed.get("Responses", []) if r.get("Item"))
+    return 0
+
+
+def _record_response(http_response, parsed: dict, model, **_kwargs) -> None:
+    if not ENABLED:
+        return
+    operation = model.name
+    returned = _returned_count(operation, parsed)
+    scanned = int(parsed.get("ScannedCount", returned))
+    size = 0
+    if http_response is not None:
+        size = int(http_response.headers.get("content-length") or len(http_response.content or b""))
+    unit_field = "write_units" if operation in WRITE_OPERATIONS else "read_units"
+    entries = _capacity_entries(parsed)
+    paged = operation in ("Scan", "Query")
+
+    with _lock:
+        _request["operations"][operation] += 1
+        targets = [_request["totals"]]
+        table_names = [e.get("TableName", "unknown") for e in entries] or ["unknown"]
+        for name in dict.fromkeys(table_names):
+            targets.append(_request["tables"].setdefault(name, _empty_totals()))
+        for target in targets:
+            target["calls"] += 1
+            target["scanned"] += scanned
+            target["returned"] += returned
+            target["bytes"] += size
+            target["pages"] += 1 if paged else 0
+        _request["totals"][unit_field] += sum(float(e.get("CapacityUnits", 0)) for e in entries)
+        for entry in entries:
+            table = _request["tables"][entry.get("TableName", "unknown")]
+            table[unit_field] += float(entry.get("CapacityUnits", 0))
+
+
+def instrument(dynamodb):
+    """Register the hooks on a DynamoDB resource or client; returns it unchanged."""
+    client = getattr(getattr(dynamodb, "meta", None), "client", None) or dynamodb
+    events = client.meta.events
+    events.register("before-parameter-build.dynamodb", _add_return_consumed_capacity,
+                    unique_id="ddb-metrics-rcc")
+    events.register("after-call.dynamodb", _record_response, unique_id="ddb-metrics-record")
+    return dynamodb
+
+
+# ---------------------------------------------------------------------------
+# Per-request lifecycle
+# ---------------------------------------------------------------------------
+
+def begin_request(function: str, route: str = "unknown", brand_id: str = "") -> None:
+    with _lock:
+        _reset(function, route, brand_id)
+
+
+def set_route(route: str, brand_id: str = "") -> None:
+    with _lock:
+        _request["route"] = route
+        if brand_id:
+            _request["brand_id"] = brand_id
+
+
+def set_brand(brand_id: str) -> None:
+    """For routes that only learn the brand after a lookup (e.g. a review link)."""
+    with _lock:
+        _request["brand_id"] = brand_id or _request["brand_id"]
+
+
+def _ratio(totals: dict) -> float:
+    return round(totals["scanned"] / max(totals["returned"], 1), 1)
+
+
+def summary() -> dict:
+    with _lock:
+        totals = dict(_request["totals"])
+        return {
+            "route": _request["route"],
+            "brand_id": _request["brand_id"],
+            **totals,
+            "read_units": round(totals["read_units"], 2),
+            "write_units": round(totals["write_units"], 2),
+            "scan_ratio": _ratio(totals),
+            "operations": dict(_request["operations"]),
+            "tables": {
+                name: {**t, "read_units": round(t["read_units"], 2),
+                       "write_units": round(t["write_units"], 2)}
+                for name, t in _request["tables"].items()
+            },
+        }
+
+
+def _emf_line(data: dict) -> str:
+    dimensions = [["Function", "Route"]]
+    values = {"Function": _request["function"], "Route": data["route"]}
+    if BRAND_DIMENSION and data["brand_id"]:
+        dimensions.append(["Function", "Route", "BrandId"])
+        values["BrandId"] = data["brand_id"]
+    metrics = {
+        "DynamoDBCalls": (data["calls"], "Count"),
+        "DynamoDBReadUnits": (data["read_units"], "Count"),
+        "DynamoDBWriteUnits": (data["write_units"], "Count"),
+        "DynamoDBItemsScanned": (data["scanned"], "Count"),
+        "DynamoDBItemsReturned": (data["returned"], "Count"),
+        "DynamoDBPages": (data["pages"], "Count"),
+        "DynamoDBResponseBytes": (data["bytes"], "Bytes"),
+        "DynamoDBScanRatio": (data["scan_ratio"], "None"),
+    }
+    return json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": dimensions,
+                "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in metrics.items()],
+            }],
+        },
+        **values,
+        **{name: value for name, (value, _) in metrics.items()},
+        "operations": data["operations"],
+    })
+
+
+def flush(subsegment=None) -> dict:
+    """Emit this request's metrics (EMF + X-Ray) and return the summary."""
+    data = summary()
+    if not ENABLED or not data["calls"]:
+        return data
+
+    print(_emf_line(data))
+
+    amplified = data["scanned"] >= SCAN_RATIO_MIN_SCANNED and data["scan_ratio"] > SCAN_RATIO_THRESHOLD
+    if amplified:
+        print(f"[DDB SCAN AMPLIFICATION] route={data['route']} brand={data['brand_id'] or '-'} "
+              f"scanned={data['scanned']} returned={data['returned']} ratio={data['scan_ratio']}")
+
+    if subsegment is not None:
+        subsegment.put_annotation("ddb_read_units", data["read_units"])
+        subsegment.put_annotation("ddb_scan_ratio", data["scan_ratio"])
+        subsegment.put_annotation("ddb_scan_amplified", amplified)
+        subsegment.put_metadata("dynamodb_io", {
+            k: data[k] for k in ("calls", "read_units", "write_units", "scanned",
+                                 "returned", "pages", "bytes", "operations")
+        })
+    return data
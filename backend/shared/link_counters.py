@@ -0,0 +1,236 @@
+"""
+Review-link usage counters.
+
+One item per scope in the link-stats table, keyed by ``statsKey``:
+
+    global                          every link ever sent
+    brand#<brandId>                 links sent for one brand
+    product#<brandId>#<productId>   links sent for one product
+
+Each item carries ``total_sent`` and ``total_used``. auth_otp and submit_review
+bump only the product counter, in the same transaction as the link write, and
+stamp the link with ``sentCounted`` / ``usedCounted``. The brand and global
+counters are shared by every link of a brand (or of every brand), so keeping
+them in that transaction would make concurrent sends conflict on them; the
+link-stats reconciler adds them from the links stream instead, stamping the
+link with ``sentRolledUp`` / ``usedRolledUp``. It also counts any link write
+that arrives without the product stamps (seed scripts, console edits,
+imports), so the totals stay exact without rescanning links. Brand and
+global totals trail the product ones by the stream's lag, about a second.
+
+The brand and product items also carry ``data_version``, a counter bumped by
+every write that can change a dashboard under that scope (link counters, new
+reviews, their analysis, product summaries). get_insights builds its ETags
+from it, and stored dashboard documents (dashboards.py) record the version
+they were built from, which is how they are known to be stale. The global
+item has no version, so that not every write lands on one item; the
+overview's is the sum of the brand versions (overview_version()).
+"""
+import os
+import time
+
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+
+LINK_STATS_TABLE = os.environ.get("DYNAMODB_TABLE_LINK_STATS", "reviewpulse-link-stats")
+
+GLOBAL_KEY = "global"
+VERSION_FIELD = "data_version"
+BATCH_GET_LIMIT = 100  # DynamoDB BatchGetItem hard limit per request
+CONFLICT_ATTEMPTS = 3  # transactions cancelled by a TransactionConflict are retried
+
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+def brand_key(brand_id: str) -> str:
+    return f"brand#{brand_id}"
+
+
+def product_key(brand_id: str, product_id: str) -> str:
+    return f"product#{brand_id}#{product_id}"
+
+
+def link_keys(brand_id: str, product_id: str) -> list:
+    """The counter bumped together with the link write itself."""
+    return [product_key(brand_id, product_id)] if brand_id and product_id else []
+
+
+def rollup_keys(brand_id: str) -> list:
+    """The shared counters the reconciler adds a link to."""
+    return [GLOBAL_KEY] + ([brand_key(brand_id)] if brand_id else [])
+
+
+def scope_keys(brand_id: str, product_id: str) -> list:
+    """Every counter a single link contributes to."""
+    return rollup_keys(brand_id) + link_keys(brand_id, product_id)
+
+
+def version_keys(brand_id: str, product_id: str) -> list:
+    """The scopes whose data version moves when a review of the product changes."""
+    return [key for key in scope_keys(brand_id, product_id) if key != GLOBAL_KEY]
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def increment_ops(keys: list, field: str, amount: int = 1) -> list:
+    """TransactWriteItems ``Update`` entries that add ``amount`` to ``field`` under ``keys``.
+
+    ``keys`` come from link_keys() or rollup_keys(); ``field`` is
+    ``total_sent`` or ``total_used``. ADD creates the item and the attribute
+    on first use, so no counter needs to be provisioned up front. Each brand
+    and product entry bumps the scope's data version too.
+    """
+    return [_increment_op(key, field, amount) for key in keys]
+
+
+def _increment_op(key: str, field: str, amount: int) -> dict:
+    update, names, values = "ADD #f :n", {"#f": field}, {":n": amount}
+    if key != GLOBAL_KEY:
+        update += ", #v :one"
+        names["#v"] = VERSION_FIELD
+        values[":one"] = 1
+    return {
+        "Update": {
+            "TableName": LINK_STATS_TABLE,
+            "Key": {"statsKey": key},
+            "UpdateExpression": update,
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+        }
+    }
+
+
+def transact(items: list) -> None:
+    """TransactWriteItems, retrying cancellations caused only by a conflicting write.
+
+    Two links of one product sent at once conflict on the product counter;
+    the loser is retried after a short pause. Any other cancellation (a
+    failed condition) is raised as TransactionCanceledException.
+    """
+    client = aws_clients.dynamodb().meta.client
+    for attempt in range(CONFLICT_ATTEMPTS):
+        try:
+            client.transact_write_items(TransactItems=items)
+            return
+        except client.exceptions.TransactionCanceledException as exc:
+            codes = {r.get("Code") for r in exc.response.get("CancellationReasons", [])} - {"None"}
+            if codes != {"TransactionConflict"} or attempt == CONFLICT_ATTEMPTS - 1:
+                raise
+            time.sleep(0.02 * (attempt + 1))
+
+
+def bump_versions(scopes) -> None:
+    """Bump the data version of every brand and product in ``scopes``.
+
+    ``scopes`` is an iterable of (brandId, productId) pairs; each version
+    moves once, however many pairs share it. The overview has no version of
+    its own to bump (see overview_version()).
+    """
+    keys = list(dict.fromkeys(key for brand_id, product_id in scopes
+                              for key in version_keys(brand_id, product_id)))
+    if not keys:
+        return
+    with xray_recorder.in_subsegment("dynamodb-bump-data-versions") as seg:
+        seg.put_annotation("table", LINK_STATS_TABLE)
+        seg.put_annotation("operation", "update_item")
+        seg.put_metadata("key_count", len(keys))
+        table = aws_clients.table(LINK_STATS_TABLE)
+        for key in keys:
+            table.update_item(
+                Key={"statsKey": key},
+                UpdateExpression="ADD #v :one",
+                ExpressionAttributeNames={"#v": VERSION_FIELD},
+                ExpressionAttributeValues={":one": 1},
+            )
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def format_stats(item: dict | None) -> dict:
+    """Counter item -> the ``link_stats`` shape the dashboards expect."""
+    item = item or {}
+    total_sent = int(item.get("total_sent", 0))
+    total_used = int(item.get("total_used", 0))
+    usage_rate = round((total_used / total_sent * 100), 1) if total_sent else 0.0
+    return {"total_sent": total_sent, "total_used": total_used, "usage_rate": usage_rate}
+
+
+def get_version(key: str) -> int:
+    """Current data version of one scope (0 before its first write)."""
+    with xray_recorder.in_subsegment("dynamodb-get-data-version") as seg:
+        seg.put_annotation("table", LINK_STATS_TABLE)
+        seg.put_annotation("operation", "get_item")
+        resp = aws_clients.table(LINK_STATS_TABLE).get_item(
+            Key={"statsKey": key},
+            ProjectionExpression="#v",
+            ExpressionAttributeNames={"#v": VERSION_FIELD},
+        )
+    return int((resp.get("Item") or {}).get(VERSION_FIELD, 0))
+
+
+def get_stats(brand_id: str, product_id: str | None = None) -> dict:
+    """Single get_item for one brand or one product."""
+    key = product_key(brand_id, product_id) if product_id else brand_key(brand_id)
+    with xray_recorder.in_subsegment("dynamodb-get-link-stats") as seg:
+        seg.put_annotation("table", LINK_STATS_TABLE)
+        seg.put_annotation("operation", "get_item")
+        resp = aws_clients.table(LINK_STATS_TABLE).get_item(Key={"statsKey": key})
+    return format_stats(resp.get("Item"))
+
+
+def _batch_get(keys: list, what: str) -> dict:
+    """BatchGetItem for many scopes. Returns statsKey -> item, for the keys that have one."""
+    unique = list(dict.fromkeys(keys))
+    found: dict[str, dict] = {}
+    with xray_recorder.in_subsegment(f"dynamodb-batch-get-{what}") as seg:
+        seg.put_annotation("table", LINK_STATS_TABLE)
+        seg.put_annotation("operation", "batch_get_item")
+        seg.put_metadata("key_count", len(unique))
+        for start in range(0, len(unique), BATCH_GET_LIMIT):
+            request = {
+                LINK_STATS_TABLE: {
+                    "Keys": [{"statsKey": k} for k in unique[start:start + BATCH_GET_LIMIT]]
+                }
+            }
+            while request:
+                resp = aws_clients.dynamodb().batch_get_item(RequestItems=request)
+                for item in resp.get("Responses", {}).get(LINK_STATS_TABLE, []):
+                    found[item["statsKey"]] = item
+                request = resp.get("UnprocessedKeys") or None
+    return found
+
+
+def batch_get_stats(keys: list) -> dict:
+    """BatchGetItem for many scopes. Returns statsKey -> formatted stats.
+
+    Keys without a counter item yet come back as zeroes.
+    """
+    found = _batch_get(keys, "link-stats")
+    return {k: format_stats(found.get(k)) for k in dict.fromkeys(keys)}
+
+
+def batch_get_versions(keys: list) -> dict:
+    """statsKey -> data version, 0 for scopes nothing has been written to.
+
+    Keys must not include GLOBAL_KEY; see overview_version().
+    """
+    found = _batch_get(keys, "data-versions")
+    return {k: int((found.get(k) or {}).get(VERSION_FIELD, 0)) for k in dict.fromkeys(keys)}
+
+
+def overview_version(brand_ids) -> int:
+    """The overview's data version: the sum of its brands' versions.
+
+    Every change to the overview bumps a brand version, and versions only
+    grow, so the sum moves whenever the overview can have changed, without
+    every write in the system also updating one global item.
+    """
+    keys = [brand_key(brand_id) for brand_id in brand_ids if brand_id]
+    return sum(batch_get_versions(keys).values()) if keys else 0
@@ -0,0 +1,190 @@
+"""
+Read-through cache for brand and product metadata.
+
+Two tiers:
+  1. In-process TTL map, shared by every request a warm container serves.
+  2. A BatchGetItem loader behind it. Concurrent misses are coalesced: the
+     first caller for a key loads it (together with any other keys it missed)
+     and later callers for the same key wait on that load instead of issuing
+     their own read.
+
+Entries are keyed ("brand", brandId) or ("product", brandId, productId).
+Missing records are cached as None for a shorter TTL so unknown ids don't
+hammer DynamoDB.
+
+Invalidation is local to the container. ai_processor drops its own copy when
+it writes a new ai_summary; other containers pick the change up when their
+entry expires, so METADATA_CACHE_TTL_SECONDS bounds how stale a summary can
+be on live dashboards and the thank-you page. Stored dashboards are built
+with refresh(), which always reads through.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+
+BRANDS_TABLE = os.environ.get("DYNAMODB_TABLE_BRANDS", "reviewpulse-brands")
+PRODUCTS_TABLE = os.environ.get("DYNAMODB_TABLE_PRODUCTS", "reviewpulse-products")
+TTL_SECONDS = float(os.environ.get("METADATA_CACHE_TTL_SECONDS", "60"))
+NEGATIVE_TTL_SECONDS = float(os.environ.get("METADATA_CACHE_NEGATIVE_TTL_SECONDS", "10"))
+
+BATCH_GET_LIMIT = 100  # DynamoDB BatchGetItem hard limit per request
+
+_lock = threading.Lock()
+_entries: dict[tuple, tuple] = {}     # key -> (expires_at, item | None)
+_inflight: dict[tuple, Future] = {}   # key -> Future resolving to item | None
+_stats = {"hits": 0, "misses": 0, "coalesced": 0, "batch_loads": 0}
+
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+def brand_key(brand_id: str) -> tuple:
+    return ("brand", brand_id)
+
+
+def product_key(brand_id: str, product_id: str) -> tuple:
+    return ("product", brand_id, product_id)
+
+
+def _table_and_key(key: tuple) -> tuple:
+    if key[0] == "brand":
+        return BRANDS_TABLE, {"brandId": key[1]}
+    return PRODUCTS_TABLE, {"productId": key[2], "brandId": key[1]}
+
+
+def _key_for_item(table_name: str, item: dict) -> tuple:
+    if table_name == BRANDS_TABLE:
+        return brand_key(item["brandId"])
+    return product_key(item["brandId"], item["productId"])
+
+
+# ---------------------------------------------------------------------------
+# Loader
+# ---------------------------------------------------------------------------
+
+def _batch_load(keys: list) -> dict:
+    """BatchGetItem across both tables. Returns key -> item (absent = missing)."""
+    loaded: dict[tuple, dict] = {}
+    with xray_recorder.in_subsegment("dynamodb-batch-get-metadata") as seg:
+        seg.put_annotation("operation", "batch_get_item")
+        seg.put_metadata("key_count", len(keys))
+        for start in range(0, len(keys), BATCH_GET_LIMIT):
+            request: dict[str, dict] = {}
+            for key in keys[start:start + BATCH_GET_LIMIT]:
+                table_name, ddb_key = _table_and_key(key)
+                request.setdefault(table_name, {"Keys": []})["Keys"].append(ddb_key)
+            while request:
+                resp = aws_clients.dynamodb().batch_get_item(RequestItems=request)
+                for table_name, items in resp.get("Responses", {}).items():
+                    for item in items:
+                        loaded[_key_for_item(table_name, item)] = item
+                request = resp.get("UnprocessedKeys") or None
+    return loaded
+
+
+def get_many(keys: list) -> dict:
+    """Return key -> item (or None when the record doesn't exist)."""
+    now = time.monotonic()
+    result: dict[tuple, dict | None] = {}
+    to_load: list[tuple] = []
+    waiting: dict[tuple, Future] = {}
+
+    with _lock:
+        for key in dict.fromkeys(keys):
+            entry = _entries.get(key)
+            if entry and entry[0] > now:
+                _stats["hits"] += 1
+                result[key] = entry[1]
+            elif key in _inflight:
+                _stats["coalesced"] += 1
+                waiting[key] = _inflight[key]
+            else:
+                _stats["misses"] += 1
+                fut: Future = Future()
+                _inflight[key] = fut
+                to_load.append(key)
+
+    if to_load:
+        try:
+            loaded = _batch_load(to_load)
+        except Exception as exc:
+            with _lock:
+                for key in to_load:
+                    _inflight.pop(key).set_exception(exc)
+            raise
+        now = time.monotonic()
+        with _lock:
+            _stats["batch_loads"] += 1
+            for key in to_load:
+                item = loaded.get(key)
+                ttl = TTL_SECONDS if item is not None else NEGATIVE_TTL_SECONDS
+                _entries[key] = (now + ttl, item)
+                _inflight.pop(key).set_result(item)
+                result[key] = item
+
+    for key, fut in waiting.items():
+        result[key] = fut.result()
+
+    with xray_recorder.in_subsegment("metadata-cache-lookup") as seg:
+        seg.put_metadata("requested", len(result))
+        seg.put_metadata("loaded", len(to_load))
+        seg.put_metadata("coalesced", len(waiting))
+        seg.put_metadata("cumulative", stats())
+    return result
+
+
+def refresh(keys: list) -> dict:
+    """Like get_many(), but always read through to DynamoDB (and re-cache the result).
+
+    For callers that persist what they build, such as stored dashboards,
+    which must not outlive a summary this container cached a minute ago.
+    """
+    keys = list(dict.fromkeys(keys))
+    loaded = _batch_load(keys)
+    now = time.monotonic()
+    with _lock:
+        for key in keys:
+            item = loaded.get(key)
+            _entries[key] = (now + (TTL_SECONDS if item is not None else NEGATIVE_TTL_SECONDS), item)
+    return {key: loaded.get(key) for key in keys}
+
+
+def get_brand(brand_id: str, fresh: bool = False) -> dict | None:
+    key = brand_key(brand_id)
+    return (refresh if fresh else get_many)([key])[key]
+
+
+def get_product(brand_id: str, product_id: str, fresh: bool = False) -> dict | None:
+    key = product_key(brand_id, product_id)
+    return (refresh if fresh else get_many)([key])[key]
+
+
+# ---------------------------------------------------------------------------
+# Invalidation & instrumentation
+# ---------------------------------------------------------------------------
+
+def invalidate(key: tuple) -> None:
+    with _lock:
+        _entries.pop(key, None)
+
+
+def invalidate_product(brand_id: str, product_id: str) -> None:
+    invalidate(product_key(brand_id, product_id))
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def stats() -> dict:
+    """Cumulative counters for this container, plus the hit ratio."""
+    lookups = _stats["hits"] + _stats["misses"] + _stats["coalesced"]
+    hit_ratio = round(_stats["hits"] / lookups, 3) if lookups else 0.0
+    return {**_stats, "entries": len(_entries), "hit_ratio": hit_ratio}
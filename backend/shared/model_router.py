@@ -0,0 +1,124 @@
+"""
+Which Bedrock model answers a call: by task, input size and how the models
+have been doing.
+
+Every call used to go to BEDROCK_MODEL_ID, a ten-word review and a summary
+of thirty reviews alike. route() now gives a call its candidate models, in
+the order to try them, from three tiers:
+
+    fast       BEDROCK_MODEL_FAST   short reviews (up to SHORT_INPUT_CHARS)
+    standard   BEDROCK_MODEL_ID     longer reviews
+    large      BEDROCK_MODEL_LARGE  product summaries (BEDROCK_MODEL_ID unless set)
+
+The other tiers follow as failover (TASK_TIERS), and tiers naming the same
+model are tried once. Within that order, a model is moved back when
+
+  * it was throttled in the last COOLDOWN_S seconds,
+  * its recent latency (an average over this container's calls) is over
+    AI_LATENCY_SLO_MS, or over the time left before the invocation's
+    deadline,
+
+unless every candidate is. Either lasts COOLDOWN_S: after that the model is
+tried in its place again, and its next call starts a fresh average.
+
+ai_processor tries the candidates in turn, moving on only when one is
+throttled or unavailable (FAILOVER_CODES), and observe()s each call's
+outcome and latency. The state is per container: a throttle seen by one
+invocation steers the next ones on the same container away, for a while.
+
+AI_MODEL_ROUTING=false sends every call to BEDROCK_MODEL_ID, without
+failover, as before.
+
+    models, reason = model_router.route("review_analysis", len(review_text))
+    model_router.observe(models[0], latency_ms, throttled=False)
+"""
+import os
+import threading
+import time
+
+import aws_clients
+
+# "false" sends every call to BEDROCK_MODEL_ID, without failover
+ROUTING = os.environ.get("AI_MODEL_ROUTING", "true").lower() == "true"
+
+TIERS = {
+    "fast": os.environ.get("BEDROCK_MODEL_FAST", "anthropic.claude-3-haiku-20240307-v1:0"),
+    "standard": os.environ.get("BEDROCK_MODEL_ID", "anthropic.claude-3-haiku-20240307-v1:0"),
+}
+# unset or empty: summaries stay on the standard model until a larger one is chosen
+TIERS["large"] = os.environ.get("BEDROCK_MODEL_LARGE") or TIERS["standard"]
+# task -> (tiers for a short input, tiers for a longer one), in the order to try them
+TASK_TIERS = {
+    "review_analysis": (("fast", "standard", "large"), ("standard", "fast", "large")),
+    "product_summary": (("large", "standard", "fast"), ("large", "standard", "fast")),
+}
+SHORT_INPUT_CHARS = int(os.environ.get("AI_SHORT_INPUT_CHARS", "400"))
+LATENCY_SLO_MS = float(os.environ.get("AI_LATENCY_SLO_MS", "8000"))
+COOLDOWN_S = float(os.environ.get("AI_THROTTLE_COOLDOWN_S", "30"))
+LATENCY_WEIGHT = 0.2          # of the newest call in a model's latency average
+
+# error codes a call fails over on; anything else is the request's fault
+FAILOVER_CODES = frozenset((
+    "ThrottlingException", "ServiceUnavailableException", "ModelNotReadyException",
+    "ModelTimeoutException", "TooManyRequestsException",
+))
+
+_lock = threading.Lock()
+_latency_ms: dict[str, float] = {}      # model id -> recent latency
+_observed_at: dict[str, float] = {}     # model id -> monotonic time of its last latency
+_throttled_at: dict[str, float] = {}    # model id -> monotonic time of its last throttle
+
+
+def route(task: str, input_chars: int) -> tuple:
+    """(model ids to try in order, reason) for a ``task`` call on ``input_chars`` of input."""
+    if not ROUTING:
+        return [TIERS["standard"]], "routing off"
+    short, longer = TASK_TIERS.get(task, TASK_TIERS["review_analysis"])
+    tiers = short if input_chars <= SHORT_INPUT_CHARS else longer
+    models = list(dict.fromkeys(TIERS[tier] for tier in tiers))
+
+    now = time.monotonic()
+    remaining = aws_clients.remaining_s()
+    budget_ms = LATENCY_SLO_MS if remaining is None else min(LATENCY_SLO_MS, remaining * 1000)
+    demoted = {}
+    with _lock:
+        for model in models:
+            if now - _throttled_at.get(model, -COOLDOWN_S) < COOLDOWN_S:
+                demoted[model] = "throttled"
+            elif (now - _observed_at.get(model, -COOLDOWN_S) < COOLDOWN_S
+                  and _latency_ms[model] > budget_ms):
+                demoted[model] = f"{_latency_ms[model]:.0f} ms over {budget_ms:.0f} ms"
+    first = tiers[0]
+    if not demoted or len(demoted) == len(models):
+        return models, f"{first} tier" + (" (all candidates demoted)" if demoted else "")
+    ordered = [m for m in models if m not in demoted] + [m for m in models if m in demoted]
+    reason = "; ".join(f"{model} {why}" for model, why in demoted.items())
+    return ordered, f"{first} tier, {reason}"
+
+
+def fails_over(exc: Exception) -> bool:
+    """Whether a failed call should be retried on the next candidate."""
+    code = (getattr(exc, "response", None) or {}).get("Error", {}).get("Code", "")
+    return code in FAILOVER_CODES
+
+
+def observe(model: str, latency_ms: float, throttled: bool = False) -> None:
+    """Fold one call's outcome into the model's state."""
+    now = time.monotonic()
+    with _lock:
+        if throttled:
+            _throttled_at[model] = now
+            return
+        previous = _latency_ms.get(model)
+        stale = now - _observed_at.get(model, -COOLDOWN_S) >= COOLDOWN_S
+        _latency_ms[model] = latency_ms if previous is None or stale else (
+            previous + LATENCY_WEIGHT * (latency_ms - previous))
+        _observed_at[model] = now
+
+
+def reset() -> None:
+    """Forget every model's state, as after a fresh cold start."""
+    with _lock:
+        _latency_ms.clear()
+        _observed_at.clear()
+        _throttled_at.clear()
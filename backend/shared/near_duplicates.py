@@ -0,0 +1,194 @@
+"""
+Near-duplicate reviews, found before they cost a Bedrock call.
+
+Copy-pasted, templated and bot reviews all read alike, and each one used
+to be analysed from scratch. ai_processor now gives every review text a
+MinHash signature first and looks it up among the product's analysed
+reviews; one that is close enough (and has the same rating, which the
+analysis depends on) lends its analysis instead.
+
+Signatures: the text lower-cased with punctuation and spacing dropped, cut
+into overlapping SHINGLE_CHARS-character shingles, each hashed once and
+kept as the minimum in one of SIGNATURE_SIZE bins (one-permutation
+MinHash; empty bins borrow from the next filled one). Two signatures agree
+in about the Jaccard similarity of their shingle sets, and THRESHOLD of
+agreement counts as a duplicate. A signature is microseconds of work,
+whatever the review count.
+
+Lookups (LSH): a signature is cut into BANDS bands, and a product's
+analysed reviews are filed in the near-duplicates table under each of
+their band hashes:
+
+    scopeKey   product#<brandId>#<productId> (as the link-stats counters)
+    band       <band number>#<hash of the band's values>
+    entries    up to BUCKET_CAPACITY analysed reviews filed there:
+               FeedbackId, rating and the whole signature (binary)
+
+Reviews sharing a band are candidates; one BatchGetItem of a review's
+BANDS buckets brings every candidate with its signature, and the most
+similar above THRESHOLD wins. With BANDS x ROWS = 16 x 4 a pair at 0.8
+similarity shares a band with probability 1 - (1 - 0.8^4)^16 > 99.9%.
+Filing is one TransactWriteItems of the BANDS bucket updates, once per
+review Bedrock analysed; a full bucket cancels it, and it is resent
+without the full ones.
+
+    signature = near_duplicates.signature(text)
+    match = near_duplicates.find(scope_key, signature, rating)   # (FeedbackId, similarity) | None
+"""
+import hashlib
+import os
+import re
+import time
+from array import array
+
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+
+NEAR_DUPLICATES_TABLE = os.environ.get("DYNAMODB_TABLE_NEAR_DUPLICATES", "reviewpulse-near-duplicates")
+
+SHINGLE_CHARS = 5
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS = SIGNATURE_SIZE // BANDS
+THRESHOLD = 0.8               # signature agreement that counts as a duplicate
+BUCKET_CAPACITY = 4           # reviews filed per band bucket; later ones are not
+BATCH_GET_LIMIT = 100         # DynamoDB BatchGetItem hard limit per request
+CONFLICT_ATTEMPTS = 3         # filings cancelled by a TransactionConflict are retried
+
+_WORD = re.compile(r"[^\W_]+")
+_EMPTY = 1 << 32
+_MASK = 0xFFFFFFFF
+
+
+# ---------------------------------------------------------------------------
+# Signatures
+# ---------------------------------------------------------------------------
+
+def shingles(text) -> set:
+    """The text's SHINGLE_CHARS-character shingles, case, punctuation and spacing aside."""
+    norm = " ".join(_WORD.findall(str(text or "").lower()))
+    if len(norm) <= SHINGLE_CHARS:
+        return {norm} if norm else set()
+    return {norm[i:i + SHINGLE_CHARS] for i in range(len(norm) - SHINGLE_CHARS + 1)}
+
+
+def signature(text) -> array | None:
+    """SIGNATURE_SIZE 32-bit minimums of ``text``'s shingle hashes; None if it has no words."""
+    bins = [_EMPTY] * SIGNATURE_SIZE
+    blake2b = hashlib.blake2b
+    for shingle in shingles(text):
+        h = int.from_bytes(blake2b(shingle.encode(), digest_size=8).digest(), "little")
+        slot, value = h % SIGNATURE_SIZE, h >> 32
+        if value < bins[slot]:
+            bins[slot] = value
+    filled = [i for i, value in enumerate(bins) if value != _EMPTY]
+    if not filled:
+        return None
+    if len(filled) < SIGNATURE_SIZE:
+        # an empty bin takes the next filled one's value, mixed with the distance
+        nxt = filled[0] + SIGNATURE_SIZE
+        for i in range(SIGNATURE_SIZE - 1, -1, -1):
+            if bins[i] != _EMPTY:
+                nxt = i
+            else:
+                bins[i] = (bins[nxt % SIGNATURE_SIZE] ^ ((nxt - i) * 0x9E3779B1)) & _MASK
+    return array("I", bins)
+
+
+def similarity(a, b) -> float:
+    """Fraction of agreeing bins: an estimate of the two texts' shingle Jaccard similarity."""
+    return sum(x == y for x, y in zip(a, b)) / SIGNATURE_SIZE
+
+
+def band_keys(sig) -> list:
+    """The band bucket each band of ``sig`` files under."""
+    return [
+        f"{band:02d}#{hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(BANDS)
+    ]
+
+
+def _signature_of(entry: dict) -> array:
+    sig = array("I")
+    sig.frombytes(bytes(entry["sig"]))
+    return sig
+
+
+def best(entries, sig, rating) -> tuple | None:
+    """(FeedbackId, similarity) of the entry most like ``sig`` with the same rating, if any reaches THRESHOLD."""
+    found = None
+    for entry in entries:
+        if int(entry.get("rating", 0)) != int(rating):
+            continue
+        score = similarity(sig, _signature_of(entry))
+        if score >= THRESHOLD and (found is None or score > found[1]):
+            found = (entry["FeedbackId"], score)
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Reads and writes
+# ---------------------------------------------------------------------------
+
+def find(scope_key: str, sig, rating) -> tuple | None:
+    """The product's analysed review most like ``sig``: (FeedbackId, similarity), or None."""
+    keys = [{"scopeKey": scope_key, "band": band} for band in band_keys(sig)]
+    entries = []
+    with xray_recorder.in_subsegment("dynamodb-batch-get-near-duplicates") as seg:
+        seg.put_annotation("table", NEAR_DUPLICATES_TABLE)
+        seg.put_annotation("operation", "batch_get_item")
+        request = {NEAR_DUPLICATES_TABLE: {"Keys": keys[:BATCH_GET_LIMIT], "ProjectionExpression": "entries"}}
+        while request:
+            resp = aws_clients.dynamodb().batch_get_item(RequestItems=request)
+            for item in resp.get("Responses", {}).get(NEAR_DUPLICATES_TABLE, []):
+                entries.extend(item.get("entries", []))
+            request = resp.get("UnprocessedKeys") or None
+        seg.put_metadata("candidate_count", len(entries))
+    return best(entries, sig, rating)
+
+
+def _bucket_op(scope_key: str, band: str, entry: dict) -> dict:
+    """TransactWriteItems ``Update`` appending ``entry`` to one bucket, unless it is full."""
+    return {
+        "Update": {
+            "TableName": NEAR_DUPLICATES_TABLE,
+            "Key": {"scopeKey": scope_key, "band": band},
+            "UpdateExpression": "SET entries = list_append(if_not_exists(entries, :none), :entry)",
+            "ConditionExpression": "attribute_not_exists(entries) OR size(entries) < :cap",
+            "ExpressionAttributeValues": {":none": [], ":entry": [entry], ":cap": BUCKET_CAPACITY},
+        }
+    }
+
+
+def remember(scope_key: str, feedback_id: str, rating, sig) -> int:
+    """File an analysed review under each of its band buckets. Returns the buckets it went into.
+
+    One transaction carries every band. A full bucket fails its condition and
+    cancels the lot; the cancellation reasons say which, and the rest are
+    resent without them (full buckets are left as they are). A conflict with
+    another review filed into the same bucket at once is retried after a
+    short pause.
+    """
+    entry = {"FeedbackId": feedback_id, "rating": int(rating), "sig": sig.tobytes()}
+    ops = [_bucket_op(scope_key, band, entry) for band in band_keys(sig)]
+    client = aws_clients.dynamodb().meta.client
+    with xray_recorder.in_subsegment("dynamodb-transact-near-duplicates") as seg:
+        seg.put_annotation("table", NEAR_DUPLICATES_TABLE)
+        seg.put_annotation("operation", "transact_write_items")
+        conflicts = 0
+        while ops:
+            try:
+                client.transact_write_items(TransactItems=ops)
+                break
+            except client.exceptions.TransactionCanceledException as exc:
+                codes = [r.get("Code") for r in exc.response.get("CancellationReasons", [])]
+                if "ConditionalCheckFailed" in codes:
+                    ops = [op for op, code in zip(ops, codes) if code != "ConditionalCheckFailed"]
+                    continue
+                conflicts += 1
+                if set(codes) - {"None"} != {"TransactionConflict"} or conflicts == CONFLICT_ATTEMPTS:
+                    raise
+                time.sleep(0.02 * conflicts)
+        seg.put_metadata("bands_filed", len(ops))
+    return len(ops)
@@ -0,0 +1,141 @@
+"""
+Product-level AI summary helpers shared by ai_processor and
+scripts/seed_product_summaries.py.
+
+A ReviewSet accumulates a product's processed reviews in one pass without
+holding them all: it keeps the count, the rating sum, the newest
+PROMPT_SAMPLE_SIZE reviews for the prompt (near-duplicates, flagged with
+duplicate_of by ai_processor, are counted but not quoted), and an
+order-independent digest of (FeedbackId, sentiment, rating). Products whose stored
+ai_summary_review_hash / ai_summary_review_count match the current set have
+nothing new to summarise.
+"""
+import hashlib
+import heapq
+import itertools
+
+PROMPT_SAMPLE_SIZE = 30  # Cap on reviews quoted in the prompt, for token limits
+PROMPT_VERSION = "product-summary-v1"  # Bedrock usage is metered per version; bump with the prompt
+UNPROCESSED_SENTIMENTS = ("pending", "unprocessed", None)
+
+_DIGEST_MOD = 1 << 128
+_sequence = itertools.count()  # tie-breaker so equal timestamps never compare dicts
+
+
+def is_processed(review: dict) -> bool:
+    return review.get("sentiment") not in UNPROCESSED_SENTIMENTS
+
+
+class ReviewSet:
+    """Streaming accumulator over one product's processed reviews."""
+
+    def __init__(self):
+        self.count = 0
+        self.rating_sum = 0.0
+        self._digest = 0
+        self._sample: list[tuple] = []  # min-heap of (timestamp, seq, review)
+
+    def add(self, review: dict) -> None:
+        self.count += 1
+        self.rating_sum += float(review.get("rating", 0))
+        fingerprint = f"{review.get('FeedbackId', '')}|{review.get('sentiment', '')}|{review.get('rating', '')}"
+        self._digest = (self._digest + int.from_bytes(
+            hashlib.blake2b(fingerprint.encode("utf-8"), digest_size=16).digest(), "big"
+        )) % _DIGEST_MOD
+        if not review.get("duplicate_of"):
+            self._offer((str(review.get("timestamp", "")), next(_sequence), review))
+
+    def _offer(self, entry: tuple) -> None:
+        if len(self._sample) < PROMPT_SAMPLE_SIZE:
+            heapq.heappush(self._sample, entry)
+        elif entry[0] > self._sample[0][0]:
+            heapq.heapreplace(self._sample, entry)
+
+    def merge(self, other: "ReviewSet") -> None:
+        """Fold in a set built from a disjoint slice of the same product's reviews."""
+        self.count += other.count
+        self.rating_sum += other.rating_sum
+        self._digest = (self._digest + other._digest) % _DIGEST_MOD
+        for entry in other._sample:
+            self._offer(entry)
+
+    @classmethod
+    def from_reviews(cls, reviews: list) -> "ReviewSet":
+        review_set = cls()
+        for review in reviews:
+            if is_processed(review):
+                review_set.add(review)
+        return review_set
+
+    @property
+    def digest(self) -> str:
+        return f"{self._digest:032x}"
+
+    @property
+    def avg_rating(self) -> float:
+        return round(self.rating_sum / self.count, 1) if self.count else 0
+
+    def sample(self) -> list:
+        """Newest reviews first."""
+        return [review for _, _, review in sorted(self._sample, reverse=True)]
+
+    def matches(self, product: dict) -> bool:
+        """True when the product's stored summary was built from this exact set."""
+        return (
+            product.get("ai_summary_review_hash") == self.digest
+            and int(product.get("ai_summary_review_count", -1)) == self.count
+        )
+
+
+def build_prompt(review_set: ReviewSet, product_name: str) -> str:
+    """Build a prompt that summarizes ALL reviews for a product."""
+    review_texts = []
+    for i, r in enumerate(review_set.sample(), 1):
+        text = r.get("message", r.get("reviewText", ""))
+        rating = r.get("rating", "?")
+        sentiment = r.get("sentiment", "unknown")
+        review_texts.append(f"Review {i} (Rating: {rating}/5, Sentiment: {sentiment}): \"{text}\"")
+
+    reviews_block = "\n".join(review_texts)
+    total = review_set.count
+    avg_rating = review_set.avg_rating
+
+    return f"""You are a product analytics expert. Analyze ALL {total} customer reviews for the product "{product_name}" and provide a comprehensive summary.
+
+Product: {product_name}
+Total Reviews: {total}
+Average Rating: {avg_rating}/5
+
+Reviews:
+{reviews_block}
+
+Respond ONLY with valid JSON using this exact structure:
+{{
+  "overall_summary": "A 2-3 sentence summary of what customers overall think about this product",
+  "key_strengths": ["strength1", "strength2", "strength3"],
+  "key_weaknesses": ["weakness1", "weakness2"],
+  "recommendations": ["actionable recommendation 1", "actionable recommendation 2", "actionable recommendation 3"],
+  "customer_sentiment_overview": "One sentence describing the overall customer mood/satisfaction"
+}}
+
+Rules:
+- overall_summary: objective, data-driven, 2-3 sentences max
+- key_strengths: top 2-4 things customers love
+- key_weaknesses: top 1-3 things customers dislike (empty array if none)
+- recommendations: 2-4 actionable suggestions for the business to improve
+- customer_sentiment_overview: one concise sentence
+- Respond ONLY with JSON, no other text"""
+
+
+def summary_attributes(ai_result: dict, review_set: ReviewSet, now_iso: str) -> dict:
+    """Product attributes to store for a fresh summary."""
+    return {
+        "ai_summary": ai_result.get("overall_summary", ""),
+        "ai_strengths": ai_result.get("key_strengths", []),
+        "ai_weaknesses": ai_result.get("key_weaknesses", []),
+        "ai_recommendations": ai_result.get("recommendations", []),
+        "ai_sentiment_overview": ai_result.get("customer_sentiment_overview", ""),
+        "ai_summary_updated_at": now_iso,
+        "ai_summary_review_count": review_set.count,
+        "ai_summary_review_hash": review_set.digest,
+    }
@@ -0,0 +1,240 @@
+"""
+Recent-activity buffers: each scope's newest reviews, ready to show.
+
+The recent lists on the dashboards (a product's last 10 reviews, a brand's
+last 20, the overview's last 20 plus each brand's last 5) used to be picked
+by sorting every review of the scope. The analytics-projector Lambda keeps a
+bounded buffer per scope instead, one item in the recent-activity table,
+keyed like the link-stats counters:
+
+    global | brand#<brandId> | product#<brandId>#<productId>
+
+An item holds
+
+    entries   the newest reviews first, at most CAPACITY of them, each with
+              what the lists show (text and summary cut to SNIPPET_CHARS)
+              and the stream sequence number it was written from
+    rev       bumped by every write; writes are conditional on it, so
+              concurrent consumers (the stream shards, a rebuild) merge
+              rather than overwrite each other
+    horizon   sort key (<timestamp>#<FeedbackId>) of the newest review ever
+              trimmed off the end; absent while nothing has been
+
+Every review newer than the horizon is in the buffer, so a list of n is
+served from it when n entries are newer than the horizon. Deletions can
+leave fewer; readers then fall back to sorting the scope's reviews (newest()
+returns None). An update that arrives with an older sequence number than
+the entry already held (a retried stream batch) is ignored.
+
+    newest = recent_activity.newest(link_counters.brand_key(brand_id), 20)
+"""
+import heapq
+import os
+
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+import link_counters
+import review_analytics
+from review_records import ReviewRecord
+
+RECENT_ACTIVITY_TABLE = os.environ.get("DYNAMODB_TABLE_RECENT_ACTIVITY", "reviewpulse-recent-activity")
+
+CAPACITY = 30                 # the longest list is 20; the rest absorbs deletions
+SNIPPET_CHARS = 280
+WRITE_ATTEMPTS = 8            # conditional-write retries before the batch is failed
+BATCH_GET_LIMIT = 100         # DynamoDB BatchGetItem hard limit per request
+# a rebuild writes what it has gathered once it holds this many entries
+BACKFILL_MAX_ENTRIES = 50_000
+# what an entry is made from ("name" and "timestamp" are reserved words)
+SOURCE_NAMES = {f"#{name}": name for name in (
+    "FeedbackId", "brandId", "productId", "rating", "sentiment", "topics", "timestamp",
+    "customerName", "name", "reviewText", "message", "summary",
+)}
+_ENTRY_FIELDS = ("brandId", "productId", "rating", "sentiment", "topics")
+# what readers fetch of a buffer
+_READ_NAMES = {"#k": "scopeKey", "#e": "entries", "#h": "horizon"}
+
+
+# ---------------------------------------------------------------------------
+# Entries
+# ---------------------------------------------------------------------------
+
+def snippet(text):
+    """``text`` cut to SNIPPET_CHARS, as the recent lists show it."""
+    return text[:SNIPPET_CHARS] if isinstance(text, str) else text
+
+
+def entry(review: dict, seq: str = "0") -> dict | None:
+    """A review as buffers hold it (None without a FeedbackId or timestamp)."""
+    if not (review.get("FeedbackId") and review.get("timestamp")):
+        return None
+    out = {
+        "FeedbackId": review["FeedbackId"],
+        "timestamp": review["timestamp"],
+        "customerName": review.get("customerName", review.get("name", "")),
+        "reviewText": snippet(review.get("reviewText", review.get("message", ""))),
+        "summary": snippet(review.get("summary", "")),
+        "seq": seq,
+    }
+    for field in _ENTRY_FIELDS:
+        if field in review:
+            out[field] = review[field]
+    return out
+
+
+def same(a: dict | None, b: dict | None) -> bool:
+    """Whether two entries show the same thing (sequence numbers aside)."""
+    if a is None or b is None:
+        return a is b
+    return {**a, "seq": None} == {**b, "seq": None}
+
+
+def scope_keys(review: dict) -> list:
+    """Every buffer a review belongs in."""
+    return link_counters.scope_keys(review.get("brandId", ""), review.get("productId", ""))
+
+
+def _order(e: dict) -> str:
+    return review_analytics.sort_key(e["timestamp"], e["FeedbackId"])
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def _served(item: dict | None, n: int) -> list | None:
+    if not item:
+        return []
+    horizon = item.get("horizon")
+    entries = [e for e in item.get("entries", []) if horizon is None or _order(e) > horizon]
+    if horizon is not None and len(entries) < n:
+        return None
+    return [ReviewRecord(e) for e in entries[:n]]
+
+
+def newest(scope_key: str, n: int) -> list | None:
+    """The scope's n newest reviews as ReviewRecords, newest first.
+
+    None when deletions have left the buffer unable to say.
+    """
+    with xray_recorder.in_subsegment("dynamodb-get-recent-activity") as seg:
+        seg.put_annotation("table", RECENT_ACTIVITY_TABLE)
+        seg.put_annotation("operation", "get_item")
+        resp = aws_clients.table(RECENT_ACTIVITY_TABLE).get_item(
+            Key={"scopeKey": scope_key},
+            ProjectionExpression="#e, #h",
+            ExpressionAttributeNames={"#e": "entries", "#h": "horizon"},
+        )
+    return _served(resp.get("Item"), n)
+
+
+def batch_newest(scope_keys: list, n: int) -> dict:
+    """scope key -> newest(scope key, n), in BatchGetItem requests."""
+    unique = list(dict.fromkeys(scope_keys))
+    found: dict[str, dict] = {}
+    with xray_recorder.in_subsegment("dynamodb-batch-get-recent-activity") as seg:
+        seg.put_annotation("table", RECENT_ACTIVITY_TABLE)
+        seg.put_annotation("operation", "batch_get_item")
+        seg.put_metadata("key_count", len(unique))
+        for start in range(0, len(unique), BATCH_GET_LIMIT):
+            request = {RECENT_ACTIVITY_TABLE: {
+                "Keys": [{"scopeKey": k} for k in unique[start:start + BATCH_GET_LIMIT]],
+                "ProjectionExpression": ", ".join(_READ_NAMES),
+                "ExpressionAttributeNames": _READ_NAMES,
+            }}
+            while request:
+                resp = aws_clients.dynamodb().batch_get_item(RequestItems=request)
+                for item in resp.get("Responses", {}).get(RECENT_ACTIVITY_TABLE, []):
+                    found[item["scopeKey"]] = item
+                request = resp.get("UnprocessedKeys") or None
+    return {key: _served(found.get(key), n) for key in unique}
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def apply(scope_key: str, changes: dict, horizon: str | None = None) -> bool:
+    """Merge ``changes`` (FeedbackId -> entry, or None to remove) into one buffer.
+
+    ``horizon``: the newest entry the caller left out of ``changes`` for
+    want of room (a rebuild). Read-merge-write, conditional on ``rev`` and
+    retried on conflict. Returns whether the buffer changed.
+    """
+    table = aws_clients.table(RECENT_ACTIVITY_TABLE)
+    with xray_recorder.in_subsegment("dynamodb-merge-recent-activity") as seg:
+        seg.put_annotation("table", RECENT_ACTIVITY_TABLE)
+        seg.put_annotation("operation", "put_item")
+        seg.put_metadata("change_count", len(changes))
+        for _ in range(WRITE_ATTEMPTS):
+            item = table.get_item(Key={"scopeKey": scope_key}, ConsistentRead=True).get("Item")
+            entries = item.get("entries", []) if item else []
+            merged = {e["FeedbackId"]: e for e in entries}
+            for feedback_id, new in changes.items():
+                held = merged.get(feedback_id)
+                if new is None:
+                    merged.pop(feedback_id, None)
+                elif held is None or int(held.get("seq", 0)) <= int(new["seq"]):
+                    merged[feedback_id] = new
+            ordered = sorted(merged.values(), key=_order, reverse=True)
+            old_horizon = item.get("horizon") if item else None
+            new_horizon = max(filter(None, (old_horizon, horizon)), default=None)
+            if len(ordered) > CAPACITY:
+                new_horizon = max(filter(None, (new_horizon, _order(ordered[CAPACITY]))))
+                ordered = ordered[:CAPACITY]
+            if ordered == entries and new_horizon == old_horizon:
+                return False
+
+            new_item = {"scopeKey": scope_key, "entries": ordered, "rev": (item or {}).get("rev", 0) + 1}
+            if new_horizon is not None:
+                new_item["horizon"] = new_horizon
+            try:
+                if item is None:
+                    table.put_item(Item=new_item, ConditionExpression="attribute_not_exists(scopeKey)")
+                else:
+                    table.put_item(Item=new_item, ConditionExpression="#r = :rev",
+                                   ExpressionAttributeNames={"#r": "rev"},
+                                   ExpressionAttributeValues={":rev": item.get("rev", 0)})
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                continue
+            return True
+    raise RuntimeError(f"recent-activity buffer {scope_key} kept changing under {WRITE_ATTEMPTS} merges")
+
+
+class Backfill:
+    """Each scope's newest reviews, gathered from a pass over the feedback table.
+
+    Holds at most CAPACITY entries per scope and merges them into the buffers
+    whenever BACKFILL_MAX_ENTRIES are held, and on write(). Entries carry
+    sequence number 0, so they never replace what the stream has written.
+    """
+
+    def __init__(self):
+        self._heaps: dict[str, list] = {}
+        self._horizons: dict[str, str] = {}
+        self._held = 0
+        self.scopes_written = 0
+
+    def add(self, review: dict) -> None:
+        e = entry(review)
+        if e is None:
+            return
+        order = _order(e)
+        for key in scope_keys(review):
+            heap = self._heaps.setdefault(key, [])
+            if len(heap) < CAPACITY:
+                heapq.heappush(heap, (order, e))
+                self._held += 1
+                continue
+            dropped, _ = heapq.heappushpop(heap, (order, e))
+            if dropped > self._horizons.get(key, ""):
+                self._horizons[key] = dropped
+        if self._held >= BACKFILL_MAX_ENTRIES:
+            self.write()
+
+    def write(self) -> None:
+        for key, heap in self._heaps.items():
+            if apply(key, {e["FeedbackId"]: e for _, e in heap}, self._horizons.get(key)):
+                self.scopes_written += 1
+        self._heaps, self._horizons, self._held = {}, {}, 0
@@ -0,0 +1,63 @@
+"""
+Narrow review-analytics table.
+
+The dashboards aggregate rating, sentiment and topics over every review in
+range, and a read of the feedback table (or of its GSIs, which carry the
+review text and the customer name) is billed for the whole stored item.
+The analytics-projector Lambda keeps a narrow copy of each review, from the
+feedback stream, holding only what the aggregations read:
+
+    brandId     partition key
+    sk          <timestamp>#<FeedbackId>: sorts by time, unique per review
+    productId   productId-sk-index: a product's reviews by time
+    rating, sentiment, topics
+
+get_insights runs its aggregations over this table and goes back to the
+feedback table only for the handful of reviews its recent lists show.
+
+    records = review_analytics.records(resp["Items"])
+"""
+import os
+
+from review_records import ReviewRecord
+
+ANALYTICS_TABLE = os.environ.get("DYNAMODB_TABLE_ANALYTICS", "reviewpulse-review-analytics")
+PRODUCT_INDEX = "productId-sk-index"
+# copied as stored; everything else is left in the feedback table
+FIELDS = ("productId", "rating", "sentiment", "topics")
+# what the projector reads of a feedback item ("timestamp" is a reserved word)
+SOURCE_NAMES = {f"#{name}": name for name in ("FeedbackId", "brandId", "timestamp", *FIELDS)}
+
+
+def sort_key(timestamp: str, feedback_id: str) -> str:
+    return f"{timestamp}#{feedback_id}"
+
+
+def key(review: dict) -> dict | None:
+    """Analytics key of a feedback item; None if it has no brandId, timestamp or FeedbackId."""
+    brand_id, timestamp, feedback_id = (review.get("brandId"), review.get("timestamp"),
+                                        review.get("FeedbackId"))
+    if not (brand_id and timestamp and feedback_id):
+        return None
+    return {"brandId": brand_id, "sk": sort_key(timestamp, feedback_id)}
+
+
+def item(review: dict) -> dict | None:
+    """The narrow copy of a feedback item (None when it cannot be keyed)."""
+    narrow = key(review)
+    if narrow is None:
+        return None
+    for field in FIELDS:
+        if field in review:
+            narrow[field] = review[field]
+    return narrow
+
+
+def records(items) -> list:
+    """ReviewRecords from analytics items: no customer name, text or summary."""
+    out = []
+    for narrow in items:
+        # timestamps never contain "#"; FeedbackIds might
+        timestamp, _, feedback_id = narrow["sk"].partition("#")
+        out.append(ReviewRecord({**narrow, "timestamp": timestamp, "FeedbackId": feedback_id}))
+    return out
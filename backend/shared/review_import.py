@@ -0,0 +1,471 @@
+"""
+Bulk import of historical reviews from CSV or NDJSON.
+
+Used by the review_import Lambda (S3 source) and backend/scripts/import_reviews.py
+(S3 or local file). The pipeline:
+
+  byte chunks -> lines -> rows -> validated feedback items -> batches of 25
+  -> BatchWriteItem on a thread pool behind an AIMD throttle
+  -> FeedbackIds queued on the low-priority AI lane (SQS)
+
+Nothing holds more than a chunk of the source in memory. Each row's end byte
+offset travels with its batch; once every batch up to a point has been
+written, that offset becomes the checkpoint, so a resumed run re-reads at
+most the batches that were in flight.
+
+Dedupe is on orderId: the FeedbackId is a UUIDv5 of brandId#productId#orderId,
+so the same order imported twice maps to the same item. Repeats inside one run
+are dropped from an in-memory set, and with ``skip_existing`` (the default)
+rows whose item already exists are not rewritten, which keeps AI results from
+earlier imports intact.
+"""
+import csv
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+
+from review_validation import validate_review
+
+FEEDBACK_TABLE = os.environ.get("DYNAMODB_TABLE_FEEDBACK", "reviewpulse-feedback")
+AI_LOW_PRIORITY_QUEUE_URL = os.environ.get("AI_LOW_PRIORITY_QUEUE_URL", "")
+
+IMPORT_NAMESPACE = uuid.UUID("6f1c2f5e-3b8a-4f4e-9a51-6f7d0c2b9e10")
+BATCH_WRITE_LIMIT = 25   # DynamoDB BatchWriteItem hard limit
+BATCH_GET_LIMIT = 100    # DynamoDB BatchGetItem hard limit
+CHECKPOINT_INTERVAL_SECONDS = 5.0
+THROTTLE_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+FIELD_ALIASES = {
+    "reviewText": ("reviewText", "message", "review", "text"),
+    "customerName": ("customerName", "name"),
+    "customerEmail": ("customerEmail", "email"),
+    "customerPhone": ("customerPhone", "phone"),
+    "timestamp": ("timestamp", "createdAt", "date"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Identity
+# ---------------------------------------------------------------------------
+
+def feedback_id_for(brand_id: str, product_id: str, order_id: str) -> str:
+    """Deterministic FeedbackId so re-imports of an order land on one item."""
+    return str(uuid.uuid5(IMPORT_NAMESPACE, f"{brand_id}#{product_id}#{order_id}"))
+
+
+# ---------------------------------------------------------------------------
+# Streaming parse
+# ---------------------------------------------------------------------------
+
+def iter_lines(chunks, start_offset: int = 0):
+    """Yield ``(line_bytes, end_offset)`` from an iterable of byte chunks."""
+    buf = b""
+    offset = start_offset
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buf = buf + chunk if buf else chunk
+        pos = 0
+        while True:
+            nl = buf.find(b"\n", pos)
+            if nl < 0:
+                break
+            offset += nl + 1 - pos
+            yield buf[pos:nl + 1], offset
+            pos = nl + 1
+        buf = buf[pos:]
+    if buf:
+        offset += len(buf)
+        yield buf, offset
+
+
+def iter_records(chunks, fmt: str, start_offset: int = 0, header: list | None = None):
+    """Yield ``(row, end_offset, header)`` for each CSV / NDJSON record.
+
+    For CSV resumed mid-file, pass the header saved in the checkpoint. A
+    quoted field may span lines; lines are joined until the quotes balance.
+    ``row`` is None for lines that could not be parsed.
+    """
+    first = start_offset == 0
+    pending = ""
+    for raw, end in iter_lines(chunks, start_offset):
+        text = raw.decode("utf-8-sig" if first else "utf-8", errors="replace")
+        first = False
+        if fmt == "ndjson":
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                row = json.loads(text)
+            except json.JSONDecodeError:
+                row = None
+            yield (row if isinstance(row, dict) else None), end, header
+            continue
+
+        pending += text
+        if pending.count('"') % 2:
+            continue  # inside a quoted field that spans lines
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        yield dict(zip(header, values)), end, header
+
+
+def _field(row: dict, name: str) -> str:
+    for alias in FIELD_ALIASES.get(name, (name,)):
+        value = row.get(alias)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def _normalise_timestamp(value: str) -> str | None:
+    if not value:
+        return datetime.now(timezone.utc).isoformat()
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.isoformat()
+
+
+def build_item(row: dict, defaults: dict, job_id: str) -> tuple:
+    """Row -> ``(feedback_item, error)``; exactly one of the two is None."""
+    brand_id = _field(row, "brandId") or defaults.get("brandId", "")
+    product_id = _field(row, "productId") or defaults.get("productId", "")
+    order_id = _field(row, "orderId")
+    if not brand_id or not product_id or not order_id:
+        return None, "brandId, productId and orderId are required"
+
+    rating, review_text, error = validate_review(row.get("rating"), _field(row, "reviewText"))
+    if error:
+        return None, error
+
+    timestamp = _normalise_timestamp(_field(row, "timestamp"))
+    if timestamp is None:
+        return None, "timestamp must be ISO 8601"
+
+    return {
+        "FeedbackId": feedback_id_for(brand_id, product_id, order_id),
+        "brandId": brand_id,
+        "productId": product_id,
+        "orderId": order_id,
+        "name": _field(row, "customerName"),
+        "email": _field(row, "customerEmail"),
+        "phone": _field(row, "customerPhone"),
+        "message": review_text,
+        "rating": rating,
+        "sentiment": "pending",
+        "topics": [],
+        "summary": "",
+        "timestamp": timestamp,
+        "source": "import",
+        "importJobId": job_id,
+        "aiLane": "low",
+    }, None
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints
+# ---------------------------------------------------------------------------
+
+class LocalCheckpointStore:
+    """Checkpoint JSON on the local filesystem (CLI runs)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict | None:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def save(self, state: dict) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+        os.replace(tmp, self.path)
+
+
+class S3CheckpointStore:
+    """Checkpoint JSON stored as an S3 object next to the source file."""
+
+    def __init__(self, s3_client, bucket: str, key: str):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.key = key
+
+    def load(self) -> dict | None:
+        try:
+            resp = self.s3.get_object(Bucket=self.bucket, Key=self.key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        return json.loads(resp["Body"].read())
+
+    def save(self, state: dict) -> None:
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self.key,
+            Body=json.dumps(state).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+
+# ---------------------------------------------------------------------------
+# Adaptive throttling
+# ---------------------------------------------------------------------------
+
+class AdaptiveThrottle:
+    """AIMD limiter on batch requests per second, shared by all writers.
+
+    Each clean response raises the rate by ``increase``; a throttling signal
+    (exception or UnprocessedItems) halves it. Writers that were in flight
+    together tend to get throttled together, so the rate is halved at most
+    once per ``cooldown`` seconds rather than once per worker.
+    """
+
+    def __init__(self, initial_rate: float = 50.0, min_rate: float = 1.0,
+                 max_rate: float = 2000.0, increase: float = 2.0, cooldown: float = 0.5):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.cooldown = cooldown
+        self.throttled = 0
+        self._next_slot = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + 1.0 / self.rate
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                self.rate = max(self.min_rate, self.rate / 2)
+
+
+# ---------------------------------------------------------------------------
+# Importer
+# ---------------------------------------------------------------------------
+
+class ReviewImporter:
+    """Stream rows into the feedback table. See the module docstring."""
+
+    def __init__(self, dynamodb, sqs=None, queue_url: str = AI_LOW_PRIORITY_QUEUE_URL,
+                 table_name: str = FEEDBACK_TABLE, workers: int = 8,
+                 skip_existing: bool = True, throttle: AdaptiveThrottle | None = None):
+        self.client = dynamodb.meta.client  # resource client: native Python types
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.table_name = table_name
+        self.workers = workers
+        self.skip_existing = skip_existing
+        self.throttle = throttle or AdaptiveThrottle()
+
+    # -- DynamoDB / SQS ------------------------------------------------------
+
+    def _call(self, fn, **kwargs):
+        """Run one DynamoDB request under the throttle, retrying throttles."""
+        attempt = 0
+        while True:
+            self.throttle.acquire()
+            try:
+                return fn(**kwargs)
+            except ClientError as exc:
+                if exc.response.get("Error", {}).get("Code") not in THROTTLE_ERROR_CODES:
+                    raise
+                self.throttle.on_throttle()
+                attempt += 1
+                time.sleep(min(5.0, 0.05 * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+    def _existing(self, ids: list) -> dict:
+        """FeedbackId -> sentiment for ids that are already in the table."""
+        found = {}
+        for start in range(0, len(ids), BATCH_GET_LIMIT):
+            request = {self.table_name: {
+                "Keys": [{"FeedbackId": fid} for fid in ids[start:start + BATCH_GET_LIMIT]],
+                "ProjectionExpression": "FeedbackId, sentiment",
+            }}
+            while request:
+                resp = self._call(self.client.batch_get_item, RequestItems=request)
+                for item in resp.get("Responses", {}).get(self.table_name, []):
+                    found[item["FeedbackId"]] = item.get("sentiment")
+                request = resp.get("UnprocessedKeys") or None
+        return found
+
+    def _write(self, items: list) -> None:
+        request = {self.table_name: [{"PutRequest": {"Item": it}} for it in items]}
+        attempt = 0
+        while request:
+            resp = self._call(self.client.batch_write_item, RequestItems=request)
+            request = resp.get("UnprocessedItems") or None
+            if request:
+                self.throttle.on_throttle()
+                attempt += 1
+                time.sleep(min(5.0, 0.05 * 2 ** attempt) * random.uniform(0.5, 1.0))
+            else:
+                self.throttle.on_success()
+
+    def _queue(self, feedback_ids: list, job_id: str) -> None:
+        if not feedback_ids or not self.sqs or not self.queue_url:
+            return
+        self.sqs.send_message(
+            QueueUrl=self.queue_url,
+            MessageBody=json.dumps({"feedbackIds": feedback_ids, "importJobId": job_id}),
+        )
+
+    def _process_batch(self, items: list, job_id: str) -> dict:
+        to_write, to_queue = items, []
+        if self.skip_existing and items:
+            existing = self._existing([it["FeedbackId"] for it in items])
+            to_write = [it for it in items if it["FeedbackId"] not in existing]
+            # Written by an earlier attempt but maybe never queued
+            to_queue = [fid for fid, sentiment in existing.items() if sentiment == "pending"]
+        if to_write:
+            self._write(to_write)
+        self._queue([it["FeedbackId"] for it in to_write] + to_queue, job_id)
+        return {"rows_written": len(to_write), "rows_existing": len(items) - len(to_write)}
+
+    # -- Orchestration ---------------------------------------------------------
+
+    def run(self, open_chunks, fmt: str, defaults: dict, checkpoint_store, job_id: str,
+            should_stop=lambda: False, progress=None) -> dict:
+        """Import one source, resuming from ``checkpoint_store`` if it has state.
+
+        ``open_chunks(offset)`` must return an iterable of byte chunks starting
+        at that byte offset. ``should_stop()`` is polled between rows; when it
+        returns True the run drains in-flight batches, checkpoints and returns
+        with status "paused". ``progress(state)`` is called on each checkpoint.
+        """
+        state = checkpoint_store.load() or {
+            "jobId": job_id, "format": fmt, "offset": 0, "header": None,
+            "rows_read": 0, "rows_written": 0, "rows_existing": 0,
+            "rows_invalid": 0, "rows_duplicate": 0, "errors_sample": [],
+            "status": "running", "started_at": time.time(),
+        }
+        if state.get("status") == "complete":
+            return state
+        state["status"] = "running"
+
+        lock = threading.Lock()
+        done: dict[int, tuple] = {}          # seq -> (end_offset, header, counts)
+        next_to_commit = [0]
+        last_saved = [time.monotonic()]
+        failure: list[BaseException] = []
+        slots = threading.Semaphore(self.workers * 2)
+        seen: set[int] = set()
+
+        def commit(seq: int, end_offset: int, header, counts: dict) -> None:
+            with lock:
+                done[seq] = (end_offset, header, counts)
+                while next_to_commit[0] in done:
+                    off, hdr, cnt = done.pop(next_to_commit[0])
+                    state["offset"] = off
+                    state["header"] = hdr
+                    for k, v in cnt.items():
+                        state[k] = state.get(k, 0) + v
+                    next_to_commit[0] += 1
+                if time.monotonic() - last_saved[0] >= CHECKPOINT_INTERVAL_SECONDS:
+                    last_saved[0] = time.monotonic()
+                    checkpoint_store.save(state)
+                    if progress:
+                        progress(state)
+
+        def work(seq: int, items: list, end_offset: int, header, counts: dict) -> None:
+            try:
+                counts.update(self._process_batch(items, job_id))
+                commit(seq, end_offset, header, counts)
+            except BaseException as exc:  # surfaced after the pool drains
+                failure.append(exc)
+            finally:
+                slots.release()
+
+        seq = 0
+        batch: list = []
+        counts = {"rows_read": 0, "rows_invalid": 0, "rows_duplicate": 0}
+        end_offset, header = state["offset"], state.get("header")
+        paused = False
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            def flush():
+                nonlocal seq, batch, counts
+                slots.acquire()
+                pool.submit(work, seq, batch, end_offset, header, counts)
+                seq += 1
+                batch = []
+                counts = {"rows_read": 0, "rows_invalid": 0, "rows_duplicate": 0}
+
+            records = iter_records(open_chunks(state["offset"]), fmt,
+                                   state["offset"], state.get("header"))
+            for row, end_offset, header in records:
+                if failure:
+                    break
+                counts["rows_read"] += 1
+                item, error = build_item(row, defaults, job_id) if row is not None else (None, "unparseable row")
+                if error:
+                    counts["rows_invalid"] += 1
+                    with lock:
+                        if len(state["errors_sample"]) < 20:
+                            state["errors_sample"].append({"offset": end_offset, "error": error})
+                else:
+                    key = int.from_bytes(uuid.UUID(item["FeedbackId"]).bytes[:8], "big")
+                    if key in seen:
+                        counts["rows_duplicate"] += 1
+                    else:
+                        seen.add(key)
+                        batch.append(item)
+                if len(batch) == BATCH_WRITE_LIMIT:
+                    flush()
+                    if should_stop():
+                        paused = True
+                        break
+            if not failure and (batch or counts["rows_read"]):
+                flush()
+
+        state["throttle_events"] = self.throttle.throttled
+        state["write_rate"] = round(self.throttle.rate, 1)
+        if failure:
+            state["status"] = "failed"
+            checkpoint_store.save(state)
+            raise failure[0]
+        state["status"] = "paused" if paused else "complete"
+        if state["status"] == "complete":
+            state["finished_at"] = time.time()
+        checkpoint_store.save(state)
+        if progress:
+            progress(state)
+        return state
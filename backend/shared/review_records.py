@@ -0,0 +1,117 @@
+"""
+Compact review records for the dashboard aggregations.
+
+DynamoDB hands back each review as a dict of Decimals and strings, with
+attributes no dashboard reads (email, phone, pros, cons, orderId, ...), and
+get_insights used to re-derive the same values from those dicts in every
+aggregation: float(rating), str(sentiment).lower(), json.loads(topics),
+timestamp[:10]. A ReviewRecord does that once, when the page is loaded:
+
+    rating     int (0 when missing or not a number)
+    sentiment  interned lower-case code ("positive", "pending", ...)
+    bucket     dashboard bucket: "positive", "neutral" or "negative"
+               (anything else counts as neutral, as it always has)
+    topics     tuple of interned topic names (list, JSON or comma-separated);
+               reviews with the same topic list share the tuple
+    epoch_us   timestamp as integer microseconds since the epoch, UTC
+               (0 when missing or unparseable, so it sorts oldest)
+    day        UTC day as a date ordinal, for trend buckets
+
+The fields the dashboards show are kept as they were stored: feedback_id,
+brand_id, product_id (interned, they repeat across reviews), customer_name,
+text, summary and timestamp.
+
+Queries ask for PROJECTION only, so the dropped attributes are not even
+parsed; they are still read (and billed) by DynamoDB.
+
+    records = review_records.from_items(resp["Items"])
+"""
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+BUCKETS = ("positive", "neutral", "negative")
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+EPOCH_ORDINAL = EPOCH.date().toordinal()
+DAY_US = 86_400_000_000
+_ONE_US = timedelta(microseconds=1)
+# Reviews repeat the same few topic lists; equal lists share one tuple
+TOPIC_CACHE_SIZE = 4096
+_topic_tuples: dict = {}
+
+# What a record is built from; "name" and "timestamp" are reserved words
+PROJECTION_NAMES = {f"#{name}": name for name in (
+    "FeedbackId", "brandId", "productId", "rating", "sentiment", "topics", "timestamp",
+    "customerName", "name", "reviewText", "message", "summary",
+)}
+PROJECTION = ", ".join(PROJECTION_NAMES)
+
+
+class ReviewRecord:
+    """One review, reduced to what the dashboards read."""
+
+    __slots__ = ("feedback_id", "brand_id", "product_id", "rating", "sentiment", "bucket",
+                 "topics", "epoch_us", "day", "timestamp", "customer_name", "text", "summary")
+
+    def __init__(self, item: dict):
+        self.feedback_id = item.get("FeedbackId", "")
+        self.brand_id = sys.intern(str(item.get("brandId", "")))
+        self.product_id = sys.intern(str(item.get("productId", "")))
+        self.rating = _rating(item.get("rating", 0))
+        self.sentiment = sys.intern(str(item.get("sentiment", "neutral")).lower())
+        self.bucket = self.sentiment if self.sentiment in BUCKETS else "neutral"
+        self.topics = parse_topics(item.get("topics", []))
+        self.timestamp = item.get("timestamp", "")
+        self.epoch_us = _epoch_us(self.timestamp)
+        self.day = EPOCH_ORDINAL + self.epoch_us // DAY_US
+        self.customer_name = item.get("customerName", item.get("name", ""))
+        self.text = item.get("reviewText", item.get("message", ""))
+        self.summary = item.get("summary", "")
+
+    def __repr__(self) -> str:
+        return f"ReviewRecord({self.feedback_id!r}, {self.sentiment}, {self.rating})"
+
+
+def from_items(items) -> list:
+    return [ReviewRecord(item) for item in items]
+
+
+def _rating(value) -> int:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        try:
+            return int(float(value))
+        except (ValueError, TypeError):
+            return 0
+
+
+def parse_topics(value) -> tuple:
+    """Topic names from a stored ``topics`` (list, JSON or comma-separated), as given."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except Exception:
+            value = [t.strip() for t in value.split(",") if t.strip()]
+    if not isinstance(value, list):
+        return ()
+    try:
+        key = tuple(value)
+        found = _topic_tuples.get(key)
+    except TypeError:       # unhashable entries; parse without the cache
+        return tuple(sys.intern(str(t).strip()) for t in value)
+    if found is None:
+        if len(_topic_tuples) >= TOPIC_CACHE_SIZE:
+            _topic_tuples.clear()
+        found = _topic_tuples[key] = tuple(sys.intern(str(t).strip()) for t in value)
+    return found
+
+
+def _epoch_us(timestamp) -> int:
+    try:
+        moment = datetime.fromisoformat(str(timestamp))
+    except ValueError:
+        return 0
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - EPOCH) // _ONE_US
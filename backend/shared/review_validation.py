@@ -0,0 +1,26 @@
+"""
+Validation rules for a customer review, shared by submit_review's
+POST /review and the bulk importer so both accept exactly the same input.
+"""
+RATING_MIN = 1
+RATING_MAX = 5
+REVIEW_TEXT_MIN = 10
+REVIEW_TEXT_MAX = 500
+
+
+def validate_review(rating, review_text) -> tuple:
+    """Normalise and check a rating / review text pair.
+
+    Returns ``(rating, review_text, error)``. ``error`` is None when the pair
+    is valid, otherwise the message submit_review sends back with a 400.
+    """
+    review_text = (review_text or "").strip()
+    try:
+        rating = int(rating)
+    except (TypeError, ValueError):
+        return None, review_text, "rating must be an integer between 1 and 5"
+    if rating < RATING_MIN or rating > RATING_MAX:
+        return None, review_text, "rating must be between 1 and 5"
+    if len(review_text) < REVIEW_TEXT_MIN or len(review_text) > REVIEW_TEXT_MAX:
+        return rating, review_text, "reviewText must be between 10 and 500 characters"
+    return rating, review_text, None
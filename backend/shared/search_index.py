@@ -0,0 +1,264 @@
+"""
+Inverted index over review text, per brand, for GET /insights/{brandId}/search.
+
+Matching words against the feedback table would mean scanning all of it.
+The analytics-projector Lambda keeps a posting per brand, term and review
+in the search-index table instead, from the feedback stream:
+
+    termKey    <brandId>#<term>: one posting list per brand and term
+    sk         <timestamp>#<FeedbackId>, as the review-analytics table, so
+               every list is in time order and a date range is a key range
+    pos        the term's word positions in the text (the first MAX_POSITIONS)
+    rating, sentiment, productId
+               copied from the review, for the search filters
+
+Terms are the words of the review text, lower case, given the topic
+sketches' light singular form ("Batteries" -> "battery"); STOPWORDS are
+left out but still take a position, so phrases match across them.
+
+A query is a conjunction of terms and quoted phrases. search() walks the
+posting lists newest first, leapfrogging: each list seeks to the newest
+posting at or before the candidate key (a Query with the key as upper bound,
+so a seek skips everything newer in one read), and when every list lands on
+the same review it is a match. Reads grow with the postings near matches,
+not with the brand's review count. Phrases are checked on the positions.
+
+Each review costs one write per distinct term, and a review whose rating or
+sentiment changes (the AI analysis, say) rewrites its postings.
+
+    matches, resume = search_index.search(brand_id, search_index.parse_query('"battery life" refund'), limit=20)
+"""
+import os
+import re
+
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+import review_analytics
+from topic_sketch import singular
+
+SEARCH_INDEX_TABLE = os.environ.get("DYNAMODB_TABLE_SEARCH_INDEX", "reviewpulse-search-index")
+
+MAX_POSITIONS = 32            # per term and review; phrases past them are not found
+MAX_TERM_CHARS = 40
+SEEK_PAGE = 25                # postings per Query while a list is walked
+BATCH_WRITE_LIMIT = 25        # DynamoDB BatchWriteItem hard limit per request
+STOPWORDS = frozenset((
+    "a an and are as at be been but by for from had has have i if in into is it its of on or so "
+    "that the their them they this to was were will with my me we our you your"
+).split())
+_WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+_PHRASE = re.compile(r'"([^"]*)"')
+
+
+# ---------------------------------------------------------------------------
+# Terms
+# ---------------------------------------------------------------------------
+
+def terms(text) -> list:
+    """(term, position) for each word of ``text``; stopwords are skipped but counted."""
+    out = []
+    for position, match in enumerate(_WORD.finditer(str(text or "").lower())):
+        word = match.group().replace("'", "")
+        if word and word not in STOPWORDS and len(word) <= MAX_TERM_CHARS:
+            out.append((singular(word), position))
+    return out
+
+
+def parse_query(q: str) -> list:
+    """Clauses of a search string: one [(term, offset)] per word or "quoted phrase".
+
+    Every clause must match. Offsets are positions relative to the phrase's
+    first searchable word.
+    """
+    clauses = []
+    for phrase in _PHRASE.findall(q):
+        words = terms(phrase)
+        if words:
+            first = words[0][1]
+            clauses.append([(term, position - first) for term, position in words])
+    for term, _ in terms(_PHRASE.sub(" ", q)):
+        clauses.append([(term, 0)])
+    return clauses
+
+
+def _positions(text) -> dict:
+    """term -> its first MAX_POSITIONS positions in ``text``."""
+    out: dict[str, list] = {}
+    for term, position in terms(text):
+        held = out.setdefault(term, [])
+        if len(held) < MAX_POSITIONS:
+            held.append(position)
+    return out
+
+
+def matches(text, clauses: list) -> bool:
+    """Whether ``text`` matches every clause, as search() would find it."""
+    positions = _positions(text)
+    if any(term not in positions for clause in clauses for term, _ in clause):
+        return False
+    by_term = {term: {"pos": held} for term, held in positions.items()}
+    return all(_phrase_at(by_term, clause) for clause in clauses)
+
+
+def _term_key(brand_id: str, term: str) -> str:
+    return f"{brand_id}#{term}"
+
+
+def postings(review: dict) -> dict:
+    """(termKey, sk) -> posting item for a feedback item (empty if it has no key or text)."""
+    key = review_analytics.key(review)
+    if key is None:
+        return {}
+    positions = _positions(review.get("reviewText", review.get("message", "")))
+    extra = {field: review[field] for field in ("rating", "sentiment", "productId") if field in review}
+    return {
+        (_term_key(key["brandId"], term), key["sk"]): {
+            "termKey": _term_key(key["brandId"], term), "sk": key["sk"], "pos": held, **extra,
+        }
+        for term, held in positions.items()
+    }
+
+
+def changes(old: dict | None, new: dict | None) -> dict:
+    """(termKey, sk) -> posting to put, or None to delete, for a review going from ``old`` to ``new``."""
+    before, after = postings(old or {}), postings(new or {})
+    out = {key: None for key in before if key not in after}
+    out.update({key: item for key, item in after.items() if before.get(key) != item})
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def write(pending: dict) -> None:
+    """Apply changes() output. Puts and deletes are idempotent, so a retried batch is harmless."""
+    requests = [
+        {"PutRequest": {"Item": item}} if item is not None
+        else {"DeleteRequest": {"Key": {"termKey": term_key, "sk": sk}}}
+        for (term_key, sk), item in pending.items()
+    ]
+    with xray_recorder.in_subsegment("dynamodb-write-search-index") as seg:
+        seg.put_annotation("table", SEARCH_INDEX_TABLE)
+        seg.put_annotation("operation", "batch_write_item")
+        seg.put_metadata("write_count", len(requests))
+        for start in range(0, len(requests), BATCH_WRITE_LIMIT):
+            request = {SEARCH_INDEX_TABLE: requests[start:start + BATCH_WRITE_LIMIT]}
+            while request:
+                resp = aws_clients.dynamodb().batch_write_item(RequestItems=request)
+                request = resp.get("UnprocessedItems") or None
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+def query_page(term_key: str, upper: str, lower: str | None, limit: int) -> list:
+    """Postings of one list at or before ``upper`` (and from ``lower``), newest first."""
+    from boto3.dynamodb.conditions import Key
+    if lower and upper < lower:
+        return []
+    condition = Key("termKey").eq(term_key)
+    condition &= Key("sk").between(lower, upper) if lower else Key("sk").lte(upper)
+    resp = aws_clients.table(SEARCH_INDEX_TABLE).query(
+        KeyConditionExpression=condition, ScanIndexForward=False, Limit=limit,
+    )
+    return resp.get("Items", [])
+
+
+# above every "<timestamp>#<FeedbackId>" key
+_NEWEST = "\uffff"
+
+
+class _PostingList:
+    """One term's postings, read newest first a page at a time, with seeks."""
+
+    def __init__(self, term_key: str, lower: str | None, fetch):
+        self.term_key, self.lower, self.fetch = term_key, lower, fetch
+        self.page: list = []
+        self.at = 0
+        self.done = False       # the last page reached the end of the list
+        self.queries = 0
+
+    def seek(self, key: str, strict: bool) -> dict | None:
+        """The newest posting before ``key`` (or at it, unless ``strict``)."""
+        while True:
+            page = self.page
+            while self.at < len(page) and (page[self.at]["sk"] > key or (strict and page[self.at]["sk"] == key)):
+                self.at += 1
+            if self.at < len(page):
+                return page[self.at]
+            if self.done:
+                return None
+            # past the page: one Query from the key on skips everything newer
+            self.page = self.fetch(self.term_key, key, self.lower, SEEK_PAGE)
+            self.at = 0
+            self.queries += 1
+            self.done = len(self.page) < SEEK_PAGE
+            if not self.page:
+                return None
+
+
+def _phrase_at(postings_by_term: dict, clause: list) -> bool:
+    if len(clause) == 1:
+        return True
+    first, _ = clause[0]
+    return any(all(start + offset in postings_by_term[term]["pos"] for term, offset in clause[1:])
+               for start in postings_by_term[first]["pos"])
+
+
+def search(brand_id: str, clauses: list, limit: int, before: str | None = None, inclusive: bool = False,
+           after: str | None = None, accept=None, max_queries: int = 40, fetch=None) -> tuple:
+    """Reviews of the brand matching every clause, newest first.
+
+    ``before``/``inclusive`` bound the sort keys from above (a cursor, or the
+    end of a date range), ``after`` from below; ``accept(posting)`` filters
+    on the copied fields. Returns (matches, resume): one posting per match,
+    and (key, inclusive) to continue from, or None when the lists are done.
+    Stops early, with resume set, once the lists have made ``max_queries``
+    Queries between them.
+    """
+    fetch = fetch or query_page
+    needed = list(dict.fromkeys(term for clause in clauses for term, _ in clause))
+    lists = {term: _PostingList(_term_key(brand_id, term), after, fetch) for term in needed}
+    order = list(lists.values())
+    key, strict = (before, not inclusive) if before else (_NEWEST, False)
+    matches = []
+    with xray_recorder.in_subsegment("dynamodb-search-index") as seg:
+        seg.put_annotation("table", SEARCH_INDEX_TABLE)
+        seg.put_annotation("operation", "query")
+        seg.put_metadata("terms", needed)
+        resume = None
+        while order:
+            if sum(pl.queries for pl in order) >= max_queries:
+                resume = (key, not strict)
+                break
+            # leapfrog: every list seeks to the candidate; any that lands
+            # older makes its posting the new candidate
+            agreed, i, found = 0, 0, {}
+            while agreed < len(order):
+                posting = order[i].seek(key, strict)
+                if posting is None:
+                    break
+                if posting["sk"] == key and not strict:
+                    agreed += 1
+                else:
+                    key, strict, agreed = posting["sk"], False, 1
+                found[order[i].term_key] = posting
+                i = (i + 1) % len(order)
+            else:
+                by_term = {term: found[pl.term_key] for term, pl in lists.items()}
+                posting = by_term[needed[0]]
+                if all(_phrase_at(by_term, clause) for clause in clauses) and (accept is None or accept(posting)):
+                    matches.append(posting)
+                    if len(matches) == limit:
+                        resume = (key, False)
+                        strict = True
+                        break
+                strict = True
+                continue
+            break
+        seg.put_metadata("queries", sum(pl.queries for pl in order))
+        seg.put_metadata("match_count", len(matches))
+    return matches, resume
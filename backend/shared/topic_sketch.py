@@ -0,0 +1,257 @@
+"""
+Top-topics sketches: each brand's and product's most mentioned topics.
+
+The product dashboard's top_topics (and the brand's) used to count every
+topic of every review in scope on each request. The analytics-projector
+Lambda keeps a Count-Min sketch per scope instead, one item in the
+topic-sketches table keyed like the link-stats counters
+(brand#<brandId>, product#<brandId>#<productId>):
+
+    counts   DEPTH rows of WIDTH signed 32-bit counters (little-endian
+             binary); a topic adds its delta to one counter per row, picked
+             by hashing it, and its estimate is the smallest of those
+    top      topic -> estimate for the CANDIDATES topics with the largest
+             estimates, refreshed on every write; the dashboards read only
+             this, so a top-n costs one small GetItem whatever the review count
+    total    mentions counted (N)
+    rev      bumped by every write; writes are conditional on it
+
+Accuracy. Counts only go negative transiently, so an estimate is never
+below the true count, and with WIDTH = 512 and DEPTH = 4 it is above it by
+at most e/WIDTH * N (about 0.5% of all mentions in the scope) with
+probability at least 1 - e^-DEPTH (98%), for each topic independently. A
+topic is taken into ``top`` when one of its own updates lifts its estimate
+above the smallest candidate, so any topic mentioned in more than
+N/CANDIDATES reviews is listed once it has been updated since crossing
+that line. Reported counts are the estimates.
+``python backend/benchmarks/topic_sketch_accuracy.py`` checks all of this
+against exact counts on synthetic data.
+
+Topics are counted once per review, normalized: lower case, runs of
+whitespace collapsed, and the last word given a light singular form
+("Delivery  Times" -> "delivery time", "features" -> "feature"). The form
+is what the dashboards show, so words the suffix rules would mangle
+("series", "news", "cookies", "lenses") are listed as exceptions.
+"""
+import hashlib
+import heapq
+import os
+import re
+from array import array
+from collections import Counter
+
+from aws_xray_sdk.core import xray_recorder
+
+import aws_clients
+import link_counters
+from review_records import parse_topics
+
+TOPIC_SKETCHES_TABLE = os.environ.get("DYNAMODB_TABLE_TOPIC_SKETCHES", "reviewpulse-topic-sketches")
+
+WIDTH = 512
+DEPTH = 4
+CANDIDATES = 32               # dashboards show 5; the rest keeps the ranking stable
+WRITE_ATTEMPTS = 8            # conditional-write retries before the batch is failed
+APPLIED_BATCHES = 64          # stream batch ids an item remembers; see apply()
+NORMALIZE_CACHE_SIZE = 4096
+_normalized: dict = {}
+_SPACE = re.compile(r"\s+")
+# singular() keeps these as written (plural-only, or the same in both numbers)
+_PLURAL_ONLY = frozenset((
+    "series", "species", "news", "means", "clothes", "goods", "electronics",
+    "jeans", "pants", "shorts", "glasses", "scissors",
+))
+_IE_NOUNS = frozenset((              # -ies -> -ie, not -y
+    "cookie", "movie", "zombie", "rookie", "selfie", "hoodie", "smoothie", "calorie",
+    "brownie", "beanie", "veggie", "goalie", "freebie", "genie", "bootie", "foodie",
+))
+_S_NOUNS = frozenset((               # end in -s already; -ses -> -s, not -se
+    "lens", "bus", "gas", "plus", "bonus", "status", "virus", "campus", "census",
+    "canvas", "atlas", "focus", "iris",
+))
+
+
+# ---------------------------------------------------------------------------
+# Topics
+# ---------------------------------------------------------------------------
+
+def singular(word: str) -> str:
+    """A light singular form of a lower-case word ("batteries" -> "battery")."""
+    if word in _PLURAL_ONLY or word in _S_NOUNS:
+        return word
+    if word.endswith("ies") and word[:-1] in _IE_NOUNS:
+        return word[:-1]
+    if word.endswith("es") and word[:-2] in _S_NOUNS:
+        return word[:-2]
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize(topic) -> str:
+    """The form a topic is counted (and shown) under."""
+    found = _normalized.get(topic)
+    if found is None:
+        words = _SPACE.sub(" ", str(topic)).strip().lower().rsplit(" ", 1)
+        words[-1] = singular(words[-1])
+        if len(_normalized) >= NORMALIZE_CACHE_SIZE:
+            _normalized.clear()
+        found = _normalized[topic] = " ".join(words)
+    return found
+
+
+def review_topics(value) -> set:
+    """The normalized topics of one review's stored ``topics``, each once."""
+    return {t for t in map(normalize, parse_topics(value)) if t}
+
+
+def scope_keys(review: dict) -> list:
+    """The sketches a review counts in: its brand's and its product's."""
+    brand_id, product_id = review.get("brandId", ""), review.get("productId", "")
+    if not brand_id:
+        return []
+    keys = [link_counters.brand_key(brand_id)]
+    if product_id:
+        keys.append(link_counters.product_key(brand_id, product_id))
+    return keys
+
+
+def deltas(old: dict | None, new: dict | None) -> dict:
+    """scope key -> Counter of topic count changes, for a review going from ``old`` to ``new``."""
+    out: dict[str, Counter] = {}
+    for review, sign in ((old, -1), (new, 1)):
+        if not review:
+            continue
+        topics = review_topics(review.get("topics", []))
+        for key in scope_keys(review):
+            counter = out.setdefault(key, Counter())
+            for topic in topics:
+                counter[topic] += sign
+    return {key: counter for key, counter in out.items() if any(counter.values())}
+
+
+# ---------------------------------------------------------------------------
+# The sketch
+# ---------------------------------------------------------------------------
+
+def _cells(topic: str) -> list:
+    digest = hashlib.blake2b(topic.encode("utf-8"), digest_size=16).digest()
+    h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+    return [row * WIDTH + (h1 + row * h2) % WIDTH for row in range(DEPTH)]
+
+
+class Sketch:
+    """One scope's counters and candidates, as stored."""
+
+    def __init__(self, item: dict | None = None):
+        item = item or {}
+        self.counts = array("i")
+        if "counts" in item:
+            self.counts.frombytes(bytes(item["counts"]))
+        else:
+            self.counts.extend([0] * (WIDTH * DEPTH))
+        self.top = {t: int(c) for t, c in item.get("top", {}).items()}
+        self.total = int(item.get("total", 0))
+
+    def estimate(self, topic: str) -> int:
+        return min(self.counts[cell] for cell in _cells(topic))
+
+    def add(self, changes: Counter) -> None:
+        for topic, delta in changes.items():
+            for cell in _cells(topic):
+                self.counts[cell] += delta
+            self.total += delta
+        candidates = {t: self.estimate(t) for t in (*self.top, *changes)}
+        self.top = dict(heapq.nlargest(CANDIDATES, ((t, c) for t, c in candidates.items() if c > 0),
+                                       key=lambda tc: (tc[1], tc[0])))
+
+    def item(self) -> dict:
+        return {"counts": self.counts.tobytes(), "top": self.top, "total": self.total}
+
+
+def ranked(top: dict, n: int) -> list:
+    """The dashboards' top_topics from a ``top`` map."""
+    best = heapq.nsmallest(n, top.items(), key=lambda tc: (-int(tc[1]), tc[0]))
+    return [{"topic": t, "count": int(c)} for t, c in best]
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def top(scope_key: str, n: int) -> list:
+    """The scope's n most mentioned topics (estimated counts), most first."""
+    with xray_recorder.in_subsegment("dynamodb-get-topic-sketch") as seg:
+        seg.put_annotation("table", TOPIC_SKETCHES_TABLE)
+        seg.put_annotation("operation", "get_item")
+        resp = aws_clients.table(TOPIC_SKETCHES_TABLE).get_item(
+            Key={"scopeKey": scope_key},
+            ProjectionExpression="#t",
+            ExpressionAttributeNames={"#t": "top"},
+        )
+    return ranked(resp.get("Item", {}).get("top", {}), n)
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def _remembered(batches: list, batch: str | None) -> dict:
+    """The ``batches`` attribute after writing ``batch`` in (nothing without ids)."""
+    if batch is not None:
+        batches = (batches + [batch])[-APPLIED_BATCHES:]
+    return {"batches": batches} if batches else {}
+
+
+def apply(scope_key: str, changes: Counter, batch: str | None = None) -> None:
+    """Add ``changes`` (topic -> count delta) to one scope's sketch.
+
+    Read-modify-write, conditional on ``rev`` and retried on conflict. With
+    a ``batch`` id the write is skipped if that batch is already in; the
+    item keeps the last APPLIED_BATCHES ids, so a retry has to come back
+    before that many other batches have written to the scope.
+    """
+    table = aws_clients.table(TOPIC_SKETCHES_TABLE)
+    with xray_recorder.in_subsegment("dynamodb-update-topic-sketch") as seg:
+        seg.put_annotation("table", TOPIC_SKETCHES_TABLE)
+        seg.put_annotation("operation", "put_item")
+        seg.put_metadata("topic_count", len(changes))
+        for _ in range(WRITE_ATTEMPTS):
+            item = table.get_item(Key={"scopeKey": scope_key}, ConsistentRead=True).get("Item")
+            batches = list(item.get("batches", [])) if item else []
+            if batch is not None and batch in batches:
+                return
+            sketch = Sketch(item)
+            sketch.add(changes)
+            rev = int(item.get("rev", 0)) if item else 0
+            new_item = {"scopeKey": scope_key, "rev": rev + 1, **sketch.item(),
+                        **_remembered(batches, batch)}
+            try:
+                if item is None:
+                    table.put_item(Item=new_item, ConditionExpression="attribute_not_exists(scopeKey)")
+                else:
+                    table.put_item(Item=new_item, ConditionExpression="#r = :rev",
+                                   ExpressionAttributeNames={"#r": "rev"},
+                                   ExpressionAttributeValues={":rev": rev})
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                continue
+            return
+    raise RuntimeError(f"topic sketch {scope_key} kept changing under {WRITE_ATTEMPTS} updates")
+
+
+def apply_all(changes: dict, batch: str | None = None) -> None:
+    """apply() for every scope in ``changes`` (scope key -> Counter)."""
+    for scope_key, counter in changes.items():
+        counter = Counter({t: d for t, d in counter.items() if d})
+        if counter:
+            apply(scope_key, counter, batch)
+
+
+def merge(into: dict, changes: dict) -> None:
+    """Add one review's deltas() to pending ``into`` (scope key -> Counter)."""
+    for scope_key, counter in changes.items():
+        into.setdefault(scope_key, Counter()).update(counter)
@@ -0,0 +1,60 @@
+"""
+Shared fixtures: the benchmarks' moto environment (tables, seed data, Cognito),
+one fresh account per test. Events and contexts for calling a handler are
+built with lambda_events.
+
+    python -m pytest -q backend/tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import environment  # noqa: E402
+
+environment.configure_process()
+
+import aws_clients  # noqa: E402
+
+
+@pytest.fixture
+def aws():
+    """moto with every table created; the handlers' cached clients are dropped on both sides."""
+    import boto3
+
+    mock = environment.start_mock()
+    aws_clients.reset()
+    environment.create_tables(boto3.resource("dynamodb", region_name=environment.REGION))
+    try:
+        yield
+    finally:
+        aws_clients.reset()
+        mock.stop()
+
+
+@pytest.fixture(scope="session")
+def handlers():
+    """load(name) -> the function's handler module, imported once per session."""
+    loaded = {}
+
+    def load(name: str):
+        if name not in loaded:
+            loaded[name] = environment.load_handler(name)
+        return loaded[name]
+
+    return load
+
+
+@pytest.fixture
+def seeded(aws):
+    """A small seeded catalogue (Dataset) and Cognito access tokens, as the benchmarks use."""
+    import boto3
+
+    dataset = environment.Dataset(boto3.resource("dynamodb", region_name=environment.REGION), "1k")
+    dataset.reviews = 300
+    dataset.seed_tables(progress=lambda _msg: None)
+    cognito = environment.create_cognito(
+        boto3.client("cognito-idp", region_name=environment.REGION), dataset.hot_brand_id)
+    return dataset, cognito["tokens"]
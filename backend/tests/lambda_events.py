@@ -0,0 +1,30 @@
+"""Lambda events and context objects for calling the handlers directly."""
+import json
+
+
+class LambdaContext:
+    """Enough of the Lambda context object for the handlers."""
+
+    def __init__(self, function_name: str):
+        self.function_name = f"reviewpulse-{function_name.replace('_', '-')}"
+        self.aws_request_id = "test"
+        self.memory_limit_in_mb = 256
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 60_000
+
+
+def api_event(method: str, path: str, path_params: dict | None = None, body: dict | None = None,
+              token: str | None = None, query: dict | None = None, headers: dict | None = None) -> dict:
+    """API Gateway (REST, proxy integration) request."""
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return {
+        "httpMethod": method,
+        "path": path,
+        "pathParameters": path_params,
+        "headers": headers,
+        "queryStringParameters": query,
+        "body": json.dumps(body) if body is not None else None,
+    }
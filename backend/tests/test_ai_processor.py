@@ -0,0 +1,114 @@
+"""ai_processor: the low-priority lane's retries and the product-summary read."""
+import json
+
+import pytest
+
+import aws_clients
+import model_router
+
+FEEDBACK_TABLE = "reviewpulse-feedback"
+
+
+@pytest.fixture
+def ai_processor(aws, handlers, monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTING", True)
+    monkeypatch.setattr(model_router, "TIERS", {"fast": "model-fast", "standard": "model-standard",
+                                                "large": "model-large"})
+    model_router.reset()
+    module = handlers("ai_processor")
+    monkeypatch.setattr(module, "NEAR_DUPLICATES", False)
+    yield module
+    model_router.reset()
+
+
+def _bedrock(throttle_rate: float):
+    from fake_bedrock import FakeBedrock, ModelProfile
+
+    bedrock = FakeBedrock(jitter_ms=0.0, models={
+        model: ModelProfile(1, throttle_rate) for model in model_router.TIERS.values()
+    })
+    aws_clients.override("bedrock-runtime", bedrock)
+    return bedrock
+
+
+def _review(feedback_id: str, brand_id: str = "b1", product_id: str = "p1", **fields) -> dict:
+    item = {"FeedbackId": feedback_id, "brandId": brand_id, "productId": product_id,
+            "timestamp": f"2026-01-01T00:00:{feedback_id[-2:]}Z", "rating": 4,
+            "reviewText": "Works well, arrived quickly.", "sentiment": "pending", **fields}
+    aws_clients.table(FEEDBACK_TABLE).put_item(Item=item)
+    return item
+
+
+def _message(message_id: str, *feedback_ids: str) -> dict:
+    return {"eventSource": "aws:sqs", "messageId": message_id,
+            "body": json.dumps({"feedbackIds": list(feedback_ids)})}
+
+
+def _sentiment(feedback_id: str) -> str:
+    return aws_clients.table(FEEDBACK_TABLE).get_item(Key={"FeedbackId": feedback_id})["Item"]["sentiment"]
+
+
+def test_throttled_reviews_stay_pending_and_their_messages_are_retried(ai_processor):
+    _bedrock(throttle_rate=1.0)
+    _review("fb-01")
+    _review("fb-02")
+    summary = ai_processor.lambda_handler({"Records": [_message("m1", "fb-01"), _message("m2", "fb-02")]},
+                                          None)
+    assert summary["batchItemFailures"] == [{"itemIdentifier": "m1"}, {"itemIdentifier": "m2"}]
+    assert summary["errors"] == 0
+    assert _sentiment("fb-01") == _sentiment("fb-02") == "pending"
+
+
+def test_analysed_messages_are_not_retried(ai_processor):
+    _bedrock(throttle_rate=0.0)
+    _review("fb-01")
+    summary = ai_processor.lambda_handler({"Records": [_message("m1", "fb-01")]}, None)
+    assert summary["batchItemFailures"] == []
+    assert summary["processed"] == 1
+    assert _sentiment("fb-01") != "pending"
+
+
+def test_request_errors_are_not_retried(ai_processor, monkeypatch):
+    _review("fb-01")
+
+    def invoke(*_args, **_kwargs):
+        raise ValueError("No JSON found in Bedrock response")
+
+    monkeypatch.setattr(ai_processor, "_invoke_bedrock", invoke)
+    summary = ai_processor.lambda_handler({"Records": [_message("m1", "fb-01")]}, None)
+    assert summary["batchItemFailures"] == []
+    assert summary["errors"] == 1
+    assert _sentiment("fb-01") == "unprocessed"
+
+
+def test_product_reviews_come_from_the_product_index(ai_processor, monkeypatch):
+    _review("fb-01", sentiment="positive")
+    _review("fb-02", sentiment="negative", duplicate_of="fb-01")
+    _review("fb-03", brand_id="b2", sentiment="positive")  # same productId, other brand
+
+    def no_scan(*_args, **_kwargs):
+        raise AssertionError("feedback table scanned")
+
+    table = aws_clients.table(FEEDBACK_TABLE)
+    monkeypatch.setattr(type(table), "scan", no_scan)
+    reviews = {r["FeedbackId"]: r for r in ai_processor._product_reviews("p1", "b1")}
+    assert set(reviews) == {"fb-01", "fb-02"}
+    assert reviews["fb-02"]["duplicate_of"] == "fb-01"
+    assert "customerName" not in reviews["fb-01"]
+
+
+def test_deadline_is_not_metered_or_failed_over(ai_processor, monkeypatch):
+    import bedrock_usage
+
+    tried, recorded = [], []
+
+    def out_of_time(service):
+        tried.append(service)
+        raise aws_clients.DeadlineExceeded(f"{service} call needs 5.0s, 0.5s left")
+
+    monkeypatch.setattr(aws_clients, "client", out_of_time)
+    monkeypatch.setattr(bedrock_usage, "record", lambda *args, **kwargs: recorded.append(args))
+    with pytest.raises(aws_clients.DeadlineExceeded):
+        ai_processor._invoke_bedrock("prompt", "sentiment", "b1", "v1")
+    assert tried == ["bedrock-runtime"]
+    assert recorded == []
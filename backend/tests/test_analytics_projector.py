@@ -0,0 +1,164 @@
+"""analytics_projector: topic and aspect counts survive retried batches."""
+import json
+import random
+from collections import Counter
+
+import pytest
+from boto3.dynamodb.types import TypeSerializer
+
+import aspect_matrix
+import aws_clients
+import link_counters
+import review_analytics
+import search_index
+import topic_sketch
+
+BRAND, PRODUCTS = "brand-retry", ("p1", "p2")
+TOPICS = ("battery life", "strap", "screen", "delivery", "price", "support")
+SENTIMENTS = ("positive", "neutral", "negative")
+_ser = TypeSerializer()
+
+
+@pytest.fixture
+def projector(aws, handlers):
+    return handlers("analytics_projector")
+
+
+class Stream:
+    """Feedback stream records for a set of reviews, with the final state kept alongside."""
+
+    def __init__(self, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.reviews: dict[str, dict] = {}
+        self.seq = self.created = 0
+
+    def _review(self, feedback_id: str) -> dict:
+        return {
+            "FeedbackId": feedback_id, "brandId": BRAND, "productId": self.rng.choice(PRODUCTS),
+            "timestamp": f"2026-0{self.rng.randint(1, 3)}-1{self.rng.randint(0, 9)}T10:00:00+00:00",
+            "rating": self.rng.randint(1, 5), "sentiment": self.rng.choice(SENTIMENTS),
+            "topics": self.rng.sample(TOPICS, self.rng.randint(1, 3)),
+            "message": f"review {feedback_id} " + " ".join(self.rng.sample(TOPICS, 2)),
+        }
+
+    def _record(self, event_name: str, old: dict | None, new: dict | None) -> dict:
+        self.seq += 1
+        images = {"SequenceNumber": f"{self.seq:021d}"}
+        if old:
+            images["OldImage"] = {k: _ser.serialize(v) for k, v in old.items()}
+        if new:
+            images["NewImage"] = {k: _ser.serialize(v) for k, v in new.items()}
+        return {"eventID": f"event-{self.seq}", "eventName": event_name, "dynamodb": images}
+
+    def inserts(self, n: int) -> list:
+        out = []
+        for _ in range(n):
+            self.created += 1
+            review = self._review(f"fb-{self.created:04d}")
+            self.reviews[review["FeedbackId"]] = review
+            out.append(self._record("INSERT", None, review))
+        return out
+
+    def edits(self, n: int) -> list:
+        out = []
+        for feedback_id in self.rng.sample(sorted(self.reviews), n):
+            old = self.reviews[feedback_id]
+            new = {**old, "sentiment": self.rng.choice(SENTIMENTS),
+                   "topics": self.rng.sample(TOPICS, self.rng.randint(1, 3))}
+            self.reviews[feedback_id] = new
+            out.append(self._record("MODIFY", old, new))
+        return out
+
+    def removals(self, n: int) -> list:
+        return [self._record("REMOVE", self.reviews.pop(feedback_id), None)
+                for feedback_id in self.rng.sample(sorted(self.reviews), n)]
+
+
+def _expected(reviews) -> tuple:
+    topics, aspects = {}, {}
+    for review in reviews:
+        narrow = review_analytics.item(review)
+        topic_sketch.merge(topics, topic_sketch.deltas(None, narrow))
+        aspect_matrix.merge(aspects, aspect_matrix.deltas(None, narrow))
+    return ({k: +c for k, c in topics.items()},
+            {(scope, month, topic, bucket): n for (scope, month), c in aspects.items()
+             for (topic, bucket), n in c.items() if n})
+
+
+def _actual() -> tuple:
+    topics = {}
+    for item in aws_clients.table(topic_sketch.TOPIC_SKETCHES_TABLE).scan()["Items"]:
+        sketch = topic_sketch.Sketch(item)
+        topics[item["scopeKey"]] = +Counter({t: sketch.estimate(t) for t in map(topic_sketch.normalize, TOPICS)})
+    aspects = {}
+    for product_id in PRODUCTS:
+        scope = link_counters.product_key(BRAND, product_id)
+        for month, rows in aspect_matrix.read(scope, None, "9999-12").items():
+            for topic, buckets in rows.items():
+                aspects.update({(scope, month, topic, b): n for b, n in buckets.items() if n})
+    return topics, aspects
+
+
+def _fail_once(monkeypatch, module, name: str) -> None:
+    real = getattr(module, name)
+
+    def failing(*args, **kwargs):
+        monkeypatch.setattr(module, name, real)
+        raise RuntimeError(f"{name} failed")
+
+    monkeypatch.setattr(module, name, failing)
+
+
+def test_counts_are_exact_after_retries(projector, monkeypatch):
+    stream = Stream()
+
+    # a later write fails after the analytics items are in: the retry must still count them
+    batch = stream.inserts(40)
+    _fail_once(monkeypatch, search_index, "write")
+    with pytest.raises(RuntimeError):
+        projector.lambda_handler({"Records": batch}, None)
+    projector.lambda_handler({"Records": batch}, None)
+    assert _actual() == _expected(stream.reviews.values())
+
+    # the count writes fail half-way: the sketches are in, the matrices are not
+    batch = stream.edits(15) + stream.removals(5) + stream.inserts(10)
+    _fail_once(monkeypatch, aspect_matrix, "apply_all")
+    with pytest.raises(RuntimeError):
+        projector.lambda_handler({"Records": batch}, None)
+    projector.lambda_handler({"Records": batch}, None)
+    assert _actual() == _expected(stream.reviews.values())
+
+    # a batch delivered again after it succeeded counts nothing twice
+    projector.lambda_handler({"Records": batch}, None)
+    assert _actual() == _expected(stream.reviews.values())
+
+
+def test_a_batch_bisected_after_a_failure_counts_once(projector, monkeypatch):
+    stream = Stream(seed=5)
+    projector.lambda_handler({"Records": stream.inserts(20)}, None)
+    batch = stream.edits(10) + stream.inserts(10)
+    _fail_once(monkeypatch, search_index, "write")
+    with pytest.raises(RuntimeError):
+        projector.lambda_handler({"Records": batch}, None)
+    # bisect_batch_on_function_error: the halves come back as batches of their own
+    projector.lambda_handler({"Records": batch[:10]}, None)
+    projector.lambda_handler({"Records": batch[10:]}, None)
+    assert _actual() == _expected(stream.reviews.values())
+
+
+def test_capacity_is_flushed_when_the_batch_fails(projector, monkeypatch, capsys):
+    _fail_once(monkeypatch, search_index, "write")
+    with pytest.raises(RuntimeError):
+        projector.lambda_handler({"Records": Stream().inserts(5)}, None)
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+    assert any(line.get("Function") == "analytics-projector" for line in lines)
+
+
+def test_rebuild_counts_only_what_the_stream_has_not(projector):
+    stream = Stream(seed=11)
+    projector.lambda_handler({"Records": stream.inserts(30)}, None)
+    table = aws_clients.table(projector.FEEDBACK_TABLE)
+    for review in stream.reviews.values():
+        table.put_item(Item=review)
+    projector.lambda_handler({"action": "rebuild"}, None)
+    assert _actual() == _expected(stream.reviews.values())
@@ -0,0 +1,41 @@
+"""bedrock_usage: EMF lines stay within CloudWatch's limits."""
+import json
+
+import pytest
+
+import bedrock_usage
+
+
+def test_latencies_are_split_across_lines(aws, capsys):
+    bedrock_usage.begin_request("ai-processor")
+    for i in range(250):
+        bedrock_usage.record("review_analysis", "model-a", "brand-1", "v1",
+                             {"input_tokens": 10, "output_tokens": 2}, latency_ms=100 + i)
+    bedrock_usage.flush()
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+    assert [len(line["BedrockLatency"]) for line in lines] == [100, 100, 50]
+    assert sorted(v for line in lines for v in line["BedrockLatency"]) == [100 + i for i in range(250)]
+    # the counters go out once, on the first line
+    assert lines[0]["BedrockCalls"] == 250 and lines[0]["BedrockInputTokens"] == 2500
+    for line in lines[1:]:
+        assert "BedrockCalls" not in line
+        assert [m["Name"] for m in line["_aws"]["CloudWatchMetrics"][0]["Metrics"]] == ["BedrockLatency"]
+
+
+def test_usage_is_flushed_when_the_batch_fails(aws, handlers, monkeypatch, capsys):
+    ai_processor = handlers("ai_processor")
+
+    def analyse(item):
+        bedrock_usage.record("review_analysis", "model-a", item["brandId"], "v1",
+                             {"input_tokens": 10, "output_tokens": 2}, latency_ms=50)
+        raise RuntimeError("analysis failed")
+
+    monkeypatch.setattr(ai_processor, "_analyse_review", analyse)
+    record = {"eventName": "INSERT", "dynamodb": {"NewImage": {
+        "FeedbackId": {"S": "fb-1"}, "brandId": {"S": "brand-1"}, "productId": {"S": "p1"}}}}
+    with pytest.raises(RuntimeError):
+        ai_processor.lambda_handler({"Records": [record]}, None)
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+    assert any(line.get("BedrockCalls") == 1 for line in lines)
@@ -0,0 +1,41 @@
+"""dashboards: stale reads ask for a rebuild once per interval, not once per read."""
+import gzip
+
+import pytest
+
+import dashboards
+from lambda_events import api_event
+
+SCOPE = "brand#b1"
+
+
+@pytest.fixture
+def get_insights(aws, handlers, monkeypatch):
+    module = handlers("get_insights")
+    requested = []
+    monkeypatch.setattr(dashboards, "request_refresh", lambda keys: requested.extend(keys))
+    dashboards.put(SCOPE, 1, module._today(), module.CODE_VERSION,
+                   body=gzip.compress(b'{"avg_rating": 4.0}'), etag='"v1"')
+    return module, requested
+
+
+def test_a_burst_of_stale_reads_requests_one_refresh(get_insights, monkeypatch):
+    module, requested = get_insights
+    event = api_event("GET", "/insights/b1", {"brandId": "b1"})
+    now = [1_000_000.0]
+    monkeypatch.setattr(dashboards.time, "time", lambda: now[0])
+
+    for _ in range(5):
+        assert module._stored_dashboard(event, SCOPE, 2)["statusCode"] == 200
+    assert requested == [SCOPE]
+
+    now[0] += dashboards.REFRESH_REQUEST_INTERVAL_S + 1
+    module._stored_dashboard(event, SCOPE, 2)
+    module._stored_dashboard(event, SCOPE, 2)
+    assert requested == [SCOPE, SCOPE]
+
+
+def test_fresh_reads_request_nothing(get_insights):
+    module, requested = get_insights
+    module._stored_dashboard(api_event("GET", "/insights/b1", {"brandId": "b1"}), SCOPE, 1)
+    assert requested == []
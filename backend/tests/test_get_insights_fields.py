@@ -0,0 +1,39 @@
+"""get_insights ?fields=: only the fetches the listed sections need are run."""
+import json
+
+import ddb_metrics
+import metadata_cache
+from environment import PREFIX
+from lambda_events import LambdaContext, api_event
+
+PRODUCTS, LINKS, LINK_STATS = f"{PREFIX}-products", f"{PREFIX}-review-links", f"{PREFIX}-link-stats"
+
+
+def _get(get_insights, brand_id: str, token: str, fields: str) -> tuple:
+    """(status, body, table -> calls) for GET /insights/{brandId}?fields=..."""
+    metadata_cache.clear()
+    event = api_event("GET", f"/insights/{brand_id}", {"brandId": brand_id}, token=token,
+                      query={"fields": fields})
+    result = get_insights.lambda_handler(event, LambdaContext("get_insights"))
+    return result["statusCode"], json.loads(result["body"]), {
+        name: totals["calls"] for name, totals in ddb_metrics.summary()["tables"].items()}
+
+
+def test_minimal_fields_skip_products_and_link_tables(seeded, handlers):
+    dataset, tokens = seeded
+    status, body, tables = _get(handlers("get_insights"), dataset.hot_brand_id, tokens["admin"], "avg_rating")
+    assert status == 200
+    assert "avg_rating" in body
+    assert PRODUCTS not in tables and LINKS not in tables
+    # the ETag's data version only; no link counters
+    assert tables.get(LINK_STATS, 0) <= 1
+
+
+def test_fields_that_need_them_still_read_them(seeded, handlers):
+    dataset, tokens = seeded
+    status, body, tables = _get(handlers("get_insights"), dataset.hot_brand_id, tokens["admin"],
+                                "products,link_stats")
+    assert status == 200
+    assert {"products", "link_stats"} <= set(body)
+    assert tables.get(PRODUCTS, 0) >= 1
+    assert tables.get(LINK_STATS, 0) >= 2
@@ -0,0 +1,26 @@
+"""get_insights sentiment trend buckets."""
+import pytest
+
+
+@pytest.fixture
+def get_insights(aws, handlers):
+    return handlers("get_insights")
+
+
+def test_monthly_buckets_keep_the_month_key(get_insights):
+    window = get_insights._time_window({"from": "2026-01-15", "to": "2026-03-02"})
+    trend = get_insights._sentiment_trend([], window)
+    assert [(b["period"], b["label"], b["month"]) for b in trend] == [
+        ("2026-01-01", "Jan", "Jan"), ("2026-02-01", "Feb", "Feb"), ("2026-03-01", "Mar", "Mar")]
+
+    # no granularity is monthly too
+    default = get_insights._sentiment_trend([], get_insights._time_window({}))
+    assert all("month" in b for b in default)
+
+
+@pytest.mark.parametrize("granularity", ["day", "week"])
+def test_finer_buckets_have_period_and_label_only(get_insights, granularity):
+    window = get_insights._time_window({"from": "2026-03-01", "to": "2026-03-20",
+                                        "granularity": granularity})
+    trend = get_insights._sentiment_trend([], window)
+    assert trend and all(set(b) == {"period", "label", "positive", "negative", "neutral"} for b in trend)
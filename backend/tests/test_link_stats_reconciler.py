@@ -0,0 +1,143 @@
+"""link_stats_reconciler: stream roll-ups and rebuilds are idempotent and agree."""
+import pytest
+from boto3.dynamodb.types import TypeSerializer
+
+import aws_clients
+import link_counters
+
+LINKS_TABLE = "reviewpulse-review-links"
+_ser = TypeSerializer()
+
+
+@pytest.fixture
+def reconciler(aws, handlers):
+    return handlers("link_stats_reconciler")
+
+
+def _image(item: dict) -> dict:
+    return {k: _ser.serialize(v) for k, v in item.items()}
+
+
+def _record(event_name: str, new: dict, old: dict | None = None) -> dict:
+    images = {"NewImage": _image(new)}
+    if old is not None:
+        images["OldImage"] = _image(old)
+    return {"eventName": event_name, "dynamodb": images}
+
+
+def _link(token: str) -> dict:
+    return aws_clients.table(LINKS_TABLE).get_item(Key={"linkToken": token})["Item"]
+
+
+def _send(token: str, brand_id: str, product_id: str) -> dict:
+    """What auth_otp writes: the link and, in one transaction, its product counter."""
+    item = {"linkToken": token, "brandId": brand_id, "productId": product_id,
+            "used": False, "sentCounted": True}
+    link_counters.transact([
+        {"Put": {"TableName": LINKS_TABLE, "Item": item}},
+        *link_counters.increment_ops(link_counters.link_keys(brand_id, product_id), "total_sent"),
+    ])
+    return _record("INSERT", item)
+
+
+def _use(token: str) -> dict:
+    """What submit_review writes when the link is used; returns the MODIFY record."""
+    old = _link(token)
+    link_counters.transact([
+        {"Update": {"TableName": LINKS_TABLE, "Key": {"linkToken": token},
+                    "UpdateExpression": "SET used = :t, usedCounted = :t",
+                    "ExpressionAttributeValues": {":t": True}}},
+        *link_counters.increment_ops(link_counters.link_keys(old["brandId"], old["productId"]),
+                                     "total_used"),
+    ])
+    return _record("MODIFY", _link(token), old)
+
+
+def _totals() -> dict:
+    items = aws_clients.table(link_counters.LINK_STATS_TABLE).scan()["Items"]
+    return {i["statsKey"]: (int(i.get("total_sent", 0)), int(i.get("total_used", 0))) for i in items}
+
+
+def test_handlers_bump_only_the_product_counter(reconciler):
+    _send("t1", "b1", "p1")
+    assert _totals() == {"product#b1#p1": (1, 0)}
+
+
+def test_stream_rolls_up_brand_and_global_once(reconciler):
+    records = [_send("t1", "b1", "p1"), _send("t2", "b1", "p2"), _send("t3", "b2", "p3")]
+    assert reconciler.lambda_handler({"Records": records}, None)["counters_adjusted"] == 3
+    expected = {"global": (3, 0), "brand#b1": (2, 0), "brand#b2": (1, 0),
+                "product#b1#p1": (1, 0), "product#b1#p2": (1, 0), "product#b2#p3": (1, 0)}
+    assert _totals() == expected
+
+    # a redelivered batch moves nothing
+    assert reconciler.lambda_handler({"Records": records}, None)["counters_adjusted"] == 0
+    assert _totals() == expected
+    assert _link("t1")["sentRolledUp"] is True
+
+
+def test_used_links_roll_up_once(reconciler):
+    reconciler.lambda_handler({"Records": [_send("t1", "b1", "p1")]}, None)
+    used = _use("t1")
+    after_use = _link("t1")
+    assert reconciler.lambda_handler({"Records": [used]}, None)["counters_adjusted"] == 1
+    assert reconciler.lambda_handler({"Records": [used]}, None)["counters_adjusted"] == 0
+
+    # the reconciler's own stamp comes back as a MODIFY with used already true
+    stamped = _record("MODIFY", _link("t1"), after_use)
+    assert reconciler.lambda_handler({"Records": [stamped]}, None)["counters_adjusted"] == 0
+    assert _totals() == {"global": (1, 1), "brand#b1": (1, 1), "product#b1#p1": (1, 1)}
+
+
+def test_unstamped_links_are_counted_everywhere(reconciler):
+    """Seed scripts and console edits write links the handlers never counted."""
+    item = {"linkToken": "seed", "brandId": "b1", "productId": "p1", "used": True}
+    aws_clients.table(LINKS_TABLE).put_item(Item=item)
+    record = _record("INSERT", item)
+    # sent and used, each once
+    assert reconciler.lambda_handler({"Records": [record, record]}, None)["counters_adjusted"] == 2
+    assert _totals() == {"global": (1, 1), "brand#b1": (1, 1), "product#b1#p1": (1, 1)}
+
+
+def test_rebuild_is_idempotent_and_matches_the_stream(reconciler):
+    records = [_send(f"t{i}", f"b{i % 2}", f"p{i % 3}") for i in range(12)]
+    reconciler.lambda_handler({"Records": records}, None)
+    reconciler.lambda_handler({"Records": [_use(f"t{i}") for i in range(0, 12, 4)]}, None)
+    from_stream = _totals()
+
+    first = reconciler.lambda_handler({"action": "rebuild"}, None)
+    assert first["links_scanned"] == 12
+    assert first["counters_adjusted"] == 0
+    assert _totals() == from_stream
+    reconciler.lambda_handler({"action": "rebuild"}, None)
+    assert _totals() == from_stream
+    assert from_stream["global"] == (12, 3)
+
+
+def test_rebuild_backfills_without_overwriting(reconciler):
+    """Links that predate the counters are added; what the counters already hold is kept."""
+    links = aws_clients.table(LINKS_TABLE)
+    links.put_item(Item={"linkToken": "old1", "brandId": "b1", "productId": "p1", "used": True})
+    links.put_item(Item={"linkToken": "old2", "brandId": "b1", "productId": "p1", "used": False})
+    # sent while the rebuild runs, its stream record not yet processed
+    _send("new", "b1", "p1")
+
+    summary = reconciler.lambda_handler({"action": "rebuild"}, None)
+    assert summary == {"links_scanned": 3, "counters_adjusted": 4, "next_key": None}
+    assert _totals() == {"global": (3, 1), "brand#b1": (3, 1), "product#b1#p1": (3, 1)}
+
+    # the late stream record finds the link already rolled up
+    assert reconciler.lambda_handler({"Records": [_record("INSERT", _link("new"))]},
+                                     None)["counters_adjusted"] == 0
+    assert _totals() == {"global": (3, 1), "brand#b1": (3, 1), "product#b1#p1": (3, 1)}
+
+
+def test_global_item_carries_no_data_version(reconciler):
+    reconciler.lambda_handler({"Records": [_send("t1", "b1", "p1"), _send("t2", "b2", "p2")]}, None)
+    link_counters.bump_versions([("b1", "p1")])
+    items = {i["statsKey"]: i for i in
+             aws_clients.table(link_counters.LINK_STATS_TABLE).scan()["Items"]}
+    assert link_counters.VERSION_FIELD not in items["global"]
+    versions = link_counters.batch_get_versions(["brand#b1", "brand#b2"])
+    assert versions == {"brand#b1": 2, "brand#b2": 1}
+    assert link_counters.overview_version(["b1", "b2"]) == 3
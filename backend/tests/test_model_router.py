@@ -0,0 +1,125 @@
+"""model_router: candidate order, demotion and failover."""
+import importlib
+
+import pytest
+from botocore.exceptions import ClientError
+
+import aws_clients
+import model_router
+
+FAST, STANDARD, LARGE = "model-fast", "model-standard", "model-large"
+
+
+@pytest.fixture(autouse=True)
+def router(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTING", True)
+    monkeypatch.setattr(model_router, "TIERS", {"fast": FAST, "standard": STANDARD, "large": LARGE})
+    monkeypatch.setattr(model_router, "LATENCY_SLO_MS", 1000.0)
+    monkeypatch.setattr(aws_clients, "remaining_s", lambda: None)
+    clock = [1000.0]
+    monkeypatch.setattr(model_router.time, "monotonic", lambda: clock[0])
+    model_router.reset()
+    yield clock
+    model_router.reset()
+
+
+def _error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, "InvokeModel")
+
+
+def test_order_by_task_and_size():
+    short, long = model_router.SHORT_INPUT_CHARS, model_router.SHORT_INPUT_CHARS + 1
+    assert model_router.route("review_analysis", short)[0] == [FAST, STANDARD, LARGE]
+    assert model_router.route("review_analysis", long)[0] == [STANDARD, FAST, LARGE]
+    assert model_router.route("product_summary", short)[0] == [LARGE, STANDARD, FAST]
+    assert model_router.route("unknown_task", short)[0] == [FAST, STANDARD, LARGE]
+
+
+def test_tiers_naming_one_model_are_tried_once(monkeypatch):
+    monkeypatch.setitem(model_router.TIERS, "large", STANDARD)
+    assert model_router.route("product_summary", 0)[0] == [STANDARD, FAST]
+
+
+def test_routing_off_sends_everything_to_the_standard_model(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTING", False)
+    assert model_router.route("product_summary", 0) == ([STANDARD], "routing off")
+
+
+def test_throttled_model_moves_back_for_the_cooldown(router):
+    model_router.observe(FAST, 0, throttled=True)
+    models, reason = model_router.route("review_analysis", 10)
+    assert models == [STANDARD, LARGE, FAST]
+    assert "throttled" in reason
+
+    router[0] += model_router.COOLDOWN_S
+    assert model_router.route("review_analysis", 10)[0] == [FAST, STANDARD, LARGE]
+
+
+def test_slow_model_moves_back_and_starts_afresh(router):
+    model_router.observe(LARGE, 5000)
+    assert model_router.route("product_summary", 10)[0] == [STANDARD, FAST, LARGE]
+
+    router[0] += model_router.COOLDOWN_S
+    assert model_router.route("product_summary", 10)[0] == [LARGE, STANDARD, FAST]
+    # its next call is not averaged with the slow one
+    model_router.observe(LARGE, 100)
+    assert model_router.route("product_summary", 10)[0][0] == LARGE
+
+
+def test_deadline_tightens_the_latency_budget(monkeypatch):
+    model_router.observe(FAST, 600)
+    assert model_router.route("review_analysis", 10)[0][0] == FAST
+    monkeypatch.setattr(aws_clients, "remaining_s", lambda: 0.5)
+    assert model_router.route("review_analysis", 10)[0] == [STANDARD, LARGE, FAST]
+
+
+def test_order_kept_when_every_candidate_is_demoted():
+    for model in (FAST, STANDARD, LARGE):
+        model_router.observe(model, 0, throttled=True)
+    models, reason = model_router.route("review_analysis", 10)
+    assert models == [FAST, STANDARD, LARGE]
+    assert "all candidates demoted" in reason
+
+
+@pytest.mark.parametrize("code", sorted(model_router.FAILOVER_CODES))
+def test_throttles_and_outages_fail_over(code):
+    assert model_router.fails_over(_error(code))
+
+
+@pytest.mark.parametrize("exc", [_error("ValidationException"), _error("AccessDeniedException"),
+                                 ValueError("bad body")])
+def test_request_errors_do_not_fail_over(exc):
+    assert not model_router.fails_over(exc)
+
+
+def test_large_tier_defaults_to_the_standard_model(monkeypatch):
+    monkeypatch.setenv("BEDROCK_MODEL_ID", "model-from-env")
+    monkeypatch.delenv("BEDROCK_MODEL_LARGE", raising=False)
+    try:
+        assert importlib.reload(model_router).TIERS["large"] == "model-from-env"
+        monkeypatch.setenv("BEDROCK_MODEL_LARGE", "")
+        assert importlib.reload(model_router).TIERS["large"] == "model-from-env"
+    finally:
+        monkeypatch.undo()
+        importlib.reload(model_router)
+
+
+def test_ai_processor_fails_over_in_route_order(aws, handlers):
+    from fake_bedrock import FakeBedrock, ModelProfile
+
+    bedrock = FakeBedrock(jitter_ms=0.0, models={
+        FAST: ModelProfile(1, 1.0),        # always throttled
+        STANDARD: ModelProfile(1, 0.0),
+        LARGE: ModelProfile(1, 0.0),
+    })
+    aws_clients.override("bedrock-runtime", bedrock)
+    ai_processor = handlers("ai_processor")
+
+    ai_processor._invoke_bedrock(ai_processor._build_prompt("short review", 4), "review_analysis",
+                                 "brand-1", "v1", input_chars=12)
+    assert bedrock.calls_by_model == {FAST: 1, STANDARD: 1}
+
+    # the throttle sends the next short review straight to the standard model
+    ai_processor._invoke_bedrock(ai_processor._build_prompt("short review", 4), "review_analysis",
+                                 "brand-1", "v1", input_chars=12)
+    assert bedrock.calls_by_model == {FAST: 1, STANDARD: 2}
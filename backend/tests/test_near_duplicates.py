@@ -0,0 +1,69 @@
+"""near_duplicates: signature similarity, bucket capacity and the rating guard."""
+import pytest
+
+import aws_clients
+import near_duplicates
+
+SCOPE = "product#b1#p1"
+TEXT = ("The strap broke after two weeks and support never answered my emails, "
+        "so I would not buy this watch again.")
+
+
+@pytest.fixture
+def buckets(aws):
+    def read() -> dict:
+        items = aws_clients.table(near_duplicates.NEAR_DUPLICATES_TABLE).scan()["Items"]
+        return {item["band"]: [entry["FeedbackId"] for entry in item["entries"]] for item in items}
+
+    return read
+
+
+def test_signature_ignores_case_punctuation_and_spacing():
+    assert near_duplicates.signature(TEXT) == near_duplicates.signature(f"  {TEXT.upper()}!!")
+    assert near_duplicates.signature("?! ...") is None
+
+
+def test_similarity_separates_edits_from_other_reviews():
+    sig = near_duplicates.signature(TEXT)
+    edited = near_duplicates.signature(TEXT.replace("two weeks", "three weeks"))
+    other = near_duplicates.signature("Lovely screen and the battery lasts all week, great value.")
+    assert near_duplicates.similarity(sig, sig) == 1.0
+    assert near_duplicates.similarity(sig, edited) >= near_duplicates.THRESHOLD
+    assert near_duplicates.similarity(sig, other) < 0.2
+
+
+def test_remember_files_every_band_in_one_write(aws, buckets, monkeypatch):
+    client = aws_clients.dynamodb().meta.client
+    calls = []
+    real = client.transact_write_items
+    monkeypatch.setattr(client, "transact_write_items", lambda **kw: calls.append(kw) or real(**kw))
+    sig = near_duplicates.signature(TEXT)
+    assert near_duplicates.remember(SCOPE, "fb-1", 4, sig) == near_duplicates.BANDS
+    assert len(calls) == 1
+    assert sorted(buckets()) == sorted(near_duplicates.band_keys(sig))
+
+
+def test_full_buckets_are_skipped_and_the_rest_still_filed(aws, buckets):
+    sig = near_duplicates.signature(TEXT)
+    for n in range(near_duplicates.BUCKET_CAPACITY):
+        near_duplicates.remember(SCOPE, f"fb-{n}", 4, sig)
+    assert near_duplicates.remember(SCOPE, "fb-late", 4, sig) == 0
+
+    edited = near_duplicates.signature(TEXT.replace("two weeks", "three weeks"))
+    shared = set(near_duplicates.band_keys(sig)) & set(near_duplicates.band_keys(edited))
+    assert 0 < len(shared) < near_duplicates.BANDS
+    assert near_duplicates.remember(SCOPE, "fb-edit", 4, edited) == near_duplicates.BANDS - len(shared)
+
+    filed = buckets()
+    assert all(len(entries) <= near_duplicates.BUCKET_CAPACITY for entries in filed.values())
+    assert not any("fb-late" in entries for entries in filed.values())
+    assert all("fb-edit" not in filed[band] for band in shared)
+
+
+def test_find_matches_only_the_same_rating(aws):
+    near_duplicates.remember(SCOPE, "fb-1", 5, near_duplicates.signature(TEXT))
+    edited = near_duplicates.signature(TEXT.replace("two weeks", "three weeks"))
+    match = near_duplicates.find(SCOPE, edited, 5)
+    assert match is not None and match[0] == "fb-1" and match[1] >= near_duplicates.THRESHOLD
+    assert near_duplicates.find(SCOPE, edited, 2) is None
+    assert near_duplicates.find("product#b1#p2", edited, 5) is None
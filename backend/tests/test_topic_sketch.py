@@ -0,0 +1,97 @@
+"""topic_sketch: estimates against exact counts, and topic normalization."""
+import itertools
+import math
+import random
+from collections import Counter
+
+import pytest
+
+import topic_sketch
+
+SCOPE = "brand#b"
+BATCH = 100                 # stream records per projector invocation
+
+
+def _replay(rng: random.Random, reviews: int, vocabulary: int = 3_000) -> tuple:
+    """Insert ``reviews`` reviews with Zipf-drawn topics, deleting and editing
+    some as they go, through deltas() into a Sketch in stream-sized batches.
+    Returns (sketch, exact counts)."""
+    topics = [f"aspect {i:05d}" for i in range(vocabulary)]
+    weights = list(itertools.accumulate(1 / (rank + 1) ** 1.1 for rank in range(vocabulary)))
+    sketch, exact, live, pending = topic_sketch.Sketch(), Counter(), {}, {}
+
+    def review(picked=None):
+        picked = picked or rng.choices(topics, cum_weights=weights, k=rng.randint(1, 4))
+        return {"brandId": "b", "topics": list(picked)}
+
+    for step in range(reviews):
+        roll = rng.random()
+        old = new = None
+        if live and roll < 0.1:
+            old = live.pop(rng.choice(list(live)))
+        elif live and roll < 0.2:
+            review_id = rng.choice(list(live))
+            old, new = live[review_id], review()
+            live[review_id] = new
+        else:
+            new = live[step] = review()
+        for item, sign in ((old, -1), (new, 1)):
+            for topic in set(item["topics"]) if item else ():
+                exact[topic] += sign
+        topic_sketch.merge(pending, topic_sketch.deltas(old, new))
+        if step % BATCH == BATCH - 1 or step == reviews - 1:
+            counter = Counter({t: d for t, d in pending.get(SCOPE, {}).items() if d})
+            if counter:
+                sketch.add(counter)
+            pending = {}
+    return sketch, +exact
+
+
+@pytest.mark.parametrize("seed,reviews", [(1, 500), (2, 5_000), (3, 20_000)])
+def test_estimates_within_the_documented_bounds(seed, reviews):
+    sketch, exact = _replay(random.Random(seed), reviews)
+    total = sum(exact.values())
+    assert sketch.total == total
+    bound = math.e / topic_sketch.WIDTH * total
+
+    # never under; over the bound for at most e^-DEPTH of the topics
+    assert all(sketch.estimate(t) >= c for t, c in exact.items())
+    over = [t for t, c in exact.items() if sketch.estimate(t) - c > bound]
+    assert len(over) / len(exact) <= math.exp(-topic_sketch.DEPTH)
+
+    # every heavy topic is a candidate
+    heavy = [t for t, c in exact.items() if c > total / topic_sketch.CANDIDATES]
+    assert all(t in sketch.top for t in heavy)
+
+    # the served top 5 is the exact top 5 wherever the counts are further apart than the error
+    served = [row["topic"] for row in topic_sketch.ranked(sketch.top, 5)]
+    ordered = exact.most_common(6)
+    for k, (topic, count) in enumerate(ordered[:5]):
+        if all(count - other > bound for _, other in ordered[k + 1:]):
+            assert served[k] == topic
+
+
+def test_normalized_forms_count_together():
+    changes = topic_sketch.deltas(None, {"brandId": "b", "productId": "p",
+                                         "topics": ["Delivery  Times", "delivery time", "Features"]})
+    assert changes == {"brand#b": {"delivery time": 1, "feature": 1},
+                       "product#b#p": {"delivery time": 1, "feature": 1}}
+
+
+@pytest.mark.parametrize("plural,expected", [
+    ("batteries", "battery"), ("features", "feature"), ("boxes", "box"), ("watches", "watch"),
+    ("dresses", "dress"), ("cases", "case"), ("status", "status"), ("price", "price"),
+    ("cookies", "cookie"), ("movies", "movie"), ("series", "series"), ("species", "species"),
+    ("news", "news"), ("clothes", "clothes"), ("lenses", "lens"), ("buses", "bus"),
+    ("glasses", "glasses"),
+])
+def test_singular(plural, expected):
+    assert topic_sketch.singular(plural) == expected
+    # the singular form is stable
+    assert topic_sketch.singular(expected) == expected
+
+
+def test_exceptions_apply_to_the_last_word_only():
+    assert topic_sketch.normalize("TV Series") == "tv series"
+    assert topic_sketch.normalize("camera  Lenses") == "camera lens"
+    assert topic_sketch.normalize("news feeds") == "news feed"
@@ -43,7 +43,7 @@ import ThumbUpAltOutlinedIcon from '@mui/icons-material/ThumbUpAltOutlined';
 import ThumbDownAltOutlinedIcon from '@mui/icons-material/ThumbDownAltOutlined';
 import LightbulbOutlinedIcon from '@mui/icons-material/LightbulbOutlined';
 import { useAuth } from '../context/AuthContext';
-import api from '../services/api';
+import api, { loadPendingSections, readySections } from '../services/api';
 
 const SIDEBAR_W = 260;
 
@@ -504,7 +504,11 @@ const DashboardPage = () => {
     const fetchData = async () => {
       try {
         const { data: res } = await api.get(`/insights/${brandId}`);
-        setData(res);
+        setData(readySections(res));
+        if (res.degraded_sections?.length) {
+          setLoading(false);
+          setData(await loadPendingSections(`/insights/${brandId}`, res));
+        }
       } catch (err) {
         console.error('Failed to load dashboard data', err);
       } finally {
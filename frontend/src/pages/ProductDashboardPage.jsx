@@ -43,7 +43,7 @@ import {
 } from 'chart.js';
 import { Bar } from 'react-chartjs-2';
 import { useAuth } from '../context/AuthContext';
-import api from '../services/api';
+import api, { loadPendingSections, readySections } from '../services/api';
 
 ChartJS.register(CategoryScale, LinearScale, BarElement, Tooltip, Legend);
 
@@ -343,11 +343,41 @@ const ProductDashboardPage = () => {
   const [linkForm, setLinkForm] = useState({ customerEmail: '', customerName: '', customerPhone: '', orderId: '' });
   const [sending, setSending] = useState(false);
 
+  /* older reviews, paged through /reviews; null until the first page is loaded */
+  const [pagedReviews, setPagedReviews] = useState(null);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
+  const [loadingReviews, setLoadingReviews] = useState(false);
+
+  const loadMoreReviews = async () => {
+    setLoadingReviews(true);
+    try {
+      const { data: page } = await api.get(`/insights/${brandId}/${productId}/reviews`, {
+        params: { limit: 20, ...(reviewsCursor ? { cursor: reviewsCursor } : {}) },
+      });
+      setPagedReviews((prev) => [...(prev || []), ...page.reviews]);
+      setReviewsCursor(page.next_cursor);
+    } catch (err) {
+      console.error('Failed to load reviews', err);
+      toast.error('Could not load more reviews');
+    } finally {
+      setLoadingReviews(false);
+    }
+  };
+
+  const shownReviews = pagedReviews || data?.recent_reviews;
+  const hasMoreReviews = pagedReviews
+    ? Boolean(reviewsCursor)
+    : (data?.total_reviews || 0) > (data?.recent_reviews?.length || 0);
+
   useEffect(() => {
     const fetch = async () => {
       try {
         const { data: res } = await api.get(`/insights/${brandId}/${productId}`);
-        setData(res);
+        setData(readySections(res));
+        if (res.degraded_sections?.length) {
+          setLoading(false);
+          setData(await loadPendingSections(`/insights/${brandId}/${productId}`, res));
+        }
       } catch (err) {
         console.error('Failed to load product insights', err);
       } finally {
@@ -371,7 +401,7 @@ const ProductDashboardPage = () => {
   /* ── charts ── */
   const sentimentTrendChart = useMemo(() => {
     if (!data?.sentiment_trend) return null;
-    const labels = data.sentiment_trend.map((m) => m.month);
+    const labels = data.sentiment_trend.map((m) => m.label);
     return {
       data: {
         labels,
@@ -782,8 +812,29 @@ const ProductDashboardPage = () => {
           Recent Reviews
         </Typography>
 
-        {data?.recent_reviews && data.recent_reviews.length > 0 ? (
-          data.recent_reviews.map((r) => <ReviewRow key={r.FeedbackId} review={r} />)
+        {shownReviews && shownReviews.length > 0 ? (
+          <>
+            {shownReviews.map((r) => <ReviewRow key={r.FeedbackId} review={r} />)}
+            {hasMoreReviews && (
+              <Button
+                fullWidth
+                variant="outlined"
+                onClick={loadMoreReviews}
+                disabled={loadingReviews}
+                sx={{
+                  mt: 1,
+                  textTransform: 'none',
+                  borderRadius: '12px',
+                  fontWeight: 600,
+                  borderColor: 'rgba(255,255,255,0.12)',
+                  color: 'rgba(255,255,255,0.5)',
+                  '&:hover': { borderColor: 'rgba(255,255,255,0.25)' },
+                }}
+              >
+                {loadingReviews ? 'Loading…' : 'Load older reviews'}
+              </Button>
+            )}
+          </>
         ) : (
           <Paper
             elevation={0}
@@ -42,7 +42,7 @@ import BarChartIcon from '@mui/icons-material/BarChart';
 import ArrowBackIcon from '@mui/icons-material/ArrowBack';
 import StorefrontIcon from '@mui/icons-material/Storefront';
 import { useAuth } from '../context/AuthContext';
-import api from '../services/api';
+import api, { loadPendingSections, readySections } from '../services/api';
 
 const SIDEBAR_W = 270;
 
@@ -335,7 +335,11 @@ const SuperAdminDashboard = () => {
     const fetchData = async () => {
       try {
         const { data: res } = await api.get('/insights');
-        setData(res);
+        setData(readySections(res));
+        if (res.degraded_sections?.length) {
+          setLoading(false);
+          setData(await loadPendingSections('/insights', res));
+        }
       } catch (err) {
         console.error('Failed to load superadmin data', err);
       } finally {
@@ -40,4 +40,28 @@ api.interceptors.response.use(
   }
 );
 
+// get_insights returns {"status": "pending"} for sections that missed its
+// latency budget and lists them in degraded_sections. readySections() drops
+// those so the page can render right away; loadPendingSections() then fetches
+// each one with ?section= and returns the completed payload.
+const isPending = (value) => value?.status === 'pending';
+
+export const readySections = (data) =>
+  Object.fromEntries(Object.entries(data).filter(([, value]) => !isPending(value)));
+
+export const loadPendingSections = async (path, data) => {
+  const merged = readySections(data);
+  await Promise.all(
+    (data.degraded_sections || []).map(async (section) => {
+      try {
+        const { data: part } = await api.get(path, { params: { section } });
+        if (!isPending(part[section])) merged[section] = part[section];
+      } catch (err) {
+        console.error(`Failed to load insights section ${section}`, err);
+      }
+    })
+  );
+  return merged;
+};
+
 export default api;
@@ -41,22 +41,41 @@ module "ses" {
 }
 
 # -----------------------------------------------------------------------------
-# 5. Lambda (depends on: IAM, DynamoDB)
+# 4b. SQS (no dependencies)
+# -----------------------------------------------------------------------------
+module "sqs" {
+  source       = "./modules/sqs"
+  project_name = var.project_name
+  environment  = var.environment
+}
+
+# -----------------------------------------------------------------------------
+# 5. Lambda (depends on: IAM, DynamoDB, SQS)
 # -----------------------------------------------------------------------------
 module "lambda" {
-  source              = "./modules/lambda"
-  project_name        = var.project_name
-  environment         = var.environment
-  lambda_role_arn     = module.iam.lambda_role_arn
-  feedback_table_name = module.dynamodb.feedback_table_name
-  users_table_name    = module.dynamodb.users_table_name
-  products_table_name = module.dynamodb.products_table_name
-  brands_table_name   = module.dynamodb.brands_table_name
-  links_table_name    = module.dynamodb.review_links_table_name
-  ses_from_email      = "tripathiparth2411@gmail.com"
-  cognito_user_pool_id = module.cognito.user_pool_id
-  cognito_client_id    = module.cognito.user_pool_client_id
-  cloudfront_url       = module.cloudfront.cloudfront_url
+  source                      = "./modules/lambda"
+  project_name                = var.project_name
+  environment                 = var.environment
+  lambda_role_arn             = module.iam.lambda_role_arn
+  feedback_table_name         = module.dynamodb.feedback_table_name
+  users_table_name            = module.dynamodb.users_table_name
+  products_table_name         = module.dynamodb.products_table_name
+  brands_table_name           = module.dynamodb.brands_table_name
+  links_table_name            = module.dynamodb.review_links_table_name
+  link_stats_table_name       = module.dynamodb.link_stats_table_name
+  dashboards_table_name       = module.dynamodb.dashboards_table_name
+  review_analytics_table_name = module.dynamodb.review_analytics_table_name
+  recent_activity_table_name  = module.dynamodb.recent_activity_table_name
+  topic_sketches_table_name   = module.dynamodb.topic_sketches_table_name
+  aspect_matrix_table_name    = module.dynamodb.aspect_matrix_table_name
+  search_index_table_name     = module.dynamodb.search_index_table_name
+  near_duplicates_table_name  = module.dynamodb.near_duplicates_table_name
+  ai_usage_table_name         = module.dynamodb.ai_usage_table_name
+  ai_low_priority_queue_url   = module.sqs.ai_low_priority_queue_url
+  ses_from_email              = "tripathiparth2411@gmail.com"
+  cognito_user_pool_id        = module.cognito.user_pool_id
+  cognito_client_id           = module.cognito.user_pool_client_id
+  cloudfront_url              = module.cloudfront.cloudfront_url
 }
 
 # -----------------------------------------------------------------------------
@@ -75,7 +94,7 @@ module "api_gateway" {
 }
 
 # -----------------------------------------------------------------------------
-# 7. EventBridge (depends on: DynamoDB, Lambda)
+# 7. EventBridge (depends on: DynamoDB, Lambda, SQS, S3)
 # -----------------------------------------------------------------------------
 module "eventbridge" {
   source                    = "./modules/eventbridge"
@@ -83,6 +102,18 @@ module "eventbridge" {
   environment               = var.environment
   feedback_table_stream_arn = module.dynamodb.feedback_table_stream_arn
   ai_processor_function_arn = module.lambda.ai_processor_function_arn
+
+  review_links_table_stream_arn          = module.dynamodb.review_links_table_stream_arn
+  link_stats_reconciler_function_arn     = module.lambda.link_stats_reconciler_function_arn
+  analytics_projector_function_arn       = module.lambda.analytics_projector_function_arn
+  analytics_projector_failures_queue_arn = module.sqs.analytics_projector_failures_queue_arn
+
+  ai_low_priority_queue_arn  = module.sqs.ai_low_priority_queue_arn
+  review_import_function_arn = module.lambda.review_import_function_arn
+  imports_bucket_id          = module.s3.imports_bucket_id
+  imports_bucket_arn         = module.s3.imports_bucket_arn
+
+  get_insights_function_arn = module.lambda.get_insights_function_arn
 }
 
 # -----------------------------------------------------------------------------
@@ -5,6 +5,11 @@ resource "aws_api_gateway_rest_api" "this" {
   name        = "${var.project_name}-api"
   description = "ReviewPulse REST API"
 
+  # get_insights returns large dashboards gzip-encoded (isBase64Encoded);
+  # API Gateway only decodes those for binary media types. Request bodies of
+  # this type arrive base64-encoded too, and the handlers decode them.
+  binary_media_types = ["application/json"]
+
   endpoint_configuration {
     types = ["REGIONAL"]
   }
@@ -22,7 +27,7 @@ locals {
   cors_headers = {
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
     "method.response.header.Access-Control-Allow-Methods" = "'GET,POST,OPTIONS'"
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,Authorization,X-Amz-Date'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,Authorization,X-Amz-Date,If-None-Match'"
   }
 
   cors_method_response_parameters = {
@@ -71,6 +76,26 @@ resource "aws_api_gateway_resource" "insights_brand_product" {
   path_part   = "{productId}"
 }
 
+# --- /insights/{brandId}/{productId}/reviews ---
+resource "aws_api_gateway_resource" "insights_brand_product_reviews" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  parent_id   = aws_api_gateway_resource.insights_brand_product.id
+  path_part   = "reviews"
+}
+# --- /insights/{brandId}/{productId}/aspects ---
+resource "aws_api_gateway_resource" "insights_brand_product_aspects" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  parent_id   = aws_api_gateway_resource.insights_brand_product.id
+  path_part   = "aspects"
+}
+
+# --- /insights/{brandId}/search (a static segment wins over {productId}) ---
+resource "aws_api_gateway_resource" "insights_brand_search" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  parent_id   = aws_api_gateway_resource.insights_brand.id
+  path_part   = "search"
+}
+
 # --- /auth ---
 resource "aws_api_gateway_resource" "auth" {
   rest_api_id = aws_api_gateway_rest_api.this.id
@@ -563,6 +588,180 @@ resource "aws_api_gateway_integration_response" "options_auth_send_review_link"
   depends_on = [aws_api_gateway_integration.options_auth_send_review_link]
 }
 
+# =============================================================================
+# ROUTE 9: GET /insights/{brandId}/{productId}/reviews → get-insights Lambda
+# =============================================================================
+resource "aws_api_gateway_method" "get_insights_brand_product_reviews" {
+  rest_api_id   = aws_api_gateway_rest_api.this.id
+  resource_id   = aws_api_gateway_resource.insights_brand_product_reviews.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "get_insights_brand_product_reviews" {
+  rest_api_id             = aws_api_gateway_rest_api.this.id
+  resource_id             = aws_api_gateway_resource.insights_brand_product_reviews.id
+  http_method             = aws_api_gateway_method.get_insights_brand_product_reviews.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = "arn:aws:apigateway:ca-central-1:lambda:path/2015-03-31/functions/${var.get_insights_function_arn}/invocations"
+}
+
+# OPTIONS /insights/{brandId}/{productId}/reviews (CORS)
+resource "aws_api_gateway_method" "options_insights_brand_product_reviews" {
+  rest_api_id   = aws_api_gateway_rest_api.this.id
+  resource_id   = aws_api_gateway_resource.insights_brand_product_reviews.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "options_insights_brand_product_reviews" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  resource_id = aws_api_gateway_resource.insights_brand_product_reviews.id
+  http_method = aws_api_gateway_method.options_insights_brand_product_reviews.http_method
+  type        = "MOCK"
+
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "options_insights_brand_product_reviews" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  resource_id = aws_api_gateway_resource.insights_brand_product_reviews.id
+  http_method = aws_api_gateway_method.options_insights_brand_product_reviews.http_method
+  status_code = "200"
+
+  response_parameters = local.cors_method_response_parameters
+}
+
+resource "aws_api_gateway_integration_response" "options_insights_brand_product_reviews" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  resource_id = aws_api_gateway_resource.insights_brand_product_reviews.id
+  http_method = aws_api_gateway_method.options_insights_brand_product_reviews.http_method
+  status_code = aws_api_gateway_method_response.options_insights_brand_product_reviews.status_code
+
+  response_parameters = local.cors_headers
+
+  depends_on = [aws_api_gateway_integration.options_insights_brand_product_reviews]
+}
+
+# =============================================================================
+# ROUTE 10: GET /insights/{brandId}/{productId}/aspects → get-insights Lambda
+# =============================================================================
+resource "aws_api_gateway_method" "get_insights_brand_product_aspects" {
+  rest_api_id   = aws_api_gateway_rest_api.this.id
+  resource_id   = aws_api_gateway_resource.insights_brand_product_aspects.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "get_insights_brand_product_aspects" {
+  rest_api_id             = aws_api_gateway_rest_api.this.id
+  resource_id             = aws_api_gateway_resource.insights_brand_product_aspects.id
+  http_method             = aws_api_gateway_method.get_insights_brand_product_aspects.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = "arn:aws:apigateway:ca-central-1:lambda:path/2015-03-31/functions/${var.get_insights_function_arn}/invocations"
+}
+
+# OPTIONS /insights/{brandId}/{productId}/aspects (CORS)
+resource "aws_api_gateway_method" "options_insights_brand_product_aspects" {
+  rest_api_id   = aws_api_gateway_rest_api.this.id
+  resource_id   = aws_api_gateway_resource.insights_brand_product_aspects.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "options_insights_brand_product_aspects" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  resource_id = aws_api_gateway_resource.insights_brand_product_aspects.id
+  http_method = aws_api_gateway_method.options_insights_brand_product_aspects.http_method
+  type        = "MOCK"
+
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "options_insights_brand_product_aspects" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  resource_id = aws_api_gateway_resource.insights_brand_product_aspects.id
+  http_method = aws_api_gateway_method.options_insights_brand_product_aspects.http_method
+  status_code = "200"
+
+  response_parameters = local.cors_method_response_parameters
+}
+
+resource "aws_api_gateway_integration_response" "options_insights_brand_product_aspects" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  resource_id = aws_api_gateway_resource.insights_brand_product_aspects.id
+  http_method = aws_api_gateway_method.options_insights_brand_product_aspects.http_method
+  status_code = aws_api_gateway_method_response.options_insights_brand_product_aspects.status_code
+
+  response_parameters = local.cors_headers
+
+  depends_on = [aws_api_gateway_integration.options_insights_brand_product_aspects]
+}
+
+# =============================================================================
+# ROUTE 11: GET /insights/{brandId}/search → get-insights Lambda
+# =============================================================================
+resource "aws_api_gateway_method" "get_insights_brand_search" {
+  rest_api_id   = aws_api_gateway_rest_api.this.id
+  resource_id   = aws_api_gateway_resource.insights_brand_search.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "get_insights_brand_search" {
+  rest_api_id             = aws_api_gateway_rest_api.this.id
+  resource_id             = aws_api_gateway_resource.insights_brand_search.id
+  http_method             = aws_api_gateway_method.get_insights_brand_search.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = "arn:aws:apigateway:ca-central-1:lambda:path/2015-03-31/functions/${var.get_insights_function_arn}/invocations"
+}
+
+# OPTIONS /insights/{brandId}/search (CORS)
+resource "aws_api_gateway_method" "options_insights_brand_search" {
+  rest_api_id   = aws_api_gateway_rest_api.this.id
+  resource_id   = aws_api_gateway_resource.insights_brand_search.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "options_insights_brand_search" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  resource_id = aws_api_gateway_resource.insights_brand_search.id
+  http_method = aws_api_gateway_method.options_insights_brand_search.http_method
+  type        = "MOCK"
+
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "options_insights_brand_search" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  resource_id = aws_api_gateway_resource.insights_brand_search.id
+  http_method = aws_api_gateway_method.options_insights_brand_search.http_method
+  status_code = "200"
+
+  response_parameters = local.cors_method_response_parameters
+}
+
+resource "aws_api_gateway_integration_response" "options_insights_brand_search" {
+  rest_api_id = aws_api_gateway_rest_api.this.id
+  resource_id = aws_api_gateway_resource.insights_brand_search.id
+  http_method = aws_api_gateway_method.options_insights_brand_search.http_method
+  status_code = aws_api_gateway_method_response.options_insights_brand_search.status_code
+
+  response_parameters = local.cors_headers
+
+  depends_on = [aws_api_gateway_integration.options_insights_brand_search]
+}
+
 # =============================================================================
 # LAMBDA PERMISSIONS — allow API Gateway to invoke each function
 # =============================================================================
@@ -615,6 +814,13 @@ resource "aws_api_gateway_deployment" "this" {
       aws_api_gateway_integration.post_auth_verify.id,
       aws_api_gateway_method.post_auth_send_review_link.id,
       aws_api_gateway_integration.post_auth_send_review_link.id,
+      aws_api_gateway_method.get_insights_brand_product_reviews.id,
+      aws_api_gateway_integration.get_insights_brand_product_reviews.id,
+      aws_api_gateway_method.get_insights_brand_product_aspects.id,
+      aws_api_gateway_integration.get_insights_brand_product_aspects.id,
+      aws_api_gateway_method.get_insights_brand_search.id,
+      aws_api_gateway_integration.get_insights_brand_search.id,
+      aws_api_gateway_rest_api.this.binary_media_types,
     ]))
   }
 
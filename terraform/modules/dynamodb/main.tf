@@ -14,6 +14,42 @@ resource "aws_dynamodb_table" "feedback" {
     type = "S"
   }
 
+  attribute {
+    name = "productId"
+    type = "S"
+  }
+
+  attribute {
+    name = "brandId"
+    type = "S"
+  }
+
+  attribute {
+    name = "timestamp"
+    type = "S"
+  }
+
+  # Reviews of a product, newest first (GET /insights/{brandId}/{productId}/reviews),
+  # and ai_processor's product summaries. Only the fields those read are
+  # projected; no customer contact details.
+  global_secondary_index {
+    name               = "productId-timestamp-index"
+    hash_key           = "productId"
+    range_key          = "timestamp"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["brandId", "customerName", "name", "rating", "reviewText", "message", "sentiment", "summary", "topics", "duplicate_of"]
+  }
+
+  # Reviews of a brand by time: the insights routes read a brand's (or, per
+  # brand, every brand's) reviews in a from/to range through this index.
+  global_secondary_index {
+    name               = "brandId-timestamp-index"
+    hash_key           = "brandId"
+    range_key          = "timestamp"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["productId", "customerName", "name", "rating", "reviewText", "message", "sentiment", "summary", "topics"]
+  }
+
   stream_enabled   = true
   stream_view_type = "NEW_AND_OLD_IMAGES"
 
@@ -114,6 +150,10 @@ resource "aws_dynamodb_table" "review_links" {
     type = "S"
   }
 
+  # Feeds the link-stats reconciler
+  stream_enabled   = true
+  stream_view_type = "NEW_AND_OLD_IMAGES"
+
   ttl {
     attribute_name = "expiresAt"
     enabled        = true
@@ -124,3 +164,260 @@ resource "aws_dynamodb_table" "review_links" {
     Environment = var.environment
   }
 }
+
+# =============================================================================
+# TABLE 6: reviewpulse-link-stats (pre-aggregated review-link counters)
+# Keys:       global | brand#<brandId> | product#<brandId>#<productId>
+# Attributes: statsKey, total_sent, total_used
+# =============================================================================
+resource "aws_dynamodb_table" "link_stats" {
+  name         = "${var.project_name}-link-stats"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key = "statsKey"
+
+  attribute {
+    name = "statsKey"
+    type = "S"
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# TABLE 7: reviewpulse-dashboards (pre-built dashboard documents)
+# Keys:       global | brand#<brandId> | product#<brandId>#<productId>
+# Attributes: docKey, body (gzip JSON), etag, version, built_on, built_at,
+#             code, empty, lease_until
+# =============================================================================
+resource "aws_dynamodb_table" "dashboards" {
+  name         = "${var.project_name}-dashboards"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key = "docKey"
+
+  attribute {
+    name = "docKey"
+    type = "S"
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# TABLE 8: reviewpulse-review-analytics (narrow copy of the feedback table)
+# Keys:       brandId, sk = <timestamp>#<FeedbackId>
+# Attributes: productId, rating, sentiment, topics
+# Maintained from the feedback stream by the analytics-projector Lambda; the
+# dashboard aggregations read this instead of the full review items.
+# =============================================================================
+resource "aws_dynamodb_table" "review_analytics" {
+  name         = "${var.project_name}-review-analytics"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key  = "brandId"
+  range_key = "sk"
+
+  attribute {
+    name = "brandId"
+    type = "S"
+  }
+
+  attribute {
+    name = "sk"
+    type = "S"
+  }
+
+  attribute {
+    name = "productId"
+    type = "S"
+  }
+
+  # A product's reviews by time (the items are narrow, so all of it is projected)
+  global_secondary_index {
+    name            = "productId-sk-index"
+    hash_key        = "productId"
+    range_key       = "sk"
+    projection_type = "ALL"
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# TABLE 9: reviewpulse-recent-activity (newest reviews per dashboard scope)
+# Keys:       global | brand#<brandId> | product#<brandId>#<productId>
+# Attributes: scopeKey, entries (newest first, bounded), rev, horizon
+# Maintained from the feedback stream by the analytics-projector Lambda; the
+# dashboards' recent lists read one item instead of sorting every review.
+# =============================================================================
+resource "aws_dynamodb_table" "recent_activity" {
+  name         = "${var.project_name}-recent-activity"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key = "scopeKey"
+
+  attribute {
+    name = "scopeKey"
+    type = "S"
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# TABLE 10: reviewpulse-topic-sketches (most mentioned topics per scope)
+# Keys:       brand#<brandId> | product#<brandId>#<productId>
+# Attributes: scopeKey, counts (Count-Min counters, binary), top, total, rev
+# Maintained from the feedback stream by the analytics-projector Lambda; the
+# dashboards' top_topics read one item instead of counting every review.
+# =============================================================================
+resource "aws_dynamodb_table" "topic_sketches" {
+  name         = "${var.project_name}-topic-sketches"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key = "scopeKey"
+
+  attribute {
+    name = "scopeKey"
+    type = "S"
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# TABLE 11: reviewpulse-aspect-matrix (topic x sentiment per product and month)
+# Keys:       scopeKey = product#<brandId>#<productId>, month = YYYY-MM
+# Attributes: scopeKey, month, topics, counts (3 counters per topic, binary), rev
+# Maintained from the feedback stream by the analytics-projector Lambda;
+# GET /insights/{brandId}/{productId}/aspects queries a range of months.
+# =============================================================================
+resource "aws_dynamodb_table" "aspect_matrix" {
+  name         = "${var.project_name}-aspect-matrix"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key  = "scopeKey"
+  range_key = "month"
+
+  attribute {
+    name = "scopeKey"
+    type = "S"
+  }
+
+  attribute {
+    name = "month"
+    type = "S"
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# TABLE 12: reviewpulse-search-index (inverted index of review text per brand)
+# Keys:       termKey = <brandId>#<term>, sk = <timestamp>#<FeedbackId>
+# Attributes: termKey, sk, pos (word positions), rating, sentiment, productId
+# Maintained from the feedback stream by the analytics-projector Lambda;
+# GET /insights/{brandId}/search intersects the query's posting lists.
+# =============================================================================
+resource "aws_dynamodb_table" "search_index" {
+  name         = "${var.project_name}-search-index"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key  = "termKey"
+  range_key = "sk"
+
+  attribute {
+    name = "termKey"
+    type = "S"
+  }
+
+  attribute {
+    name = "sk"
+    type = "S"
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# TABLE 13: reviewpulse-near-duplicates (MinHash LSH buckets per product)
+# Keys:       scopeKey = product#<brandId>#<productId>, band = <band>#<hash>
+# Attributes: scopeKey, band, entries (FeedbackId, rating, signature)
+# Written by the ai-processor Lambda for every review Bedrock analyses; a
+# near-duplicate found here reuses that analysis instead of calling Bedrock.
+# =============================================================================
+resource "aws_dynamodb_table" "near_duplicates" {
+  name         = "${var.project_name}-near-duplicates"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key  = "scopeKey"
+  range_key = "band"
+
+  attribute {
+    name = "scopeKey"
+    type = "S"
+  }
+
+  attribute {
+    name = "band"
+    type = "S"
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# TABLE 14: reviewpulse-ai-usage (Bedrock usage per brand per day)
+# Keys:       brandId, sk = <day>#<callType>#<modelId>#<promptVersion>
+# Attributes: calls, errors, retries, input_tokens, output_tokens, latency_ms
+#             (running sums), callType, modelId, promptVersion, updatedAt
+# Added to by the ai-processor Lambda once per invocation; a brand's spend
+# over a date range is one Query.
+# =============================================================================
+resource "aws_dynamodb_table" "ai_usage" {
+  name         = "${var.project_name}-ai-usage"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key  = "brandId"
+  range_key = "sk"
+
+  attribute {
+    name = "brandId"
+    type = "S"
+  }
+
+  attribute {
+    name = "sk"
+    type = "S"
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
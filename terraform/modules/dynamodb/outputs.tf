@@ -25,6 +25,51 @@ output "review_links_table_name" {
   value       = aws_dynamodb_table.review_links.name
 }
 
+output "link_stats_table_name" {
+  description = "Name of the link stats counters table"
+  value       = aws_dynamodb_table.link_stats.name
+}
+
+output "dashboards_table_name" {
+  description = "Name of the pre-built dashboard documents table"
+  value       = aws_dynamodb_table.dashboards.name
+}
+
+output "review_analytics_table_name" {
+  description = "Name of the narrow review analytics table"
+  value       = aws_dynamodb_table.review_analytics.name
+}
+
+output "recent_activity_table_name" {
+  description = "Name of the recent-activity buffers table"
+  value       = aws_dynamodb_table.recent_activity.name
+}
+
+output "topic_sketches_table_name" {
+  description = "Name of the topic sketches table"
+  value       = aws_dynamodb_table.topic_sketches.name
+}
+
+output "aspect_matrix_table_name" {
+  description = "Name of the aspect matrix table"
+  value       = aws_dynamodb_table.aspect_matrix.name
+}
+
+output "search_index_table_name" {
+  description = "Name of the search index table"
+  value       = aws_dynamodb_table.search_index.name
+}
+
+output "near_duplicates_table_name" {
+  description = "Name of the near-duplicate signatures table"
+  value       = aws_dynamodb_table.near_duplicates.name
+}
+
+output "ai_usage_table_name" {
+  description = "Name of the Bedrock usage roll-up table"
+  value       = aws_dynamodb_table.ai_usage.name
+}
+
 # --- Table ARNs ---
 
 output "feedback_table_arn" {
@@ -52,9 +97,59 @@ output "review_links_table_arn" {
   value       = aws_dynamodb_table.review_links.arn
 }
 
-# --- Stream ARN ---
+output "link_stats_table_arn" {
+  description = "ARN of the link stats counters table"
+  value       = aws_dynamodb_table.link_stats.arn
+}
+
+output "dashboards_table_arn" {
+  description = "ARN of the pre-built dashboard documents table"
+  value       = aws_dynamodb_table.dashboards.arn
+}
+
+output "review_analytics_table_arn" {
+  description = "ARN of the narrow review analytics table"
+  value       = aws_dynamodb_table.review_analytics.arn
+}
+
+output "recent_activity_table_arn" {
+  description = "ARN of the recent-activity buffers table"
+  value       = aws_dynamodb_table.recent_activity.arn
+}
+
+output "topic_sketches_table_arn" {
+  description = "ARN of the topic sketches table"
+  value       = aws_dynamodb_table.topic_sketches.arn
+}
+
+output "aspect_matrix_table_arn" {
+  description = "ARN of the aspect matrix table"
+  value       = aws_dynamodb_table.aspect_matrix.arn
+}
+
+output "search_index_table_arn" {
+  description = "ARN of the search index table"
+  value       = aws_dynamodb_table.search_index.arn
+}
+
+output "near_duplicates_table_arn" {
+  description = "ARN of the near-duplicate signatures table"
+  value       = aws_dynamodb_table.near_duplicates.arn
+}
+
+output "ai_usage_table_arn" {
+  description = "ARN of the Bedrock usage roll-up table"
+  value       = aws_dynamodb_table.ai_usage.arn
+}
+
+# --- Stream ARNs ---
 
 output "feedback_table_stream_arn" {
   description = "Stream ARN of the feedback table"
   value       = aws_dynamodb_table.feedback.stream_arn
 }
+
+output "review_links_table_stream_arn" {
+  description = "Stream ARN of the review links table"
+  value       = aws_dynamodb_table.review_links.stream_arn
+}
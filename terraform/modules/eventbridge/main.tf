@@ -1,6 +1,8 @@
 # =============================================================================
 # PART A — DynamoDB Streams → AI Processor Lambda trigger
-# Fires on every new review INSERT so Bedrock can analyse sentiment
+# Fires on every new review INSERT so Bedrock can analyse sentiment. Bulk
+# imports (aiLane = "low") are left to the SQS low-priority lane (PART A3);
+# the filters are ORed, so a review without aiLane still matches the first.
 # =============================================================================
 resource "aws_lambda_event_source_mapping" "feedback_stream" {
   event_source_arn  = var.feedback_table_stream_arn
@@ -12,19 +14,127 @@ resource "aws_lambda_event_source_mapping" "feedback_stream" {
     filter {
       pattern = jsonencode({
         eventName = ["INSERT"]
+        dynamodb  = { NewImage = { aiLane = { S = [{ exists = false }] } } }
+      })
+    }
+    filter {
+      pattern = jsonencode({
+        eventName = ["INSERT"]
+        dynamodb  = { NewImage = { aiLane = { S = [{ "anything-but" = ["low"] }] } } }
+      })
+    }
+  }
+}
+
+# =============================================================================
+# PART A2 — DynamoDB Streams (review-links) → Link-stats reconciler
+# Counts link writes that bypassed the handlers' transactional counters
+# =============================================================================
+resource "aws_lambda_event_source_mapping" "review_links_stream" {
+  event_source_arn                   = var.review_links_table_stream_arn
+  function_name                      = var.link_stats_reconciler_function_arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+
+  filter_criteria {
+    filter {
+      pattern = jsonencode({
+        eventName = ["INSERT", "MODIFY"]
       })
     }
   }
 }
 
 # =============================================================================
-# PART B — EventBridge rule for hourly batch summary (future use)
+# PART A2b — DynamoDB Streams (feedback) → Analytics projector
+# Every insert, edit and TTL removal, so the narrow review-analytics table
+# mirrors the feedback table. A failing batch is split in half and retried,
+# down to the record that fails; that one is recorded on the failures queue
+# after its retries so one bad record cannot hold the shard for 24 hours.
+# =============================================================================
+resource "aws_lambda_event_source_mapping" "feedback_analytics_stream" {
+  event_source_arn                   = var.feedback_table_stream_arn
+  function_name                      = var.analytics_projector_function_arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 5
+  bisect_batch_on_function_error     = true
+
+  destination_config {
+    on_failure {
+      destination_arn = var.analytics_projector_failures_queue_arn
+    }
+  }
+}
+
+# =============================================================================
+# PART A3 — SQS low-priority lane → AI Processor
+# Bulk-imported reviews; capped concurrency leaves Bedrock headroom for live
+# reviews arriving on the feedback stream. Messages whose reviews Bedrock
+# throttled are reported back as failures, so SQS redelivers them (and after
+# maxReceiveCount moves them to the DLQ) instead of deleting them.
+# =============================================================================
+resource "aws_lambda_event_source_mapping" "ai_low_priority" {
+  event_source_arn                   = var.ai_low_priority_queue_arn
+  function_name                      = var.ai_processor_function_arn
+  batch_size                         = 4
+  maximum_batching_window_in_seconds = 30
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  scaling_config {
+    maximum_concurrency = 2
+  }
+}
+
+# =============================================================================
+# PART A4 — S3 imports/ uploads → Review Import Lambda
+# =============================================================================
+resource "aws_lambda_permission" "allow_s3_imports" {
+  statement_id  = "AllowS3ImportsInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = var.review_import_function_arn
+  principal     = "s3.amazonaws.com"
+  source_arn    = var.imports_bucket_arn
+}
+
+resource "aws_s3_bucket_notification" "imports" {
+  bucket = var.imports_bucket_id
+
+  lambda_function {
+    lambda_function_arn = var.review_import_function_arn
+    events              = ["s3:ObjectCreated:*"]
+    filter_prefix       = "imports/"
+    filter_suffix       = ".csv"
+  }
+
+  lambda_function {
+    lambda_function_arn = var.review_import_function_arn
+    events              = ["s3:ObjectCreated:*"]
+    filter_prefix       = "imports/"
+    filter_suffix       = ".ndjson"
+  }
+
+  lambda_function {
+    lambda_function_arn = var.review_import_function_arn
+    events              = ["s3:ObjectCreated:*"]
+    filter_prefix       = "imports/"
+    filter_suffix       = ".jsonl"
+  }
+
+  depends_on = [aws_lambda_permission.allow_s3_imports]
+}
+
+# =============================================================================
+# PART B — Hourly EventBridge rule
+# Rebuilds stale pre-built dashboards (get-insights, {"action": "materialize"})
 # =============================================================================
 resource "aws_cloudwatch_event_rule" "new_review" {
   name                = "${var.project_name}-new-review"
-  description         = "Hourly batch summary trigger for AI processor (enable when needed)"
+  description         = "Hourly dashboard materialization"
   schedule_expression = "rate(1 hour)"
-  state               = "DISABLED"
+  state               = "ENABLED"
 
   tags = {
     Project     = var.project_name
@@ -32,16 +142,17 @@ resource "aws_cloudwatch_event_rule" "new_review" {
   }
 }
 
-resource "aws_cloudwatch_event_target" "ai_processor" {
+resource "aws_cloudwatch_event_target" "dashboard_materializer" {
   rule      = aws_cloudwatch_event_rule.new_review.name
-  target_id = "${var.project_name}-ai-processor"
-  arn       = var.ai_processor_function_arn
+  target_id = "${var.project_name}-dashboard-materializer"
+  arn       = var.get_insights_function_arn
+  input     = jsonencode({ action = "materialize" })
 }
 
-resource "aws_lambda_permission" "allow_eventbridge" {
-  statement_id  = "AllowEventBridgeInvoke"
+resource "aws_lambda_permission" "allow_eventbridge_materializer" {
+  statement_id  = "AllowEventBridgeMaterialize"
   action        = "lambda:InvokeFunction"
-  function_name = var.ai_processor_function_arn
+  function_name = var.get_insights_function_arn
   principal     = "events.amazonaws.com"
   source_arn    = aws_cloudwatch_event_rule.new_review.arn
 }
@@ -17,3 +17,48 @@ variable "ai_processor_function_arn" {
   description = "ARN of the AI processor Lambda function"
   type        = string
 }
+
+variable "review_links_table_stream_arn" {
+  description = "ARN of the DynamoDB Streams for the review links table"
+  type        = string
+}
+
+variable "link_stats_reconciler_function_arn" {
+  description = "ARN of the link stats reconciler Lambda function"
+  type        = string
+}
+
+variable "analytics_projector_function_arn" {
+  description = "ARN of the analytics projector Lambda function"
+  type        = string
+}
+
+variable "analytics_projector_failures_queue_arn" {
+  description = "ARN of the SQS queue recording stream batches the analytics projector gave up on"
+  type        = string
+}
+
+variable "ai_low_priority_queue_arn" {
+  description = "ARN of the low-priority AI analysis SQS queue"
+  type        = string
+}
+
+variable "review_import_function_arn" {
+  description = "ARN of the review import Lambda function"
+  type        = string
+}
+
+variable "imports_bucket_id" {
+  description = "ID of the bulk review imports S3 bucket"
+  type        = string
+}
+
+variable "imports_bucket_arn" {
+  description = "ARN of the bulk review imports S3 bucket"
+  type        = string
+}
+
+variable "get_insights_function_arn" {
+  description = "ARN of the get-insights Lambda function (dashboard materializer)"
+  type        = string
+}
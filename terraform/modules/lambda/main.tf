@@ -1,29 +1,160 @@
 # =============================================================================
 # ZIP archives for Lambda deployment packages
+# Each package = the function's own *.py files + backend/shared/*.py, flat at
+# the zip root so handlers can `import link_counters` etc. directly.
 # =============================================================================
 
+locals {
+  functions_dir = "${path.module}/../../../backend/functions"
+  shared_dir    = "${path.module}/../../../backend/shared"
+  shared_files  = fileset(local.shared_dir, "*.py")
+}
+
 data "archive_file" "submit_review" {
   type        = "zip"
-  source_dir  = "${path.module}/../../../backend/functions/submit_review"
   output_path = "${path.module}/zip/submit_review.zip"
+
+  dynamic "source" {
+    for_each = fileset("${local.functions_dir}/submit_review", "*.py")
+    content {
+      content  = file("${local.functions_dir}/submit_review/${source.value}")
+      filename = source.value
+    }
+  }
+
+  dynamic "source" {
+    for_each = local.shared_files
+    content {
+      content  = file("${local.shared_dir}/${source.value}")
+      filename = source.value
+    }
+  }
 }
 
 data "archive_file" "get_insights" {
   type        = "zip"
-  source_dir  = "${path.module}/../../../backend/functions/get_insights"
   output_path = "${path.module}/zip/get_insights.zip"
+
+  dynamic "source" {
+    for_each = fileset("${local.functions_dir}/get_insights", "*.py")
+    content {
+      content  = file("${local.functions_dir}/get_insights/${source.value}")
+      filename = source.value
+    }
+  }
+
+  dynamic "source" {
+    for_each = local.shared_files
+    content {
+      content  = file("${local.shared_dir}/${source.value}")
+      filename = source.value
+    }
+  }
 }
 
 data "archive_file" "auth_otp" {
   type        = "zip"
-  source_dir  = "${path.module}/../../../backend/functions/auth_otp"
   output_path = "${path.module}/zip/auth_otp.zip"
+
+  dynamic "source" {
+    for_each = fileset("${local.functions_dir}/auth_otp", "*.py")
+    content {
+      content  = file("${local.functions_dir}/auth_otp/${source.value}")
+      filename = source.value
+    }
+  }
+
+  dynamic "source" {
+    for_each = local.shared_files
+    content {
+      content  = file("${local.shared_dir}/${source.value}")
+      filename = source.value
+    }
+  }
 }
 
 data "archive_file" "ai_processor" {
   type        = "zip"
-  source_dir  = "${path.module}/../../../backend/functions/ai_processor"
   output_path = "${path.module}/zip/ai_processor.zip"
+
+  dynamic "source" {
+    for_each = fileset("${local.functions_dir}/ai_processor", "*.py")
+    content {
+      content  = file("${local.functions_dir}/ai_processor/${source.value}")
+      filename = source.value
+    }
+  }
+
+  dynamic "source" {
+    for_each = local.shared_files
+    content {
+      content  = file("${local.shared_dir}/${source.value}")
+      filename = source.value
+    }
+  }
+}
+
+data "archive_file" "link_stats_reconciler" {
+  type        = "zip"
+  output_path = "${path.module}/zip/link_stats_reconciler.zip"
+
+  dynamic "source" {
+    for_each = fileset("${local.functions_dir}/link_stats_reconciler", "*.py")
+    content {
+      content  = file("${local.functions_dir}/link_stats_reconciler/${source.value}")
+      filename = source.value
+    }
+  }
+
+  dynamic "source" {
+    for_each = local.shared_files
+    content {
+      content  = file("${local.shared_dir}/${source.value}")
+      filename = source.value
+    }
+  }
+}
+
+data "archive_file" "analytics_projector" {
+  type        = "zip"
+  output_path = "${path.module}/zip/analytics_projector.zip"
+
+  dynamic "source" {
+    for_each = fileset("${local.functions_dir}/analytics_projector", "*.py")
+    content {
+      content  = file("${local.functions_dir}/analytics_projector/${source.value}")
+      filename = source.value
+    }
+  }
+
+  dynamic "source" {
+    for_each = local.shared_files
+    content {
+      content  = file("${local.shared_dir}/${source.value}")
+      filename = source.value
+    }
+  }
+}
+
+data "archive_file" "review_import" {
+  type        = "zip"
+  output_path = "${path.module}/zip/review_import.zip"
+
+  dynamic "source" {
+    for_each = fileset("${local.functions_dir}/review_import", "*.py")
+    content {
+      content  = file("${local.functions_dir}/review_import/${source.value}")
+      filename = source.value
+    }
+  }
+
+  dynamic "source" {
+    for_each = local.shared_files
+    content {
+      content  = file("${local.shared_dir}/${source.value}")
+      filename = source.value
+    }
+  }
 }
 
 # =============================================================================
@@ -45,17 +176,19 @@ resource "aws_lambda_function" "submit_review" {
 
   environment {
     variables = {
-      DYNAMODB_TABLE_FEEDBACK = var.feedback_table_name
-      DYNAMODB_TABLE_USERS    = var.users_table_name
-      DYNAMODB_TABLE_PRODUCTS = var.products_table_name
-      DYNAMODB_TABLE_BRANDS   = var.brands_table_name
-      DYNAMODB_TABLE_LINKS    = var.links_table_name
-      REVIEW_LINKS_TABLE      = var.links_table_name
-      AWS_REGION_NAME         = "ca-central-1"
-      ENVIRONMENT             = var.environment
-      COGNITO_USER_POOL_ID    = var.cognito_user_pool_id
-      COGNITO_CLIENT_ID       = var.cognito_client_id
-      CLOUDFRONT_URL          = var.cloudfront_url
+      DYNAMODB_TABLE_FEEDBACK   = var.feedback_table_name
+      DYNAMODB_TABLE_USERS      = var.users_table_name
+      DYNAMODB_TABLE_PRODUCTS   = var.products_table_name
+      DYNAMODB_TABLE_BRANDS     = var.brands_table_name
+      DYNAMODB_TABLE_LINKS      = var.links_table_name
+      DYNAMODB_TABLE_LINK_STATS = var.link_stats_table_name
+      REVIEW_LINKS_TABLE        = var.links_table_name
+      AWS_REGION_NAME           = "ca-central-1"
+      ENVIRONMENT               = var.environment
+      XRAY_PATCH_MODULES        = var.xray_patch_modules
+      COGNITO_USER_POOL_ID      = var.cognito_user_pool_id
+      COGNITO_CLIENT_ID         = var.cognito_client_id
+      CLOUDFRONT_URL            = var.cloudfront_url
     }
   }
 
@@ -84,16 +217,37 @@ resource "aws_lambda_function" "get_insights" {
 
   environment {
     variables = {
-      DYNAMODB_TABLE_FEEDBACK = var.feedback_table_name
-      DYNAMODB_TABLE_USERS    = var.users_table_name
-      DYNAMODB_TABLE_PRODUCTS = var.products_table_name
-      DYNAMODB_TABLE_BRANDS   = var.brands_table_name
-      DYNAMODB_TABLE_LINKS    = var.links_table_name
-      AWS_REGION_NAME         = "ca-central-1"
-      ENVIRONMENT             = var.environment
-      COGNITO_USER_POOL_ID    = var.cognito_user_pool_id
-      COGNITO_CLIENT_ID       = var.cognito_client_id
-      CLOUDFRONT_URL          = var.cloudfront_url
+      DYNAMODB_TABLE_FEEDBACK        = var.feedback_table_name
+      DYNAMODB_TABLE_USERS           = var.users_table_name
+      DYNAMODB_TABLE_PRODUCTS        = var.products_table_name
+      DYNAMODB_TABLE_BRANDS          = var.brands_table_name
+      DYNAMODB_TABLE_LINKS           = var.links_table_name
+      DYNAMODB_TABLE_LINK_STATS      = var.link_stats_table_name
+      DYNAMODB_TABLE_DASHBOARDS      = var.dashboards_table_name
+      DYNAMODB_TABLE_ANALYTICS       = var.review_analytics_table_name
+      DYNAMODB_TABLE_RECENT_ACTIVITY = var.recent_activity_table_name
+      DYNAMODB_TABLE_TOPIC_SKETCHES  = var.topic_sketches_table_name
+      DYNAMODB_TABLE_ASPECT_MATRIX   = var.aspect_matrix_table_name
+      DYNAMODB_TABLE_SEARCH_INDEX    = var.search_index_table_name
+      AWS_REGION_NAME                = "ca-central-1"
+      ENVIRONMENT                    = var.environment
+      XRAY_PATCH_MODULES             = var.xray_patch_modules
+      COGNITO_USER_POOL_ID           = var.cognito_user_pool_id
+      COGNITO_CLIENT_ID              = var.cognito_client_id
+      CLOUDFRONT_URL                 = var.cloudfront_url
+      INSIGHTS_SECTION_BUDGET_MS     = var.insights_section_budget_ms
+      INSIGHTS_ANALYTICS_READS       = var.insights_analytics_reads
+      INSIGHTS_RECENT_BUFFERS        = var.insights_recent_buffers
+      INSIGHTS_TOPIC_SKETCHES        = var.insights_topic_sketches
+      INSIGHTS_ASPECT_MATRIX         = var.insights_aspect_matrix
+      INSIGHTS_SEARCH_INDEX          = var.insights_search_index
+      # stale documents are refreshed by invoking this function itself
+      DASHBOARD_MATERIALIZER_FUNCTION = "${var.project_name}-get-insights"
+      # and so are the per-brand shards of the overview (OVERVIEW_FANOUT=lambda)
+      OVERVIEW_FANOUT         = var.overview_fanout
+      OVERVIEW_SHARD_FUNCTION = "${var.project_name}-get-insights"
+      # section workers (8) plus fan-out invocations (16)
+      AWS_MAX_POOL_CONNECTIONS = "24"
     }
   }
 
@@ -122,17 +276,19 @@ resource "aws_lambda_function" "auth_otp" {
 
   environment {
     variables = {
-      DYNAMODB_TABLE_FEEDBACK = var.feedback_table_name
-      DYNAMODB_TABLE_USERS    = var.users_table_name
-      DYNAMODB_TABLE_PRODUCTS = var.products_table_name
-      DYNAMODB_TABLE_BRANDS   = var.brands_table_name
-      DYNAMODB_TABLE_LINKS    = var.links_table_name
-      SES_FROM_EMAIL          = var.ses_from_email
-      AWS_REGION_NAME         = "ca-central-1"
-      ENVIRONMENT             = var.environment
-      COGNITO_USER_POOL_ID    = var.cognito_user_pool_id
-      COGNITO_CLIENT_ID       = var.cognito_client_id
-      CLOUDFRONT_URL          = var.cloudfront_url
+      DYNAMODB_TABLE_FEEDBACK   = var.feedback_table_name
+      DYNAMODB_TABLE_USERS      = var.users_table_name
+      DYNAMODB_TABLE_PRODUCTS   = var.products_table_name
+      DYNAMODB_TABLE_BRANDS     = var.brands_table_name
+      DYNAMODB_TABLE_LINKS      = var.links_table_name
+      DYNAMODB_TABLE_LINK_STATS = var.link_stats_table_name
+      SES_FROM_EMAIL            = var.ses_from_email
+      AWS_REGION_NAME           = "ca-central-1"
+      ENVIRONMENT               = var.environment
+      XRAY_PATCH_MODULES        = var.xray_patch_modules
+      COGNITO_USER_POOL_ID      = var.cognito_user_pool_id
+      COGNITO_CLIENT_ID         = var.cognito_client_id
+      CLOUDFRONT_URL            = var.cloudfront_url
     }
   }
 
@@ -161,17 +317,138 @@ resource "aws_lambda_function" "ai_processor" {
 
   environment {
     variables = {
-      DYNAMODB_TABLE_FEEDBACK = var.feedback_table_name
-      DYNAMODB_TABLE_USERS    = var.users_table_name
-      DYNAMODB_TABLE_PRODUCTS = var.products_table_name
-      DYNAMODB_TABLE_BRANDS   = var.brands_table_name
-      DYNAMODB_TABLE_LINKS    = var.links_table_name
-      BEDROCK_MODEL_ID        = "anthropic.claude-v2"
-      AWS_REGION_NAME         = "ca-central-1"
-      ENVIRONMENT             = var.environment
-      COGNITO_USER_POOL_ID    = var.cognito_user_pool_id
-      COGNITO_CLIENT_ID       = var.cognito_client_id
-      CLOUDFRONT_URL          = var.cloudfront_url
+      DYNAMODB_TABLE_FEEDBACK        = var.feedback_table_name
+      DYNAMODB_TABLE_USERS           = var.users_table_name
+      DYNAMODB_TABLE_PRODUCTS        = var.products_table_name
+      DYNAMODB_TABLE_BRANDS          = var.brands_table_name
+      DYNAMODB_TABLE_LINKS           = var.links_table_name
+      DYNAMODB_TABLE_LINK_STATS      = var.link_stats_table_name
+      DYNAMODB_TABLE_NEAR_DUPLICATES = var.near_duplicates_table_name
+      DYNAMODB_TABLE_AI_USAGE        = var.ai_usage_table_name
+      BEDROCK_MODEL_ID               = "anthropic.claude-v2"
+      AWS_REGION_NAME                = "ca-central-1"
+      ENVIRONMENT                    = var.environment
+      XRAY_PATCH_MODULES             = var.xray_patch_modules
+      COGNITO_USER_POOL_ID           = var.cognito_user_pool_id
+      COGNITO_CLIENT_ID              = var.cognito_client_id
+      CLOUDFRONT_URL                 = var.cloudfront_url
+      AI_NEAR_DUPLICATES             = var.ai_near_duplicates
+      AI_MODEL_ROUTING               = var.ai_model_routing
+      BEDROCK_MODEL_FAST             = var.bedrock_model_fast
+      BEDROCK_MODEL_LARGE            = var.bedrock_model_large
+      # brand/product dashboards are rebuilt when their reviews change
+      DASHBOARD_MATERIALIZER_FUNCTION = aws_lambda_function.get_insights.function_name
+    }
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# FUNCTION 5: reviewpulse-link-stats-reconciler (review-links stream consumer)
+# =============================================================================
+resource "aws_lambda_function" "link_stats_reconciler" {
+  function_name    = "${var.project_name}-link-stats-reconciler"
+  role             = var.lambda_role_arn
+  handler          = "handler.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 300
+  memory_size      = 256
+  filename         = data.archive_file.link_stats_reconciler.output_path
+  source_code_hash = data.archive_file.link_stats_reconciler.output_base64sha256
+
+  tracing_config {
+    mode = "Active"
+  }
+
+  environment {
+    variables = {
+      DYNAMODB_TABLE_LINKS      = var.links_table_name
+      DYNAMODB_TABLE_LINK_STATS = var.link_stats_table_name
+      AWS_REGION_NAME           = "ca-central-1"
+      ENVIRONMENT               = var.environment
+      XRAY_PATCH_MODULES        = var.xray_patch_modules
+    }
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# FUNCTION 6: reviewpulse-review-import (bulk historical review import)
+# Re-invokes itself with the S3 checkpoint when a file outlives one run
+# =============================================================================
+resource "aws_lambda_function" "review_import" {
+  function_name    = "${var.project_name}-review-import"
+  role             = var.lambda_role_arn
+  handler          = "handler.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 900
+  memory_size      = 1024
+  filename         = data.archive_file.review_import.output_path
+  source_code_hash = data.archive_file.review_import.output_base64sha256
+
+  tracing_config {
+    mode = "Active"
+  }
+
+  environment {
+    variables = {
+      DYNAMODB_TABLE_FEEDBACK   = var.feedback_table_name
+      AI_LOW_PRIORITY_QUEUE_URL = var.ai_low_priority_queue_url
+      IMPORT_WORKERS            = "8"
+      AWS_REGION_NAME           = "ca-central-1"
+      ENVIRONMENT               = var.environment
+      XRAY_PATCH_MODULES        = var.xray_patch_modules
+    }
+  }
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# FUNCTION 7: reviewpulse-analytics-projector (feedback stream consumer)
+# Keeps the narrow review-analytics table, the recent-activity buffers, the
+# topic sketches, the aspect matrices and the search index in step with the
+# feedback table
+# =============================================================================
+resource "aws_lambda_function" "analytics_projector" {
+  function_name    = "${var.project_name}-analytics-projector"
+  role             = var.lambda_role_arn
+  handler          = "handler.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 300
+  memory_size      = 256
+  filename         = data.archive_file.analytics_projector.output_path
+  source_code_hash = data.archive_file.analytics_projector.output_base64sha256
+
+  tracing_config {
+    mode = "Active"
+  }
+
+  environment {
+    variables = {
+      DYNAMODB_TABLE_FEEDBACK        = var.feedback_table_name
+      DYNAMODB_TABLE_ANALYTICS       = var.review_analytics_table_name
+      DYNAMODB_TABLE_RECENT_ACTIVITY = var.recent_activity_table_name
+      DYNAMODB_TABLE_TOPIC_SKETCHES  = var.topic_sketches_table_name
+      DYNAMODB_TABLE_ASPECT_MATRIX   = var.aspect_matrix_table_name
+      DYNAMODB_TABLE_SEARCH_INDEX    = var.search_index_table_name
+      DYNAMODB_TABLE_LINK_STATS      = var.link_stats_table_name
+      AWS_REGION_NAME                = "ca-central-1"
+      ENVIRONMENT                    = var.environment
+      XRAY_PATCH_MODULES             = var.xray_patch_modules
+      # dashboards of the brands and products whose reviews changed are rebuilt
+      DASHBOARD_MATERIALIZER_FUNCTION = aws_lambda_function.get_insights.function_name
     }
   }
 
@@ -20,6 +20,21 @@ output "ai_processor_function_arn" {
   value       = aws_lambda_function.ai_processor.arn
 }
 
+output "link_stats_reconciler_function_arn" {
+  description = "ARN of the link-stats-reconciler Lambda function"
+  value       = aws_lambda_function.link_stats_reconciler.arn
+}
+
+output "review_import_function_arn" {
+  description = "ARN of the review-import Lambda function"
+  value       = aws_lambda_function.review_import.arn
+}
+
+output "analytics_projector_function_arn" {
+  description = "ARN of the analytics-projector Lambda function"
+  value       = aws_lambda_function.analytics_projector.arn
+}
+
 # --- Function Names ---
 
 output "submit_review_function_name" {
@@ -41,3 +56,18 @@ output "ai_processor_function_name" {
   description = "Name of the ai-processor Lambda function"
   value       = aws_lambda_function.ai_processor.function_name
 }
+
+output "link_stats_reconciler_function_name" {
+  description = "Name of the link-stats-reconciler Lambda function"
+  value       = aws_lambda_function.link_stats_reconciler.function_name
+}
+
+output "review_import_function_name" {
+  description = "Name of the review-import Lambda function"
+  value       = aws_lambda_function.review_import.function_name
+}
+
+output "analytics_projector_function_name" {
+  description = "Name of the analytics-projector Lambda function"
+  value       = aws_lambda_function.analytics_projector.function_name
+}
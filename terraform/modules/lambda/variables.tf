@@ -38,6 +38,56 @@ variable "links_table_name" {
   type        = string
 }
 
+variable "link_stats_table_name" {
+  description = "Name of the link stats counters DynamoDB table"
+  type        = string
+}
+
+variable "dashboards_table_name" {
+  description = "Name of the pre-built dashboard documents DynamoDB table"
+  type        = string
+}
+
+variable "review_analytics_table_name" {
+  description = "Name of the narrow review analytics DynamoDB table"
+  type        = string
+}
+
+variable "recent_activity_table_name" {
+  description = "Name of the recent-activity buffers DynamoDB table"
+  type        = string
+}
+
+variable "topic_sketches_table_name" {
+  description = "Name of the topic sketches DynamoDB table"
+  type        = string
+}
+
+variable "aspect_matrix_table_name" {
+  description = "Name of the aspect matrix DynamoDB table"
+  type        = string
+}
+
+variable "search_index_table_name" {
+  description = "Name of the search index DynamoDB table"
+  type        = string
+}
+
+variable "near_duplicates_table_name" {
+  description = "Name of the near-duplicate signatures DynamoDB table"
+  type        = string
+}
+
+variable "ai_usage_table_name" {
+  description = "Name of the Bedrock usage roll-up DynamoDB table"
+  type        = string
+}
+
+variable "ai_low_priority_queue_url" {
+  description = "URL of the low-priority AI analysis SQS queue"
+  type        = string
+}
+
 variable "ses_from_email" {
   description = "Verified SES sender email address"
   type        = string
@@ -57,3 +107,80 @@ variable "cloudfront_url" {
   description = "CloudFront distribution URL"
   type        = string
 }
+
+variable "xray_patch_modules" {
+  description = "Comma-separated aws_xray_sdk modules the handlers patch at init (empty disables patching)"
+  type        = string
+  default     = "botocore"
+}
+
+variable "insights_section_budget_ms" {
+  description = "How long get-insights waits for dashboard sections before returning the rest as pending"
+  type        = number
+  default     = 800
+}
+
+variable "overview_fanout" {
+  description = "How get-insights builds the superadmin overview: off (one invocation) or lambda (one invocation per brand)"
+  type        = string
+  default     = "off"
+
+  validation {
+    condition     = contains(["off", "lambda"], var.overview_fanout)
+    error_message = "overview_fanout must be off or lambda (process pools do not run on Lambda)."
+  }
+}
+
+variable "insights_analytics_reads" {
+  description = "Whether get-insights aggregates from the review-analytics table (\"true\") or the feedback GSIs (\"false\"); set \"true\" only after the analytics-projector rebuild has backfilled the table"
+  type        = string
+  default     = "false"
+}
+
+variable "insights_recent_buffers" {
+  description = "Whether get-insights reads its recent lists from the recent-activity buffers (\"true\") or sorts the reviews (\"false\"); set \"true\" only after the analytics-projector rebuild has backfilled them"
+  type        = string
+  default     = "false"
+}
+
+variable "insights_topic_sketches" {
+  description = "Whether get-insights reads its top topics from the topic sketches (\"true\") or counts the reviews (\"false\"); set \"true\" only after the analytics-projector rebuild (with recount, if the analytics table was already backfilled) has filled them"
+  type        = string
+  default     = "false"
+}
+
+variable "insights_aspect_matrix" {
+  description = "Whether get-insights answers /aspects from the aspect matrices (\"true\") or counts the product's reviews (\"false\"); set \"true\" only after the analytics-projector rebuild (with recount, if the analytics table was already backfilled) has filled them"
+  type        = string
+  default     = "false"
+}
+
+variable "insights_search_index" {
+  description = "Whether get-insights answers /search from the search index (\"true\") or matches the text of the brand's reviews (\"false\"); set \"true\" only after the analytics-projector rebuild has filled it"
+  type        = string
+  default     = "false"
+}
+
+variable "ai_near_duplicates" {
+  description = "Whether ai-processor reuses the analysis of a near-duplicate review of the same product (\"true\") or sends every review to Bedrock (\"false\")"
+  type        = string
+  default     = "true"
+}
+
+variable "ai_model_routing" {
+  description = "Whether ai-processor picks a Bedrock model per call by task and input size, failing over when one is throttled (\"true\"), or sends every call to BEDROCK_MODEL_ID (\"false\")"
+  type        = string
+  default     = "true"
+}
+
+variable "bedrock_model_fast" {
+  description = "Bedrock model for short single-review analyses when model routing is on"
+  type        = string
+  default     = "anthropic.claude-3-haiku-20240307-v1:0"
+}
+
+variable "bedrock_model_large" {
+  description = "Bedrock model for product summaries when model routing is on; empty keeps them on BEDROCK_MODEL_ID"
+  type        = string
+  default     = ""
+}
@@ -113,3 +113,41 @@ resource "aws_s3_bucket_policy" "frontend_public_read" {
   })
 }
 
+# =============================================================================
+# BUCKET 3: reviewpulse-imports — private drop zone for bulk review imports
+# Upload to imports/<brandId>/<file>.csv|.ndjson; checkpoints/ holds resume state
+# =============================================================================
+resource "aws_s3_bucket" "imports" {
+  bucket = "${var.project_name}-imports-${random_id.suffix.hex}"
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+resource "aws_s3_bucket_lifecycle_configuration" "imports" {
+  bucket = aws_s3_bucket.imports.id
+
+  rule {
+    id     = "expire-checkpoints"
+    status = "Enabled"
+
+    filter {
+      prefix = "checkpoints/"
+    }
+
+    expiration {
+      days = 30
+    }
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "imports" {
+  bucket = aws_s3_bucket.imports.id
+
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
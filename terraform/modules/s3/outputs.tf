@@ -23,3 +23,18 @@ output "frontend_bucket_website_endpoint" {
   value       = aws_s3_bucket_website_configuration.frontend.website_endpoint
 }
 
+
+output "imports_bucket_name" {
+  description = "Name of the bulk review imports S3 bucket"
+  value       = aws_s3_bucket.imports.bucket
+}
+
+output "imports_bucket_arn" {
+  description = "ARN of the bulk review imports S3 bucket"
+  value       = aws_s3_bucket.imports.arn
+}
+
+output "imports_bucket_id" {
+  description = "ID of the bulk review imports S3 bucket"
+  value       = aws_s3_bucket.imports.id
+}
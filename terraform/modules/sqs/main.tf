@@ -0,0 +1,47 @@
+# =============================================================================
+# QUEUE 1: reviewpulse-ai-low-priority — background AI analysis lane
+# Bulk-imported reviews are queued here instead of going through the feedback
+# stream, so a large import cannot starve live reviews of Bedrock capacity.
+# =============================================================================
+resource "aws_sqs_queue" "ai_low_priority_dlq" {
+  name                      = "${var.project_name}-ai-low-priority-dlq"
+  message_retention_seconds = 1209600 # 14 days
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+resource "aws_sqs_queue" "ai_low_priority" {
+  name                       = "${var.project_name}-ai-low-priority"
+  visibility_timeout_seconds = 360 # 6x the ai-processor timeout
+  message_retention_seconds  = 1209600
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.ai_low_priority_dlq.arn
+    maxReceiveCount     = 5
+  })
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+# =============================================================================
+# QUEUE 2: reviewpulse-analytics-projector-failures — stream batches given up on
+# The feedback stream's analytics mapping bisects a failing batch and retries
+# it; what still fails is recorded here (shard and sequence range, not the
+# records) so the shard moves on. The projector's rebuild then fills in the
+# reviews the batch held; deletions it held are not replayed.
+# =============================================================================
+resource "aws_sqs_queue" "analytics_projector_failures" {
+  name                      = "${var.project_name}-analytics-projector-failures"
+  message_retention_seconds = 1209600 # 14 days
+
+  tags = {
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
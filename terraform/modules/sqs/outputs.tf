@@ -0,0 +1,14 @@
+output "ai_low_priority_queue_url" {
+  description = "URL of the low-priority AI analysis queue"
+  value       = aws_sqs_queue.ai_low_priority.url
+}
+
+output "ai_low_priority_queue_arn" {
+  description = "ARN of the low-priority AI analysis queue"
+  value       = aws_sqs_queue.ai_low_priority.arn
+}
+
+output "analytics_projector_failures_queue_arn" {
+  description = "ARN of the queue recording feedback-stream batches the analytics projector gave up on"
+  value       = aws_sqs_queue.analytics_projector_failures.arn
+}
@@ -23,6 +23,11 @@ output "exports_bucket" {
   value       = module.s3.exports_bucket_name
 }
 
+output "imports_bucket" {
+  description = "Name of the S3 bucket for bulk review imports (upload to imports/<brandId>/)"
+  value       = module.s3.imports_bucket_name
+}
+
 output "cloudwatch_dashboard" {
   description = "Name of the CloudWatch Operations dashboard"
   value       = module.xray.dashboard_name
@@ -0,0 +1,134 @@
+"""
+ReviewPlus — synthetic review generator
+Shared by seed_data.py (demo data) and seed_load.py (load-test datasets).
+No AWS clients are created here, so worker processes can import it cheaply.
+"""
+
+import random
+from datetime import datetime
+from decimal import Decimal
+
+
+def feb_date(day, hour=10, minute=0, second=0):
+    """Return an ISO timestamp for a day in February 2025."""
+    return datetime(2025, 2, day, hour, minute, second).isoformat()
+
+
+def random_feb_ts(rng=random):
+    """Random ISO timestamp between Feb 1–21, 2025."""
+    day = rng.randint(1, 21)
+    hour = rng.randint(6, 23)
+    minute = rng.randint(0, 59)
+    second = rng.randint(0, 59)
+    return feb_date(day, hour, minute, second)
+
+
+# --- Random review templates ---
+
+FIRST_NAMES = [
+    "Aarav", "Ananya", "Arjun", "Diya", "Ishaan", "Kavya", "Rohan",
+    "Meera", "Vivaan", "Saanvi", "Aditya", "Riya", "Kabir", "Nisha",
+    "Yash", "Pooja", "Dev", "Tanya", "Nikhil", "Simran", "Harsh",
+    "Neha", "Akash", "Shreya", "Kunal", "Divya",
+]
+LAST_NAMES = [
+    "Kumar", "Sharma", "Gupta", "Verma", "Reddy", "Iyer", "Nair",
+    "Desai", "Chopra", "Malhotra", "Thakur", "Banerjee", "Das", "Jain",
+    "Bhat", "Kapoor", "Saxena", "Mishra", "Pandey", "Agarwal",
+]
+EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
+
+POSITIVE_MSGS = [
+    "Absolutely love this product! Exceeded my expectations in every way.",
+    "Great quality for the price. Very happy with my purchase.",
+    "Fast delivery and product works exactly as described. Highly recommend!",
+    "This is my second purchase from this brand. Consistently excellent quality.",
+    "Perfect gift for my family member. They absolutely loved it!",
+    "The build quality is solid and it feels premium. Worth every penny.",
+    "Amazing product! My friends are all asking where I bought it.",
+    "Sleek design and works flawlessly. Could not be happier.",
+    "Five stars well deserved. Will definitely buy from this brand again.",
+    "Impressed with the packaging and product quality. Top notch!",
+]
+NEUTRAL_MSGS = [
+    "Product is okay. Does what it says but nothing extraordinary.",
+    "Decent product for the price range. Could be improved in some areas.",
+    "Average experience. Works fine but expected a bit more polish.",
+    "It is fine for daily use. Not amazing but gets the job done.",
+    "Mixed feelings. Some features are great, others need improvement.",
+]
+NEGATIVE_MSGS = [
+    "Disappointed with the quality. Does not match the product images.",
+    "Product broke after two weeks of normal use. Very poor build quality.",
+    "Not worth the price. Would not recommend to others.",
+    "Delivery was late and product had minor defects. Expected better.",
+    "Below average product. The competition offers much better alternatives.",
+]
+
+POSITIVE_TOPICS = [
+    ["quality", "value"], ["design", "performance"], ["packaging", "delivery"],
+    ["durability", "comfort"], ["ease of use", "features"],
+]
+NEUTRAL_TOPICS = [
+    ["value", "performance"], ["design", "durability"], ["features", "price"],
+]
+NEGATIVE_TOPICS = [
+    ["quality", "durability"], ["delivery", "packaging"], ["price", "build quality"],
+]
+
+
+def _gen_random_review(idx: int, product: dict, rng=random, ts: str | None = None) -> dict:
+    """Generate a random review for a given product.
+
+    ``rng`` is the random source (a seeded ``random.Random`` makes the output
+    reproducible) and ``ts`` overrides the default February 2025 timestamp.
+    """
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    name = f"{first} {last}"
+    domain = rng.choice(EMAIL_DOMAINS)
+    email = f"{first.lower()}.{last.lower()}@{domain}"
+
+    # Weighted: 55% positive, 25% neutral, 20% negative
+    roll = rng.random()
+    if roll < 0.55:
+        rating = rng.choice([4, 5])
+        message = rng.choice(POSITIVE_MSGS)
+        sentiment = "positive"
+        topics = rng.choice(POSITIVE_TOPICS)
+        confidence = round(rng.uniform(0.80, 0.98), 2)
+    elif roll < 0.80:
+        rating = 3
+        message = rng.choice(NEUTRAL_MSGS)
+        sentiment = "neutral"
+        topics = rng.choice(NEUTRAL_TOPICS)
+        confidence = round(rng.uniform(0.65, 0.85), 2)
+    else:
+        rating = rng.choice([1, 2])
+        message = rng.choice(NEGATIVE_MSGS)
+        sentiment = "negative"
+        topics = rng.choice(NEGATIVE_TOPICS)
+        confidence = round(rng.uniform(0.70, 0.92), 2)
+
+    ts = ts or random_feb_ts(rng)
+
+    return {
+        "FeedbackId": f"fb-seed-{idx:03d}",
+        "productId": product["productId"],
+        "brandId": product["brandId"],
+        "orderId": f"ORD-SEED-{idx:03d}",
+        "name": name,
+        "email": email,
+        "phone": f"+91-{rng.randint(7000000000, 9999999999)}",
+        "rating": Decimal(str(rating)),
+        "message": message,
+        "sentiment": sentiment,
+        "ai_confidence": str(confidence),
+        "topics": topics,
+        "summary": message[:60] + "...",
+        "pros": [topics[0]] if sentiment != "negative" else [],
+        "cons": [topics[-1]] if sentiment != "positive" else [],
+        "feature_requests": [],
+        "ai_processed_at": ts,
+        "timestamp": ts,
+    }
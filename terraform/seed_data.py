@@ -6,7 +6,6 @@ Tables: reviewpulse-brands, reviewpulse-products, reviewpulse-users,
 """
 
 import json
-import random
 import uuid
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
@@ -14,6 +13,8 @@ from decimal import Decimal
 import boto3
 import bcrypt
 
+from review_generator import _gen_random_review, feb_date
+
 # ---------------------------------------------------------------------------
 # Config
 # ---------------------------------------------------------------------------
@@ -37,24 +38,6 @@ links_tbl = dynamodb.Table("reviewpulse-review-links")
 NOW = datetime.now(timezone.utc)
 NOW_ISO = NOW.isoformat()
 
-# ---------------------------------------------------------------------------
-# Helpers
-# ---------------------------------------------------------------------------
-
-def feb_date(day, hour=10, minute=0, second=0):
-    """Return an ISO timestamp for a day in February 2025."""
-    return datetime(2025, 2, day, hour, minute, second).isoformat()
-
-
-def random_feb_ts():
-    """Random ISO timestamp between Feb 1–21, 2025."""
-    day = random.randint(1, 21)
-    hour = random.randint(6, 23)
-    minute = random.randint(0, 59)
-    second = random.randint(0, 59)
-    return feb_date(day, hour, minute, second)
-
-
 # ---------------------------------------------------------------------------
 # 1) Brands
 # ---------------------------------------------------------------------------
@@ -272,113 +255,6 @@ CURATED_REVIEWS = [
     },
 ]
 
-# --- Random review templates for the remaining 75 reviews ---
-
-FIRST_NAMES = [
-    "Aarav", "Ananya", "Arjun", "Diya", "Ishaan", "Kavya", "Rohan",
-    "Meera", "Vivaan", "Saanvi", "Aditya", "Riya", "Kabir", "Nisha",
-    "Yash", "Pooja", "Dev", "Tanya", "Nikhil", "Simran", "Harsh",
-    "Neha", "Akash", "Shreya", "Kunal", "Divya",
-]
-LAST_NAMES = [
-    "Kumar", "Sharma", "Gupta", "Verma", "Reddy", "Iyer", "Nair",
-    "Desai", "Chopra", "Malhotra", "Thakur", "Banerjee", "Das", "Jain",
-    "Bhat", "Kapoor", "Saxena", "Mishra", "Pandey", "Agarwal",
-]
-EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
-
-POSITIVE_MSGS = [
-    "Absolutely love this product! Exceeded my expectations in every way.",
-    "Great quality for the price. Very happy with my purchase.",
-    "Fast delivery and product works exactly as described. Highly recommend!",
-    "This is my second purchase from this brand. Consistently excellent quality.",
-    "Perfect gift for my family member. They absolutely loved it!",
-    "The build quality is solid and it feels premium. Worth every penny.",
-    "Amazing product! My friends are all asking where I bought it.",
-    "Sleek design and works flawlessly. Could not be happier.",
-    "Five stars well deserved. Will definitely buy from this brand again.",
-    "Impressed with the packaging and product quality. Top notch!",
-]
-NEUTRAL_MSGS = [
-    "Product is okay. Does what it says but nothing extraordinary.",
-    "Decent product for the price range. Could be improved in some areas.",
-    "Average experience. Works fine but expected a bit more polish.",
-    "It is fine for daily use. Not amazing but gets the job done.",
-    "Mixed feelings. Some features are great, others need improvement.",
-]
-NEGATIVE_MSGS = [
-    "Disappointed with the quality. Does not match the product images.",
-    "Product broke after two weeks of normal use. Very poor build quality.",
-    "Not worth the price. Would not recommend to others.",
-    "Delivery was late and product had minor defects. Expected better.",
-    "Below average product. The competition offers much better alternatives.",
-]
-
-POSITIVE_TOPICS = [
-    ["quality", "value"], ["design", "performance"], ["packaging", "delivery"],
-    ["durability", "comfort"], ["ease of use", "features"],
-]
-NEUTRAL_TOPICS = [
-    ["value", "performance"], ["design", "durability"], ["features", "price"],
-]
-NEGATIVE_TOPICS = [
-    ["quality", "durability"], ["delivery", "packaging"], ["price", "build quality"],
-]
-
-
-def _gen_random_review(idx: int, product: dict) -> dict:
-    """Generate a random review for a given product."""
-    first = random.choice(FIRST_NAMES)
-    last = random.choice(LAST_NAMES)
-    name = f"{first} {last}"
-    domain = random.choice(EMAIL_DOMAINS)
-    email = f"{first.lower()}.{last.lower()}@{domain}"
-
-    # Weighted: 55% positive, 25% neutral, 20% negative
-    roll = random.random()
-    if roll < 0.55:
-        rating = random.choice([4, 5])
-        message = random.choice(POSITIVE_MSGS)
-        sentiment = "positive"
-        topics = random.choice(POSITIVE_TOPICS)
-        confidence = round(random.uniform(0.80, 0.98), 2)
-    elif roll < 0.80:
-        rating = 3
-        message = random.choice(NEUTRAL_MSGS)
-        sentiment = "neutral"
-        topics = random.choice(NEUTRAL_TOPICS)
-        confidence = round(random.uniform(0.65, 0.85), 2)
-    else:
-        rating = random.choice([1, 2])
-        message = random.choice(NEGATIVE_MSGS)
-        sentiment = "negative"
-        topics = random.choice(NEGATIVE_TOPICS)
-        confidence = round(random.uniform(0.70, 0.92), 2)
-
-    ts = random_feb_ts()
-
-    return {
-        "FeedbackId": f"fb-seed-{idx:03d}",
-        "productId": product["productId"],
-        "brandId": product["brandId"],
-        "orderId": f"ORD-SEED-{idx:03d}",
-        "name": name,
-        "email": email,
-        "phone": f"+91-{random.randint(7000000000, 9999999999)}",
-        "rating": Decimal(str(rating)),
-        "message": message,
-        "sentiment": sentiment,
-        "ai_confidence": str(confidence),
-        "topics": topics,
-        "summary": message[:60] + "...",
-        "pros": [topics[0]] if sentiment != "negative" else [],
-        "cons": [topics[-1]] if sentiment != "positive" else [],
-        "feature_requests": [],
-        "ai_processed_at": ts,
-        "timestamp": ts,
-    }
-
-
 def generate_random_reviews(count: int = 75) -> list:
     """Generate `count` random reviews spread across all 7 products."""
     reviews = []
@@ -394,33 +270,37 @@ def generate_random_reviews(count: int = 75) -> list:
 
 def seed_brands():
     print("\n--- Seeding reviewpulse-brands ---")
-    for b in BRANDS:
-        brands_tbl.put_item(Item=b)
-        print(f"  + {b['brandId']}: {b['brandName']}")
+    with brands_tbl.batch_writer() as batch:
+        for b in BRANDS:
+            batch.put_item(Item=b)
+            print(f"  + {b['brandId']}: {b['brandName']}")
     print(f"  Total: {len(BRANDS)} brands")
 
 
 def seed_products():
     print("\n--- Seeding reviewpulse-products ---")
-    for p in PRODUCTS:
-        products_tbl.put_item(Item=p)
-        print(f"  + {p['productId']}: {p['productName']} ({p['brandId']})")
+    with products_tbl.batch_writer() as batch:
+        for p in PRODUCTS:
+            batch.put_item(Item=p)
+            print(f"  + {p['productId']}: {p['productName']} ({p['brandId']})")
     print(f"  Total: {len(PRODUCTS)} products")
 
 
 def seed_users():
     print("\n--- Seeding reviewpulse-users ---")
-    for u in USERS:
-        users_tbl.put_item(Item=u)
-        print(f"  + {u['userId']}: {u['email']} (role={u['role']})")
+    with users_tbl.batch_writer() as batch:
+        for u in USERS:
+            batch.put_item(Item=u)
+            print(f"  + {u['userId']}: {u['email']} (role={u['role']})")
     print(f"  Total: {len(USERS)} users")
 
 
 def seed_review_links():
     print("\n--- Seeding reviewpulse-review-links ---")
-    for link in REVIEW_LINKS:
-        links_tbl.put_item(Item=link)
-        print(f"  + {link['linkToken']} -> {link['customerEmail']}")
+    with links_tbl.batch_writer() as batch:
+        for link in REVIEW_LINKS:
+            batch.put_item(Item=link)
+            print(f"  + {link['linkToken']} -> {link['customerEmail']}")
     print(f"  Total: {len(REVIEW_LINKS)} review links")
     print(f"  Expires at: {datetime.fromtimestamp(EXPIRES_AT, tz=timezone.utc).isoformat()}")
 
@@ -429,17 +309,18 @@ def seed_feedback():
     print("\n--- Seeding reviewpulse-feedback ---")
 
     # 5 curated reviews for prod-001
-    print("  [Curated reviews for Wireless Earbuds Pro X1]")
-    for r in CURATED_REVIEWS:
-        feedback_tbl.put_item(Item=r)
-        print(f"    + {r['FeedbackId']}: {r['name']} — {r['sentiment']} "
-              f"({r['rating']}★) — {r['timestamp'][:10]}")
-
-    # 75 random reviews spread across all products
     random_reviews = generate_random_reviews(75)
-    print(f"  [Random reviews: {len(random_reviews)}]")
-    for r in random_reviews:
-        feedback_tbl.put_item(Item=r)
+    with feedback_tbl.batch_writer() as batch:
+        print("  [Curated reviews for Wireless Earbuds Pro X1]")
+        for r in CURATED_REVIEWS:
+            batch.put_item(Item=r)
+            print(f"    + {r['FeedbackId']}: {r['name']} — {r['sentiment']} "
+                  f"({r['rating']}★) — {r['timestamp'][:10]}")
+
+        # 75 random reviews spread across all products
+        print(f"  [Random reviews: {len(random_reviews)}]")
+        for r in random_reviews:
+            batch.put_item(Item=r)
 
     total = len(CURATED_REVIEWS) + len(random_reviews)
     print(f"  Total: {total} feedback reviews seeded")
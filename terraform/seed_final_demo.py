@@ -46,9 +46,10 @@ brands = [
     },
 ]
 
-for brand in brands:
-    brands_table.put_item(Item=brand)
-    print(f"Seeded brand: {brand['brandName']}")
+with brands_table.batch_writer() as batch:
+    for brand in brands:
+        batch.put_item(Item=brand)
+        print(f"Seeded brand: {brand['brandName']}")
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # SECTION 2 — Seed 4 Products (2 per brand)
@@ -87,9 +88,10 @@ products = [
     },
 ]
 
-for product in products:
-    products_table.put_item(Item=product)
-    print(f"Seeded product: {product['productName']}")
+with products_table.batch_writer() as batch:
+    for product in products:
+        batch.put_item(Item=product)
+        print(f"Seeded product: {product['productName']}")
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # SECTION 3 — Seed Reviews (17-20 Feb 2025)
@@ -608,12 +610,13 @@ reviews = [
     },
 ]
 
-for review in reviews:
-    feedback_table.put_item(Item=review)
-    print(
-        f"Seeded review: {review['customerName']} \u2192 {review['productName']} "
-        f"({review['rating']}\u2b50) [{review['timestamp'][:10]}]"
-    )
+with feedback_table.batch_writer() as batch:
+    for review in reviews:
+        batch.put_item(Item=review)
+        print(
+            f"Seeded review: {review['customerName']} \u2192 {review['productName']} "
+            f"({review['rating']}\u2b50) [{review['timestamp'][:10]}]"
+        )
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # SECTION 4 — Create 2 Cognito Users
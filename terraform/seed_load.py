@@ -0,0 +1,299 @@
+"""
+ReviewPlus — Parallel synthetic-load seeder
+Builds large, reproducible datasets for performance testing and writes them
+with batch_writer across a process pool.
+
+    # 10M reviews into DynamoDB Local
+    python terraform/seed_load.py --reviews 10000000 --brands 50 --products 5000 \\
+        --endpoint-url http://localhost:8000 --create-tables
+
+    # measure the generator alone
+    python terraform/seed_load.py --reviews 1000000 --dry-run
+
+The dataset is a pure function of (--seed, --brands, --products, --reviews,
+--shard-size, --zipf-s, --start, --days): reviews are generated in fixed-size
+shards, each with its own seeded RNG, so the result does not depend on how
+many workers run or in which order shards finish.
+
+  * Products: review volume follows a Zipf law over product rank
+    (weight 1 / rank ** zipf_s), so a few products dominate as in production.
+  * Timestamps: a uniform day in [start, start + days) and an hour drawn
+    from a diurnal profile: quiet overnight, busiest around 20:00.
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import time
+from bisect import bisect
+from datetime import datetime, timedelta
+
+import boto3
+from botocore.config import Config
+
+from review_generator import _gen_random_review
+
+# ---------------------------------------------------------------------------
+# Config
+# ---------------------------------------------------------------------------
+REGION = "ca-central-1"
+TABLE_PREFIX = "reviewpulse"
+
+PRODUCT_ADJECTIVES = [
+    "Classic", "Ultra", "Smart", "Eco", "Premium", "Compact", "Pro", "Lite",
+    "Organic", "Wireless", "Travel", "Deluxe",
+]
+PRODUCT_NOUNS = [
+    "Earbuds", "Watch", "Backpack", "Towel Set", "Yoga Mat", "Blender",
+    "Jacket", "Desk Lamp", "Water Bottle", "Sneakers", "Charger", "Kettle",
+]
+
+# Relative review volume per hour of day (UTC): quiet overnight, lunchtime
+# bump, evening peak around 20:00
+DIURNAL_WEIGHTS = [
+    0.9, 0.6, 0.4, 0.3, 0.25, 0.3, 0.5, 0.8,      # 00–07
+    1.0, 1.1, 1.2, 1.4, 1.6, 1.5, 1.3, 1.3,       # 08–15
+    1.4, 1.6, 1.9, 2.2, 2.4, 2.2, 1.8, 1.3,       # 16–23
+]
+HOUR_CUM_WEIGHTS = list(itertools.accumulate(DIURNAL_WEIGHTS))
+
+BOTO_CONFIG = Config(
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    max_pool_connections=4,
+)
+
+
+# ---------------------------------------------------------------------------
+# Dataset generation
+# ---------------------------------------------------------------------------
+
+def build_brands(count: int, start: datetime) -> list:
+    return [
+        {
+            "brandId": f"load-brand-{b:04d}",
+            "brandName": f"Load Brand {b:04d}",
+            "adminEmail": f"admin+{b:04d}@load.reviewplus.test",
+            "createdAt": start.isoformat(),
+        }
+        for b in range(1, count + 1)
+    ]
+
+
+def build_products(count: int, brands: list, seed: int, start: datetime) -> list:
+    """Products in Zipf rank order; rank r belongs to brand (r - 1) % len(brands)."""
+    rng = random.Random(f"{seed}:products")
+    return [
+        {
+            "productId": f"load-prod-{p:06d}",
+            "brandId": brands[(p - 1) % len(brands)]["brandId"],
+            "productName": f"{rng.choice(PRODUCT_ADJECTIVES)} {rng.choice(PRODUCT_NOUNS)} {p}",
+            "createdAt": start.isoformat(),
+        }
+        for p in range(1, count + 1)
+    ]
+
+
+def zipf_cum_weights(count: int, s: float) -> list:
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, count + 1)))
+
+
+def diurnal_ts(rng: random.Random, start: datetime, days: int) -> str:
+    day = rng.randrange(days)
+    hour = bisect(HOUR_CUM_WEIGHTS, rng.random() * HOUR_CUM_WEIGHTS[-1])
+    moment = start + timedelta(days=day, hours=hour, seconds=rng.randrange(3600))
+    return moment.isoformat()
+
+
+def generate_shard(shard: int, first_idx: int, count: int, products: list,
+                   cum_weights: list, seed: int, start: datetime, days: int):
+    """Yield ``count`` reviews numbered from ``first_idx``; deterministic per shard."""
+    rng = random.Random(f"{seed}:reviews:{shard}")
+    total_weight = cum_weights[-1]
+    for idx in range(first_idx, first_idx + count):
+        product = products[bisect(cum_weights, rng.random() * total_weight)]
+        review = _gen_random_review(idx, product, rng=rng, ts=diurnal_ts(rng, start, days))
+        review["FeedbackId"] = f"fb-load-{seed}-{idx:09d}"
+        review["orderId"] = f"ORD-LOAD-{seed}-{idx:09d}"
+        yield review
+
+
+# ---------------------------------------------------------------------------
+# Worker processes
+# ---------------------------------------------------------------------------
+_worker = {}
+
+
+def _init_worker(options: dict, products: list) -> None:
+    _worker["options"] = options
+    _worker["products"] = products
+    _worker["cum_weights"] = zipf_cum_weights(len(products), options["zipf_s"])
+    _worker["start"] = datetime.fromisoformat(options["start"])
+    if not options["dry_run"]:
+        dynamodb = boto3.resource(
+            "dynamodb",
+            region_name=options["region"],
+            endpoint_url=options["endpoint_url"],
+            config=BOTO_CONFIG,
+        )
+        _worker["table"] = dynamodb.Table(options["feedback_table"])
+
+
+def _load_shard(shard_spec: tuple) -> tuple:
+    shard, first_idx, count = shard_spec
+    options = _worker["options"]
+    started = time.monotonic()
+    reviews = generate_shard(
+        shard, first_idx, count, _worker["products"], _worker["cum_weights"],
+        options["seed"], _worker["start"], options["days"],
+    )
+    if options["dry_run"]:
+        written = sum(1 for _ in reviews)
+    else:
+        written = 0
+        with _worker["table"].batch_writer() as batch:
+            for review in reviews:
+                batch.put_item(Item=review)
+                written += 1
+    return shard, written, time.monotonic() - started
+
+
+def shard_specs(total: int, shard_size: int) -> list:
+    return [
+        (shard, first_idx + 1, min(shard_size, total - first_idx))
+        for shard, first_idx in enumerate(range(0, total, shard_size))
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Tables
+# ---------------------------------------------------------------------------
+
+def create_tables(dynamodb, prefix: str) -> None:
+    """Create the tables the loader writes, for DynamoDB Local runs."""
+    schemas = {
+        f"{prefix}-brands": [("brandId", "HASH")],
+        f"{prefix}-products": [("productId", "HASH"), ("brandId", "RANGE")],
+        f"{prefix}-feedback": [("FeedbackId", "HASH")],
+    }
+    # GSIs as in terraform/modules/dynamodb: name -> (hash, range, projected attributes)
+    indexes = {
+        f"{prefix}-feedback": {
+            "productId-timestamp-index": ("productId", "timestamp", [
+                "brandId", "customerName", "name", "rating", "reviewText", "message",
+                "sentiment", "summary", "topics"]),
+            "brandId-timestamp-index": ("brandId", "timestamp", [
+                "productId", "customerName", "name", "rating", "reviewText", "message",
+                "sentiment", "summary", "topics"]),
+        },
+    }
+    existing = set(dynamodb.meta.client.list_tables()["TableNames"])
+    for name, keys in schemas.items():
+        if name in existing:
+            print(f"  = {name} (exists)")
+            continue
+        kwargs = {}
+        attributes = [attr for attr, _ in keys]
+        if name in indexes:
+            kwargs["GlobalSecondaryIndexes"] = [{
+                "IndexName": index,
+                "KeySchema": [{"AttributeName": hash_key, "KeyType": "HASH"},
+                              {"AttributeName": range_key, "KeyType": "RANGE"}],
+                "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": projected},
+            } for index, (hash_key, range_key, projected) in indexes[name].items()]
+            attributes += [attr for hash_key, range_key, _ in indexes[name].values()
+                           for attr in (hash_key, range_key)]
+        dynamodb.create_table(
+            TableName=name,
+            KeySchema=[{"AttributeName": attr, "KeyType": kind} for attr, kind in keys],
+            AttributeDefinitions=[{"AttributeName": attr, "AttributeType": "S"}
+                                  for attr in dict.fromkeys(attributes)],
+            BillingMode="PAY_PER_REQUEST",
+            **kwargs,
+        ).wait_until_exists()
+        print(f"  + {name}")
+
+
+def write_all(table, items: list) -> None:
+    with table.batch_writer() as batch:
+        for item in items:
+            batch.put_item(Item=item)
+
+
+# ===========================================================================
+# Main
+# ===========================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a large synthetic ReviewPlus dataset")
+    parser.add_argument("--reviews", type=int, default=100_000)
+    parser.add_argument("--brands", type=int, default=10)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for product popularity")
+    parser.add_argument("--start", default="2025-01-01", help="first day of review timestamps (UTC)")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--shard-size", type=int, default=50_000,
+                        help="reviews per deterministic shard (part of the dataset identity)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--endpoint-url", help="e.g. http://localhost:8000 for DynamoDB Local")
+    parser.add_argument("--region", default=REGION)
+    parser.add_argument("--table-prefix", default=TABLE_PREFIX)
+    parser.add_argument("--create-tables", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="generate only, write nothing")
+    args = parser.parse_args()
+
+    start = datetime.fromisoformat(args.start)
+    brands = build_brands(args.brands, start)
+    products = build_products(args.products, brands, args.seed, start)
+    shards = shard_specs(args.reviews, args.shard_size)
+
+    print("=" * 56)
+    print("  ReviewPlus — Synthetic Load Seeder")
+    print("=" * 56)
+    print(f"  Brands: {len(brands):,}  Products: {len(products):,}  Reviews: {args.reviews:,}")
+    print(f"  Seed: {args.seed}  Shards: {len(shards)} x {args.shard_size:,}  Workers: {args.workers}")
+    print(f"  Target: {args.endpoint_url or args.region}{'  (dry run)' if args.dry_run else ''}")
+
+    if not args.dry_run:
+        dynamodb = boto3.resource("dynamodb", region_name=args.region,
+                                  endpoint_url=args.endpoint_url, config=BOTO_CONFIG)
+        if args.create_tables:
+            print("\n--- Creating tables ---")
+            create_tables(dynamodb, args.table_prefix)
+        print("\n--- Seeding brands and products ---")
+        write_all(dynamodb.Table(f"{args.table_prefix}-brands"), brands)
+        write_all(dynamodb.Table(f"{args.table_prefix}-products"), products)
+        print(f"  Total: {len(brands):,} brands, {len(products):,} products")
+
+    options = {
+        "seed": args.seed,
+        "zipf_s": args.zipf_s,
+        "start": args.start,
+        "days": args.days,
+        "region": args.region,
+        "endpoint_url": args.endpoint_url,
+        "feedback_table": f"{args.table_prefix}-feedback",
+        "dry_run": args.dry_run,
+    }
+
+    print("\n--- Seeding reviews ---")
+    started = time.monotonic()
+    done = 0
+    with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(options, products)) as pool:
+        for shard, written, seconds in pool.imap_unordered(_load_shard, shards):
+            done += written
+            elapsed = time.monotonic() - started
+            print(f"  shard {shard:>5}: {written:>8,} in {seconds:6.1f}s  |  "
+                  f"{done:>12,} / {args.reviews:,}  {done / elapsed:>9,.0f} reviews/s")
+
+    elapsed = time.monotonic() - started
+    print()
+    print("=" * 56)
+    print(f"  Seeded {done:,} reviews in {elapsed:,.1f}s ({done / elapsed if elapsed else 0:,.0f}/s)")
+    print("=" * 56)
+
+
+if __name__ == "__main__":
+    main()